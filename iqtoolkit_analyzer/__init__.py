@@ -18,6 +18,7 @@ __version__ = "0.2.3a1"
 
 from .parser import parse_postgres_log
 from .analyzer import run_slow_query_analysis, normalize_query
+from .concurrency import analyze_concurrency
 from .llm_client import LLMClient, LLMConfig
 from .report_generator import ReportGenerator
 from .antipatterns import (
@@ -25,12 +26,14 @@ from .antipatterns import (
     StaticQueryRewriter,
     AntiPatternMatch,
     AntiPatternType,
+    load_rule_pack,
 )
 
 __all__ = [
     "parse_postgres_log",
     "run_slow_query_analysis",
     "normalize_query",
+    "analyze_concurrency",
     "LLMClient",
     "LLMConfig",
     "ReportGenerator",
@@ -38,4 +41,5 @@ __all__ = [
     "StaticQueryRewriter",
     "AntiPatternMatch",
     "AntiPatternType",
+    "load_rule_pack",
 ]
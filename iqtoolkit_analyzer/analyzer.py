@@ -8,6 +8,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Optional,
     Sequence,
     Tuple,
     TypedDict,
@@ -18,6 +19,7 @@ from typing import (
 import pandas as pd  # This import is used for data manipulation and analysis
 
 from .antipatterns import (
+    AntiPatternDetector,
     StaticQueryRewriter,
     AntiPatternMatch,
 )  # This import is used for query rewriting and anti-pattern detection
@@ -50,6 +52,19 @@ def normalize_query(query: str) -> str:
         return query.lower()
 
 
+def query_fingerprint(query: str) -> str:
+    """
+    Computes the grouping fingerprint of a SQL query
+
+    Args:
+        query: Raw SQL query string
+
+    Returns:
+        MD5 hex digest of the normalized query
+    """
+    return hashlib.md5(normalize_query(query).encode()).hexdigest()
+
+
 @dataclass
 class SlowQuery:
     """Represents a slow query with analysis metadata."""
@@ -96,8 +111,9 @@ class NormalizedQueryRecord(TypedDict):
 class SlowQueryAnalyzer:
     """Analyzes slow queries and calculates impact scores."""
 
-    def __init__(self) -> None:
-        self.query_rewriter = StaticQueryRewriter()  # Initialize the query rewriter
+    def __init__(self, detector: Optional[AntiPatternDetector] = None) -> None:
+        # Initialize the query rewriter (optionally with custom rule packs)
+        self.query_rewriter = StaticQueryRewriter(detector)
 
     def analyze_slow_queries(
         self, queries: Sequence[QueryRecord], min_duration: float = 1000
@@ -154,8 +170,10 @@ class SlowQueryAnalyzer:
             impact_score = avg_duration * frequency
 
             representative_query = group[0]["normalized"]
+            # Normalization hides literal values (LIKE patterns, OFFSET and
+            # LIMIT sizes, IN lists), so rules run on an example statement
             antipattern_matches, static_report = self.query_rewriter.analyze_query(
-                representative_query
+                group[0]["raw"]
             )
             optimization_score = self.query_rewriter.get_optimization_score(
                 antipattern_matches
@@ -242,6 +260,7 @@ def _build_dataframe(queries: List[SlowQuery]) -> pd.DataFrame:
     for query in queries:
         rows.append(
             {
+                "query_hash": query.query_hash,
                 "normalized_query": query.normalized_query,
                 "example_query": query.raw_query,
                 "avg_duration": query.duration,
@@ -254,12 +273,18 @@ def _build_dataframe(queries: List[SlowQuery]) -> pd.DataFrame:
                 "last_seen": query.last_seen,
                 "optimization_score": query.optimization_score,
                 "static_analysis_report": query.static_analysis_report,
+                "antipatterns": [
+                    f"{match.title}: {match.problem_description}"
+                    for match in query.antipattern_matches
+                ],
+                "antipattern_matches": list(query.antipattern_matches),
             }
         )
 
     if not rows:
         return pd.DataFrame(
             columns=[
+                "query_hash",
                 "normalized_query",
                 "example_query",
                 "avg_duration",
@@ -272,6 +297,8 @@ def _build_dataframe(queries: List[SlowQuery]) -> pd.DataFrame:
                 "last_seen",
                 "optimization_score",
                 "static_analysis_report",
+                "antipatterns",
+                "antipattern_matches",
             ]
         )
 
@@ -282,15 +309,17 @@ def run_slow_query_analysis(
     data: Union[pd.DataFrame, Sequence[QueryRecord]],
     top_n: int = 5,
     min_duration: float = 0.0,
+    detector: Optional[AntiPatternDetector] = None,
 ) -> Union[List[SlowQuery], Tuple[pd.DataFrame, Dict[str, float]]]:
     """Analyze slow queries.
 
     If a list of query dicts is provided, returns a list of SlowQuery objects
     for backward compatibility. If a DataFrame is provided, returns a tuple of
-    (top_queries_df, summary_dict) suitable for reporting.
+    (top_queries_df, summary_dict) suitable for reporting. Pass ``detector``
+    to use custom anti-pattern rule packs or disabled rules.
     """
 
-    analyzer = SlowQueryAnalyzer()
+    analyzer = SlowQueryAnalyzer(detector)
 
     # Backward compatibility path for iterable query records
     if isinstance(data, Sequence) and not isinstance(data, pd.DataFrame):
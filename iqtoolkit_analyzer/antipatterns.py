@@ -5,11 +5,68 @@ This module implements detection of common SQL anti-patterns and provides
 static rewrite suggestions without requiring database schema knowledge.
 """
 
+import logging
 import re
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 from enum import Enum
 
+import yaml
+
+from . import sql_checks
+from .sql_checks import Finding, TokenIndex, index_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-query guards: longer statements are only scanned up to the limit, and
+# scanning stops (keeping what was found) once the time budget is spent
+MAX_QUERY_LENGTH = 50_000
+SCAN_TIME_BUDGET_MS = 250.0
+
+# Named severities map to the penalty weight used by get_optimization_score
+SEVERITY_LEVELS = {
+    "info": 0.05,
+    "low": 0.1,
+    "medium": 0.2,
+    "high": 0.3,
+    "critical": 0.4,
+}
+DEFAULT_SEVERITY = "low"
+DEFAULT_CONFIDENCE = 0.8
+
+_RULE_PACK_KEYS = {
+    "id",
+    "type",
+    "problem",
+    "solution",
+    "example",
+    "regex",
+    "flags",
+    "keywords",
+    "severity",
+    "confidence",
+    "enabled",
+}
+_REGEX_FLAGS = {
+    "IGNORECASE": re.IGNORECASE,
+    "MULTILINE": re.MULTILINE,
+    "DOTALL": re.DOTALL,
+    "VERBOSE": re.VERBOSE,
+}
+_KEYWORD_RE = re.compile(r"^\w+(?:\|\w+)*$")
+
 
 class AntiPatternType(Enum):
     """Types of SQL anti-patterns we can detect."""
@@ -19,6 +76,15 @@ class AntiPatternType(Enum):
     LARGE_IN_CLAUSE = "large_in_clause"
     NOT_IN_WITH_SUBQUERY = "not_in_with_subquery"
     NO_WHERE_CLAUSE_ON_JOIN = "no_where_clause_on_join"
+    CORRELATED_SUBQUERY_IN_SELECT = "correlated_subquery_in_select"
+    DEEP_OFFSET_PAGINATION = "deep_offset_pagination"
+    ORDER_BY_RANDOM = "order_by_random"
+    SELECT_STAR_ON_JOIN = "select_star_on_join"
+    OR_CHAIN = "or_chain"
+    IMPLICIT_CAST = "implicit_cast"
+    COUNT_STAR_FULL_TABLE = "count_star_full_table"
+    UNBOUNDED_RESULT_SET = "unbounded_result_set"
+    CUSTOM = "custom"
 
 
 @dataclass
@@ -32,20 +98,161 @@ class AntiPatternMatch:
     confidence_score: float = 1.0
     line_number: Optional[int] = None
     matched_text: str = ""
+    rule_id: str = ""
+    severity: float = SEVERITY_LEVELS[DEFAULT_SEVERITY]
+
+    @property
+    def title(self) -> str:
+        """Human readable rule name."""
+        return (self.rule_id or self.pattern_type.value).replace("_", " ").title()
+
+
+@dataclass
+class RuleStats:
+    """Evaluation counters for one detection rule."""
+
+    rule_id: str
+    severity: float
+    evaluations: int = 0
+    matches: int = 0
+    total_time_ms: float = 0.0
+
+    @property
+    def avg_time_ms(self) -> float:
+        return self.total_time_ms / self.evaluations if self.evaluations else 0.0
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    """A detection rule with its regexes compiled and keywords indexed."""
+
+    rule_id: str
+    pattern_type: AntiPatternType
+    config: Dict[str, Any]
+    regex: Optional[re.Pattern]  # None for rules checked on the token index
+    keywords: FrozenSet[str]
+    alternatives: Tuple[FrozenSet[str], ...]
+    contains: Optional[str] = None
+    trigger: Optional[re.Pattern] = None
+    check: Optional[Callable[[TokenIndex], List[Finding]]] = None
+
+    def has_keywords(self, present: FrozenSet[str]) -> bool:
+        """Whether the keywords the prefilter found allow this rule to match."""
+        if not self.keywords <= present:
+            return False
+        return not any(present.isdisjoint(g) for g in self.alternatives)
+
+    def applies(self, query: str) -> bool:
+        """Whether the cheap text tests allow this rule to match."""
+        if self.contains is not None and self.contains not in query:
+            return False
+        return self.trigger is None or self.trigger.search(query) is not None
 
 
 class AntiPatternDetector:
     """Detects common SQL anti-patterns and suggests rewrites."""
 
-    def __init__(self) -> None:
-        self.patterns = self._initialize_patterns()
+    def __init__(
+        self,
+        max_query_length: int = MAX_QUERY_LENGTH,
+        time_budget_ms: float = SCAN_TIME_BUDGET_MS,
+        rule_packs: Optional[Iterable[str]] = None,
+        disabled_rules: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Args:
+            max_query_length: Characters of each statement that are scanned
+            time_budget_ms: Time after which remaining rules are skipped
+            rule_packs: Paths of YAML rule packs to load (see load_rule_pack)
+            disabled_rules: Rule ids to skip, built-in or from a pack
 
-    def _initialize_patterns(self) -> Dict[AntiPatternType, Dict[str, Any]]:
-        """Initialize anti-pattern detection rules."""
-        return {
-            AntiPatternType.LEADING_WILDCARD_LIKE: {
-                "regex": r'\bWHERE\s+\w+\s+LIKE\s+[\'"]%[^%\'"]',
-                "flags": re.IGNORECASE | re.MULTILINE,
+        Raises:
+            ValueError: If a rule pack is invalid
+        """
+        self.max_query_length = max_query_length
+        self.time_budget_ms = time_budget_ms
+        self.patterns = self._initialize_patterns()
+        for path in rule_packs or ():
+            for rule_id, config in load_rule_pack(path).items():
+                if rule_id in self.patterns:
+                    raise ValueError(
+                        f"Rule pack {path}: rule id '{rule_id}' is already defined"
+                    )
+                self.patterns[rule_id] = config
+        self.disabled_rules = set(disabled_rules or ())
+        unknown = self.disabled_rules - set(self.patterns)
+        if unknown:
+            logger.warning(f"Unknown anti-pattern rules disabled: {sorted(unknown)}")
+        self._compile_rules()
+
+    def _compile_rules(self) -> None:
+        """
+        Compile every enabled rule once and build the shared keyword prefilter.
+
+        Each rule lists the keywords it cannot match without (``A|B`` accepts
+        either). One scan of the query with the combined keyword alternation
+        tells which rules can possibly fire, so only those run their
+        confirming regex and a query with no trigger keyword costs a single
+        pass. Built-in rules with a ``check`` function inspect one token
+        index (see sql_checks) that is built once per query instead of a
+        regex; their optional ``contains`` text and ``trigger`` regex are
+        cheap tests that must pass before building that index is worth it.
+        Both are written in upper case and tested on the upper-cased query.
+        """
+        self._rules: List[_CompiledRule] = []
+        # Rules whose keywords are satisfied, per set of keywords found; few
+        # distinct sets occur, so the per-rule tests run once for each
+        self._candidates: Dict[FrozenSet[str], List[_CompiledRule]] = {}
+        self.rule_stats: Dict[str, RuleStats] = {}
+        keywords: Set[str] = set()
+        for rule_id, config in self.patterns.items():
+            if rule_id in self.disabled_rules or not config.get("enabled", True):
+                continue
+            groups = [
+                frozenset(word.upper() for word in keyword.split("|"))
+                for keyword in config.get("keywords", ())
+            ]
+            for group in groups:
+                keywords.update(group)
+            check = config.get("check")
+            self._rules.append(
+                _CompiledRule(
+                    rule_id=rule_id,
+                    pattern_type=config["type"],
+                    config=config,
+                    regex=(
+                        None if check else re.compile(config["regex"], config["flags"])
+                    ),
+                    keywords=frozenset().union(*(g for g in groups if len(g) == 1)),
+                    alternatives=tuple(g for g in groups if len(g) > 1),
+                    contains=config.get("contains"),
+                    trigger=(
+                        re.compile(config["trigger"]) if "trigger" in config else None
+                    ),
+                    check=check,
+                )
+            )
+            self.rule_stats[rule_id] = RuleStats(rule_id, config["severity"])
+        # Rules without keywords always run; an empty alternation never matches
+        self._prefilter = re.compile(
+            r"\b(?:" + "|".join(sorted(keywords) or [r"(?!)"]) + r")\b"
+        )
+
+    def get_rule_stats(self) -> List[RuleStats]:
+        """Per-rule counters, most expensive rule first."""
+        return sorted(
+            self.rule_stats.values(), key=lambda s: s.total_time_ms, reverse=True
+        )
+
+    def _initialize_patterns(self) -> Dict[str, Dict[str, Any]]:
+        """Initialize the built-in anti-pattern detection rules, keyed by id."""
+        rules: Dict[str, Dict[str, Any]] = {
+            AntiPatternType.LEADING_WILDCARD_LIKE.value: {
+                "type": AntiPatternType.LEADING_WILDCARD_LIKE,
+                "severity": SEVERITY_LEVELS["high"],
+                "keywords": ("LIKE|ILIKE",),
+                "check": sql_checks.check_leading_wildcard_like,
+                "trigger": r"\bI?LIKE\s+[EN]?'[%_]",
                 "problem": "Full table scan; cannot use B-tree index",
                 "solution": "Use full-text search (tsvector) or restructure "
                 "data if possible",
@@ -53,9 +260,14 @@ class AntiPatternDetector:
                 "-- Consider: WHERE email LIKE 'user@%' (if pattern allows)\n"
                 "-- Or use: WHERE email @@ to_tsquery('example.com')",
             },
-            AntiPatternType.FUNCTION_ON_COLUMN: {
-                "regex": r"\bWHERE\s+\w+\s*\(\s*\w+\s*\)\s*[=<>!]",
-                "flags": re.IGNORECASE | re.MULTILINE,
+            AntiPatternType.FUNCTION_ON_COLUMN.value: {
+                "type": AntiPatternType.FUNCTION_ON_COLUMN,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("WHERE|ON|HAVING",),
+                "check": sql_checks.check_function_on_column,
+                "contains": "(",
+                "trigger": r"(?:\b(?:WHERE|ON|HAVING|AND|OR|NOT)|\()\s*"
+                r"(?!(?:IN|EXISTS|ANY|ALL|SOME|NOT)\b)[A-Z_][\w$]*\s*\(",
                 "problem": "Function prevents index usage",
                 "solution": "Create function-based index or restructure " "condition",
                 "example": "-- Instead of: WHERE LOWER(email) = "
@@ -63,9 +275,13 @@ class AntiPatternDetector:
                 "-- Create index: CREATE INDEX ON users (LOWER(email))\n"
                 "-- Or store normalized data",
             },
-            AntiPatternType.LARGE_IN_CLAUSE: {
-                "regex": r"\bIN\s*\(\s*[^)]*,.*?,.*?,.*?,.*?[^)]*\)",
-                "flags": re.IGNORECASE | re.DOTALL,
+            AntiPatternType.LARGE_IN_CLAUSE.value: {
+                "type": AntiPatternType.LARGE_IN_CLAUSE,
+                "severity": SEVERITY_LEVELS["low"],
+                "keywords": ("IN",),
+                "check": sql_checks.check_large_in_clause,
+                "contains": ",",
+                "trigger": r"\bIN\s*\(\s*(?!SELECT\b|WITH\b|VALUES\b)[^,]",
                 "problem": "Can be slow with many values",
                 "solution": "Use JOIN to temporary table or VALUES list " "instead",
                 "example": "-- Instead of: WHERE id IN (1, 2, 3, ..., 5000)\n"
@@ -73,7 +289,10 @@ class AntiPatternDetector:
                 "table.id = t.id\n"
                 "-- Or create temp table with values",
             },
-            AntiPatternType.NOT_IN_WITH_SUBQUERY: {
+            AntiPatternType.NOT_IN_WITH_SUBQUERY.value: {
+                "type": AntiPatternType.NOT_IN_WITH_SUBQUERY,
+                "severity": SEVERITY_LEVELS["high"],
+                "keywords": ("NOT", "IN"),
                 "regex": r"\bNOT\s+IN\s*\(\s*SELECT\b",
                 "flags": re.IGNORECASE | re.MULTILINE,
                 "problem": "Returns incorrect results if subquery has " "NULL values",
@@ -85,7 +304,10 @@ class AntiPatternDetector:
                 "-- Or: LEFT JOIN deleted_users d ON d.id = user_id "
                 "WHERE d.id IS NULL",
             },
-            AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN: {
+            AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN.value: {
+                "type": AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN,
+                "severity": SEVERITY_LEVELS["critical"],
+                "keywords": ("FROM",),
                 "regex": r"\bFROM\s+\w+\s*,\s*\w+(?!\s+WHERE)",
                 "flags": re.IGNORECASE | re.DOTALL,
                 "problem": "Cartesian product risk; hard to optimize",
@@ -95,62 +317,228 @@ class AntiPatternDetector:
                 "-- Use: SELECT * FROM orders o INNER JOIN customers c "
                 "ON o.customer_id = c.id WHERE o.amount > 1000\n",
             },
+            AntiPatternType.CORRELATED_SUBQUERY_IN_SELECT.value: {
+                "type": AntiPatternType.CORRELATED_SUBQUERY_IN_SELECT,
+                "severity": SEVERITY_LEVELS["high"],
+                "keywords": ("SELECT",),
+                "check": sql_checks.check_correlated_subquery,
+                "trigger": r"\(\s*SELECT\b",
+                "problem": "Subquery in the SELECT list runs once per output row",
+                "solution": "Rewrite as a JOIN with GROUP BY, or a LATERAL join",
+                "example": "-- Instead of: SELECT c.name, (SELECT COUNT(*) FROM "
+                "tickets t WHERE t.customer_id = c.id) FROM customers c\n"
+                "-- Use: SELECT c.name, COUNT(t.id) FROM customers c "
+                "LEFT JOIN tickets t ON t.customer_id = c.id GROUP BY c.id, c.name",
+            },
+            AntiPatternType.DEEP_OFFSET_PAGINATION.value: {
+                "type": AntiPatternType.DEEP_OFFSET_PAGINATION,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("OFFSET|LIMIT",),
+                "check": sql_checks.check_deep_offset,
+                "trigger": r"\bOFFSET\s+(?:\d{4}|[$?:])|\bLIMIT\s+\d{4,}\s*,",
+                "problem": "Every skipped row is read and discarded; pages get "
+                "slower the deeper they go",
+                "solution": "Use keyset (seek) pagination on an indexed sort key",
+                "example": "-- Instead of: ORDER BY id LIMIT 50 OFFSET 100000\n"
+                "-- Use: WHERE id > :last_seen_id ORDER BY id LIMIT 50",
+            },
+            AntiPatternType.ORDER_BY_RANDOM.value: {
+                "type": AntiPatternType.ORDER_BY_RANDOM,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("ORDER",),
+                "check": sql_checks.check_order_by_random,
+                "trigger": r"\bBY\s+(?:RANDOM|RAND|NEWID)\s*\(",
+                "problem": "Sorts the entire input to pick a few random rows",
+                "solution": "Use TABLESAMPLE, or pick random keys from the id range",
+                "example": "-- Instead of: SELECT * FROM items ORDER BY random() "
+                "LIMIT 10\n"
+                "-- Use: SELECT * FROM items TABLESAMPLE SYSTEM (1) LIMIT 10",
+            },
+            AntiPatternType.SELECT_STAR_ON_JOIN.value: {
+                "type": AntiPatternType.SELECT_STAR_ON_JOIN,
+                "severity": SEVERITY_LEVELS["low"],
+                "keywords": ("SELECT", "JOIN"),
+                "check": sql_checks.check_select_star_on_join,
+                "contains": "*",
+                "trigger": r"\bSELECT\s+(?:(?:DISTINCT|ALL)\s+)?\*",
+                "problem": "Returns every column of every joined table and "
+                "rules out index-only scans",
+                "solution": "Select only the columns the caller needs",
+                "example": "-- Instead of: SELECT * FROM orders o JOIN customers c "
+                "ON c.id = o.customer_id\n"
+                "-- Use: SELECT o.id, o.total, c.name FROM orders o "
+                "JOIN customers c ON c.id = o.customer_id",
+            },
+            AntiPatternType.OR_CHAIN.value: {
+                "type": AntiPatternType.OR_CHAIN,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("OR", "WHERE|ON|HAVING"),
+                "check": sql_checks.check_or_chain,
+                "trigger": r"\bOR\b(?!\s+REPLACE\b)",
+                "problem": "OR between predicates usually prevents a single "
+                "index scan",
+                "solution": "Use IN for one column, or UNION ALL of branches "
+                "that each use an index",
+                "example": "-- Instead of: WHERE status = 'a' OR status = 'b' "
+                "OR status = 'c'\n"
+                "-- Use: WHERE status IN ('a', 'b', 'c')\n"
+                "-- Instead of: WHERE email = ? OR phone = ?\n"
+                "-- Use: SELECT ... WHERE email = ? UNION SELECT ... "
+                "WHERE phone = ?",
+            },
+            AntiPatternType.IMPLICIT_CAST.value: {
+                "type": AntiPatternType.IMPLICIT_CAST,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("WHERE|ON|HAVING",),
+                "check": sql_checks.check_implicit_cast,
+                "trigger": r"::|\bCAST\s*\(",
+                "problem": "Casting a column in a comparison prevents use of "
+                "its index",
+                "solution": "Cast the constant or parameter instead, or compare "
+                "values of the column's own type",
+                "example": "-- Instead of: WHERE created_at::date = '2025-01-01'\n"
+                "-- Use: WHERE created_at >= '2025-01-01' "
+                "AND created_at < '2025-01-02'",
+            },
+            AntiPatternType.COUNT_STAR_FULL_TABLE.value: {
+                "type": AntiPatternType.COUNT_STAR_FULL_TABLE,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("COUNT", "FROM"),
+                "check": sql_checks.check_count_star_full_table,
+                "trigger": r"\bCOUNT\s*\(\s*(?:\*|1)\s*\)",
+                "problem": "Counting every row visits the whole table",
+                "solution": "Use the planner estimate when an approximate count "
+                "will do, or maintain a counter table",
+                "example": "-- Instead of: SELECT COUNT(*) FROM events\n"
+                "-- Estimate: SELECT reltuples::bigint FROM pg_class "
+                "WHERE relname = 'events'",
+            },
+            AntiPatternType.UNBOUNDED_RESULT_SET.value: {
+                "type": AntiPatternType.UNBOUNDED_RESULT_SET,
+                "severity": SEVERITY_LEVELS["medium"],
+                "keywords": ("SELECT", "FROM"),
+                "check": sql_checks.check_unbounded_result_set,
+                # A large LIMIT, a nested SELECT or set operation (whose
+                # top-level block may lack the filter found elsewhere), or
+                # a statement with no LIMIT, FETCH or filter at all
+                "trigger": r"\bLIMIT\s+\d{5}|\(\s*SELECT\b"
+                r"|\b(?:UNION|INTERSECT|EXCEPT)\b"
+                r"|\A(?!(?s:.*)\b(?:LIMIT|FETCH|WHERE|GROUP|HAVING)\b)",
+                "problem": "Returns every row (or a very large page); time and "
+                "memory grow with the table",
+                "solution": "Filter the rows, or paginate with a small LIMIT",
+                "example": "-- Instead of: SELECT * FROM orders ORDER BY "
+                "created_at\n"
+                "-- Use: SELECT ... FROM orders WHERE created_at > :since "
+                "ORDER BY created_at LIMIT 100",
+            },
         }
+        for config in rules.values():
+            config.setdefault("confidence", DEFAULT_CONFIDENCE)
+        return rules
 
     def detect_antipatterns(self, query: str) -> List[AntiPatternMatch]:
         """
         Detect anti-patterns in a SQL query.
 
+        Statements longer than ``max_query_length`` are only scanned up to
+        that length, and scanning stops once ``time_budget_ms`` is spent, so
+        a single pathological statement cannot stall a run. The budget is
+        checked between rules and while tokenizing, not inside a rule's
+        regex; rule packs are screened for catastrophic backtracking instead.
+
         Args:
             query: The SQL query to analyze
 
         Returns:
             List of detected anti-pattern matches
         """
-        matches = []
-
-        for pattern_type, config in self.patterns.items():
-            regex_matches = re.finditer(config["regex"], query, config["flags"])
+        matches: List[AntiPatternMatch] = []
+        deadline = time.perf_counter() + self.time_budget_ms / 1000
 
-            for match in regex_matches:
+        if len(query) > self.max_query_length:
+            logger.warning(
+                f"Query of {len(query)} characters truncated to "
+                f"{self.max_query_length} for anti-pattern detection"
+            )
+            query = query[: self.max_query_length]
+
+        # Keywords and triggers are matched case-sensitively on the upper-cased
+        # text, which lets the regex engine skip ahead to literal prefixes
+        upper = query.upper()
+        present = frozenset(self._prefilter.findall(upper))
+        candidates = self._candidates.get(present)
+        if candidates is None:
+            candidates = [rule for rule in self._rules if rule.has_keywords(present)]
+            self._candidates[present] = candidates
+
+        # Built when the first check rule passes its trigger, so a statement
+        # that passes none costs only the prefilter and trigger regexes
+        token_index: Optional[TokenIndex] = None
+        indexed = False
+        token_time_ms = 0.0
+        served: List[RuleStats] = []
+
+        for rule in candidates:
+            if rule.check is not None and indexed:
+                # Running a check on the built index is cheaper than its trigger
+                if rule.contains is not None and rule.contains not in upper:
+                    continue
+            elif not rule.applies(upper):
+                continue
+            started = time.perf_counter()
+            pattern_type, config = rule.pattern_type, rule.config
+            findings: List[Finding]
+            if started > deadline:
+                logger.warning(
+                    f"Anti-pattern scan exceeded {self.time_budget_ms:g} ms; "
+                    f"skipping remaining rules"
+                )
+                break
+            if rule.check is not None and not indexed:
+                indexed = True
+                token_index = index_tokens(query, deadline)
+                now = time.perf_counter()
+                token_time_ms = (now - started) * 1000
+                started = now
+            if rule.regex is not None:
+                confidence = self._calculate_confidence(config)
+                findings = [
+                    (match.group(), confidence) for match in rule.regex.finditer(query)
+                ]
+            elif rule.check is not None and token_index is not None:
+                findings = rule.check(token_index)
+            else:
+                findings = []
+
+            for matched_text, confidence in findings:
                 anti_pattern = AntiPatternMatch(
                     pattern_type=pattern_type,
                     problem_description=config["problem"],
                     rewrite_suggestion=config["solution"],
                     example_rewrite=config.get("example"),
-                    matched_text=match.group(),
-                    confidence_score=self._calculate_confidence(
-                        pattern_type, match, query
-                    ),
+                    matched_text=matched_text,
+                    confidence_score=confidence,
+                    rule_id=rule.rule_id,
+                    severity=config["severity"],
                 )
                 matches.append(anti_pattern)
 
-        return matches
+            stats = self.rule_stats[rule.rule_id]
+            stats.evaluations += 1
+            stats.matches += len(findings)
+            stats.total_time_ms += (time.perf_counter() - started) * 1000
+            if rule.check is not None:
+                served.append(stats)
 
-    def _calculate_confidence(
-        self, pattern_type: AntiPatternType, match: re.Match, query: str
-    ) -> float:
-        """Calculate confidence score for anti-pattern detection."""
-        base_confidence = 0.8
-
-        # Adjust confidence based on context
-        if pattern_type == AntiPatternType.LARGE_IN_CLAUSE:
-            # Count the number of values in the IN clause
-            in_values: int = match.group().count(",")
-            if in_values > 10:
-                return min(1.0, base_confidence + (in_values / 100))
-            elif in_values < 5:
-                return max(0.5, base_confidence - 0.2)
-
-        elif pattern_type == AntiPatternType.LEADING_WILDCARD_LIKE:
-            # Check if it's actually a leading wildcard
-            like_content = re.search(
-                r"LIKE\s+['\"]([^'\"]+)['\"]", match.group(), re.IGNORECASE
-            )
-            if like_content and like_content.group(1).startswith("%"):
-                return base_confidence + 0.1
+        # The shared index's cost is split across the rules it served
+        for stats in served:
+            stats.total_time_ms += token_time_ms / len(served)
+        return matches
 
-        return base_confidence
+    def _calculate_confidence(self, config: Dict[str, Any]) -> float:
+        """Calculate confidence score for a regex rule match."""
+        return float(config.get("confidence", DEFAULT_CONFIDENCE))
 
     def generate_rewrite_report(
         self, query: str, matches: List[AntiPatternMatch]
@@ -171,10 +559,7 @@ class AntiPatternDetector:
         report = f"🔍 **Anti-Pattern Analysis** ({len(matches)} issues found)\n\n"
 
         for i, match in enumerate(matches, 1):
-            report += (
-                f"### Issue #{i}: "
-                f"{match.pattern_type.value.replace('_', ' ').title()}\n\n"
-            )
+            report += f"### Issue #{i}: {match.title}\n\n"
             report += f"**Problem**: {match.problem_description}\n\n"
             report += f"**Detected Pattern**: `{match.matched_text.strip()}`\n\n"
             report += f"**Recommendation**: {match.rewrite_suggestion}\n\n"
@@ -191,8 +576,8 @@ class AntiPatternDetector:
 class StaticQueryRewriter:
     """Provides static query rewriting suggestions without database schema."""
 
-    def __init__(self) -> None:
-        self.detector = AntiPatternDetector()
+    def __init__(self, detector: Optional[AntiPatternDetector] = None) -> None:
+        self.detector = detector or AntiPatternDetector()
 
     def analyze_query(self, query: str) -> Tuple[List[AntiPatternMatch], str]:
         """
@@ -222,20 +607,207 @@ class StaticQueryRewriter:
         if not matches:
             return 1.0
 
-        # Weight different anti-patterns by severity
-        severity_weights = {
-            AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN: 0.4,
-            AntiPatternType.LEADING_WILDCARD_LIKE: 0.3,
-            AntiPatternType.NOT_IN_WITH_SUBQUERY: 0.3,
-            AntiPatternType.FUNCTION_ON_COLUMN: 0.2,
-            AntiPatternType.LARGE_IN_CLAUSE: 0.1,
-        }
-
+        # Each match carries its rule's severity weight
         total_penalty = 0.0
         for match in matches:
-            weight = severity_weights.get(match.pattern_type, 0.1)
-            penalty = weight * match.confidence_score
+            penalty = match.severity * match.confidence_score
             total_penalty += penalty
 
         # Convert penalty to score (max penalty of 1.0 = score of 0.0)
         return max(0.0, 1.0 - min(1.0, total_penalty))
+
+
+def _has_nested_quantifier(pattern: str, flags: int) -> bool:
+    """
+    Whether a regex repeats a group that itself repeats without bound
+
+    Catches the usual catastrophic shapes such as ``(a+)+`` or
+    ``(\\w+\\s?)*``: an unbounded quantifier inside a repeated group with
+    nothing the group must match once per repetition, so a failing match
+    tries every way of splitting the text. A group with a fixed separator,
+    like ``(?:,\\s*\\w+)*``, is allowed; possessive quantifiers and atomic
+    groups never backtrack and are always allowed.
+
+    Walks the parse tree of the ``re`` module's private parser, imported
+    here so a Python that renames it only loses this check.
+    """
+    from re import _constants, _parser  # type: ignore[attr-defined]
+
+    repeats = (_constants.MAX_REPEAT, _constants.MIN_REPEAT)
+    # Items that always consume exactly one character
+    single_character = (
+        _constants.LITERAL,
+        _constants.NOT_LITERAL,
+        _constants.IN,
+        _constants.ANY,
+    )
+
+    def unbounded(items: Any) -> bool:
+        for op, av in items:
+            if op in repeats and (av[1] == _constants.MAXREPEAT or unbounded(av[2])):
+                return True
+            if op is _constants.SUBPATTERN and unbounded(av[3]):
+                return True
+            if op is _constants.BRANCH and any(unbounded(b) for b in av[1]):
+                return True
+        return False
+
+    def fixed(items: Any) -> bool:
+        """Whether items always match a character outside unbounded repeats."""
+        for op, av in items:
+            if op in single_character:
+                return True
+            if op in repeats and av[0] >= 1 and av[1] != _constants.MAXREPEAT:
+                if fixed(av[2]):
+                    return True
+            if op is _constants.SUBPATTERN and fixed(av[3]):
+                return True
+        return False
+
+    def nested(items: Any) -> bool:
+        for op, av in items:
+            if op in repeats:
+                low, high, body = av
+                if high > 1 and unbounded(body) and not fixed(body):
+                    return True
+                if nested(body):
+                    return True
+            elif op is _constants.SUBPATTERN:
+                if nested(av[3]):
+                    return True
+            elif op is _constants.BRANCH:
+                if any(nested(branch) for branch in av[1]):
+                    return True
+            elif op in (_constants.ASSERT, _constants.ASSERT_NOT):
+                if nested(av[1]):
+                    return True
+        return False
+
+    return nested(_parser.parse(pattern, flags))
+
+
+def _validate_rule(source: str, raw: Any) -> Tuple[str, Dict[str, Any]]:
+    """Check one rule pack entry and convert it to the internal rule shape."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"{source}: each rule must be a mapping")
+    rule_id = raw.get("id")
+    if not isinstance(rule_id, str) or not rule_id.strip():
+        raise ValueError(f"{source}: every rule needs a non-empty 'id'")
+    where = f"{source}: rule '{rule_id}'"
+
+    unknown = set(raw) - _RULE_PACK_KEYS
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+    for key in ("regex", "problem", "solution"):
+        if not isinstance(raw.get(key), str) or not raw[key].strip():
+            raise ValueError(f"{where}: '{key}' is required")
+
+    flag_names = raw.get("flags", ["IGNORECASE"])
+    if not isinstance(flag_names, list):
+        raise ValueError(f"{where}: 'flags' must be a list of flag names")
+    flags = 0
+    for name in flag_names:
+        if str(name).upper() not in _REGEX_FLAGS:
+            raise ValueError(
+                f"{where}: unknown flag '{name}' "
+                f"(valid: {', '.join(sorted(_REGEX_FLAGS))})"
+            )
+        flags |= _REGEX_FLAGS[str(name).upper()]
+    try:
+        re.compile(raw["regex"], flags)
+    except re.error as e:
+        raise ValueError(f"{where}: invalid regex: {e}") from e
+    try:
+        nested = _has_nested_quantifier(raw["regex"], flags)
+    except Exception as e:
+        # The parser is private to the re module and may change shape
+        logger.warning(f"{where}: skipped the backtracking check ({e!r})")
+        nested = False
+    if nested:
+        raise ValueError(
+            f"{where}: regex repeats a group that repeats without bound, which "
+            f"can backtrack exponentially (use one quantifier, or a possessive "
+            f"one such as a++)"
+        )
+
+    keywords = raw.get("keywords", [])
+    if not isinstance(keywords, list) or not all(
+        isinstance(k, str) and _KEYWORD_RE.match(k) for k in keywords
+    ):
+        raise ValueError(f"{where}: 'keywords' must be a list of words (A|B allowed)")
+
+    severity = raw.get("severity", DEFAULT_SEVERITY)
+    if isinstance(severity, str):
+        if severity.lower() not in SEVERITY_LEVELS:
+            raise ValueError(
+                f"{where}: unknown severity '{severity}' "
+                f"(valid: {', '.join(SEVERITY_LEVELS)} or a number in [0, 1])"
+            )
+        weight = SEVERITY_LEVELS[severity.lower()]
+    elif isinstance(severity, (int, float)) and 0 <= severity <= 1:
+        weight = float(severity)
+    else:
+        raise ValueError(f"{where}: 'severity' must be a level or a number in [0, 1]")
+
+    confidence = raw.get("confidence", DEFAULT_CONFIDENCE)
+    if not isinstance(confidence, (int, float)) or not 0 < confidence <= 1:
+        raise ValueError(f"{where}: 'confidence' must be a number in (0, 1]")
+
+    try:
+        pattern_type = AntiPatternType(raw.get("type", AntiPatternType.CUSTOM.value))
+    except ValueError as e:
+        raise ValueError(f"{where}: unknown type '{raw.get('type')}'") from e
+
+    return rule_id, {
+        "type": pattern_type,
+        "regex": raw["regex"],
+        "flags": flags,
+        "keywords": tuple(keywords),
+        "severity": weight,
+        "confidence": float(confidence),
+        "problem": raw["problem"],
+        "solution": raw["solution"],
+        "example": raw.get("example"),
+        "enabled": bool(raw.get("enabled", True)),
+    }
+
+
+def load_rule_pack(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load and validate a YAML anti-pattern rule pack
+
+    A pack is a mapping with a ``rules`` list. Each rule needs ``id``,
+    ``regex``, ``problem`` and ``solution`` and may set ``example``,
+    ``keywords`` (prefilter words, ``A|B`` for either), ``flags``
+    (default IGNORECASE), ``severity`` (info/low/medium/high/critical or a
+    weight in [0, 1]), ``confidence``, ``type`` and ``enabled``.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        Rules keyed by id, in the shape used by AntiPatternDetector.patterns
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the pack or any rule is invalid
+    """
+    pack_path = Path(path)
+    if not pack_path.exists():
+        raise FileNotFoundError(f"Rule pack not found: {path}")
+    try:
+        with open(pack_path, "r") as f:
+            data = yaml.safe_load(f) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"Rule pack {path}: invalid YAML: {e}") from e
+    if not isinstance(data, dict) or not isinstance(data.get("rules"), list):
+        raise ValueError(f"Rule pack {path}: expected a mapping with a 'rules' list")
+
+    rules: Dict[str, Dict[str, Any]] = {}
+    for raw in data["rules"]:
+        rule_id, config = _validate_rule(f"Rule pack {path}", raw)
+        if rule_id in rules:
+            raise ValueError(f"Rule pack {path}: duplicate rule id '{rule_id}'")
+        rules[rule_id] = config
+    logger.info(f"Loaded {len(rules)} anti-pattern rules from {path}")
+    return rules
@@ -0,0 +1,181 @@
+"""
+Concurrency reconstruction for slow query logs.
+
+Every parsed log entry carries the moment a statement finished and how long
+it ran, so the start of each execution is implied. Sweeping over these
+intervals rebuilds how many slow queries were active at any point in time,
+which separates "this query is slow" from "this query is slow because many
+copies of it run at once".
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analyzer import normalize_query, query_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConcurrencyWindow:
+    """A period during which the set of active queries did not change."""
+
+    start: pd.Timestamp
+    end: pd.Timestamp
+    active_count: int
+    fingerprints: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return float((self.end - self.start).total_seconds() * 1000.0)
+
+
+@dataclass
+class ConcurrencyReport:
+    """Result of the sweep-line concurrency reconstruction."""
+
+    total_executions: int = 0
+    peak_concurrency: int = 0
+    avg_concurrency: float = 0.0
+    peak_windows: List[ConcurrencyWindow] = field(default_factory=list)
+    fingerprint_peaks: Dict[str, int] = field(default_factory=dict)
+    co_active_pairs: List[Tuple[str, str, int]] = field(default_factory=list)
+    query_texts: Dict[str, str] = field(default_factory=dict)
+
+
+def analyze_concurrency(
+    log_df: pd.DataFrame, top_windows: int = 5, top_pairs: int = 10
+) -> ConcurrencyReport:
+    """
+    Rebuilds concurrently active slow queries with an O(n log n) sweep-line
+
+    Args:
+        log_df: DataFrame with columns [timestamp, duration_ms, query] where
+            timestamp marks the end of the execution
+        top_windows: Number of worst-overlap windows to keep
+        top_pairs: Number of most frequently co-active fingerprint pairs to keep
+
+    Returns:
+        ConcurrencyReport with peak concurrency, worst windows and co-activity
+    """
+    report = ConcurrencyReport()
+    if log_df is None or log_df.empty:
+        return report
+
+    ends = pd.to_datetime(log_df["timestamp"]).to_numpy(dtype="datetime64[ns]")
+    durations = pd.to_numeric(log_df["duration_ms"], errors="coerce").to_numpy()
+    valid = ~(np.isnat(ends) | np.isnan(durations))
+    ends = ends[valid]
+    durations = np.clip(durations[valid], 0.0, None)
+    queries = log_df["query"].astype(str).to_numpy()[valid]
+
+    count = len(ends)
+    report.total_executions = count
+    if count == 0:
+        return report
+
+    # Fingerprint each distinct statement text only once
+    fingerprint_cache: Dict[str, str] = {}
+    fingerprints: List[str] = []
+    for text in queries:
+        fp = fingerprint_cache.get(text)
+        if fp is None:
+            fp = query_fingerprint(text)
+            fingerprint_cache[text] = fp
+            report.query_texts.setdefault(fp, normalize_query(text))
+        fingerprints.append(fp)
+
+    starts = ends - (durations * 1_000_000).astype("timedelta64[ns]")
+
+    # Events: (time, kind, execution index); kind 0 = end, 1 = start so that
+    # at equal timestamps an ending query never overlaps a starting one.
+    times = np.concatenate([starts, ends])
+    kinds = np.concatenate([np.ones(count, dtype=np.int8), np.zeros(count, np.int8)])
+    owners = np.concatenate([np.arange(count), np.arange(count)])
+    order = np.lexsort((kinds, times))
+
+    active_by_fp: Dict[str, int] = defaultdict(int)
+    peaks: Dict[str, int] = defaultdict(int)
+    pair_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    windows: List[Tuple[int, int, Dict[str, int]]] = []
+    active = 0
+    peak = 0
+    weighted_ns = 0.0
+
+    for position, event_index in enumerate(order):
+        fp = fingerprints[owners[event_index]]
+        if kinds[event_index] == 1:
+            # Copies of the same pattern overlapping show in fingerprint_peaks
+            for other in active_by_fp:
+                if other == fp:
+                    continue
+                key = (fp, other) if fp < other else (other, fp)
+                pair_counts[key] += 1
+            active += 1
+            peak = max(peak, active)
+            active_by_fp[fp] += 1
+            peaks[fp] = max(peaks[fp], active_by_fp[fp])
+        else:
+            active -= 1
+            active_by_fp[fp] -= 1
+            if active_by_fp[fp] == 0:
+                del active_by_fp[fp]
+
+        if position + 1 >= len(order):
+            break
+        next_time = times[order[position + 1]]
+        span = float((next_time - times[event_index]) / np.timedelta64(1, "ns"))
+        weighted_ns += active * span
+        if active == 0 or span <= 0 or top_windows <= 0:
+            continue
+
+        # Keep the worst windows in a bounded min-heap keyed by active count
+        if len(windows) < top_windows or active > windows[0][0]:
+            snapshot = dict(active_by_fp)
+            entry = (active, position, snapshot)
+            if len(windows) < top_windows:
+                heapq.heappush(windows, entry)
+            else:
+                heapq.heapreplace(windows, entry)
+
+    total_span = float((times[order[-1]] - times[order[0]]) / np.timedelta64(1, "ns"))
+    report.avg_concurrency = weighted_ns / total_span if total_span > 0 else 0.0
+    report.peak_concurrency = peak
+    report.fingerprint_peaks = dict(
+        sorted(peaks.items(), key=lambda item: item[1], reverse=True)
+    )
+
+    for active_count, position, snapshot in sorted(
+        windows, key=lambda w: (-w[0], w[1])
+    ):
+        window_start = times[order[position]]
+        window_end = times[order[position + 1]]
+        report.peak_windows.append(
+            ConcurrencyWindow(
+                start=pd.Timestamp(window_start),
+                end=pd.Timestamp(window_end),
+                active_count=active_count,
+                fingerprints=dict(
+                    sorted(snapshot.items(), key=lambda item: item[1], reverse=True)
+                ),
+            )
+        )
+
+    report.co_active_pairs = [
+        (a, b, n)
+        for (a, b), n in sorted(
+            pair_counts.items(), key=lambda item: item[1], reverse=True
+        )[:top_pairs]
+    ]
+
+    logger.info(
+        f"Reconstructed concurrency for {count} executions "
+        f"(peak: {report.peak_concurrency})"
+    )
+    return report
@@ -0,0 +1,172 @@
+"""
+Dimensional breakdowns of slow query time.
+
+Groups parsed log entries by any combination of query fingerprint and the
+session dimensions extracted from ``log_line_prefix`` (database, user,
+application, client) so a shared cluster can tell which service account or
+application is burning the time.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pandas as pd
+
+from .analyzer import normalize_query, query_fingerprint
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_DIMENSION = "(unknown)"
+
+DIMENSION_ALIASES = {
+    "fingerprint": "fingerprint",
+    "query": "fingerprint",
+    "db": "database",
+    "database": "database",
+    "user": "user",
+    "app": "application",
+    "application": "application",
+    "client": "client",
+    "host": "client",
+}
+
+
+@dataclass
+class DimensionBreakdown:
+    """Multi-key aggregation of slow query time."""
+
+    group_by: List[str]
+    groups: pd.DataFrame
+    totals: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    top_contributors: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    query_texts: Dict[str, str] = field(default_factory=dict)
+    total_time: float = 0.0
+
+
+def parse_group_by(spec: str) -> List[str]:
+    """
+    Parse a comma separated ``--group-by`` specification
+
+    Args:
+        spec: e.g. "fingerprint,db,user,app"
+
+    Returns:
+        Canonical dimension names in the order given
+
+    Raises:
+        ValueError: If an unknown dimension is requested
+    """
+    dimensions: List[str] = []
+    for raw in spec.split(","):
+        name = raw.strip().lower()
+        if not name:
+            continue
+        if name not in DIMENSION_ALIASES:
+            valid = ", ".join(sorted(DIMENSION_ALIASES))
+            raise ValueError(f"Unknown group-by dimension '{raw}'. Valid: {valid}")
+        canonical = DIMENSION_ALIASES[name]
+        if canonical not in dimensions:
+            dimensions.append(canonical)
+    if not dimensions:
+        raise ValueError("At least one group-by dimension is required")
+    return dimensions
+
+
+def build_dimension_breakdown(
+    log_df: pd.DataFrame,
+    group_by: List[str],
+    top_n: int = 10,
+    top_contributors: int = 3,
+    min_duration: float = 0.0,
+) -> DimensionBreakdown:
+    """
+    Aggregate slow query time by several dimensions at once
+
+    Args:
+        log_df: Parsed log DataFrame (see parse_postgres_log)
+        group_by: Canonical dimension names (see parse_group_by)
+        top_n: Number of groups/patterns to keep in each table
+        top_contributors: Number of contributors to keep per pattern
+        min_duration: Minimum duration in ms to include an entry
+
+    Returns:
+        DimensionBreakdown with grouped, per-dimension and per-pattern tables
+    """
+    df = log_df.loc[
+        pd.to_numeric(log_df["duration_ms"], errors="coerce") >= min_duration,
+        ["duration_ms", "query"],
+    ].copy()
+    df["duration_ms"] = df["duration_ms"].astype(float)
+
+    # Fingerprint each distinct statement once and store it as a category
+    queries = df["query"].astype(str).astype("category")
+    texts = queries.cat.categories
+    fingerprints = [query_fingerprint(text) for text in texts]
+    unique_fingerprints = pd.Index(fingerprints).unique()
+    text_to_fp = unique_fingerprints.get_indexer(fingerprints)
+    df["fingerprint"] = pd.Categorical.from_codes(
+        text_to_fp[queries.cat.codes.to_numpy()], categories=unique_fingerprints
+    )
+    query_texts: Dict[str, str] = {}
+    for fp, text in zip(fingerprints, texts):
+        query_texts.setdefault(fp, normalize_query(text))
+
+    for dimension in group_by:
+        if dimension == "fingerprint":
+            continue
+        values = log_df[dimension] if dimension in log_df.columns else None
+        if values is None:
+            df[dimension] = pd.Categorical([UNKNOWN_DIMENSION] * len(df))
+        else:
+            column = values.loc[df.index].astype("object")
+            column = column.where(column.notna(), UNKNOWN_DIMENSION)
+            df[dimension] = column.astype(str).astype("category")
+
+    total_time = float(df["duration_ms"].sum())
+
+    def _aggregate(keys: List[str]) -> pd.DataFrame:
+        grouped = (
+            df.groupby(keys, observed=True, sort=False)["duration_ms"]
+            .agg(executions="size", total_duration="sum", avg_duration="mean")
+            .reset_index()
+            .sort_values("total_duration", ascending=False)
+        )
+        grouped["share"] = (
+            grouped["total_duration"] / total_time if total_time > 0 else 0.0
+        )
+        return grouped.reset_index(drop=True)
+
+    groups = _aggregate(group_by)
+    breakdown = DimensionBreakdown(
+        group_by=group_by,
+        groups=groups.head(top_n) if top_n > 0 else groups,
+        query_texts=query_texts,
+        total_time=total_time,
+    )
+
+    for dimension in group_by:
+        if dimension == "fingerprint":
+            continue
+        totals = _aggregate([dimension])
+        breakdown.totals[dimension] = totals.head(top_n) if top_n > 0 else totals
+
+    others = [d for d in group_by if d != "fingerprint"]
+    if "fingerprint" in group_by and others:
+        per_pattern = _aggregate(["fingerprint"])
+        if top_n > 0:
+            per_pattern = per_pattern.head(top_n)
+        pattern_time = dict(
+            zip(per_pattern["fingerprint"], per_pattern["total_duration"])
+        )
+        for fp in per_pattern["fingerprint"]:
+            rows = groups[groups["fingerprint"] == fp].head(top_contributors).copy()
+            rows["pattern_share"] = rows["total_duration"] / pattern_time[fp]
+            breakdown.top_contributors[str(fp)] = rows[
+                others + ["executions", "total_duration", "pattern_share"]
+            ].reset_index(drop=True)
+
+    logger.info(
+        f"Built breakdown by {', '.join(group_by)} ({len(groups)} distinct groups)"
+    )
+    return breakdown
@@ -0,0 +1,198 @@
+"""
+Anti-pattern rules evaluated on execution plans.
+
+Where antipatterns.py inspects SQL text, these rules inspect what the
+executor actually did: sequential scans over large relations, nested loops
+that re-run their inner side many times, sorts that spill to disk and hash
+joins that need several batches. Each finding carries the exclusive time
+of the node it points at, so findings can be ranked by what they cost.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from .antipatterns import SEVERITY_LEVELS
+from .explain_metrics import NodeMetrics, estimate_error, node_metrics
+from .explain_parser import ExplainPlan
+
+logger = logging.getLogger(__name__)
+
+# Rows read (returned plus discarded by the filter, over all loops) from
+# which a sequential scan is reported
+LARGE_RELATION_ROWS = 100_000
+# Inner-side executions from which a nested loop is reported
+HIGH_LOOP_COUNT = 1_000
+# Share of scanned rows a filter must discard for an index to clearly help
+SELECTIVE_FILTER_SHARE = 0.9
+
+
+@dataclass
+class PlanFinding:
+    """An anti-pattern found at one node of a plan."""
+
+    rule_id: str
+    node: str
+    severity: str
+    problem: str
+    suggestion: str
+    exclusive_ms: float = 0.0
+
+    @property
+    def title(self) -> str:
+        """Human readable rule name."""
+        return self.rule_id.replace("_", " ").title()
+
+    @property
+    def weight(self) -> float:
+        return SEVERITY_LEVELS[self.severity]
+
+
+def _seq_scan_on_large_relation(metric: NodeMetrics) -> Optional[PlanFinding]:
+    node = metric.node
+    if node.node_type != "Seq Scan":
+        return None
+    if node.actual_rows is not None and node.actual_loops:
+        removed = node.rows_removed_by_filter * node.actual_loops
+        scanned = node.actual_rows * node.actual_loops + removed
+    else:
+        # Without ANALYZE only the (filtered) output estimate is known
+        removed, scanned = 0, node.plan_rows or 0
+    if scanned < LARGE_RELATION_ROWS:
+        return None
+
+    removed_share = removed / scanned if scanned else 0.0
+    problem = f"{node.label} read {scanned:,.0f} rows"
+    if removed:
+        problem += f", {removed_share:.0%} of them discarded by the filter"
+    condition = node.metadata.get("filter")
+    if condition:
+        suggestion = (
+            f"Index the columns of the filter `{condition}`, or make the "
+            "predicate sargable, so only the matching rows are read"
+        )
+    else:
+        suggestion = (
+            "The whole relation is read; restrict it with a selective WHERE "
+            "clause, or index the join key if it feeds a join"
+        )
+    return PlanFinding(
+        rule_id="seq_scan_on_large_relation",
+        node=node.label,
+        severity="high" if removed_share >= SELECTIVE_FILTER_SHARE else "medium",
+        problem=problem,
+        suggestion=suggestion,
+        exclusive_ms=metric.exclusive_ms,
+    )
+
+
+def _nested_loop_high_loops(metric: NodeMetrics) -> Optional[PlanFinding]:
+    node = metric.node
+    if node.node_type != "Nested Loop" or len(node.children) < 2:
+        return None
+    outer, inner = node.children[0], node.children[1]
+    if inner.actual_loops is not None:
+        loops = float(inner.actual_loops)
+    else:
+        loops = outer.plan_rows or 0.0
+    if loops < HIGH_LOOP_COUNT:
+        return None
+
+    problem = f"Nested Loop ran its inner side ({inner.label}) {loops:,.0f} times"
+    error, _ = estimate_error(outer)
+    if error is not None and error >= 2 and outer.actual_rows is not None:
+        problem += (
+            f"; the planner expected {outer.plan_rows:,.0f} outer rows and got "
+            f"{outer.actual_rows * (outer.actual_loops or 1):,.0f}"
+        )
+    return PlanFinding(
+        rule_id="nested_loop_high_loops",
+        node=node.label,
+        severity="high" if inner.node_type == "Seq Scan" else "medium",
+        problem=problem,
+        suggestion=(
+            "Index the inner side's join key, or fix the outer row estimate "
+            "(ANALYZE, extended statistics) so the planner can choose a hash "
+            "or merge join"
+        ),
+        exclusive_ms=metric.exclusive_ms,
+    )
+
+
+def _sort_spill_to_disk(metric: NodeMetrics) -> Optional[PlanFinding]:
+    node = metric.node
+    if node.metadata.get("sort_space_type") != "Disk":
+        return None
+    used_kb = int(node.metadata.get("sort_space_used_kb", 0))
+    return PlanFinding(
+        rule_id="sort_spill_to_disk",
+        node=node.label,
+        severity="medium",
+        problem=(
+            f"Sort spilled {used_kb:,} kB to disk "
+            f"({node.metadata.get('sort_method', 'external sort')})"
+        ),
+        suggestion=(
+            f"Raise work_mem for this query above ~{max(used_kb * 2, 1024) // 1024} "
+            "MB (SET LOCAL work_mem), or read rows in order from an index "
+            "matching the sort key"
+        ),
+        exclusive_ms=metric.exclusive_ms,
+    )
+
+
+def _hash_batches(metric: NodeMetrics) -> Optional[PlanFinding]:
+    node = metric.node
+    batches = int(node.metadata.get("hash_batches", 1))
+    if node.node_type != "Hash" or batches <= 1:
+        return None
+    planned = int(node.metadata.get("original_hash_batches", batches))
+    problem = f"Hash table split into {batches} batches"
+    if planned != batches:
+        problem += f" (planned {planned}; the build side was underestimated)"
+    return PlanFinding(
+        rule_id="hash_batches",
+        node=node.label,
+        severity="medium",
+        problem=problem + ", writing the overflow to temporary files",
+        suggestion=(
+            "Raise work_mem (or hash_mem_multiplier) for this query, or make "
+            "the smaller input the build side by fixing its row estimate"
+        ),
+        exclusive_ms=metric.exclusive_ms,
+    )
+
+
+PLAN_RULES: Dict[str, Callable[[NodeMetrics], Optional[PlanFinding]]] = {
+    "seq_scan_on_large_relation": _seq_scan_on_large_relation,
+    "nested_loop_high_loops": _nested_loop_high_loops,
+    "sort_spill_to_disk": _sort_spill_to_disk,
+    "hash_batches": _hash_batches,
+}
+
+
+def detect_plan_antipatterns(
+    plan: ExplainPlan, disabled_rules: Optional[List[str]] = None
+) -> List[PlanFinding]:
+    """
+    Run the plan rules over every node of a plan
+
+    Args:
+        plan: Parsed plan; rules fall back to estimates without ANALYZE data
+        disabled_rules: Rule ids to skip
+
+    Returns:
+        Findings, most severe and most expensive first
+    """
+    rules = [
+        rule
+        for rule_id, rule in PLAN_RULES.items()
+        if rule_id not in (disabled_rules or [])
+    ]
+    findings = []
+    for metric in node_metrics(plan):
+        for rule in rules:
+            finding = rule(metric)
+            if finding is not None:
+                findings.append(finding)
+    return sorted(findings, key=lambda f: (f.weight, f.exclusive_ms), reverse=True)
@@ -0,0 +1,149 @@
+"""
+Batch analysis of EXPLAIN output files.
+
+DBAs often collect ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` output into
+directories of files. Each file is parsed, measured and checked against the
+plan anti-pattern rules in a worker process; the main process only ranks
+the results and rolls them up for the report.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from tqdm import tqdm
+
+from .explain_antipatterns import PlanFinding, detect_plan_antipatterns
+from .explain_metrics import node_metrics
+from .explain_parser import ExplainPlan, parse_explain
+from .plan_history import plan_hash
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExplainFileResult:
+    """Analysis of one EXPLAIN file."""
+
+    path: str
+    plan: Optional[ExplainPlan] = None
+    findings: List[PlanFinding] = field(default_factory=list)
+    # Dominant node summary, e.g. "Seq Scan on sales: 82% of time"
+    dominant: str = ""
+    execution_ms: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def severity_score(self) -> float:
+        return sum(finding.weight for finding in self.findings)
+
+
+def collect_explain_files(paths: Iterable[str], pattern: str = "*") -> List[str]:
+    """
+    Expand files and directories into a sorted list of EXPLAIN files
+
+    Args:
+        paths: Files and/or directories (searched recursively)
+        pattern: Glob applied to file names inside directories
+
+    Returns:
+        Sorted file paths, hidden files excluded
+
+    Raises:
+        FileNotFoundError: If a path doesn't exist
+    """
+    files = set()
+    for raw in paths:
+        path = Path(raw)
+        if not path.exists():
+            raise FileNotFoundError(f"EXPLAIN path not found: {raw}")
+        if path.is_file():
+            files.add(str(path))
+            continue
+        for candidate in path.rglob(pattern):
+            relative = candidate.relative_to(path)
+            if candidate.is_file() and not any(
+                part.startswith(".") for part in relative.parts
+            ):
+                files.add(str(candidate))
+    return sorted(files)
+
+
+def analyze_explain_file(path: str) -> ExplainFileResult:
+    """
+    Parse one file and run the plan metrics and rules on it
+
+    Runs in worker processes, so failures are returned rather than raised.
+
+    Args:
+        path: File holding EXPLAIN output (JSON or text)
+
+    Returns:
+        ExplainFileResult; ``error`` is set when the file is not a plan
+    """
+    try:
+        plan = parse_explain(Path(path).read_text(encoding="utf-8", errors="ignore"))
+    except (OSError, ValueError) as e:
+        return ExplainFileResult(path=path, error=str(e))
+
+    # Plain EXPLAIN output has no query text; group such plans by shape
+    if plan.fingerprint is None:
+        plan.fingerprint = plan_hash(plan.root)
+
+    metrics = node_metrics(plan)
+    total_ms = sum(metric.exclusive_ms for metric in metrics)
+    dominant = ""
+    if total_ms > 0:
+        top = max(metrics, key=lambda metric: metric.exclusive_ms)
+        dominant = f"{top.node.label}: {top.exclusive_ms / total_ms:.0%} of time"
+    return ExplainFileResult(
+        path=path,
+        plan=plan,
+        findings=detect_plan_antipatterns(plan),
+        dominant=dominant,
+        execution_ms=plan.execution_time_ms or total_ms,
+    )
+
+
+def analyze_explain_files(
+    files: List[str], workers: Optional[int] = None
+) -> List[ExplainFileResult]:
+    """
+    Analyze EXPLAIN files in a process pool and rank them
+
+    Args:
+        files: Paths from collect_explain_files
+        workers: Worker processes (default: CPU count); 1 runs in-process
+
+    Returns:
+        Results ranked by execution time, then by finding severity; files
+        that failed to parse come last
+    """
+    workers = workers or os.cpu_count() or 1
+    progress = {"desc": "Analyzing EXPLAIN files", "unit": "file", "total": len(files)}
+    if workers <= 1 or len(files) < 2:
+        results = [analyze_explain_file(path) for path in tqdm(files, **progress)]
+    else:
+        # Several files per task keeps the pickling overhead small
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                tqdm(
+                    pool.map(analyze_explain_file, files, chunksize=chunksize),
+                    **progress,
+                )
+            )
+
+    failed = sum(1 for result in results if result.error)
+    logger.info(
+        f"Analyzed {len(results) - failed} EXPLAIN files with {workers} workers "
+        f"({failed} failed)"
+    )
+    return sorted(
+        results,
+        key=lambda r: (r.error is None, r.execution_ms, r.severity_score),
+        reverse=True,
+    )
@@ -0,0 +1,296 @@
+"""
+Per-node metrics for parsed execution plans.
+
+EXPLAIN ANALYZE reports each node's time and buffers including everything
+below it, and per loop. This module derives what a node itself cost
+(exclusive time and buffers, times loops), how far the planner's row
+estimate was off, and rolls both up by node type and relation across every
+logged execution of a query fingerprint. Plans are consumed as a stream, so
+only the running totals are kept in memory.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .analyzer import normalize_query
+from .explain_parser import ExplainPlan, PlanNode
+from .plan_history import PlanHistory
+
+logger = logging.getLogger(__name__)
+
+NODE_ROLLUP_COLUMNS = [
+    "fingerprint",
+    "node",
+    "node_type",
+    "relation",
+    "occurrences",
+    "loops",
+    "exclusive_ms",
+    "time_share",
+    "estimate_error",
+    "estimate_direction",
+    "shared_hit_blocks",
+    "shared_read_blocks",
+    "hit_ratio",
+    "temp_read_blocks",
+    "temp_written_blocks",
+]
+
+DOMINANT_NODE_COLUMNS = [
+    "query",
+    "executions",
+    "total_ms",
+    "node",
+    "exclusive_ms",
+    "time_share",
+    "estimate_error",
+    "estimate_direction",
+    "hit_ratio",
+    "summary",
+]
+
+_BUFFER_FIELDS = (
+    "shared_hit_blocks",
+    "shared_read_blocks",
+    "temp_read_blocks",
+    "temp_written_blocks",
+)
+
+
+@dataclass
+class NodeMetrics:
+    """Exclusive cost of one plan node in one execution."""
+
+    node: PlanNode
+    exclusive_ms: float
+    loops: int
+    # max(actual, estimate) / min(actual, estimate), rows per loop, >= 1
+    estimate_error: Optional[float]
+    # "under" when the planner expected fewer rows than were produced
+    estimate_direction: Optional[str]
+    buffers: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class PlanMetricsReport:
+    """Node rollups and the dominant node of each fingerprint's plans."""
+
+    nodes: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=NODE_ROLLUP_COLUMNS)
+    )
+    dominant: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=DOMINANT_NODE_COLUMNS)
+    )
+    plans_analyzed: int = 0
+    plans_skipped: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return len(self.dominant) == 0
+
+
+def _inclusive_ms(node: PlanNode) -> float:
+    if node.actual_total_time is None or not node.actual_loops:
+        return 0.0
+    return node.actual_total_time * node.actual_loops
+
+
+def estimate_error(node: PlanNode) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Compare the planner's row estimate with the rows a node produced
+
+    Both sides are floored at one row so empty results do not divide by zero.
+
+    Args:
+        node: Plan node with ``plan_rows`` and per-loop ``actual_rows``
+
+    Returns:
+        (error ratio >= 1, "under" or "over"), or (None, None) when the node
+        was never executed or has no estimate
+    """
+    if node.plan_rows is None or node.actual_rows is None or not node.actual_loops:
+        return None, None
+    actual = max(node.actual_rows, 1.0)
+    estimate = max(node.plan_rows, 1.0)
+    if actual >= estimate:
+        return actual / estimate, "under"
+    return estimate / actual, "over"
+
+
+def node_metrics(plan: ExplainPlan) -> List[NodeMetrics]:
+    """
+    Compute exclusive time, buffers and estimate error for every node
+
+    Exclusive values are the node's inclusive totals (time per loop times
+    loops) minus those of its direct children, floored at zero since parallel
+    workers and subplans can make children look more expensive than their
+    parent.
+
+    Args:
+        plan: Parsed plan; without ANALYZE data all times are zero
+
+    Returns:
+        NodeMetrics per node, depth first
+    """
+    metrics = []
+    for node in plan.root.walk():
+        exclusive = _inclusive_ms(node) - sum(
+            _inclusive_ms(child) for child in node.children
+        )
+        buffers = {
+            name: max(
+                getattr(node, name)
+                - sum(getattr(child, name) for child in node.children),
+                0,
+            )
+            for name in _BUFFER_FIELDS
+        }
+        error, direction = estimate_error(node)
+        metrics.append(
+            NodeMetrics(
+                node=node,
+                exclusive_ms=max(exclusive, 0.0),
+                loops=node.actual_loops or 0,
+                estimate_error=error,
+                estimate_direction=direction,
+                buffers=buffers,
+            )
+        )
+    return metrics
+
+
+def _node_summary(
+    node: str, share: float, error: Optional[float], direction: Optional[str]
+) -> str:
+    """Format e.g. ``Seq Scan on sales: 82% of time, estimate off by 400x``."""
+    summary = f"{node}: {share:.0%} of time"
+    if error is not None and pd.notna(error) and error >= 2:
+        summary += f", estimate off by {error:.0f}x ({direction})"
+    return summary
+
+
+def analyze_plans(
+    plans: Iterable[ExplainPlan], history: Optional[PlanHistory] = None
+) -> PlanMetricsReport:
+    """
+    Roll node metrics up per fingerprint, node type and relation
+
+    Args:
+        plans: Parsed plans, e.g. from iter_log_plans; plans without ANALYZE
+            timing or without a fingerprint are skipped
+        history: Optional plan history that records every plan in the same
+            pass, for plan-flip detection
+
+    Returns:
+        PlanMetricsReport with a node rollup and one dominant node per
+        fingerprint, sorted by total plan time
+    """
+    totals: Dict[Tuple[str, str], Dict[str, Any]] = defaultdict(
+        lambda: {
+            "occurrences": 0,
+            "loops": 0,
+            "exclusive_ms": 0.0,
+            "estimate_error": None,
+            "estimate_direction": None,
+            **{name: 0 for name in _BUFFER_FIELDS},
+        }
+    )
+    node_keys: Dict[Tuple[str, str], Tuple[str, Optional[str]]] = {}
+    queries: Dict[str, str] = {}
+    executions: Dict[str, int] = defaultdict(int)
+    analyzed = skipped = 0
+
+    for plan in plans:
+        if history is not None:
+            history.record(plan)
+        if (
+            plan.fingerprint is None
+            or not plan.has_analyze
+            or plan.root.actual_total_time is None
+        ):
+            skipped += 1
+            continue
+        analyzed += 1
+        executions[plan.fingerprint] += 1
+        if plan.fingerprint not in queries and plan.query_text:
+            queries[plan.fingerprint] = normalize_query(plan.query_text)
+
+        for metric in node_metrics(plan):
+            node = metric.node
+            key = (plan.fingerprint, node.label)
+            node_keys[key] = (node.node_type, node.relation_name)
+            entry = totals[key]
+            entry["occurrences"] += 1
+            entry["loops"] += metric.loops
+            entry["exclusive_ms"] += metric.exclusive_ms
+            for name, blocks in metric.buffers.items():
+                entry[name] += blocks
+            if metric.estimate_error is not None and (
+                entry["estimate_error"] is None
+                or metric.estimate_error > entry["estimate_error"]
+            ):
+                entry["estimate_error"] = metric.estimate_error
+                entry["estimate_direction"] = metric.estimate_direction
+
+    logger.info(
+        f"Computed plan node metrics for {analyzed} plans over "
+        f"{len(executions)} fingerprints ({skipped} skipped)"
+    )
+    if not totals:
+        return PlanMetricsReport(plans_analyzed=analyzed, plans_skipped=skipped)
+
+    rows = []
+    for (fingerprint, label), entry in totals.items():
+        node_type, relation = node_keys[(fingerprint, label)]
+        rows.append(
+            {
+                "fingerprint": fingerprint,
+                "node": label,
+                "node_type": node_type,
+                "relation": relation,
+                **entry,
+            }
+        )
+    nodes = pd.DataFrame(rows)
+    per_fp_total = nodes.groupby("fingerprint")["exclusive_ms"].transform("sum")
+    nodes["time_share"] = (
+        nodes["exclusive_ms"] / per_fp_total.where(per_fp_total > 0)
+    ).fillna(0.0)
+    accessed = nodes["shared_hit_blocks"] + nodes["shared_read_blocks"]
+    nodes["hit_ratio"] = nodes["shared_hit_blocks"] / accessed.where(accessed > 0)
+    nodes = nodes.sort_values(
+        ["fingerprint", "exclusive_ms"], ascending=[True, False]
+    ).reset_index(drop=True)[NODE_ROLLUP_COLUMNS]
+
+    top = nodes.drop_duplicates("fingerprint").set_index("fingerprint")
+    dominant = pd.DataFrame(index=top.index)
+    dominant["query"] = [queries.get(fp, "") for fp in top.index]
+    dominant["executions"] = [executions[fp] for fp in top.index]
+    dominant["total_ms"] = nodes.groupby("fingerprint")["exclusive_ms"].sum()
+    for column in (
+        "node",
+        "exclusive_ms",
+        "time_share",
+        "estimate_error",
+        "estimate_direction",
+        "hit_ratio",
+    ):
+        dominant[column] = top[column]
+    dominant["summary"] = [
+        _node_summary(
+            row.node, row.time_share, row.estimate_error, row.estimate_direction
+        )
+        for row in top.itertuples()
+    ]
+    dominant = dominant.sort_values("total_ms", ascending=False)[DOMINANT_NODE_COLUMNS]
+
+    return PlanMetricsReport(
+        nodes=nodes,
+        dominant=dominant,
+        plans_analyzed=analyzed,
+        plans_skipped=skipped,
+    )
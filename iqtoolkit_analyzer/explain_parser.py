@@ -0,0 +1,472 @@
+"""
+Parsing of PostgreSQL EXPLAIN output, including ``auto_explain`` log entries.
+
+``auto_explain`` logs the plan of slow statements right after a
+``duration: ... ms  plan:`` line, in JSON or text format. This module streams
+those entries out of a log file one at a time and turns each plan into a
+compact tree of :class:`PlanNode` objects (node type, relation, estimated and
+actual rows, loops, buffers and timing), linked to the query fingerprint
+used by the rest of the analyzer.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .analyzer import query_fingerprint
+from .parser import parse_log_line_prefix
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+_PLAN_ENTRY_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)(.*?)"
+    r"\bLOG:\s+duration: ([\d.]+) ms\s+plan:\s*(.*)$"
+)
+# Text every auto_explain entry contains, for a cheap check before a full pass
+PLAN_MARKER = "plan:"
+_NODE_RE = re.compile(
+    r"^(?P<indent>\s*)(?:->\s+)?(?P<header>\S.*?)\s+"
+    r"(?P<estimates>\(cost=\S+ rows=\S+ width=\d+\))?\s*"
+    r"(?P<actuals>\((?:actual|never executed)[^)]*\))?\s*$"
+)
+_HEADER_RE = re.compile(
+    r"^(?P<type>.+?)(?: using (?P<index>\S+))?(?: on (?P<relation>\S+)"
+    r"(?: (?P<alias>\S+))?)?$"
+)
+_JOIN_RE = re.compile(
+    r"^(Hash|Merge|Nested Loop)"
+    r"(?: (Left|Right|Full|Semi|Anti|Right Semi|Right Anti))?(?: Join)?$"
+)
+_COST_RE = re.compile(r"cost=([\d.]+)\.\.([\d.]+) rows=([\d.]+) width=(\d+)")
+_ACTUAL_RE = re.compile(
+    r"actual (?:time=([\d.]+)\.\.([\d.]+) )?rows=([\d.]+) loops=(\d+)"
+)
+_BUFFER_RE = re.compile(r"(shared|local|temp)((?: \w+=\d+)+)")
+_BATCHES_RE = re.compile(r"Batches: (\d+)(?: \(originally (\d+)\))?")
+_SORT_RE = re.compile(r"^(.+?)\s+(Disk|Memory): (\d+)kB")
+_SUBPLAN_RE = re.compile(r"^(?:SubPlan|InitPlan|CTE) ")
+
+# Text node names that EXPLAIN (FORMAT JSON) reports as one node type plus
+# a strategy, so both formats produce the same tree
+_TEXT_NODE_ALIASES: Dict[str, Tuple[str, str]] = {
+    "HashAggregate": ("Aggregate", "Hashed"),
+    "GroupAggregate": ("Aggregate", "Sorted"),
+    "MixedAggregate": ("Aggregate", "Mixed"),
+    "HashSetOp": ("SetOp", "Hashed"),
+}
+_JSON_METADATA = {
+    "Strategy": "strategy",
+    "Partial Mode": "partial_mode",
+    "Scan Direction": "scan_direction",
+    "Parallel Aware": "parallel_aware",
+    "Subplan Name": "subplan_name",
+    "Filter": "filter",
+    "Index Cond": "index_cond",
+    "Join Filter": "join_filter",
+    "Sort Method": "sort_method",
+    "Sort Space Type": "sort_space_type",
+    "Sort Space Used": "sort_space_used_kb",
+    "Hash Batches": "hash_batches",
+    "Original Hash Batches": "original_hash_batches",
+    "Workers Planned": "workers_planned",
+    "Workers Launched": "workers_launched",
+}
+# JSON values that only restate the default and are not worth keeping
+_JSON_METADATA_DEFAULTS = {
+    "parallel_aware": False,
+    "scan_direction": "Forward",
+    "partial_mode": "Simple",
+    "strategy": "Plain",
+}
+
+
+@dataclass
+class PlanNode:
+    """One node of an execution plan; actual values are per loop."""
+
+    node_type: str
+    relation_name: Optional[str] = None
+    alias: Optional[str] = None
+    index_name: Optional[str] = None
+    join_type: Optional[str] = None
+    startup_cost: Optional[float] = None
+    total_cost: Optional[float] = None
+    plan_rows: Optional[float] = None
+    plan_width: Optional[int] = None
+    actual_startup_time: Optional[float] = None
+    actual_total_time: Optional[float] = None
+    actual_rows: Optional[float] = None
+    actual_loops: Optional[int] = None
+    shared_hit_blocks: int = 0
+    shared_read_blocks: int = 0
+    shared_dirtied_blocks: int = 0
+    shared_written_blocks: int = 0
+    temp_read_blocks: int = 0
+    temp_written_blocks: int = 0
+    rows_removed_by_filter: int = 0
+    children: List["PlanNode"] = field(default_factory=list)
+    # Node specific extras: sort method/space, hash batches, filters, ...
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        """Short description such as ``Seq Scan on sales``."""
+        target = self.relation_name or self.index_name
+        return f"{self.node_type} on {target}" if target else self.node_type
+
+    def walk(self) -> Iterator["PlanNode"]:
+        """Yield this node and all of its descendants, depth first."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+
+@dataclass
+class ExplainPlan:
+    """A parsed plan, plus the log entry it came from when streamed."""
+
+    root: PlanNode
+    format: str
+    query_text: Optional[str] = None
+    fingerprint: Optional[str] = None
+    planning_time_ms: Optional[float] = None
+    execution_time_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
+    timestamp: Optional[datetime] = None
+    pid: Optional[int] = None
+
+    @property
+    def has_analyze(self) -> bool:
+        return self.root.actual_loops is not None
+
+
+def _int(value: Any) -> int:
+    return int(value) if value is not None else 0
+
+
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _node_from_json(data: Dict[str, Any]) -> PlanNode:
+    """Build a node (and its children) from an EXPLAIN JSON ``Plan`` object."""
+    if "Node Type" not in data:
+        raise ValueError("Plan node without 'Node Type'")
+    loops = data.get("Actual Loops")
+    node = PlanNode(
+        node_type=str(data["Node Type"]),
+        relation_name=data.get("Relation Name"),
+        alias=data.get("Alias"),
+        index_name=data.get("Index Name"),
+        join_type=data.get("Join Type"),
+        startup_cost=_float(data.get("Startup Cost")),
+        total_cost=_float(data.get("Total Cost")),
+        plan_rows=_float(data.get("Plan Rows")),
+        plan_width=data.get("Plan Width"),
+        actual_startup_time=_float(data.get("Actual Startup Time")),
+        actual_total_time=_float(data.get("Actual Total Time")),
+        actual_rows=_float(data.get("Actual Rows")),
+        actual_loops=int(loops) if loops is not None else None,
+        shared_hit_blocks=_int(data.get("Shared Hit Blocks")),
+        shared_read_blocks=_int(data.get("Shared Read Blocks")),
+        shared_dirtied_blocks=_int(data.get("Shared Dirtied Blocks")),
+        shared_written_blocks=_int(data.get("Shared Written Blocks")),
+        temp_read_blocks=_int(data.get("Temp Read Blocks")),
+        temp_written_blocks=_int(data.get("Temp Written Blocks")),
+        rows_removed_by_filter=_int(data.get("Rows Removed by Filter")),
+    )
+    for key, name in _JSON_METADATA.items():
+        if key in data and data[key] != _JSON_METADATA_DEFAULTS.get(name):
+            node.metadata[name] = data[key]
+    node.children = [_node_from_json(child) for child in data.get("Plans", [])]
+    return node
+
+
+def _parse_json(text: str) -> ExplainPlan:
+    data = json.loads(text)
+    # EXPLAIN (FORMAT JSON) wraps the document in a one element array
+    if isinstance(data, list):
+        if not data:
+            raise ValueError("Empty EXPLAIN JSON document")
+        data = data[0]
+    if not isinstance(data, dict) or "Plan" not in data:
+        raise ValueError("EXPLAIN JSON document without a 'Plan' object")
+    return ExplainPlan(
+        root=_node_from_json(data["Plan"]),
+        format="json",
+        query_text=data.get("Query Text"),
+        planning_time_ms=_float(data.get("Planning Time")),
+        execution_time_ms=_float(data.get("Execution Time")),
+    )
+
+
+def _node_from_header(header: str) -> PlanNode:
+    """Build a node from the ``Index Scan using idx on t x`` part of a line."""
+    metadata: Dict[str, Any] = {}
+    for prefix, key, value in (
+        ("Parallel ", "parallel_aware", True),
+        ("Partial ", "partial_mode", "Partial"),
+        ("Finalize ", "partial_mode", "Finalize"),
+    ):
+        if header.startswith(prefix):
+            header = header[len(prefix) :]
+            metadata[key] = value
+
+    match = _HEADER_RE.match(header)
+    if match is None:  # pragma: no cover - the pattern accepts any header
+        return PlanNode(node_type=header, metadata=metadata)
+    node_type = match.group("type")
+    relation, alias = match.group("relation"), match.group("alias")
+    index_name = match.group("index")
+    join_type = None
+
+    if node_type.endswith(" Backward"):
+        node_type = node_type[: -len(" Backward")]
+        metadata["scan_direction"] = "Backward"
+    if node_type == "Bitmap Index Scan":
+        # "on" names the index here, not a relation
+        index_name, relation = relation, None
+    if node_type in _TEXT_NODE_ALIASES:
+        node_type, metadata["strategy"] = _TEXT_NODE_ALIASES[node_type]
+    join = _JOIN_RE.match(node_type)
+    # A bare "Hash" is the build side of a hash join, not a join itself
+    if join and (node_type == "Nested Loop" or node_type.endswith(" Join")):
+        kind = join.group(1)
+        node_type = kind if kind == "Nested Loop" else f"{kind} Join"
+        join_type = join.group(2) or "Inner"
+
+    return PlanNode(
+        node_type=node_type,
+        relation_name=relation,
+        alias=alias,
+        index_name=index_name,
+        join_type=join_type,
+        metadata=metadata,
+    )
+
+
+def _apply_detail(node: PlanNode, key: str, value: str) -> None:
+    """Record a ``Key: value`` detail line on the node it belongs to."""
+    if key == "Buffers":
+        for kind, counters in _BUFFER_RE.findall(value):
+            if kind == "local":
+                continue
+            for counter in counters.split():
+                name, _, amount = counter.partition("=")
+                attr = f"{kind}_{name}_blocks"
+                if hasattr(node, attr):
+                    setattr(node, attr, getattr(node, attr) + int(amount))
+    elif key == "Rows Removed by Filter":
+        node.rows_removed_by_filter = int(float(value))
+    elif key in ("Filter", "Index Cond", "Join Filter"):
+        node.metadata[key.lower().replace(" ", "_")] = value
+    elif key == "Sort Method":
+        sort = _SORT_RE.match(value)
+        if sort:
+            node.metadata["sort_method"] = sort.group(1)
+            node.metadata["sort_space_type"] = sort.group(2)
+            node.metadata["sort_space_used_kb"] = int(sort.group(3))
+        else:
+            node.metadata["sort_method"] = value.strip()
+    elif key == "Buckets":
+        batches = _BATCHES_RE.search(value)
+        if batches:
+            node.metadata["hash_batches"] = int(batches.group(1))
+            node.metadata["original_hash_batches"] = int(
+                batches.group(2) or batches.group(1)
+            )
+    elif key in ("Workers Planned", "Workers Launched"):
+        node.metadata[key.lower().replace(" ", "_")] = int(value)
+
+
+def _parse_text(text: str) -> ExplainPlan:
+    query_lines: List[str] = []
+    root: Optional[PlanNode] = None
+    root_indent = 0
+    stack: List[Tuple[int, PlanNode]] = []
+    subplan_name: Optional[str] = None
+    timings: Dict[str, float] = {}
+    in_footer = False
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        indent = len(line) - len(line.lstrip())
+
+        if root is None:
+            node_match = _NODE_RE.match(line)
+            if node_match and (
+                node_match.group("estimates") or node_match.group("actuals")
+            ):
+                root = _node_line(node_match)
+                root_indent = indent
+                stack = [(-1, root)]
+            elif stripped.startswith("Query Text:") and not query_lines:
+                query_lines.append(stripped[len("Query Text:") :].strip())
+            elif query_lines:
+                query_lines.append(line.rstrip())
+            continue
+
+        key, _, value = stripped.partition(": ")
+        if indent <= root_indent:
+            # Planning, Execution Time, JIT, Triggers: nothing below is a node
+            in_footer = True
+            if key in ("Planning Time", "Execution Time"):
+                timings[key] = float(value.split()[0])
+            continue
+        if in_footer:
+            continue
+
+        if stripped.startswith("->"):
+            node_match = _NODE_RE.match(line)
+            if node_match is None:
+                continue
+            column = line.index("->")
+            node = _node_line(node_match)
+            if subplan_name:
+                node.metadata["subplan_name"] = subplan_name
+                subplan_name = None
+            while stack[-1][0] >= column:
+                stack.pop()
+            stack[-1][1].children.append(node)
+            stack.append((column, node))
+        elif _SUBPLAN_RE.match(stripped):
+            subplan_name = stripped
+        else:
+            _apply_detail(stack[-1][1], key, value)
+
+    if root is None:
+        raise ValueError("No plan node found in EXPLAIN text")
+    return ExplainPlan(
+        root=root,
+        format="text",
+        query_text="\n".join(query_lines).strip() or None,
+        planning_time_ms=timings.get("Planning Time"),
+        execution_time_ms=timings.get("Execution Time"),
+    )
+
+
+def _node_line(match: "re.Match[str]") -> PlanNode:
+    node = _node_from_header(match.group("header").strip())
+    estimates = match.group("estimates")
+    if estimates:
+        cost = _COST_RE.search(estimates)
+        if cost:
+            node.startup_cost = float(cost.group(1))
+            node.total_cost = float(cost.group(2))
+            node.plan_rows = float(cost.group(3))
+            node.plan_width = int(cost.group(4))
+    actuals = match.group("actuals")
+    if actuals:
+        actual = _ACTUAL_RE.search(actuals)
+        if actual:
+            node.actual_startup_time = _float(actual.group(1))
+            node.actual_total_time = _float(actual.group(2))
+            node.actual_rows = float(actual.group(3))
+            node.actual_loops = int(actual.group(4))
+        else:
+            # "(never executed)"
+            node.actual_rows = 0.0
+            node.actual_loops = 0
+    return node
+
+
+def parse_explain(text: str) -> ExplainPlan:
+    """
+    Parse EXPLAIN or auto_explain output in JSON or text format
+
+    Args:
+        text: Plan text; JSON is detected by its leading ``{`` or ``[``
+
+    Returns:
+        ExplainPlan with the node tree; ``fingerprint`` is set when the
+        output includes the query text
+
+    Raises:
+        ValueError: If the text is not a recognizable plan
+    """
+    body = text.strip()
+    if not body:
+        raise ValueError("Empty EXPLAIN output")
+    if body[0] in "[{":
+        try:
+            plan = _parse_json(body)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid EXPLAIN JSON: {e}") from e
+    else:
+        plan = _parse_text(body)
+    if plan.query_text:
+        plan.fingerprint = query_fingerprint(plan.query_text)
+    return plan
+
+
+def _finish_entry(entry: Dict[str, Any]) -> Optional[ExplainPlan]:
+    try:
+        plan = parse_explain("\n".join(entry["lines"]))
+    except ValueError as e:
+        logger.warning(f"Skipping unparseable plan logged at {entry['timestamp']}: {e}")
+        return None
+    plan.duration_ms = entry["duration_ms"]
+    plan.timestamp = entry["timestamp"]
+    plan.pid = entry["pid"]
+    return plan
+
+
+def iter_log_plans(log_file_path: str) -> Iterator[ExplainPlan]:
+    """
+    Stream auto_explain plans out of a plain-text PostgreSQL log
+
+    Only the entry being read is held in memory, so arbitrarily large logs
+    can be processed. Plans that fail to parse are logged and skipped.
+
+    Args:
+        log_file_path: Path to a plain-text (stderr) PostgreSQL log file
+
+    Yields:
+        ExplainPlan per ``duration: ... ms  plan:`` entry, in log order
+
+    Raises:
+        FileNotFoundError: If log file doesn't exist
+    """
+    path = Path(log_file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Log file not found: {log_file_path}")
+
+    entry: Optional[Dict[str, Any]] = None
+    count = 0
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not _ENTRY_RE.match(line):
+                if entry is not None:
+                    # stderr logging indents message continuation lines by a tab
+                    entry["lines"].append(line[1:] if line[:1] == "\t" else line)
+                continue
+            if entry is not None:
+                plan = _finish_entry(entry)
+                entry = None
+                if plan is not None:
+                    count += 1
+                    yield plan
+            match = _PLAN_ENTRY_RE.match(line)
+            if match:
+                entry = {
+                    "timestamp": datetime.fromisoformat(match.group(1)),
+                    "pid": parse_log_line_prefix(match.group(2))["pid"],
+                    "duration_ms": float(match.group(3)),
+                    "lines": [match.group(4)] if match.group(4) else [],
+                }
+    if entry is not None:
+        plan = _finish_entry(entry)
+        if plan is not None:
+            count += 1
+            yield plan
+    logger.info(f"Extracted {count} auto_explain plans from {log_file_path}")
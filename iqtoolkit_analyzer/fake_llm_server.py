@@ -0,0 +1,439 @@
+"""
+Local stand-in for the Ollama and OpenAI chat APIs.
+
+Benchmarks and CI runs can't depend on a real model, so this server
+answers ``POST /api/chat`` and ``/api/generate`` (Ollama) and
+``POST /v1/chat/completions`` (OpenAI) with canned recommendations after a
+configurable latency, fails a configurable share of requests and streams
+answers (NDJSON for Ollama, server-sent events for OpenAI) when asked to.
+Point ``ollama_host`` or ``openai_base_url`` at it. JSON-mode requests get
+one entry per ``Query N:`` section of the prompt, so packed requests work.
+
+Usage:
+    python -m iqtoolkit_analyzer.fake_llm_server --port 11434
+    python -m iqtoolkit_analyzer.fake_llm_server --latency lognormal:800,0.5 \\
+        --error-rate 0.05 --load-ms 5000 --seed 1
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+_QUERY_NUMBER_RE = re.compile(r"^Query (\d+):", re.MULTILINE)
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+([\w.]+)", re.IGNORECASE)
+
+
+@dataclass
+class LatencyDistribution:
+    """Response latency in milliseconds.
+
+    ``fixed`` takes the latency, ``uniform`` the low and high bounds,
+    ``normal`` the mean and standard deviation and ``lognormal`` the median
+    and the sigma of the underlying normal distribution.
+    """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.params[0], self.params[1]))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return self.params[0]
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """
+    Parse a latency distribution such as ``250``, ``uniform:100,500`` or
+    ``lognormal:800,0.5``
+
+    Args:
+        spec: ``kind:param[,param]``, or a number for a fixed latency
+
+    Returns:
+        LatencyDistribution
+
+    Raises:
+        ValueError: If the kind is unknown or the parameters don't fit it
+    """
+    kind, _, raw = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    kind = kind.strip().lower()
+    if kind not in LATENCY_KINDS:
+        raise ValueError(
+            f"Unknown latency distribution '{kind}' "
+            f"(valid: {', '.join(LATENCY_KINDS)})"
+        )
+    try:
+        params = tuple(float(value) for value in raw.split(","))
+    except ValueError as e:
+        raise ValueError(f"Invalid latency parameters '{raw}'") from e
+    if len(params) != LATENCY_KINDS[kind] or any(value < 0 for value in params):
+        raise ValueError(
+            f"Latency '{kind}' takes {LATENCY_KINDS[kind]} non-negative "
+            f"parameter(s), got '{raw}'"
+        )
+    if kind == "lognormal" and params[0] == 0:
+        raise ValueError("Lognormal latency needs a positive median")
+    return LatencyDistribution(kind, params)
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behavior of the fake server."""
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    # Share of requests answered with ``error_status``
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Extra delay of the first request for each model (a cold model load)
+    load_ms: float = 0.0
+    # Pieces a streamed answer is split into; latency is spread over them
+    stream_chunks: int = 8
+    seed: Optional[int] = None
+
+
+def fake_answer(prompt: str, json_output: bool = False) -> str:
+    """
+    Build a deterministic recommendation for a prompt
+
+    Args:
+        prompt: Prompt text; table names are taken from it
+        json_output: Answer packed prompts with a ``{"results": [...]}``
+            object, one entry per ``Query N:`` section
+
+    Returns:
+        Answer text
+    """
+    tables = _TABLE_RE.findall(prompt)
+    table = tables[0] if tables else "the table"
+    if json_output:
+        numbers = _QUERY_NUMBER_RE.findall(prompt) or ["1"]
+        return json.dumps(
+            {
+                "results": [
+                    {
+                        "id": int(number),
+                        "root_cause": "Sequential scan",
+                        "recommendation": "Add an index on the filtered columns",
+                        "estimated_impact": "30-50% faster",
+                    }
+                    for number in numbers
+                ]
+            }
+        )
+    return (
+        f"**Root Cause:** Sequential scan on {table}.\n"
+        f"**Recommendation:** Add an index on the columns {table} is "
+        "filtered by.\n"
+        "**Estimated Impact:** 30-50% faster"
+    )
+
+
+def _split(text: str, pieces: int) -> List[str]:
+    size = max(1, math.ceil(len(text) / max(1, pieces)))
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": []})
+        elif self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-fake"})
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        fake = self.server.fake
+        routes = {
+            "/api/chat": "ollama_chat",
+            "/api/generate": "ollama_generate",
+            "/v1/chat/completions": "openai_chat",
+            "/chat/completions": "openai_chat",
+        }
+        route = routes.get(self.path)
+        if route is None:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        fake.count(route)
+
+        model = str(body.get("model", ""))
+        fake.load(model)
+        if fake.should_fail():
+            fake.count("errors")
+            error = "injected failure"
+            if route == "openai_chat":
+                self._send_json(fake.config.error_status, {"error": {"message": error}})
+            else:
+                self._send_json(fake.config.error_status, {"error": error})
+            return
+
+        latency = fake.latency()
+        if route == "ollama_generate":
+            # An empty prompt only loads the model (pre-warm)
+            if body.get("prompt"):
+                time.sleep(latency)
+            answer = (
+                fake_answer(str(body.get("prompt", ""))) if body.get("prompt") else ""
+            )
+            self._send_json(
+                200,
+                {
+                    "model": model,
+                    "created_at": _now(),
+                    "response": answer,
+                    "done": True,
+                },
+            )
+            return
+
+        messages = body.get("messages") or []
+        prompt = str(messages[-1].get("content", "")) if messages else ""
+        if route == "ollama_chat":
+            json_output = body.get("format") == "json"
+            # Ollama streams unless told otherwise
+            stream = body.get("stream", True)
+        else:
+            response_format = body.get("response_format") or {}
+            json_output = response_format.get("type") == "json_object"
+            stream = bool(body.get("stream", False))
+        answer = fake_answer(prompt, json_output)
+
+        if not stream:
+            time.sleep(latency)
+            if route == "ollama_chat":
+                self._send_json(200, _ollama_message(model, answer, done=True))
+            else:
+                self._send_json(200, _openai_completion(model, answer))
+            return
+
+        pieces = _split(answer, fake.config.stream_chunks)
+        self._start_chunked(
+            "application/x-ndjson" if route == "ollama_chat" else "text/event-stream"
+        )
+        for piece in pieces:
+            time.sleep(latency / len(pieces))
+            if route == "ollama_chat":
+                self._send_chunk(json.dumps(_ollama_message(model, piece)) + "\n")
+            else:
+                chunk = _openai_chunk(model, {"content": piece}, None)
+                self._send_chunk(f"data: {json.dumps(chunk)}\n\n")
+        if route == "ollama_chat":
+            self._send_chunk(json.dumps(_ollama_message(model, "", done=True)) + "\n")
+        else:
+            final = _openai_chunk(model, {}, "stop")
+            self._send_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+        self._send_chunk("")
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _send_chunk(self, text: str) -> None:
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _ollama_message(model: str, content: str, done: bool = False) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "created_at": _now(),
+        "message": {"role": "assistant", "content": content},
+        "done": done,
+    }
+
+
+def _openai_completion(model: str, content: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _openai_chunk(
+    model: str, delta: Dict[str, str], finish_reason: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeLLMServer"
+
+
+class FakeLLMServer:
+    """An in-process fake Ollama/OpenAI server on a background thread."""
+
+    def __init__(
+        self,
+        config: Optional[FakeLLMConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            config: Latency, errors and streaming behavior
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.config = config or FakeLLMConfig()
+        self.stats: Counter = Counter()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._loaded: Set[str] = set()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-llm", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Fake LLM server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def latency(self) -> float:
+        """Seconds the next response takes."""
+        with self._lock:
+            return self.config.latency.sample(self._rng) / 1000
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.config.error_rate
+
+    def load(self, model: str) -> None:
+        """Wait for a cold model load on the model's first request."""
+        with self._lock:
+            cold = model not in self._loaded
+            self._loaded.add(model)
+        if cold and self.config.load_ms:
+            time.sleep(self.config.load_ms / 1000)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Fake Ollama/OpenAI chat server for benchmarks and tests"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        default=LatencyDistribution(),
+        help="fixed:MS, uniform:LOW,HIGH, normal:MEAN,STDDEV or "
+        "lognormal:MEDIAN,SIGMA (default: 0)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--load-ms", type=float, default=0.0, help="Cold start of each model"
+    )
+    parser.add_argument("--stream-chunks", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    server = FakeLLMServer(
+        FakeLLMConfig(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            load_ms=args.load_ms,
+            stream_chunks=args.stream_chunks,
+            seed=args.seed,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+    logger.info(f"Fake LLM server listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""
+Persistent history of analysis results in a local SQLite database.
+
+Keeps per-bucket statistics between runs, so changes that only show up
+across several log files (such as a query switching plans overnight) can
+be detected. Uses the standard library ``sqlite3`` module only.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .plan_history import PlanHistory, PlanStats
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plan_buckets (
+    fingerprint TEXT NOT NULL,
+    plan_hash TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    query TEXT,
+    executions INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    min_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (fingerprint, plan_hash, bucket_start)
+);
+"""
+
+
+class HistoryStore:
+    """SQLite-backed store of per-bucket analysis history."""
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) a history database
+
+        Args:
+            path: Database file path (``~`` is expanded); parent directories
+                are created
+
+        Raises:
+            ValueError: If the file was written by a newer schema version
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self._conn.close()
+            raise ValueError(
+                f"History database {path} has schema version {version}; "
+                f"this version supports up to {SCHEMA_VERSION}"
+            )
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def save_plan_history(self, history: PlanHistory) -> int:
+        """
+        Store plan buckets, replacing buckets already stored under the same
+        fingerprint, plan hash and start time
+
+        Replacing rather than adding keeps re-analyzing the same log
+        idempotent.
+
+        Args:
+            history: Buckets from the current run
+
+        Returns:
+            Number of buckets written
+        """
+        rows = [
+            (
+                stats.fingerprint,
+                stats.plan_hash,
+                bucket_start.isoformat(),
+                stats.shape,
+                history.queries.get(stats.fingerprint),
+                stats.executions,
+                stats.total_ms,
+                stats.min_ms,
+                stats.max_ms,
+                (stats.first_seen or bucket_start).isoformat(),
+                (stats.last_seen or bucket_start).isoformat(),
+                json.dumps(stats.histogram),
+            )
+            for (_, _, bucket_start), stats in history.buckets.items()
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO plan_buckets VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        logger.info(f"Saved {len(rows)} plan buckets to {self.path}")
+        return len(rows)
+
+    def load_plan_history(
+        self,
+        fingerprints: Optional[Iterable[str]] = None,
+        bucket_minutes: int = 60,
+    ) -> PlanHistory:
+        """
+        Load stored plan buckets
+
+        Args:
+            fingerprints: Restrict to these query fingerprints (default: all)
+            bucket_minutes: Bucket width recorded on the returned history
+
+        Returns:
+            PlanHistory with the stored buckets
+        """
+        query = "SELECT * FROM plan_buckets"
+        params: list = []
+        if fingerprints is not None:
+            params = list(fingerprints)
+            if not params:
+                return PlanHistory(bucket_minutes=bucket_minutes)
+            query += f" WHERE fingerprint IN ({', '.join('?' * len(params))})"
+
+        history = PlanHistory(bucket_minutes=bucket_minutes)
+        for row in self._conn.execute(query, params):
+            (
+                fingerprint,
+                digest,
+                bucket_start,
+                shape,
+                query_text,
+                executions,
+                total_ms,
+                min_ms,
+                max_ms,
+                first_seen,
+                last_seen,
+                histogram,
+            ) = row
+            history.buckets[
+                (fingerprint, digest, datetime.fromisoformat(bucket_start))
+            ] = PlanStats(
+                fingerprint=fingerprint,
+                plan_hash=digest,
+                shape=shape,
+                executions=executions,
+                total_ms=total_ms,
+                min_ms=min_ms,
+                max_ms=max_ms,
+                first_seen=datetime.fromisoformat(first_seen),
+                last_seen=datetime.fromisoformat(last_seen),
+                histogram={int(k): v for k, v in json.loads(histogram).items()},
+            )
+            if query_text:
+                history.queries.setdefault(fingerprint, query_text)
+        return history
@@ -0,0 +1,774 @@
+"""
+Offline index advisor.
+
+Reads tables, columns and existing indexes from a schema DDL file, extracts
+the columns every slow query pattern filters, joins and sorts on, and picks
+a small set of composite B-tree indexes that covers as much impact-weighted
+time as possible with a greedy set-cover heuristic. An existing index
+counts as coverage for every access its key prefix already serves, so only
+missing indexes are proposed.
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .sql_lexer import CLAUSE_KEYWORDS, Token, TokenType, identifier_name, tokenize
+
+logger = logging.getLogger(__name__)
+
+MAX_INDEX_COLUMNS = 3
+DEFAULT_MAX_INDEXES = 5
+# Candidates that would cover less than this share of the time are dropped
+MIN_BENEFIT_SHARE = 0.01
+
+_MAX_IDENTIFIER_LENGTH = 63
+_PLAIN_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_$]*$")
+
+_EQUALITY_OPERATORS = {"="}
+_RANGE_OPERATORS = {"<", ">", "<=", ">="}
+_PREDICATE_CLAUSES = {"WHERE", "ON", "HAVING"}
+_OTHER_CLAUSES = {
+    "SELECT",
+    "FROM",
+    "JOIN",
+    "SET",
+    "GROUP",
+    "LIMIT",
+    "OFFSET",
+    "FETCH",
+    "RETURNING",
+    "VALUES",
+    "USING",
+    "WINDOW",
+    "UNION",
+    "INTERSECT",
+    "EXCEPT",
+}
+_RELATION_KEYWORDS = {"FROM", "JOIN", "UPDATE", "INTO", "USING"}
+_NON_COLUMN_WORDS = CLAUSE_KEYWORDS | {
+    "NULL",
+    "TRUE",
+    "FALSE",
+    "NOT",
+    "IS",
+    "IN",
+    "CASE",
+    "DISTINCT",
+    "INTERVAL",
+    "ASC",
+    "DESC",
+    "NULLS",
+    "CURRENT_DATE",
+    "CURRENT_TIMESTAMP",
+    "LOCALTIMESTAMP",
+}
+_TABLE_CONSTRAINTS = {"CONSTRAINT", "PRIMARY", "UNIQUE", "FOREIGN", "CHECK", "EXCLUDE"}
+_SORT_MODIFIERS = {"ASC", "DESC", "NULLS", "FIRST", "LAST"}
+
+# (qualifier, column) as written, and (table, column) once resolved
+_ColumnRef = Tuple[Optional[str], str]
+_Resolver = Callable[[Optional[_ColumnRef]], Optional[Tuple[str, str]]]
+_Index = Tuple[str, Tuple[str, ...]]
+
+
+@dataclass
+class TableSchema:
+    """Columns and B-tree index keys of one table."""
+
+    name: str
+    columns: List[str] = field(default_factory=list)
+    indexes: List[Tuple[str, ...]] = field(default_factory=list)
+
+
+@dataclass
+class Schema:
+    """Tables defined by a DDL file, keyed by name as qualified there."""
+
+    tables: Dict[str, TableSchema] = field(default_factory=dict)
+
+    def table(self, name: str) -> Optional[TableSchema]:
+        """
+        Look up a table the way a query names it
+
+        Unqualified names resolve like the default search_path: a table the
+        DDL left unqualified, then one in ``public``, then the only schema
+        that defines it; ``public.t`` also finds an unqualified ``t``.
+        """
+        found = self.tables.get(name)
+        if found is not None:
+            return found
+        qualifier, _, bare = name.rpartition(".")
+        if qualifier:
+            return self.tables.get(bare) if qualifier == "public" else None
+        found = self.tables.get(f"public.{name}")
+        if found is not None:
+            return found
+        matches = [t for key, t in self.tables.items() if _bare_name(key) == name]
+        return matches[0] if len(matches) == 1 else None
+
+
+@dataclass
+class TableAccess:
+    """The columns one query pattern filters, joins and sorts one table on."""
+
+    table: str
+    equality: List[str] = field(default_factory=list)
+    range: List[str] = field(default_factory=list)
+    sort: List[str] = field(default_factory=list)
+    fingerprint: str = ""
+    weight: float = 0.0  # share of the pattern's slow query time (ms)
+
+    def desired_key(self) -> Tuple[str, ...]:
+        """Equality columns first, then one range column or the sort order."""
+        key = list(self.equality)
+        if self.range:
+            key.append(self.range[0])
+        else:
+            key.extend(column for column in self.sort if column not in key)
+        return tuple(key[:MAX_INDEX_COLUMNS])
+
+
+@dataclass
+class IndexRecommendation:
+    """A proposed index and the slow query time it is expected to serve."""
+
+    table: str
+    columns: Tuple[str, ...]
+    benefit_ms: float
+    share: float
+    fingerprints: List[str] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        # Indexes live in their table's schema, so it is left out of the name
+        name = "idx_" + "_".join((_bare_name(self.table),) + self.columns)
+        if len(name) <= _MAX_IDENTIFIER_LENGTH:
+            return name
+        # Names that only differ past the limit must not collide once cut
+        digest = hashlib.sha1(
+            "_".join((self.table,) + self.columns).encode()
+        ).hexdigest()[:8]
+        return f"{name[:_MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+
+    @property
+    def statement(self) -> str:
+        table = ".".join(_quote_identifier(part) for part in self.table.split("."))
+        columns = ", ".join(_quote_identifier(c) for c in self.columns)
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_quote_identifier(self.name)} "
+            f"ON {table} ({columns});"
+        )
+
+
+@dataclass
+class IndexAdvice:
+    """Recommended indexes and how much of the time they cover."""
+
+    recommendations: List[IndexRecommendation] = field(default_factory=list)
+    total_weight: float = 0.0
+    unknown_relations: List[str] = field(default_factory=list)
+
+    @property
+    def covered_share(self) -> float:
+        return sum(r.share for r in self.recommendations)
+
+
+def _bare_name(name: str) -> str:
+    return name.rpartition(".")[2]
+
+
+def _quote_identifier(name: str) -> str:
+    if _PLAIN_IDENTIFIER_RE.match(name) and name.upper() not in CLAUSE_KEYWORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _is_column_like(token: Token) -> bool:
+    return token.type is TokenType.QUOTED_IDENT or (
+        token.type is TokenType.WORD and token.upper not in _NON_COLUMN_WORDS
+    )
+
+
+def _split_statements(tokens: List[Token]) -> List[List[Token]]:
+    statements: List[List[Token]] = [[]]
+    for token in tokens:
+        if token.text == ";":
+            statements.append([])
+        else:
+            statements[-1].append(token)
+    return [statement for statement in statements if statement]
+
+
+def _split_items(tokens: List[Token], start: int) -> Tuple[List[List[Token]], int]:
+    """Top-level comma separated items of the list opened at start."""
+    items: List[List[Token]] = [[]]
+    depth = 0
+    position = start + 1
+    while position < len(tokens):
+        token = tokens[position]
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            if depth == 0:
+                break
+            depth -= 1
+        elif token.text == "," and depth == 0:
+            items.append([])
+            position += 1
+            continue
+        items[-1].append(token)
+        position += 1
+    return [item for item in items if item], position
+
+
+def _read_name(tokens: List[Token], position: int) -> Tuple[str, int]:
+    """Read ``name(.name)*``; returns the qualified name and next index."""
+    name = identifier_name(tokens[position])
+    position += 1
+    while (
+        position + 1 < len(tokens)
+        and tokens[position].text == "."
+        and tokens[position + 1].type in (TokenType.WORD, TokenType.QUOTED_IDENT)
+    ):
+        name += "." + identifier_name(tokens[position + 1])
+        position += 2
+    return name, position
+
+
+def _key_column(item: List[Token]) -> Optional[str]:
+    """The column of an index key item, or None for an expression."""
+    if not item or not _is_column_like(item[0]):
+        return None
+    if len(item) > 1 and item[1].text in ("(", "."):
+        return None
+    return identifier_name(item[0])
+
+
+def _index_key(items: List[List[Token]]) -> Tuple[str, ...]:
+    """Leading plain columns of an index key (expressions end the prefix)."""
+    key: List[str] = []
+    for item in items:
+        column = _key_column(item)
+        if column is None:
+            break
+        key.append(column)
+    return tuple(key)
+
+
+def _parse_create_table(statement: List[Token], schema: Schema) -> None:
+    position = 2
+    while position < len(statement) and statement[position].upper in (
+        "IF",
+        "NOT",
+        "EXISTS",
+    ):
+        position += 1
+    if position >= len(statement):
+        return
+    name, position = _read_name(statement, position)
+    if position >= len(statement) or statement[position].text != "(":
+        return  # CREATE TABLE ... AS / PARTITION OF
+    table = schema.tables.setdefault(name, TableSchema(name))
+    items, _ = _split_items(statement, position)
+    for item in items:
+        first = item[0].upper
+        if first in _TABLE_CONSTRAINTS:
+            _add_constraint_index(item, table)
+            continue
+        if first == "LIKE" or not _is_column_like(item[0]):
+            continue
+        column = identifier_name(item[0])
+        table.columns.append(column)
+        words = [token.upper for token in item[1:]]
+        if "UNIQUE" in words or ("PRIMARY" in words and "KEY" in words):
+            table.indexes.append((column,))
+
+
+def _add_constraint_index(item: List[Token], table: TableSchema) -> None:
+    """Record the index behind a PRIMARY KEY or UNIQUE table constraint."""
+    for position, token in enumerate(item):
+        if token.upper in ("PRIMARY", "UNIQUE"):
+            opening = next(
+                (p for p in range(position, len(item)) if item[p].text == "("), None
+            )
+            if opening is not None:
+                columns, _ = _split_items(item, opening)
+                key = _index_key(columns)
+                if key:
+                    table.indexes.append(key)
+            return
+
+
+def _parse_create_index(statement: List[Token], schema: Schema) -> None:
+    words = [token.upper for token in statement]
+    if "ON" not in words:
+        return
+    position = words.index("ON") + 1
+    if position < len(statement) and statement[position].upper == "ONLY":
+        position += 1
+    if position >= len(statement):
+        return
+    name, position = _read_name(statement, position)
+    method = "BTREE"
+    if position + 1 < len(statement) and statement[position].upper == "USING":
+        method = statement[position + 1].upper
+        position += 2
+    if method != "BTREE" or position >= len(statement):
+        return
+    if statement[position].text != "(":
+        return
+    items, close = _split_items(statement, position)
+    if "WHERE" in words[close:]:
+        return  # partial indexes only serve queries that imply their predicate
+    key = _index_key(items)
+    if key:
+        table = schema.table(name) or schema.tables.setdefault(name, TableSchema(name))
+        table.indexes.append(key)
+
+
+def _parse_alter_table(statement: List[Token], schema: Schema) -> None:
+    position = 2
+    while position < len(statement) and statement[position].upper in (
+        "IF",
+        "EXISTS",
+        "ONLY",
+    ):
+        position += 1
+    if position >= len(statement):
+        return
+    name, position = _read_name(statement, position)
+    table = schema.table(name)
+    if table is not None:
+        _add_constraint_index(statement[position:], table)
+
+
+def parse_schema(ddl: str) -> Schema:
+    """
+    Parse tables, columns and B-tree indexes from schema DDL
+
+    Understands CREATE TABLE (with inline and table-level PRIMARY KEY /
+    UNIQUE constraints), CREATE INDEX and ALTER TABLE ... ADD PRIMARY KEY /
+    UNIQUE. Expression keys end an index's usable prefix; partial and
+    non-B-tree indexes are ignored.
+
+    Args:
+        ddl: SQL text, e.g. the output of ``pg_dump --schema-only``
+
+    Returns:
+        Schema keyed by table name, schema-qualified where the DDL is
+    """
+    schema = Schema()
+    for statement in _split_statements(tokenize(ddl)):
+        words = [token.upper for token in statement[:4]]
+        if words[:1] != ["CREATE"] and words[:2] != ["ALTER", "TABLE"]:
+            continue
+        if words[:2] == ["ALTER", "TABLE"]:
+            _parse_alter_table(statement, schema)
+        elif "INDEX" in words:
+            _parse_create_index(statement, schema)
+        elif "TABLE" in words:
+            # CREATE [UNLOGGED | TEMP] TABLE
+            offset = words.index("TABLE") - 1
+            _parse_create_table(statement[offset:], schema)
+    logger.info(f"Loaded {len(schema.tables)} tables from schema DDL")
+    return schema
+
+
+def load_schema(path: str) -> Schema:
+    """
+    Load a schema DDL file (see parse_schema)
+
+    Args:
+        path: Path to the .sql file
+
+    Returns:
+        Parsed Schema
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    schema_path = Path(path)
+    if not schema_path.exists():
+        raise FileNotFoundError(f"Schema file not found: {path}")
+    return parse_schema(schema_path.read_text())
+
+
+def _relation_aliases(
+    tokens: List[Token], schema: Schema, unknown: Set[str]
+) -> Dict[str, str]:
+    """Map every alias and name of a statement's known tables to the table."""
+    aliases: Dict[str, str] = {}
+    count = len(tokens)
+    for position, token in enumerate(tokens):
+        keyword = token.upper
+        if keyword not in _RELATION_KEYWORDS:
+            continue
+        if (
+            keyword == "UPDATE"
+            and position
+            and tokens[position - 1].upper
+            in (
+                "FOR",
+                "DO",
+            )
+        ):
+            continue
+        item = position + 1
+        while item < count:
+            if tokens[item].upper == "ONLY":
+                item += 1
+            if item >= count or not _is_column_like(tokens[item]):
+                break
+            name, item = _read_name(tokens, item)
+            if item < count and tokens[item].text == "(":
+                break  # table function
+            table = schema.table(name)
+            if table is not None:
+                aliases[name] = table.name
+                # The bare table name qualifies columns of a qualified one too
+                aliases.setdefault(_bare_name(name), table.name)
+            else:
+                unknown.add(name)
+            if item < count and tokens[item].upper == "AS":
+                item += 1
+            if item < count and _is_column_like(tokens[item]):
+                if table is not None:
+                    aliases[identifier_name(tokens[item])] = table.name
+                item += 1
+            if keyword == "FROM" and item < count and tokens[item].text == ",":
+                item += 1
+                continue
+            break
+    return aliases
+
+
+def _column_at(tokens: List[Token], first: int, last: int) -> Optional[_ColumnRef]:
+    """(qualifier, column) if tokens first..last are a plain column reference."""
+    if first < 0 or last >= len(tokens) or first > last:
+        return None
+    if not all(_is_column_like(tokens[p]) for p in range(first, last + 1, 2)):
+        return None
+    if last == first:
+        return None, identifier_name(tokens[first])
+    if last == first + 2 and tokens[first + 1].text == ".":
+        return identifier_name(tokens[first]), identifier_name(tokens[last])
+    return None
+
+
+def _left_operand(tokens: List[Token], operator: int) -> Optional[_ColumnRef]:
+    last = operator - 1
+    if last < 0 or not _is_column_like(tokens[last]):
+        return None
+    if last >= 1 and tokens[last - 1].text == "::":
+        return None  # col::type, the cast hides the column
+    if last >= 2 and tokens[last - 1].text == ".":
+        return _column_at(tokens, last - 2, last)
+    return _column_at(tokens, last, last)
+
+
+def _right_operand(tokens: List[Token], operator: int) -> Optional[_ColumnRef]:
+    first = operator + 1
+    count = len(tokens)
+    if first >= count or not _is_column_like(tokens[first]):
+        return None
+    last = first + 2 if first + 2 < count and tokens[first + 1].text == "." else first
+    following = tokens[last + 1].text if last + 1 < count else ""
+    if following in ("(", "::", "."):
+        return None
+    return _column_at(tokens, first, last)
+
+
+def extract_table_access(sql: str, schema: Schema) -> List[TableAccess]:
+    """
+    Extract the filter, join and sort columns a statement uses per table
+
+    Only plain (optionally qualified) columns compared with ``=``, ``IN``,
+    ``<``/``>``/``BETWEEN`` or a prefix ``LIKE``, joined with ``=``, or
+    listed at the start of ORDER BY are considered; columns wrapped in
+    functions or casts cannot use a plain index and are skipped. Each join
+    column is reported as a separate access of its own table.
+
+    Args:
+        sql: SQL statement
+        schema: Schema used to resolve aliases and unqualified columns
+
+    Returns:
+        TableAccess list: filters and sorts per table, then join columns
+    """
+    return _extract(sql, schema, set())
+
+
+def _extract(sql: str, schema: Schema, unknown: Set[str]) -> List[TableAccess]:
+    tokens = tokenize(sql)
+    aliases = _relation_aliases(tokens, schema, unknown)
+    if not aliases:
+        return []
+    tables = sorted(set(aliases.values()))
+    accesses = {table: TableAccess(table) for table in tables}
+    # Join keys are looked up on the inner side of a nested loop, whichever
+    # that turns out to be, so each is its own single-column access
+    joins: List[Tuple[str, str]] = []
+
+    def resolve(ref: Optional[_ColumnRef]) -> Optional[Tuple[str, str]]:
+        if ref is None:
+            return None
+        qualifier, column = ref
+        if qualifier is not None:
+            table = aliases.get(qualifier)
+            candidates = [table] if table is not None else []
+        else:
+            candidates = tables
+        owners = [
+            t
+            for t in candidates
+            if column in (schema.tables[t].columns if t in schema.tables else ())
+        ]
+        return (owners[0], column) if len(owners) == 1 else None
+
+    def add(values: List[str], column: str) -> None:
+        if column not in values:
+            values.append(column)
+
+    clause = ""
+    stack: List[str] = []
+    count = len(tokens)
+    for position, token in enumerate(tokens):
+        text, upper = token.text, token.upper
+        if text == "(":
+            stack.append(clause)
+            continue
+        if text == ")":
+            clause = stack.pop() if stack else ""
+            continue
+        if upper in _PREDICATE_CLAUSES:
+            clause = "predicate"
+            continue
+        if (
+            upper == "ORDER"
+            and position + 1 < count
+            and tokens[position + 1].upper == "BY"
+        ):
+            _add_sort_columns(tokens, position + 2, resolve, accesses)
+        if upper in _OTHER_CLAUSES or upper == "ORDER":
+            clause = ""
+            continue
+        if clause != "predicate":
+            continue
+
+        if text in _EQUALITY_OPERATORS or text in _RANGE_OPERATORS:
+            left = resolve(_left_operand(tokens, position))
+            right = resolve(_right_operand(tokens, position))
+            is_range = text in _RANGE_OPERATORS
+            if left is not None and right is not None:
+                if left[0] != right[0] and not is_range:
+                    joins.extend(k for k in (left, right) if k not in joins)
+                continue
+            target = left or right
+            if target is not None:
+                values = accesses[target[0]]
+                add(values.range if is_range else values.equality, target[1])
+        elif upper in ("IN", "BETWEEN", "LIKE"):
+            if position and tokens[position - 1].upper == "NOT":
+                continue
+            target = resolve(_left_operand(tokens, position))
+            if target is None:
+                continue
+            values = accesses[target[0]]
+            if upper == "IN":
+                add(values.equality, target[1])
+            elif upper == "BETWEEN":
+                add(values.range, target[1])
+            elif position + 1 < count and tokens[position + 1].type is TokenType.STRING:
+                pattern = tokens[position + 1].text
+                body = pattern[pattern.find("'") + 1 :]
+                if body and body[0] not in "%_'":
+                    add(values.range, target[1])
+
+    found = [
+        access
+        for access in accesses.values()
+        if access.equality or access.range or access.sort
+    ]
+    found.extend(TableAccess(table, equality=[column]) for table, column in joins)
+    return found
+
+
+def _add_sort_columns(
+    tokens: List[Token],
+    position: int,
+    resolve: _Resolver,
+    accesses: Dict[str, TableAccess],
+) -> None:
+    """Record the leading plain ORDER BY columns that belong to one table."""
+    table: Optional[str] = None
+    columns: List[str] = []
+    count = len(tokens)
+    while position < count:
+        last = position
+        if position + 2 < count and tokens[position + 1].text == ".":
+            last = position + 2
+        target = resolve(_column_at(tokens, position, last))
+        if target is None or (table is not None and target[0] != table):
+            break
+        table = target[0]
+        columns.append(target[1])
+        position = last + 1
+        while position < count and tokens[position].upper in _SORT_MODIFIERS:
+            position += 1
+        if position < count and tokens[position].text == ",":
+            position += 1
+            continue
+        break
+    if table is not None:
+        for column in columns:
+            if column not in accesses[table].sort:
+                accesses[table].sort.append(column)
+
+
+def _coverage(key: Tuple[str, ...], access: TableAccess) -> float:
+    """Share of an access's desired key that an index key can serve."""
+    desired = access.desired_key()
+    if not desired:
+        return 0.0
+    equality = set(access.equality)
+    used = 0
+    position = 0
+    while position < len(key) and key[position] in equality:
+        used += 1
+        position += 1
+    tail = key[position:]
+    if access.range:
+        if tail and tail[0] == access.range[0]:
+            used += 1
+    else:
+        remaining = [column for column in access.sort if column not in equality]
+        for column, wanted in zip(tail, remaining):
+            if column != wanted:
+                break
+            used += 1
+    return min(1.0, used / len(desired))
+
+
+def advise_indexes(
+    queries: pd.DataFrame,
+    schema: Schema,
+    max_indexes: int = DEFAULT_MAX_INDEXES,
+    min_benefit_share: float = MIN_BENEFIT_SHARE,
+) -> IndexAdvice:
+    """
+    Propose a small set of composite indexes for the slow query patterns
+
+    Every pattern's total slow query time is split evenly across the table
+    accesses it makes (filters and sorts per table, each join key). Each candidate
+    index (one per distinct desired key) is scored by the weighted increase
+    in coverage it brings over the existing and already chosen indexes, and
+    the best candidate is taken until ``max_indexes`` are chosen or no
+    candidate adds ``min_benefit_share`` of the total time. Chosen indexes
+    made redundant by a later, longer one are dropped again.
+
+    Args:
+        queries: Per-fingerprint DataFrame from run_slow_query_analysis with
+            columns [query_hash, example_query, total_duration]
+        schema: Parsed schema DDL (see load_schema)
+        max_indexes: Maximum number of indexes to propose
+        min_benefit_share: Minimum share of total time a new index must serve
+
+    Returns:
+        IndexAdvice with the chosen indexes in order of benefit
+    """
+    advice = IndexAdvice()
+    unknown: Set[str] = set()
+    accesses: List[TableAccess] = []
+    for row in queries.itertuples(index=False):
+        weight = float(row.total_duration)
+        advice.total_weight += weight
+        found = _extract(str(row.example_query), schema, unknown)
+        for access in found:
+            # A statement's time is shared by the accesses it makes
+            access.fingerprint = str(row.query_hash)
+            access.weight = weight / len(found)
+            accesses.append(access)
+    advice.unknown_relations = sorted(unknown)
+    if not accesses or advice.total_weight <= 0:
+        return advice
+
+    by_table: Dict[str, List[int]] = {}
+    for i, access in enumerate(accesses):
+        by_table.setdefault(access.table, []).append(i)
+    existing = [
+        max(
+            (_coverage(key, access) for key in schema.tables[access.table].indexes),
+            default=0.0,
+        )
+        for access in accesses
+    ]
+    candidates = sorted(
+        {(access.table, access.desired_key()) for access in accesses}
+        - {(t.name, key) for t in schema.tables.values() for key in t.indexes}
+    )
+
+    def gains(index: _Index, current: List[float]) -> Dict[int, float]:
+        """Weighted coverage increase per access if index were added."""
+        table, key = index
+        served = {}
+        for i in by_table[table]:
+            gain = _coverage(key, accesses[i]) - current[i]
+            if gain > 0:
+                served[i] = accesses[i].weight * gain
+        return served
+
+    def apply(index: _Index, current: List[float]) -> None:
+        table, key = index
+        for i in by_table[table]:
+            current[i] = max(current[i], _coverage(key, accesses[i]))
+
+    threshold = min_benefit_share * advice.total_weight
+    current = list(existing)
+    chosen: List[_Index] = []
+    while len(chosen) < max_indexes:
+        scored = [
+            (sum(gains(c, current).values()), c) for c in candidates if c not in chosen
+        ]
+        if not scored:
+            break
+        benefit, best = max(scored, key=lambda item: item[0])
+        if benefit <= 0 or benefit < threshold:
+            break
+        chosen.append(best)
+        apply(best, current)
+
+    # Drop indexes whose coverage the remaining ones fully provide
+    for index in list(reversed(chosen)):
+        others = list(existing)
+        for other in chosen:
+            if other != index:
+                apply(other, others)
+        if not gains(index, others):
+            chosen.remove(index)
+
+    current = list(existing)
+    for table, key in chosen:
+        served = gains((table, key), current)
+        apply((table, key), current)
+        benefit = sum(served.values())
+        advice.recommendations.append(
+            IndexRecommendation(
+                table=table,
+                columns=key,
+                benefit_ms=benefit,
+                share=benefit / advice.total_weight,
+                fingerprints=sorted({accesses[i].fingerprint for i in served}),
+            )
+        )
+    advice.recommendations.sort(key=lambda r: r.benefit_ms, reverse=True)
+    logger.info(
+        f"Index advisor proposed {len(advice.recommendations)} indexes covering "
+        f"{advice.covered_share:.1%} of slow query time"
+    )
+    return advice
@@ -0,0 +1,266 @@
+"""
+On-disk cache of LLM recommendations.
+
+The same top queries are analyzed on every run, so recommendations are
+kept in a local SQLite file, keyed by query fingerprint, provider, model,
+temperature and a hash of the prompt template. Entries expire after a TTL
+and the least recently used ones are evicted beyond a size limit. The
+normalized query text is kept too, so similar queries can find an entry
+(see llm_similarity).
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    cache_key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    recommendation TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    query_text TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS recommendations_last_used
+    ON recommendations (last_used);
+"""
+
+# Upgrades from each older schema version to the next
+_MIGRATIONS = {
+    1: "ALTER TABLE recommendations ADD COLUMN query_text TEXT NOT NULL DEFAULT ''",
+}
+
+
+def cache_key(
+    fingerprint: str, provider: str, model: str, temperature: float, prompt: str
+) -> str:
+    """
+    Build the cache key of one recommendation
+
+    Args:
+        fingerprint: Query fingerprint (see analyzer.query_fingerprint)
+        provider: LLM provider name
+        model: Model name
+        temperature: Sampling temperature
+        prompt: Prompt template; any change to it invalidates old entries
+
+    Returns:
+        SHA-256 hex digest
+    """
+    prompt_version = hashlib.sha256(prompt.encode()).hexdigest()
+    payload = json.dumps([fingerprint, provider, model, temperature, prompt_version])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Cache effectiveness of one run."""
+
+    hits: int = 0
+    misses: int = 0
+    # Misses answered with the recommendation of a similar query
+    similar_hits: int = 0
+    # LLM latency the hits took when they were first generated
+    saved_ms: float = 0.0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class RecommendationCache:
+    """SQLite-backed TTL + LRU cache of LLM recommendations."""
+
+    def __init__(self, path: str, ttl_hours: float = 168, max_entries: int = 1000):
+        """
+        Open (and create if needed) a cache database
+
+        Args:
+            path: Database file path (``~`` is expanded); parent directories
+                are created
+            ttl_hours: Age after which an entry is regenerated
+            max_entries: Entries kept; the least recently used are evicted
+
+        Raises:
+            ValueError: If the file was written by a newer schema version
+        """
+        self.path = Path(path).expanduser()
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self._conn.close()
+            raise ValueError(
+                f"LLM cache {path} has schema version {version}; "
+                f"this version supports up to {SCHEMA_VERSION}"
+            )
+        with self._conn:
+            if version:
+                for old in range(version, SCHEMA_VERSION):
+                    self._conn.execute(_MIGRATIONS[old])
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        logger.info(f"LLM recommendation cache: {self.path}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "RecommendationCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a recommendation, counting the hit or miss
+
+        Args:
+            key: Key from cache_key
+
+        Returns:
+            The cached recommendation, or None if missing or expired
+        """
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT recommendation, latency_ms, created_at FROM recommendations "
+            "WHERE cache_key = ?",
+            (key,),
+        ).fetchone()
+        if row is None or now - row[2] > self.ttl_seconds:
+            self.stats.misses += 1
+            return None
+        with self._conn:
+            self._conn.execute(
+                "UPDATE recommendations SET last_used = ? WHERE cache_key = ?",
+                (now, key),
+            )
+        self.stats.hits += 1
+        self.stats.saved_ms += row[1]
+        return str(row[0])
+
+    def get_similar(self, key: str) -> Optional[str]:
+        """
+        Look up the recommendation of a similar query, counting a similar hit
+
+        Args:
+            key: Key of the similar query's entry
+
+        Returns:
+            The cached recommendation, or None if missing or expired
+        """
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT recommendation, latency_ms, created_at FROM recommendations "
+            "WHERE cache_key = ?",
+            (key,),
+        ).fetchone()
+        if row is None or now - row[2] > self.ttl_seconds:
+            return None
+        with self._conn:
+            self._conn.execute(
+                "UPDATE recommendations SET last_used = ? WHERE cache_key = ?",
+                (now, key),
+            )
+        self.stats.similar_hits += 1
+        self.stats.saved_ms += row[1]
+        return str(row[0])
+
+    def answered(self, provider: str, model: str) -> List[Tuple[str, str]]:
+        """
+        List the fresh entries of a model that have their query text
+
+        Args:
+            provider: LLM provider
+            model: Model name
+
+        Returns:
+            ``(fingerprint, normalized query text)`` pairs, most recently
+            used first
+        """
+        rows = self._conn.execute(
+            "SELECT fingerprint, query_text FROM recommendations "
+            "WHERE provider = ? AND model = ? AND query_text != '' "
+            "AND created_at >= ? ORDER BY last_used DESC",
+            (provider, model, time.time() - self.ttl_seconds),
+        ).fetchall()
+        return [(str(fingerprint), str(text)) for fingerprint, text in rows]
+
+    def contains(self, key: str) -> bool:
+        """Whether a fresh entry exists, without counting a hit or miss."""
+        row = self._conn.execute(
+            "SELECT created_at FROM recommendations WHERE cache_key = ?", (key,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def put(
+        self,
+        key: str,
+        recommendation: str,
+        latency_ms: float,
+        fingerprint: str = "",
+        provider: str = "",
+        model: str = "",
+        query_text: str = "",
+    ) -> None:
+        """
+        Store a recommendation, drop expired entries and evict the least
+        recently used ones beyond ``max_entries``
+
+        Args:
+            key: Key from cache_key
+            recommendation: Text returned by the LLM
+            latency_ms: Time the request took
+            fingerprint: Query fingerprint (kept for inspection)
+            provider: LLM provider (kept for inspection)
+            model: Model name (kept for inspection)
+            query_text: Normalized query, for similarity lookups
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recommendations (cache_key, fingerprint, "
+                "provider, model, recommendation, latency_ms, created_at, "
+                "last_used, query_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    fingerprint,
+                    provider,
+                    model,
+                    recommendation,
+                    latency_ms,
+                    now,
+                    now,
+                    query_text,
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM recommendations WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM recommendations WHERE cache_key NOT IN ("
+                "SELECT cache_key FROM recommendations "
+                "ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
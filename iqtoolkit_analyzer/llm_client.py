@@ -1,7 +1,24 @@
 import os
+import json
 import logging
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable, Optional, Dict, Any, List, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+
+from .analyzer import normalize_query, query_fingerprint
+from .llm_cache import RecommendationCache, cache_key
+from .llm_similarity import SimilarityIndex
+from .llm_resilience import (
+    CircuitBreaker,
+    LatencyHistogram,
+    Provider,
+    ProviderChain,
+    RetryPolicy,
+)
+from .prompt_compactor import compact_query, count_tokens
 
 try:
     from openai import OpenAI
@@ -14,6 +31,17 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Provider clients shared by every LLMClient, keyed by class and settings
+_shared_clients: Dict[Tuple[Any, ...], Any] = {}
+_shared_clients_lock = threading.Lock()
+
+# Placeholder for the query while the rest of a prompt is sized
+_QUERY_SLOT = "<<query>>"
+# Token budget left to a query however long the rest of the prompt is
+MIN_QUERY_TOKENS = 64
+# Result of requests not started before the batch's time budget ran out
+BUDGET_EXHAUSTED = "Error generating recommendations: LLM time budget spent"
+
 
 @dataclass
 class LLMConfig:
@@ -22,11 +50,195 @@ class LLMConfig:
     api_key: Optional[str] = None
     llm_provider: str = "openai"  # 'openai' or 'ollama'
     openai_model: str = "gpt-4o-mini"
+    # OpenAI-compatible endpoint (e.g. a proxy or fake_llm_server)
+    openai_base_url: Optional[str] = None
     ollama_model: str = "arctic-text2sql-r1:7b"
     ollama_host: Optional[str] = None
     temperature: float = 0.3
     max_tokens: int = 300
     timeout: int = 30
+    # Requests in flight at once during batch generation
+    openai_max_concurrency: int = 8
+    ollama_max_concurrency: int = 2
+    # On-disk recommendation cache (disabled when None)
+    cache_path: Optional[str] = None
+    cache_ttl_hours: float = 168
+    cache_max_entries: int = 1000
+    # Cache misses reuse the cached recommendation of a query at least this
+    # similar (TF-IDF cosine over SQL tokens, 0-1; disabled when None)
+    similarity_threshold: Optional[float] = None
+    # Several queries per request, answered as JSON (see pack_queries)
+    pack_queries: bool = False
+    pack_token_budget: int = 2000
+    # Prompt size per query; longer queries are compacted to fit
+    max_prompt_tokens: int = 2000
+    # Providers tried in order after this one, as dicts of the provider
+    # fields above (llm_provider, ollama_host, ollama_model, ...)
+    fallback_providers: List[Dict[str, Any]] = field(default_factory=list)
+    # Retries of each provider, with exponential backoff and full jitter
+    max_retries: int = 0
+    retry_backoff_seconds: float = 0.5
+    retry_max_backoff_seconds: float = 8.0
+    # Hedge requests slower than this latency percentile (disabled if None)
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = 20
+    # How long Ollama keeps the model loaded after a request (e.g. "30m")
+    ollama_keep_alive: Optional[Union[str, float]] = None
+    # Consecutive failures that open a provider's circuit, and its cool-down
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 60.0
+
+
+def shared_client(factory: Callable[..., Any], **settings: Any) -> Any:
+    """
+    Return the provider client built by ``factory(**settings)``, creating
+    it only once per process
+
+    The OpenAI and Ollama clients keep a pool of HTTP connections; sharing
+    one client per provider and host lets every LLMClient (and every part
+    of the pipeline) reuse those connections.
+
+    Args:
+        factory: Client class, e.g. ``OpenAI`` or ``ollama.Client``
+        **settings: Constructor arguments (API key, host, timeout, ...)
+
+    Returns:
+        The shared client instance
+    """
+    key = (factory, tuple(sorted(settings.items())))
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = factory(**settings)
+            _shared_clients[key] = client
+            logger.debug(
+                f"Created shared LLM client {getattr(factory, '__name__', '')}"
+            )
+        return client
+
+
+def _format_stats(
+    avg_duration: float,
+    frequency: int,
+    max_duration: Optional[float],
+    impact_score: Optional[float],
+) -> str:
+    stats = [
+        f"Average Duration: {avg_duration:.2f} ms",
+        f"Execution Frequency: {frequency} times",
+    ]
+
+    if max_duration:
+        stats.append(f"Max Duration: {max_duration:.2f} ms")
+
+    if impact_score:
+        stats.append(f"Impact Score: {impact_score:.2f}")
+
+    return "\n".join(stats)
+
+
+def _format_findings(findings: Optional[List[str]]) -> str:
+    if not findings:
+        return ""
+    listed = "\n".join(f"- {finding}" for finding in findings)
+    return (
+        f"\nStatic analysis already found:\n{listed}\n"
+        "Confirm or refine these rather than restating them.\n"
+    )
+
+
+def pack_queries(prompts: List[str], token_budget: int) -> List[List[int]]:
+    """
+    Group queries into requests that fit an input token budget
+
+    Args:
+        prompts: Prompt text of each query, used to size it
+        token_budget: Input tokens allowed for the queries of one request
+
+    Returns:
+        Lists of query indexes in input order; a query over the budget on
+        its own gets a request to itself
+    """
+    packs: List[List[int]] = []
+    used = 0
+    for index, prompt in enumerate(prompts):
+        tokens = count_tokens(prompt)
+        if packs and used + tokens <= token_budget:
+            packs[-1].append(index)
+            used += tokens
+        else:
+            packs.append([index])
+            used = tokens
+    return packs
+
+
+def _format_packed_item(item: Dict[str, Any]) -> Optional[str]:
+    parts = [
+        f"**{title}:** {str(item[key]).strip()}"
+        for key, title in [
+            ("root_cause", "Root Cause"),
+            ("recommendation", "Recommendation"),
+            ("estimated_impact", "Estimated Impact"),
+        ]
+        if item.get(key)
+    ]
+    # Without a recommendation the entry is of no use
+    if not item.get("recommendation"):
+        return None
+    return "\n\n".join(parts)
+
+
+def parse_packed_response(text: str, count: int) -> List[Optional[str]]:
+    """
+    Split a packed JSON response into per-query recommendations
+
+    Accepts ``{"results": [...]}`` or a bare array, optionally inside a
+    Markdown code fence or surrounded by prose. Entries are matched by
+    their ``id`` (1-based), falling back to their position.
+
+    Args:
+        text: Raw response text
+        count: Number of queries in the request
+
+    Returns:
+        One formatted recommendation per query, None where the response
+        has no usable entry
+    """
+    results: List[Optional[str]] = [None] * count
+    starts = [pos for pos in (text.find("{"), text.find("[")) if pos >= 0]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if not starts or end < 0:
+        return results
+    try:
+        data = json.loads(text[min(starts) : end + 1])
+    except ValueError:
+        logger.warning("Packed LLM response is not valid JSON")
+        return results
+
+    if isinstance(data, dict):
+        data = data.get("results", data.get("queries", [data]))
+    if not isinstance(data, list):
+        return results
+    for position, item in enumerate(data):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id", position + 1)) - 1
+        except (TypeError, ValueError):
+            index = position
+        if 0 <= index < count and results[index] is None:
+            results[index] = _format_packed_item(item)
+    return results
+
+
+@dataclass
+class _Endpoint:
+    """A connected provider: its client (None for the default Ollama host)."""
+
+    provider: str
+    model: str
+    client: Any
+    name: str
 
 
 class LLMClient:
@@ -35,44 +247,164 @@ class LLMClient:
     def __init__(self, config: Optional[LLMConfig] = None):
         self.config = config or LLMConfig()
         self.provider = self.config.llm_provider.lower()
-        self._ollama_client = None
-
+        primary = self._connect(
+            self.provider,
+            self.config.openai_model,
+            self.config.ollama_model,
+            self.config.ollama_host,
+            self.config.api_key,
+            self.config.openai_base_url,
+        )
+        self.model = primary.model
         if self.provider == "openai":
+            self.client = primary.client
+        self._ollama_client = primary.client if self.provider == "ollama" else None
+        self._primary = primary
+
+        endpoints = [primary]
+        for fallback in self.config.fallback_providers:
+            endpoints.append(
+                self._connect(
+                    str(fallback.get("llm_provider", self.provider)).lower(),
+                    fallback.get("openai_model", self.config.openai_model),
+                    fallback.get("ollama_model", self.config.ollama_model),
+                    fallback.get("ollama_host"),
+                    fallback.get("api_key", self.config.api_key),
+                    fallback.get("openai_base_url"),
+                )
+            )
+        self.chain = ProviderChain(
+            [
+                Provider(
+                    endpoint.name,
+                    partial(self._complete_with, endpoint),
+                    CircuitBreaker(
+                        self.config.circuit_failure_threshold,
+                        self.config.circuit_reset_seconds,
+                    ),
+                )
+                for endpoint in endpoints
+            ],
+            RetryPolicy(
+                self.config.max_retries,
+                self.config.retry_backoff_seconds,
+                self.config.retry_max_backoff_seconds,
+            ),
+            hedge_percentile=self.config.hedge_percentile,
+            hedge_min_samples=self.config.hedge_min_samples,
+        )
+        if len(endpoints) > 1:
+            logger.info(
+                "LLM provider chain: "
+                + " -> ".join(provider.name for provider in self.chain.providers)
+            )
+
+        self.cache: Optional[RecommendationCache] = None
+        if self.config.cache_path:
+            self.cache = RecommendationCache(
+                self.config.cache_path,
+                ttl_hours=self.config.cache_ttl_hours,
+                max_entries=self.config.cache_max_entries,
+            )
+        # Built from the cache on first use (see _similar_entry)
+        self._similar: Optional[SimilarityIndex] = None
+
+    def _connect(
+        self,
+        provider: str,
+        openai_model: str,
+        ollama_model: str,
+        ollama_host: Optional[str],
+        api_key: Optional[str],
+        openai_base_url: Optional[str] = None,
+    ) -> _Endpoint:
+        """Creates the client of one provider in the chain."""
+        if provider == "openai":
             if OpenAI is None:
                 raise ImportError("openai package not installed")
-            api_key = self.config.api_key or os.getenv("OPENAI_API_KEY")
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError(
                     "OpenAI API key not found. Set OPENAI_API_KEY environment "
                     "variable or pass it in LLMConfig."
                 )
-            self.client = OpenAI(api_key=api_key, timeout=self.config.timeout)
-            self.model = self.config.openai_model
-            logger.info(f"Initialized OpenAI client with model: {self.model}")
-        elif self.provider == "ollama":
+            settings: Dict[str, Any] = {"api_key": api_key}
+            name = f"openai:{openai_model}"
+            if openai_base_url:
+                settings["base_url"] = openai_base_url
+                name += f"@{openai_base_url}"
+            client = shared_client(OpenAI, timeout=self.config.timeout, **settings)
+            logger.info(f"Initialized OpenAI client with model: {openai_model}")
+            return _Endpoint(provider, openai_model, client, name)
+        elif provider == "ollama":
             if ollama is None:
                 raise ImportError("ollama package not installed")
-            if self.config.ollama_host and hasattr(ollama, "Client"):
-                try:
-                    self._ollama_client = ollama.Client(host=self.config.ollama_host)
+            # A client of our own even for the default host (None): the
+            # module-level functions have no timeout, so a hung server would
+            # never fail over
+            ollama_client = None
+            try:
+                ollama_client = shared_client(
+                    ollama.Client, host=ollama_host, timeout=self.config.timeout
+                )
+                if ollama_host:
                     logger.info(
                         "Initialized Ollama client with custom host: %s",
-                        self.config.ollama_host,
-                    )
-                except (
-                    Exception
-                ) as client_error:  # pragma: no cover - network dependent
-                    logger.warning(
-                        "Failed to initialize Ollama client with host %s (%s). "
-                        "Falling back to default host.",
-                        self.config.ollama_host,
-                        client_error,
+                        ollama_host,
                     )
-                    self._ollama_client = None
-            self.model = self.config.ollama_model
-            logger.info(f"Initialized Ollama client with model: {self.model}")
+            except Exception as client_error:  # pragma: no cover - network dependent
+                logger.warning(
+                    "Failed to initialize Ollama client with host %s (%s). "
+                    "Falling back to default host.",
+                    ollama_host,
+                    client_error,
+                )
+                ollama_host = None
+            logger.info(f"Initialized Ollama client with model: {ollama_model}")
+            name = f"ollama:{ollama_model}"
+            if ollama_host:
+                name += f"@{ollama_host}"
+            return _Endpoint(provider, ollama_model, ollama_client, name)
         else:
-            raise ValueError(f"Unknown LLM provider: {self.provider}")
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+    def prewarm(self) -> Optional[threading.Thread]:
+        """
+        Load the Ollama model in the background
+
+        The first request after the server has been idle otherwise waits for
+        the model to load, which can take tens of seconds. Start this while
+        the log is parsed so the model is resident when recommendations are
+        requested; it is kept loaded for ``ollama_keep_alive``.
+
+        Returns:
+            The warm-up thread, or None unless the primary provider is Ollama
+        """
+        if self._primary.provider != "ollama":
+            return None
+        endpoint = self._primary
+        target = endpoint.client or ollama
+        keep_alive = self.config.ollama_keep_alive
+
+        def warm_up() -> None:
+            start = time.monotonic()
+            try:
+                # An empty prompt loads the model without generating anything
+                target.generate(model=endpoint.model, prompt="", keep_alive=keep_alive)
+                logger.info(
+                    f"Warmed up {endpoint.name} in {time.monotonic() - start:.1f}s"
+                )
+            except Exception as e:
+                logger.warning(f"Could not warm up {endpoint.name}: {e}")
+
+        thread = threading.Thread(target=warm_up, name="llm-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def latency_histograms(self) -> Dict[str, LatencyHistogram]:
+        """Latency histogram of each provider in the chain, by name."""
+        return self.chain.latency
 
     def generate_recommendations(
         self,
@@ -81,79 +413,180 @@ class LLMClient:
         frequency: int,
         max_duration: Optional[float] = None,
         impact_score: Optional[float] = None,
+        findings: Optional[List[str]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
     ) -> str:
         """
         Uses LLM to analyze query and suggest optimizations
+
+        ``findings`` are static anti-pattern findings passed on to the model
+        so it doesn't have to rediscover them. With ``on_token`` the response
+        is streamed and each piece of text is passed to it as it arrives.
         """
         try:
             prompt = self._build_prompt(
-                query_text, avg_duration, frequency, max_duration, impact_score
+                query_text,
+                avg_duration,
+                frequency,
+                max_duration,
+                impact_score,
+                findings,
             )
             logger.debug(
                 f"Requesting recommendations for query " f"(avg: {avg_duration:.2f}ms)"
             )
-            if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a PostgreSQL performance "
-                            "optimization expert.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=self.config.temperature,
-                    max_tokens=self.config.max_tokens,
-                )
+            return self._complete(prompt, on_token=on_token)
+        except Exception as e:
+            logger.error(f"Error generating recommendations: {e}")
+            return f"Error generating recommendations: {str(e)}"
+
+    def _complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        json_output: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Send one prompt through the provider chain
+
+        Providers are tried in order, with retries, hedging and circuit
+        breaking as configured (see ProviderChain).
+
+        Args:
+            prompt: User prompt
+            max_tokens: Response token limit (default: ``config.max_tokens``)
+            json_output: Ask the provider for a JSON object response
+            on_token: Stream the response, passing each piece of text to this
+                callback as it arrives
+
+        Returns:
+            Response text ("" when the provider returned no content)
+
+        Raises:
+            ProviderChainError: If every provider failed
+        """
+        return self.chain.call(
+            prompt, max_tokens=max_tokens, json_output=json_output, on_token=on_token
+        )
+
+    def _complete_with(
+        self,
+        endpoint: _Endpoint,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        json_output: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Send one prompt to one provider
+
+        Args:
+            endpoint: Provider to call
+            prompt: User prompt
+            max_tokens: Response token limit (default: ``config.max_tokens``)
+            json_output: Ask the provider for a JSON object response
+            on_token: Stream the response, passing each piece of text to this
+                callback as it arrives
+
+        Returns:
+            Response text ("" when the provider returned no content)
+        """
+        if endpoint.provider == "openai":
+            request: Dict[str, Any] = {
+                "model": endpoint.model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "You are a PostgreSQL performance "
+                        "optimization expert.",
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                "temperature": self.config.temperature,
+                "max_tokens": max_tokens or self.config.max_tokens,
+            }
+            if json_output:
+                request["response_format"] = {"type": "json_object"}
+            if on_token is not None:
+                parts: List[str] = []
+                for chunk in endpoint.client.chat.completions.create(
+                    **request, stream=True
+                ):
+                    # The final chunk may carry usage only
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        parts.append(text)
+                        on_token(text)
+                recommendation = "".join(parts)
+            else:
+                response = endpoint.client.chat.completions.create(**request)
                 recommendation = response.choices[0].message.content or ""
-                logger.info("Successfully generated recommendations (OpenAI)")
-                return recommendation
-            elif self.provider == "ollama":
-                chat_target = self._ollama_client or ollama
-                response = chat_target.chat(  # type: ignore
-                    model=self.model,
+            logger.info("Successfully generated recommendations (OpenAI)")
+            return recommendation
+        elif endpoint.provider == "ollama":
+            chat_target = endpoint.client or ollama
+            extra: Dict[str, Any] = {"format": "json"} if json_output else {}
+            if self.config.ollama_keep_alive is not None:
+                extra["keep_alive"] = self.config.ollama_keep_alive
+            if on_token is not None:
+                parts = []
+                for piece in chat_target.chat(
+                    model=endpoint.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    stream=True,
+                    **extra,
+                ):
+                    text = self._ollama_content(piece)
+                    if text:
+                        parts.append(text)
+                        on_token(text)
+                content = "".join(parts).strip()
+            else:
+                response = chat_target.chat(
+                    model=endpoint.model,
                     messages=[{"role": "user", "content": prompt}],
+                    **extra,
                 )
                 logger.debug(f"Ollama response type: {type(response)}")
                 logger.debug(f"Ollama response: {response}")
+                content = self._ollama_content(response).strip()
 
-                # Type-safe response parsing
-                content: str = ""
-                # Handle both ChatResponse objects and dict responses (for tests)
-                try:
-                    if hasattr(response, "message") and hasattr(
-                        response.message, "content"
-                    ):
-                        raw_content = response.message.content
-                        logger.debug(f"Raw content (ChatResponse): {raw_content}")
-                        if isinstance(raw_content, str):
-                            content = raw_content.strip()
-                    elif hasattr(response, "get"):  # dict-like object
-                        message = response.get("message")
-                        logger.debug(f"Message (dict): {message}")
-                        if isinstance(message, dict):
-                            raw_content = message.get("content")
-                            logger.debug(f"Raw content (dict): {raw_content}")
-                            if isinstance(raw_content, str):
-                                content = raw_content.strip()
-                except (AttributeError, TypeError):
-                    logger.warning("Could not parse Ollama response format")
-
-                if content:
-                    logger.info(
-                        f"Successfully generated Ollama recommendations "
-                        f"({len(content)} chars)"
-                    )
-                else:
-                    logger.warning("Ollama returned empty content")
+            if content:
+                logger.info(
+                    f"Successfully generated Ollama recommendations "
+                    f"({len(content)} chars)"
+                )
+            else:
+                logger.warning("Ollama returned empty content")
 
-                return content
-            else:  # pragma: no cover - defensive
-                raise ValueError(f"Unhandled LLM provider: {self.provider}")
-        except Exception as e:
-            logger.error(f"Error generating recommendations: {e}")
-            return f"Error generating recommendations: {str(e)}"
+            return content
+        else:  # pragma: no cover - defensive
+            raise ValueError(f"Unhandled LLM provider: {endpoint.provider}")
+
+    @staticmethod
+    def _ollama_content(response: Any) -> str:
+        """Message text of an Ollama response or streamed chunk."""
+        # Type-safe response parsing
+        content: str = ""
+        # Handle both ChatResponse objects and dict responses (for tests)
+        try:
+            if hasattr(response, "message") and hasattr(response.message, "content"):
+                raw_content = response.message.content
+                logger.debug(f"Raw content (ChatResponse): {raw_content}")
+                if isinstance(raw_content, str):
+                    content = raw_content
+            elif hasattr(response, "get"):  # dict-like object
+                message = response.get("message")
+                logger.debug(f"Message (dict): {message}")
+                if isinstance(message, dict):
+                    raw_content = message.get("content")
+                    logger.debug(f"Raw content (dict): {raw_content}")
+                    if isinstance(raw_content, str):
+                        content = raw_content
+        except (AttributeError, TypeError):
+            logger.warning("Could not parse Ollama response format")
+        return content
 
     def _build_prompt(
         self,
@@ -162,31 +595,22 @@ class LLMClient:
         frequency: int,
         max_duration: Optional[float],
         impact_score: Optional[float],
+        findings: Optional[List[str]] = None,
     ) -> str:
         """Builds the prompt for the LLM"""
 
-        stats = [
-            f"Average Duration: {avg_duration:.2f} ms",
-            f"Execution Frequency: {frequency} times",
-        ]
-
-        if max_duration:
-            stats.append(f"Max Duration: {max_duration:.2f} ms")
-
-        if impact_score:
-            stats.append(f"Impact Score: {impact_score:.2f}")
-
-        stats_text = "\n".join(stats)
+        stats_text = _format_stats(avg_duration, frequency, max_duration, impact_score)
+        findings_text = _format_findings(findings)
 
         prompt = f"""You are a PostgreSQL database performance expert.
 
 Analyze this slow-running query:
 
-Query: {query_text}
+Query: {_QUERY_SLOT}
 
 Statistics:
 {stats_text}
-
+{findings_text}
 Provide:
 1. Most likely root cause of slowness
 2. Specific, actionable optimization recommendation (e.g., add index, rewrite query)
@@ -194,35 +618,505 @@ Provide:
 
 Keep response concise and under 150 words."""
 
-        return prompt
+        return prompt.replace(
+            _QUERY_SLOT, self._fit_query(query_text, count_tokens(prompt))
+        )
+
+    def _fit_query(self, query_text: str, overhead_tokens: int) -> str:
+        """Compacts a query to what the prompt budget leaves for it."""
+        budget = max(self.config.max_prompt_tokens - overhead_tokens, MIN_QUERY_TOKENS)
+        compacted = compact_query(query_text, budget)
+        if not compacted.compacted:
+            return query_text
+        logger.info(
+            f"Query compacted from {compacted.original_tokens} to "
+            f"{compacted.tokens} tokens ({', '.join(compacted.steps)})"
+        )
+        return (
+            f"{compacted.text}\n(Shortened to fit this prompt: "
+            f"{', '.join(compacted.steps)})"
+        )
+
+    def _build_packed_section(self, number: int, query_info: Dict[str, Any]) -> str:
+        """Builds the part of a packed prompt describing one query."""
+        overhead = count_tokens(self._build_packed_prompt([]))
+        query_text = self._fit_query(str(query_info.get("query_text", "")), overhead)
+        stats_text = _format_stats(
+            float(query_info.get("avg_duration", 0)),
+            int(query_info.get("frequency", 0)),
+            query_info.get("max_duration"),
+            query_info.get("impact_score"),
+        )
+        findings_text = _format_findings(query_info.get("findings"))
+        return (
+            f"Query {number}:\n{query_text}\n\n"
+            f"Statistics:\n{stats_text}\n{findings_text}"
+        )
+
+    def _build_packed_prompt(self, queries: List[Dict[str, Any]]) -> str:
+        """Builds one prompt covering several queries, answered as JSON."""
+        sections = [
+            self._build_packed_section(number, info)
+            for number, info in enumerate(queries, start=1)
+        ]
+        queries_text = "\n\n---\n\n".join(sections)
+
+        return f"""You are a PostgreSQL database performance expert.
+
+Analyze each of these {len(queries)} slow-running queries:
+
+{queries_text}
+
+Respond with only a JSON object of the form
+{{"results": [{{"id": 1, "root_cause": "...", "recommendation": "...", \
+"estimated_impact": "..."}}]}}
+with one entry per query, where "id" is the query number, "root_cause" the most
+likely root cause of slowness, "recommendation" a specific, actionable
+optimization (e.g., add index, rewrite query) and "estimated_impact" the
+estimated performance impact (e.g., "30-50% faster"). Keep each entry under
+150 words."""
+
+    @property
+    def max_concurrency(self) -> int:
+        """Requests the current provider may have in flight at once."""
+        if self.provider == "openai":
+            return max(1, self.config.openai_max_concurrency)
+        return max(1, self.config.ollama_max_concurrency)
+
+    @property
+    def request_timeout(self) -> float:
+        """
+        Seconds a batch waits for one request, including its retries and
+        fallbacks: ``timeout`` per attempt plus the longest backoffs
+        """
+        providers = len(self.chain.providers)
+        retries = self.config.max_retries
+        return (
+            self.config.timeout * (retries + 1) * providers
+            + self.config.retry_max_backoff_seconds * retries * providers
+        )
+
+    def _generate_for(
+        self,
+        query_info: Dict[str, Any],
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        return self.generate_recommendations(
+            query_text=str(query_info.get("query_text", "")),
+            avg_duration=float(query_info.get("avg_duration", 0)),
+            frequency=int(query_info.get("frequency", 0)),
+            max_duration=query_info.get("max_duration"),
+            impact_score=query_info.get("impact_score"),
+            findings=query_info.get("findings"),
+            on_token=on_token,
+        )
+
+    def _cache_key(self, query_text: str) -> str:
+        return self._fingerprint_key(query_fingerprint(query_text))
+
+    def _fingerprint_key(self, fingerprint: str) -> str:
+        template = self._build_prompt("{query}", 0.0, 0, None, None)
+        if self.config.pack_queries:
+            # Packed answers are formatted differently
+            template += self._build_packed_prompt([{"query_text": "{query}"}])
+        return cache_key(
+            fingerprint,
+            self.provider,
+            self.model,
+            self.config.temperature,
+            template,
+        )
+
+    def is_cached(self, query_info: Dict[str, Any]) -> bool:
+        """
+        Whether the recommendation of a query, or of a query similar enough
+        to reuse, is in the cache
+        """
+        query_text = str(query_info.get("query_text", ""))
+        return self.cache is not None and (
+            self.cache.contains(self._cache_key(query_text))
+            or self._similar_entry(query_text) is not None
+        )
+
+    def _similar_entry(self, query_text: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Find the cached recommendation of the most similar answered query
+
+        Only entries for the current provider, model, temperature and prompt
+        count, like exact cache hits.
+
+        Returns:
+            ``(cache key, normalized query, similarity)``, or None if no
+            cached query reaches ``similarity_threshold``
+        """
+        threshold = self.config.similarity_threshold
+        if self.cache is None or threshold is None:
+            return None
+        if self._similar is None:
+            self._similar = SimilarityIndex()
+            for fingerprint, text in self.cache.answered(self.provider, self.model):
+                self._similar.add(fingerprint, text)
+            logger.info(f"LLM similarity index: {len(self._similar)} queries")
+        fingerprint = query_fingerprint(query_text)
+        for match, score in self._similar.most_similar(normalize_query(query_text)):
+            if score < threshold:
+                break
+            key = self._fingerprint_key(match)
+            if match != fingerprint and self.cache.contains(key):
+                return key, self._similar.query_text(match), score
+        return None
+
+    def _reuse_similar(self, query_text: str) -> Optional[str]:
+        """Adapt the cached recommendation of a similar query, if any."""
+        entry = self._similar_entry(query_text)
+        if entry is None or self.cache is None:
+            return None
+        key, similar_query, score = entry
+        recommendation = self.cache.get_similar(key)
+        if recommendation is None:
+            return None
+        if len(similar_query) > 120:
+            similar_query = similar_query[:117] + "..."
+        return (
+            f"*Reused from a similar query ({score:.0%} similar): "
+            f"`{similar_query}`. Check that it applies to this one.*\n\n"
+            f"{recommendation}"
+        )
+
+    def estimate_tokens(self, query_info: Dict[str, Any]) -> int:
+        """Approximate tokens (prompt and response) of a query's request."""
+        prompt = self._build_prompt(
+            str(query_info.get("query_text", "")),
+            float(query_info.get("avg_duration", 0)),
+            int(query_info.get("frequency", 0)),
+            query_info.get("max_duration"),
+            query_info.get("impact_score"),
+            query_info.get("findings"),
+        )
+        return count_tokens(prompt) + self.config.max_tokens
 
     def batch_generate_recommendations(
-        self, queries: List[Dict[str, Any]]
+        self,
+        queries: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[int, str], None]] = None,
+        on_token: Optional[Callable[[int, str], None]] = None,
+        time_budget: Optional[float] = None,
     ) -> List[str]:
         """
         Generate recommendations for multiple queries
 
+        Cached recommendations are reused (see ``LLMConfig.cache_path``),
+        as are those of similar queries above ``similarity_threshold``;
+        the remaining requests run in a thread pool, so the batch takes
+        about as long as its slowest requests rather than the sum of all of
+        them. A request still running ``request_timeout`` seconds after it
+        started is reported as an error in its slot; the other requests are
+        unaffected.
+
         Args:
             queries: List of dicts with keys: query_text, avg_duration, frequency
+            max_concurrency: Requests in flight at once (default: the
+                provider's ``*_max_concurrency`` setting); 1 runs sequentially
+            on_result: Called with ``(index, recommendation)`` as soon as each
+                recommendation is ready, in completion order, on the calling
+                thread
+            on_token: Stream single-query responses, calling this with
+                ``(index, text)`` for each piece of text as it arrives; it is
+                called from worker threads
+            time_budget: Seconds after which no new request is started; the
+                queries left get ``BUDGET_EXHAUSTED``
 
         Returns:
-            List of recommendation strings
+            List of recommendation strings, in the order of ``queries``
         """
-        recommendations: List[str] = []
+        results: List[str] = [""] * len(queries)
+        keys: Dict[int, str] = {}
+        misses: List[int] = []
+        similar = 0
+        for index, query_info in enumerate(queries):
+            if self.cache is not None:
+                query_text = str(query_info.get("query_text", ""))
+                keys[index] = self._cache_key(query_text)
+                cached = self.cache.get(keys[index])
+                if cached is None:
+                    cached = self._reuse_similar(query_text)
+                    similar += cached is not None
+                if cached is not None:
+                    results[index] = cached
+                    if on_result is not None:
+                        on_result(index, cached)
+                    continue
+            misses.append(index)
+        if self.cache is not None:
+            logger.info(
+                f"LLM cache: {len(queries) - len(misses)}/{len(queries)} hits "
+                f"({similar} from similar queries)"
+            )
+
+        def finished(position: int, result: Tuple[str, float]) -> None:
+            index = misses[position]
+            recommendation, latency_ms = result
+            results[index] = recommendation
+            if on_result is not None:
+                on_result(index, recommendation)
+            # Failures and empty answers are retried on the next run
+            if (
+                self.cache is not None
+                and recommendation
+                and not recommendation.startswith("Error generating")
+            ):
+                query_text = str(queries[index].get("query_text", ""))
+                fingerprint = query_fingerprint(query_text)
+                self.cache.put(
+                    keys[index],
+                    recommendation,
+                    latency_ms,
+                    fingerprint=fingerprint,
+                    provider=self.provider,
+                    model=self.model,
+                    query_text=normalize_query(query_text),
+                )
+                if self._similar is not None:
+                    self._similar.add(fingerprint, normalize_query(query_text))
+
+        def stream(position: int, text: str) -> None:
+            if on_token is not None:
+                on_token(misses[position], text)
 
-        for i, query_info in enumerate(queries):
-            logger.info(f"Processing query {i + 1}/{len(queries)}")
+        self._run_requests(
+            [queries[index] for index in misses],
+            max_concurrency,
+            finished,
+            stream if on_token is not None else None,
+            time.monotonic() + time_budget if time_budget is not None else None,
+        )
+        return results
 
-            rec = self.generate_recommendations(
-                query_text=str(query_info.get("query_text", "")),
-                avg_duration=float(query_info.get("avg_duration", 0)),
-                frequency=int(query_info.get("frequency", 0)),
-                max_duration=query_info.get("max_duration"),
-                impact_score=query_info.get("impact_score"),
+    def _run_requests(
+        self,
+        queries: List[Dict[str, Any]],
+        max_concurrency: Optional[int],
+        on_done: Optional[Callable[[int, Tuple[str, float]], None]] = None,
+        on_token: Optional[Callable[[int, str], None]] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """Generate recommendations, returning each with its latency in ms."""
+        if self.config.pack_queries and len(queries) > 1:
+            return self._run_packed(
+                queries, max_concurrency, on_done, on_token, deadline
             )
-            recommendations.append(rec)
+        jobs = [
+            self._job_for(query_info, index, on_token)
+            for index, query_info in enumerate(queries)
+        ]
+        return self._run_concurrently(
+            jobs, max_concurrency, on_done=on_done, deadline=deadline
+        )
+
+    def _job_for(
+        self,
+        query_info: Dict[str, Any],
+        index: int,
+        on_token: Optional[Callable[[int, str], None]],
+    ) -> Callable[[], str]:
+        """A single-query request, streamed to ``on_token`` if given."""
+        if on_token is None:
+            return partial(self._generate_for, query_info)
+        return partial(self._generate_for, query_info, partial(on_token, index))
+
+    def _run_packed(
+        self,
+        queries: List[Dict[str, Any]],
+        max_concurrency: Optional[int],
+        on_done: Optional[Callable[[int, Tuple[str, float]], None]] = None,
+        on_token: Optional[Callable[[int, str], None]] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Generate recommendations with one request per pack of queries
+
+        Queries missing from (or malformed in) a pack's response are
+        retried with their own single-query request. Packed JSON responses
+        are not streamed; only the retries are.
+        """
+        # The instructions are sent once per request; queries share the rest
+        overhead = count_tokens(self._build_packed_prompt([]))
+        packs = pack_queries(
+            [self._build_packed_section(1, info) for info in queries],
+            self.config.pack_token_budget - overhead,
+        )
+        logger.info(f"Packed {len(queries)} queries into {len(packs)} requests")
+        jobs = [
+            partial(
+                self._complete,
+                self._build_packed_prompt([queries[index] for index in pack]),
+                max_tokens=self.config.max_tokens * len(pack),
+                json_output=True,
+            )
+            for pack in packs
+        ]
+
+        results: List[Tuple[str, float]] = [("", 0.0)] * len(queries)
+        retry: List[int] = []
+
+        def pack_done(pack_index: int, result: Tuple[str, float]) -> None:
+            pack = packs[pack_index]
+            response, latency_ms = result
+            for index, item in zip(pack, parse_packed_response(response, len(pack))):
+                if item is None:
+                    retry.append(index)
+                else:
+                    results[index] = (item, latency_ms / len(pack))
+                    if on_done is not None:
+                        on_done(index, results[index])
+
+        self._run_concurrently(
+            jobs, max_concurrency, label="pack", on_done=pack_done, deadline=deadline
+        )
+
+        if retry:
+            logger.warning(
+                f"{len(retry)} queries missing from packed responses; "
+                "requesting them one by one"
+            )
+            retry_jobs = [
+                self._job_for(queries[index], index, on_token) for index in retry
+            ]
+
+            def retry_done(position: int, result: Tuple[str, float]) -> None:
+                results[retry[position]] = result
+                if on_done is not None:
+                    on_done(retry[position], result)
+
+            self._run_concurrently(
+                retry_jobs, max_concurrency, on_done=retry_done, deadline=deadline
+            )
+        return results
+
+    def _run_concurrently(
+        self,
+        jobs: Sequence[Callable[[], str]],
+        max_concurrency: Optional[int],
+        label: str = "query",
+        on_done: Optional[Callable[[int, Tuple[str, float]], None]] = None,
+        deadline: Optional[float] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Run LLM requests in a bounded thread pool, keeping their order
+
+        ``on_done`` is called with ``(index, result)`` on this thread as each
+        request finishes, fails or times out. Requests not started by the
+        ``deadline`` (a ``time.monotonic()`` value) are skipped.
+        """
+        workers = min(max_concurrency or self.max_concurrency, len(jobs))
+        results: List[Tuple[str, float]] = [("", 0.0)] * len(jobs)
+        started: Dict[int, float] = {}
+        timeout = self.request_timeout
+
+        def timed_out(index: int) -> Tuple[str, float]:
+            logger.error(
+                f"{label.capitalize()} {index + 1} timed out after {timeout:g}s"
+            )
+            return (
+                f"Error generating recommendations: request timed out after "
+                f"{timeout:g}s",
+                0.0,
+            )
+
+        def run(index: int) -> Tuple[str, float]:
+            if deadline is not None and time.monotonic() > deadline:
+                return BUDGET_EXHAUSTED, 0.0
+            started[index] = time.monotonic()
+            response = jobs[index]()
+            return response, (time.monotonic() - started[index]) * 1000
+
+        if workers <= 1:
+            # One request at a time, each on a worker thread so it can be
+            # given up on; a hung thread keeps its pool, the next gets a new one
+            single: Optional[ThreadPoolExecutor] = None
+            try:
+                for index in range(len(jobs)):
+                    logger.info(f"Processing {label} {index + 1}/{len(jobs)}")
+                    if single is None:
+                        single = ThreadPoolExecutor(1, thread_name_prefix="llm")
+                    future = single.submit(run, index)
+                    if not wait([future], timeout=timeout).done:
+                        single.shutdown(wait=False)
+                        single = None
+                        results[index] = timed_out(index)
+                    else:
+                        try:
+                            results[index] = future.result()
+                        except Exception as e:
+                            logger.error(f"Error generating recommendations: {e}")
+                            results[index] = (
+                                f"Error generating recommendations: {e}",
+                                0.0,
+                            )
+                    if on_done is not None:
+                        on_done(index, results[index])
+            finally:
+                if single is not None:
+                    single.shutdown(wait=False)
+            return results
+
+        logger.info(
+            f"Processing {len(jobs)} {label} requests with up to {workers} "
+            f"concurrent {self.provider} requests"
+        )
+        # Jobs are submitted only as slots free up, so every submitted job
+        # starts at once and its timeout applies; a timed out job keeps its
+        # thread, so the pool is replaced to keep the others from queueing
+        pools = [ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")]
+        queued = list(range(len(jobs)))[::-1]
+        pending: Dict[Future, int] = {}
+
+        def fill() -> None:
+            while queued and len(pending) < workers:
+                index = queued.pop()
+                pending[pools[-1].submit(run, index)] = index
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error generating recommendations: {e}")
+                        results[index] = (f"Error generating recommendations: {e}", 0.0)
+                    if on_done is not None:
+                        on_done(index, results[index])
+                    logger.info(
+                        f"Finished {label} {index + 1}/{len(jobs)} "
+                        f"({len(jobs) - len(pending) - len(queued)} done)"
+                    )
+                now = time.monotonic()
+                abandoned = False
+                for future, index in list(pending.items()):
+                    if index in started and now - started[index] > timeout:
+                        # The thread can't be interrupted; give up on its result
+                        del pending[future]
+                        abandoned = True
+                        results[index] = timed_out(index)
+                        if on_done is not None:
+                            on_done(index, results[index])
+                if abandoned and queued:
+                    pools[-1].shutdown(wait=False)
+                    pools.append(
+                        ThreadPoolExecutor(
+                            max_workers=workers, thread_name_prefix="llm"
+                        )
+                    )
+                fill()
+        finally:
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
 
-        return recommendations
+        return results
 
 
 # Backward compatibility - keep the original function
@@ -0,0 +1,162 @@
+"""
+Deterministic-first tiering of LLM recommendations.
+
+Many top queries already have a confident static diagnosis (a leading
+wildcard LIKE, NOT IN with a subquery, ...) that an LLM would only
+restate. The tiering policy decides per query whether an LLM call is
+worth it, from the anti-pattern findings, the query's share of the total
+impact and whether the recommendation is already cached, and spends the
+LLM budget (calls, tokens, seconds) on the queries that need it most.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .antipatterns import SEVERITY_LEVELS, AntiPatternMatch
+
+logger = logging.getLogger(__name__)
+
+# Recommendation sources
+TIER_RULE = "rule"
+TIER_LLM = "llm"
+TIER_SKIPPED = "skipped"
+
+
+@dataclass
+class TieringPolicy:
+    """When a static finding replaces an LLM call, and the LLM budget."""
+
+    # A finding at least this confident and severe is a diagnosis
+    min_confidence: float = 0.8
+    min_severity: float = SEVERITY_LEVELS["high"]
+    # Queries with at least this share of the total impact always get an
+    # LLM call, static diagnosis or not
+    llm_impact_share: float = 0.5
+    # LLM budget of one run (unlimited when None); tokens count prompt and
+    # response, seconds are enforced while the requests run
+    max_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_seconds: Optional[float] = None
+
+
+@dataclass
+class TierDecision:
+    """How the recommendation of one query is produced."""
+
+    tier: str
+    reason: str
+    # Recommendation built from the confident findings, if any
+    rule_recommendation: Optional[str] = None
+    estimated_tokens: int = 0
+
+
+def rule_based_recommendation(matches: List[AntiPatternMatch]) -> str:
+    """
+    Write a recommendation from static anti-pattern findings
+
+    Args:
+        matches: Findings, most important first
+
+    Returns:
+        Markdown text with the problem, fix and example of each rule found
+    """
+    parts = []
+    seen = set()
+    for match in matches:
+        # One entry per rule, however often it matched
+        if match.title in seen:
+            continue
+        seen.add(match.title)
+        text = (
+            f"**{match.title}:** {match.problem_description}. "
+            f"{match.rewrite_suggestion}."
+        )
+        if match.example_rewrite:
+            text += f"\n\n```sql\n{match.example_rewrite}\n```"
+        parts.append(text)
+    return "\n\n".join(parts)
+
+
+def plan_recommendations(
+    queries: List[Dict[str, Any]],
+    policy: TieringPolicy,
+    is_cached: Callable[[Dict[str, Any]], bool],
+    estimate_tokens: Callable[[Dict[str, Any]], int],
+) -> List[TierDecision]:
+    """
+    Decide per query between a rule-based and an LLM recommendation
+
+    Queries are considered in the given order (highest impact first), so
+    the budget goes to the most expensive ones. Cached recommendations are
+    free and always used.
+
+    Args:
+        queries: Dicts with ``impact_score`` and ``matches`` (the query's
+            AntiPatternMatch list)
+        policy: Thresholds and budget
+        is_cached: Whether a query's LLM recommendation is cached
+        estimate_tokens: Tokens an LLM call for a query would use
+
+    Returns:
+        One TierDecision per query, in the order of ``queries``
+    """
+    total_impact = sum(float(q.get("impact_score") or 0) for q in queries)
+    calls = 0
+    tokens = 0
+    decisions: List[TierDecision] = []
+    for query_info in queries:
+        confident = sorted(
+            (
+                match
+                for match in query_info.get("matches") or []
+                if match.confidence_score >= policy.min_confidence
+                and match.severity >= policy.min_severity
+            ),
+            key=lambda m: m.severity * m.confidence_score,
+            reverse=True,
+        )
+        rule_text = rule_based_recommendation(confident) if confident else None
+        share = (
+            float(query_info.get("impact_score") or 0) / total_impact
+            if total_impact
+            else 0.0
+        )
+
+        if is_cached(query_info):
+            decisions.append(TierDecision(TIER_LLM, "cached", rule_text))
+            continue
+        if confident and share < policy.llm_impact_share:
+            top = confident[0]
+            decisions.append(
+                TierDecision(
+                    TIER_RULE,
+                    f"{top.title}, {top.confidence_score:.0%} confidence",
+                    rule_text,
+                )
+            )
+            continue
+
+        needed = estimate_tokens(query_info)
+        within_budget = (policy.max_calls is None or calls < policy.max_calls) and (
+            policy.max_tokens is None or tokens + needed <= policy.max_tokens
+        )
+        if within_budget:
+            calls += 1
+            tokens += needed
+            reason = f"{share:.0%} of impact" if confident else "no confident finding"
+            decisions.append(TierDecision(TIER_LLM, reason, rule_text, needed))
+        elif rule_text is not None:
+            decisions.append(TierDecision(TIER_RULE, "LLM budget spent", rule_text))
+        else:
+            decisions.append(TierDecision(TIER_SKIPPED, "LLM budget spent"))
+
+    counts = {
+        tier: sum(1 for d in decisions if d.tier == tier)
+        for tier in (TIER_LLM, TIER_RULE, TIER_SKIPPED)
+    }
+    logger.info(
+        f"Recommendation tiers: {counts[TIER_LLM]} LLM, {counts[TIER_RULE]} "
+        f"rule-based, {counts[TIER_SKIPPED]} skipped (~{tokens} LLM tokens)"
+    )
+    return decisions
@@ -0,0 +1,303 @@
+"""
+Retries, fallback, hedging and circuit breaking for LLM requests.
+
+A ProviderChain calls an ordered list of providers (e.g. local Ollama,
+then a second Ollama host, then OpenAI). Each provider is retried with
+exponential backoff and full jitter before the next one is tried, a
+provider that keeps failing is skipped by its circuit breaker until a
+cool-down has passed, and a request slower than a percentile of the
+provider's recent latency can be hedged with a second request whose
+answer is used if it arrives first. Latencies are kept per provider.
+"""
+
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Recent samples kept per provider for percentiles
+LATENCY_SAMPLES = 1000
+
+
+class ProviderChainError(RuntimeError):
+    """Raised when every provider of a chain failed or was unavailable."""
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    max_retries: int = 0
+    backoff_seconds: float = 0.5
+    max_backoff_seconds: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        """
+        Seconds to wait before retry number ``attempt + 1``
+
+        Args:
+            attempt: Failed attempts so far, minus one (0 for the first retry)
+
+        Returns:
+            A random delay between 0 and the capped exponential backoff
+        """
+        cap = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+        return random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """Stops calling a provider after consecutive failures.
+
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls are refused for ``reset_seconds``; then a single trial call is
+    let through (half-open), which closes the circuit on success and
+    reopens it on failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """``closed``, ``open`` or ``half-open``."""
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be made now (reserves the half-open trial)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Circuit opened after {self._failures} consecutive failures"
+                    )
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+class LatencyHistogram:
+    """Latencies of successful requests and the count of failed ones."""
+
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.errors = 0
+        self._samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return sum(self.bucket_counts)
+
+    def record(self, latency_ms: float) -> None:
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+            self._samples.append(latency_ms)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Latency percentile over the recent successful requests
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Latency in ms, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        position = min(int(len(samples) * percent / 100), len(samples) - 1)
+        return samples[position]
+
+    def buckets(self) -> List[Tuple[str, int]]:
+        """Bucket labels (``<= 250 ms``, ..., ``> 60000 ms``) with counts."""
+        labels = [f"<= {bound} ms" for bound in LATENCY_BUCKETS_MS]
+        labels.append(f"> {LATENCY_BUCKETS_MS[-1]} ms")
+        return list(zip(labels, self.bucket_counts))
+
+
+@dataclass
+class Provider:
+    """One endpoint of a ProviderChain."""
+
+    name: str
+    call: Callable[..., str]
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class ProviderChain:
+    """Calls providers in order with retries, hedging and circuit breakers."""
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        retry: Optional[RetryPolicy] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            providers: Endpoints in order of preference
+            retry: Retries of each provider before the next is tried
+            hedge_percentile: Send a second request once the first has run
+                longer than this percentile of the provider's latency
+                (disabled when None)
+            hedge_min_samples: Latency samples needed before hedging
+            sleep: Backoff sleep (replaced in tests)
+        """
+        if not providers:
+            raise ValueError("A provider chain needs at least one provider")
+        self.providers = providers
+        self.retry = retry or RetryPolicy()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._sleep = sleep
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def latency(self) -> Dict[str, LatencyHistogram]:
+        """Latency histogram of each provider, by name."""
+        return {provider.name: provider.latency for provider in self.providers}
+
+    def call(self, *args: Any, **kwargs: Any) -> str:
+        """
+        Call the first provider that answers
+
+        Args:
+            *args: Passed to the provider call
+            **kwargs: Passed to the provider call; requests streaming to an
+                ``on_token`` callback are never hedged
+
+        Returns:
+            The provider's answer
+
+        Raises:
+            ProviderChainError: If every provider failed or had its circuit
+                open
+        """
+        errors: List[str] = []
+        for position, provider in enumerate(self.providers):
+            for attempt in range(self.retry.max_retries + 1):
+                if not provider.breaker.allow():
+                    errors.append(f"{provider.name}: circuit open")
+                    logger.info(f"Skipping {provider.name}: circuit open")
+                    break
+                try:
+                    return self._attempt(position, args, kwargs)
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    logger.warning(f"{provider.name} attempt {attempt + 1} failed: {e}")
+                if (
+                    attempt < self.retry.max_retries
+                    and provider.breaker.state != "open"
+                ):
+                    self._sleep(self.retry.delay(attempt))
+            if position + 1 < len(self.providers):
+                logger.info(f"Falling back to {self.providers[position + 1].name}")
+        raise ProviderChainError("All LLM providers failed: " + "; ".join(errors))
+
+    def _timed(self, provider: Provider, args: Tuple, kwargs: Dict) -> str:
+        start = time.monotonic()
+        try:
+            result = provider.call(*args, **kwargs)
+        except Exception:
+            provider.breaker.record_failure()
+            provider.latency.record_error()
+            raise
+        provider.breaker.record_success()
+        provider.latency.record((time.monotonic() - start) * 1000)
+        return result
+
+    def _hedge_after(self, provider: Provider) -> Optional[float]:
+        """Seconds after which a request to ``provider`` is hedged."""
+        if (
+            self.hedge_percentile is None
+            or provider.latency.count < self.hedge_min_samples
+        ):
+            return None
+        threshold = provider.latency.percentile(self.hedge_percentile)
+        return threshold / 1000 if threshold is not None else None
+
+    def _attempt(self, position: int, args: Tuple, kwargs: Dict) -> str:
+        provider = self.providers[position]
+        hedge_after = self._hedge_after(provider)
+        if hedge_after is None or kwargs.get("on_token") is not None:
+            return self._timed(provider, args, kwargs)
+
+        with self._pool_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(thread_name_prefix="llm-hedge")
+        pool = self._hedge_pool
+        futures: List[Future] = [pool.submit(self._timed, provider, args, kwargs)]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            # Hedge with the next available provider, or the same one
+            backup = next(
+                (p for p in self.providers[position + 1 :] if p.breaker.allow()),
+                provider,
+            )
+            logger.info(
+                f"{provider.name} slower than p{self.hedge_percentile:g} "
+                f"({hedge_after * 1000:.0f} ms); hedging with {backup.name}"
+            )
+            futures.append(pool.submit(self._timed, backup, args, kwargs))
+
+        # The first answer wins; fail only when every request failed
+        pending = set(futures)
+        errors: List[BaseException] = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return str(future.result())
+                errors.append(error)
+        raise errors[-1]
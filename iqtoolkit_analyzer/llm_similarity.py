@@ -0,0 +1,127 @@
+"""
+Similarity index over previously answered queries.
+
+The recommendation cache only matches identical fingerprints, so a query
+that differs from an answered one by a column or a join misses it. This
+index holds TF-IDF vectors of the answered queries' SQL tokens (words,
+operators and adjacent token pairs, with literals folded into ``?``) and
+finds the most similar ones by cosine similarity. It is built from the
+cache, runs in-process and needs no embedding model or external service.
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from .sql_lexer import TokenType, tokenize
+
+_LITERAL_TYPES = {TokenType.STRING, TokenType.NUMBER, TokenType.PARAM}
+
+
+def sql_terms(query_text: str) -> List[str]:
+    """
+    Split a query into the terms its vector is built from
+
+    Args:
+        query_text: SQL text, usually already normalized
+
+    Returns:
+        Upper-cased words and operators (``?`` for literals and parameters)
+        followed by each pair of adjacent ones, so word order counts too
+    """
+    tokens = [
+        "?" if token.type in _LITERAL_TYPES else token.upper
+        for token in tokenize(query_text)
+        if token.type is not TokenType.PUNCT
+    ]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class SimilarityIndex:
+    """TF-IDF vectors of answered queries, keyed by fingerprint."""
+
+    def __init__(self) -> None:
+        self._terms: Dict[str, Counter] = {}
+        self._texts: Dict[str, str] = {}
+        self._document_frequency: Counter = Counter()
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        # Weighted vectors and their norms; rebuilt after each add, since
+        # every new document changes the IDF of its terms
+        self._vectors: Dict[str, Tuple[Dict[str, float], float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._terms
+
+    def add(self, key: str, query_text: str) -> None:
+        """
+        Index an answered query; keys already indexed are ignored
+
+        Args:
+            key: Query fingerprint
+            query_text: Normalized query text
+        """
+        if key in self._terms:
+            return
+        terms = Counter(sql_terms(query_text))
+        if not terms:
+            return
+        self._terms[key] = terms
+        self._texts[key] = query_text
+        for term in terms:
+            self._document_frequency[term] += 1
+            self._postings[term].add(key)
+        self._vectors.clear()
+
+    def query_text(self, key: str) -> str:
+        """Normalized text of an indexed query."""
+        return self._texts[key]
+
+    def most_similar(self, query_text: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """
+        Find the indexed queries most similar to a query
+
+        Args:
+            query_text: Normalized query text
+            limit: Matches returned
+
+        Returns:
+            Up to ``limit`` ``(key, cosine similarity)`` pairs, most similar
+            first; queries sharing no term are never returned
+        """
+        vector, norm = self._weigh(Counter(sql_terms(query_text)))
+        if not norm:
+            return []
+        candidates: Set[str] = set()
+        for term in vector:
+            candidates.update(self._postings.get(term, ()))
+        scores = []
+        for key in candidates:
+            indexed, indexed_norm = self._vector(key)
+            dot = sum(
+                weight * indexed[term]
+                for term, weight in vector.items()
+                if term in indexed
+            )
+            scores.append((key, dot / (norm * indexed_norm)))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:limit]
+
+    def _idf(self, term: str) -> float:
+        # Smoothed, so terms no indexed query has still get a finite weight
+        documents = len(self._terms)
+        return math.log((1 + documents) / (1 + self._document_frequency[term])) + 1
+
+    def _weigh(self, terms: Counter) -> Tuple[Dict[str, float], float]:
+        vector = {
+            term: (1 + math.log(count)) * self._idf(term)
+            for term, count in terms.items()
+        }
+        return vector, math.sqrt(sum(weight * weight for weight in vector.values()))
+
+    def _vector(self, key: str) -> Tuple[Dict[str, float], float]:
+        if key not in self._vectors:
+            self._vectors[key] = self._weigh(self._terms[key])
+        return self._vectors[key]
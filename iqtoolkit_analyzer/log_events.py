@@ -0,0 +1,410 @@
+"""
+Extraction of non-statement performance events from PostgreSQL logs.
+
+Besides ``duration:`` lines, PostgreSQL logs temporary file usage
+(``log_temp_files``), lock waits (``log_lock_waits``), checkpoints
+(``log_checkpoints``) and autovacuum runs (``log_autovacuum_min_duration``).
+This module turns those lines into typed event tables in a single streaming
+pass and correlates them with query fingerprints by PID and time window.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analyzer import normalize_query, query_fingerprint
+from .parser import parse_log_line_prefix
+
+logger = logging.getLogger(__name__)
+
+_LINE_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)(.*?)"
+    r"\b(LOG|WARNING|ERROR|FATAL|PANIC|NOTICE|INFO|DEBUG\d?|DETAIL|HINT|"
+    r"CONTEXT|STATEMENT):\s+(.*)$"
+)
+_TEMP_FILE_RE = re.compile(r'temporary file: path "([^"]+)", size (\d+)')
+_LOCK_WAIT_RE = re.compile(
+    r"process (\d+) (still waiting for|acquired) (\w+) on (.+?) after ([\d.]+) ms"
+)
+_CHECKPOINT_RE = re.compile(r"checkpoint complete: wrote (\d+) buffers")
+_CHECKPOINT_TIMES_RE = re.compile(
+    r"write=([\d.]+) s, sync=([\d.]+) s, total=([\d.]+) s"
+)
+_AUTOVACUUM_RE = re.compile(r'automatic (vacuum|analyze) of table "([^"]+)"')
+_ELAPSED_RE = re.compile(r"elapsed:? ([\d.]+) s")
+_TUPLES_REMOVED_RE = re.compile(r"tuples: (\d+) removed")
+
+# Text every event line contains, for a cheap check before a full pass
+EVENT_MARKERS = (
+    "temporary file:",
+    "still waiting for",
+    " acquired ",
+    "checkpoint complete:",
+    "automatic vacuum of",
+    "automatic analyze of",
+)
+
+TEMP_FILE_COLUMNS = ["timestamp", "pid", "path", "size_bytes", "statement"]
+LOCK_WAIT_COLUMNS = [
+    "timestamp",
+    "pid",
+    "state",
+    "lock_mode",
+    "lock_object",
+    "wait_ms",
+    "statement",
+]
+CHECKPOINT_COLUMNS = [
+    "timestamp",
+    "buffers_written",
+    "write_s",
+    "sync_s",
+    "total_s",
+]
+AUTOVACUUM_COLUMNS = [
+    "timestamp",
+    "pid",
+    "operation",
+    "table",
+    "elapsed_s",
+    "tuples_removed",
+]
+
+
+@dataclass
+class LogEvents:
+    """Typed tables of non-statement events found in a log file."""
+
+    temp_files: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=TEMP_FILE_COLUMNS)
+    )
+    lock_waits: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=LOCK_WAIT_COLUMNS)
+    )
+    checkpoints: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=CHECKPOINT_COLUMNS)
+    )
+    autovacuum: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=AUTOVACUUM_COLUMNS)
+    )
+
+    @property
+    def empty(self) -> bool:
+        return all(
+            table.empty
+            for table in (
+                self.temp_files,
+                self.lock_waits,
+                self.checkpoints,
+                self.autovacuum,
+            )
+        )
+
+
+def _iter_log_messages(
+    lines: Iterator[str],
+) -> Iterator[Tuple[str, Optional[int], str, str]]:
+    """Yield (timestamp, pid, severity, message) with continuation lines joined."""
+    current: Optional[List[Any]] = None
+    for line in lines:
+        match = _LINE_RE.match(line)
+        if match:
+            if current is not None:
+                yield current[0], current[1], current[2], "\n".join(current[3])
+            pid = parse_log_line_prefix(match.group(2))["pid"]
+            current = [match.group(1), pid, match.group(3), [match.group(4)]]
+        elif current is not None:
+            current[3].append(line.rstrip("\n").strip())
+    if current is not None:
+        yield current[0], current[1], current[2], "\n".join(current[3])
+
+
+def extract_log_events(log_file_path: str) -> LogEvents:
+    """
+    Extract temp file, lock wait, checkpoint and autovacuum events
+
+    The file is streamed line by line, so memory use is bounded by the number
+    of events found rather than the size of the log.
+
+    Args:
+        log_file_path: Path to a plain-text PostgreSQL log file
+
+    Returns:
+        LogEvents with one DataFrame per event type
+
+    Raises:
+        FileNotFoundError: If log file doesn't exist
+    """
+    path = Path(log_file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Log file not found: {log_file_path}")
+
+    temp_files: List[Dict[str, Any]] = []
+    lock_waits: List[Dict[str, Any]] = []
+    checkpoints: List[Dict[str, Any]] = []
+    autovacuum: List[Dict[str, Any]] = []
+    # Last event per pid still waiting for its trailing STATEMENT line
+    pending: Dict[Optional[int], Dict[str, Any]] = {}
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for timestamp, pid, severity, message in _iter_log_messages(iter(f)):
+            if severity == "STATEMENT":
+                event = pending.pop(pid, None)
+                if event is not None:
+                    event["statement"] = message.strip()
+                continue
+            if severity in ("DETAIL", "HINT", "CONTEXT"):
+                continue
+            pending.pop(pid, None)
+
+            temp_match = _TEMP_FILE_RE.search(message)
+            if temp_match:
+                event = {
+                    "timestamp": timestamp,
+                    "pid": pid,
+                    "path": temp_match.group(1),
+                    "size_bytes": int(temp_match.group(2)),
+                    "statement": None,
+                }
+                temp_files.append(event)
+                pending[pid] = event
+                continue
+
+            lock_match = _LOCK_WAIT_RE.search(message)
+            if lock_match:
+                event = {
+                    "timestamp": timestamp,
+                    "pid": int(lock_match.group(1)),
+                    "state": (
+                        "acquired" if lock_match.group(2) == "acquired" else "waiting"
+                    ),
+                    "lock_mode": lock_match.group(3),
+                    "lock_object": lock_match.group(4),
+                    "wait_ms": float(lock_match.group(5)),
+                    "statement": None,
+                }
+                lock_waits.append(event)
+                pending[pid] = event
+                continue
+
+            checkpoint_match = _CHECKPOINT_RE.search(message)
+            if checkpoint_match:
+                times = _CHECKPOINT_TIMES_RE.search(message)
+                checkpoints.append(
+                    {
+                        "timestamp": timestamp,
+                        "buffers_written": int(checkpoint_match.group(1)),
+                        "write_s": float(times.group(1)) if times else 0.0,
+                        "sync_s": float(times.group(2)) if times else 0.0,
+                        "total_s": float(times.group(3)) if times else 0.0,
+                    }
+                )
+                continue
+
+            vacuum_match = _AUTOVACUUM_RE.search(message)
+            if vacuum_match:
+                elapsed = _ELAPSED_RE.search(message)
+                removed = _TUPLES_REMOVED_RE.search(message)
+                autovacuum.append(
+                    {
+                        "timestamp": timestamp,
+                        "pid": pid,
+                        "operation": vacuum_match.group(1),
+                        "table": vacuum_match.group(2),
+                        "elapsed_s": float(elapsed.group(1)) if elapsed else 0.0,
+                        "tuples_removed": int(removed.group(1)) if removed else None,
+                    }
+                )
+
+    def _frame(rows: List[Dict[str, Any]], columns: List[str]) -> pd.DataFrame:
+        frame = pd.DataFrame(rows, columns=columns)
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+        return frame
+
+    events = LogEvents(
+        temp_files=_frame(temp_files, TEMP_FILE_COLUMNS),
+        lock_waits=_frame(lock_waits, LOCK_WAIT_COLUMNS),
+        checkpoints=_frame(checkpoints, CHECKPOINT_COLUMNS),
+        autovacuum=_frame(autovacuum, AUTOVACUUM_COLUMNS),
+    )
+    logger.info(
+        f"Extracted {len(temp_files)} temp file, {len(lock_waits)} lock wait, "
+        f"{len(checkpoints)} checkpoint and {len(autovacuum)} autovacuum events"
+    )
+    return events
+
+
+def _attach_to_executions(
+    events: pd.DataFrame, executions: pd.DataFrame, tolerance_ms: float
+) -> pd.Series:
+    """
+    Map each event to the fingerprint of the execution that produced it.
+
+    An event logged with a trailing STATEMENT is fingerprinted directly;
+    otherwise it is attached to the next execution finishing on the same pid,
+    provided the event happened while that execution was running.
+    """
+    fingerprints = pd.Series([None] * len(events), index=events.index, dtype=object)
+    has_statement = events["statement"].notna()
+    fingerprints[has_statement] = events.loc[has_statement, "statement"].map(
+        query_fingerprint
+    )
+
+    remaining = events.loc[~has_statement & events["pid"].notna()]
+    if remaining.empty or executions.empty:
+        return fingerprints
+
+    left = remaining[["timestamp", "pid"]].copy()
+    left["pid"] = left["pid"].astype("int64")
+    left["event_index"] = left.index
+    right = executions[["end", "start", "pid", "fingerprint"]].copy()
+    tolerance = pd.Timedelta(milliseconds=tolerance_ms)
+    matched = pd.merge_asof(
+        left.sort_values("timestamp"),
+        right.sort_values("end"),
+        left_on="timestamp",
+        right_on="end",
+        by="pid",
+        direction="forward",
+    )
+    inside = matched["start"].notna() & (
+        matched["timestamp"] >= matched["start"] - tolerance
+    )
+    fingerprints.loc[matched.loc[inside, "event_index"].to_numpy()] = matched.loc[
+        inside, "fingerprint"
+    ].to_numpy()
+    return fingerprints
+
+
+def _overlap_counts(
+    executions: pd.DataFrame, interval_starts: pd.Series, interval_ends: pd.Series
+) -> np.ndarray:
+    """Flag executions that overlap any of the given intervals."""
+    if interval_starts.empty or executions.empty:
+        return np.zeros(len(executions), dtype=bool)
+    order = np.argsort(interval_starts.to_numpy())
+    starts = interval_starts.to_numpy()[order]
+    ends = np.maximum.accumulate(interval_ends.to_numpy()[order])
+    # Latest interval starting before each execution ends
+    idx = np.searchsorted(starts, executions["end"].to_numpy(), side="right") - 1
+    valid = idx >= 0
+    overlaps = np.zeros(len(executions), dtype=bool)
+    overlaps[valid] = ends[idx[valid]] > executions["start"].to_numpy()[valid]
+    return overlaps
+
+
+def correlate_events(
+    log_df: pd.DataFrame, events: LogEvents, tolerance_ms: float = 1000.0
+) -> pd.DataFrame:
+    """
+    Roll events up per query fingerprint
+
+    Args:
+        log_df: Parsed log DataFrame with a ``pid`` column (plain format)
+        events: Events extracted from the same log
+        tolerance_ms: Slack allowed between an event and its execution window
+
+    Returns:
+        DataFrame indexed by fingerprint with temp file, lock wait and
+        checkpoint/autovacuum overlap metrics
+    """
+    executions = log_df[["timestamp", "duration_ms", "query"]].copy()
+    executions["pid"] = (
+        pd.to_numeric(log_df["pid"], errors="coerce")
+        if "pid" in log_df.columns
+        else np.nan
+    )
+    executions["end"] = pd.to_datetime(executions["timestamp"])
+    executions["start"] = executions["end"] - pd.to_timedelta(
+        executions["duration_ms"].astype(float), unit="ms"
+    )
+    executions["fingerprint"] = executions["query"].astype(str).map(query_fingerprint)
+
+    per_fp = executions.groupby("fingerprint").agg(
+        query=("query", "first"),
+        executions=("duration_ms", "size"),
+        total_duration=("duration_ms", "sum"),
+    )
+    per_fp["query"] = per_fp["query"].astype(str).map(normalize_query)
+
+    with_pid = executions.dropna(subset=["pid"]).copy()
+    with_pid["pid"] = with_pid["pid"].astype("int64")
+
+    if not events.temp_files.empty:
+        temp = events.temp_files.copy()
+        temp["fingerprint"] = _attach_to_executions(temp, with_pid, tolerance_ms)
+        grouped = temp.dropna(subset=["fingerprint"]).groupby("fingerprint")
+        per_fp["temp_files"] = grouped["size_bytes"].size()
+        per_fp["temp_bytes"] = grouped["size_bytes"].sum()
+
+    if not events.lock_waits.empty:
+        locks = events.lock_waits.copy()
+        locks["fingerprint"] = _attach_to_executions(locks, with_pid, tolerance_ms)
+        locks = locks.dropna(subset=["fingerprint"]).sort_values(
+            "timestamp", kind="stable"
+        )
+        # "still waiting" is logged once at deadlock_timeout and "acquired"
+        # reports the full wait, so keep the longest report per wait episode.
+        # Both date the same wait start; a wait that started after the
+        # backend's previous report on that lock was logged is a new episode.
+        started = locks["timestamp"] - pd.to_timedelta(locks["wait_ms"], unit="ms")
+        backend_lock = [locks["pid"], locks["lock_object"]]
+        previous = locks.groupby(backend_lock)["timestamp"].shift()
+        locks["episode"] = (
+            (previous.isna() | (started > previous)).groupby(backend_lock).cumsum()
+        )
+        episodes = locks.groupby(["fingerprint", "pid", "lock_object", "episode"])[
+            "wait_ms"
+        ]
+        per_fp["lock_wait_ms"] = episodes.max().groupby(level="fingerprint").sum()
+        per_fp["lock_waits"] = episodes.size().groupby(level="fingerprint").size()
+
+    if not events.checkpoints.empty:
+        cp = events.checkpoints
+        executions["during_checkpoint"] = _overlap_counts(
+            executions,
+            cp["timestamp"] - pd.to_timedelta(cp["total_s"], unit="s"),
+            cp["timestamp"],
+        )
+        per_fp["checkpoint_overlaps"] = executions.groupby("fingerprint")[
+            "during_checkpoint"
+        ].sum()
+
+    if not events.autovacuum.empty:
+        av = events.autovacuum
+        executions["during_autovacuum"] = _overlap_counts(
+            executions,
+            av["timestamp"] - pd.to_timedelta(av["elapsed_s"], unit="s"),
+            av["timestamp"],
+        )
+        per_fp["autovacuum_overlaps"] = executions.groupby("fingerprint")[
+            "during_autovacuum"
+        ].sum()
+
+    for column in (
+        "temp_files",
+        "temp_bytes",
+        "lock_wait_ms",
+        "lock_waits",
+        "checkpoint_overlaps",
+        "autovacuum_overlaps",
+    ):
+        if column not in per_fp.columns:
+            per_fp[column] = 0
+        per_fp[column] = per_fp[column].fillna(0)
+
+    per_fp["lock_wait_share"] = (
+        (
+            per_fp["lock_wait_ms"]
+            / per_fp["total_duration"].where(per_fp["total_duration"] > 0)
+        )
+        .fillna(0.0)
+        .clip(upper=1.0)
+    )
+
+    return per_fp.sort_values(["temp_bytes", "lock_wait_ms"], ascending=False)
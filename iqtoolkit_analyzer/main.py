@@ -5,12 +5,39 @@ Main entry point for Slow Query Doctor CLI
 import argparse
 import sys
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Set
 
-from .parser import parse_postgres_log, load_config
+from .parser import find_log_markers, parse_postgres_log, load_config
 from .analyzer import run_slow_query_analysis
-from .llm_client import LLMClient, LLMConfig
+from .antipatterns import AntiPatternDetector
+from .concurrency import analyze_concurrency
+from .dimensions import build_dimension_breakdown, parse_group_by
+from .index_advisor import advise_indexes, load_schema
+from .explain_batch import analyze_explain_files, collect_explain_files
+from .explain_metrics import analyze_plans
+from .explain_parser import PLAN_MARKER, iter_log_plans
+from .history_store import HistoryStore
+from .log_events import EVENT_MARKERS, correlate_events, extract_log_events
+from .parameters import analyze_parameter_values
+from .plan_history import PlanHistory
+from .pg_stat_statements import (
+    fetch_statements_snapshot,
+    load_statements_snapshot,
+    merge_with_log,
+    snapshot_workload,
+)
+from .table_workload import aggregate_by_relation
+from .llm_client import BUDGET_EXHAUSTED, LLMClient, LLMConfig
+from .llm_policy import (
+    TIER_LLM,
+    TIER_RULE,
+    TIER_SKIPPED,
+    TierDecision,
+    TieringPolicy,
+    plan_recommendations,
+)
 from .report_generator import ReportGenerator
 
 # MongoDB imports
@@ -18,6 +45,69 @@ from .mongodb_analyzer import MongoDBSlowQueryDetector
 from .mongodb_config import load_mongodb_config
 from .mongodb_report_generator import MongoDBReportGenerator
 
+DEFAULT_LLM_CACHE_PATH = "~/.iqtoolkit/llm_cache.db"
+DEFAULT_LLM_MAX_RETRIES = 2
+
+
+class _StreamEcho:
+    """Prints streamed recommendations to stdout, one query at a time.
+
+    Text of the first unfinished query is printed as it arrives; text of
+    the others is held back until every query before them has finished.
+    """
+
+    def __init__(self, total: int):
+        self._total = total
+        self._pending: List[List[str]] = [[] for _ in range(total)]
+        self._finished: Dict[int, str] = {}
+        self._streamed = [False] * total
+        self._current = 0
+        self._started = False
+        self._lock = threading.Lock()
+
+    def token(self, index: int, text: str) -> None:
+        with self._lock:
+            self._pending[index].append(text)
+            self._streamed[index] = True
+            self._flush()
+
+    def finished(self, index: int, recommendation: str) -> None:
+        with self._lock:
+            self._finished[index] = recommendation
+            self._flush()
+
+    def _flush(self) -> None:
+        while self._current < self._total:
+            index = self._current
+            if not self._started:
+                print(f"\n--- Query #{index + 1} ---", flush=True)
+                self._started = True
+            if self._pending[index]:
+                print("".join(self._pending[index]), end="", flush=True)
+                self._pending[index].clear()
+            if index not in self._finished:
+                return
+            if not self._streamed[index]:
+                # Cached or packed: nothing was streamed
+                print(self._finished[index], end="", flush=True)
+            print(flush=True)
+            self._current += 1
+            self._started = False
+
+
+def _config_list(value: Any) -> List[str]:
+    """Accept a YAML list or a comma separated string for list options."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return [str(item) for item in value]
+
+
+def _optional_number(value: Any, kind: Callable[[Any], Any]) -> Any:
+    """Convert an optional numeric config value (None stays None)."""
+    return kind(value) if value is not None else None
+
 
 def postgresql_command(args: argparse.Namespace) -> int:
     """Execute PostgreSQL slow query analysis."""
@@ -39,20 +129,128 @@ def postgresql_command(args: argparse.Namespace) -> int:
     log_format = user_config.get("log_format") or "plain"
     configured_top_n = int(user_config.get("top_n") or args.top_n)
     configured_output = user_config.get("output") or args.output
+    configured_group_by = getattr(args, "group_by", None) or user_config.get("group_by")
+    configured_rule_packs = _config_list(
+        user_config.get("antipattern_rule_packs")
+    ) + list(getattr(args, "rule_pack", None) or [])
+    disabled_rules = _config_list(user_config.get("disabled_antipattern_rules"))
+    configured_schema = getattr(args, "schema", None) or user_config.get("schema_file")
+    configured_history = getattr(args, "history_db", None) or user_config.get(
+        "history_db"
+    )
+    configured_snapshots = _config_list(
+        user_config.get("pg_stat_statements_snapshots")
+    ) + list(getattr(args, "pgss_snapshot", None) or [])
+    configured_dsn = getattr(args, "pgss_dsn", None) or user_config.get(
+        "pg_stat_statements_dsn"
+    )
+    tiering_policy = None
+    if not getattr(args, "no_llm_tiering", False) and user_config.get(
+        "llm_tiering", True
+    ):
+        policy_defaults = TieringPolicy()
+        tiering_policy = TieringPolicy(
+            min_confidence=float(
+                user_config.get(
+                    "llm_min_static_confidence", policy_defaults.min_confidence
+                )
+            ),
+            llm_impact_share=float(
+                user_config.get(
+                    "llm_always_impact_share", policy_defaults.llm_impact_share
+                )
+            ),
+            max_calls=_optional_number(user_config.get("llm_budget_calls"), int),
+            max_tokens=_optional_number(user_config.get("llm_budget_tokens"), int),
+            max_seconds=_optional_number(user_config.get("llm_budget_seconds"), float),
+        )
+    stream_output = bool(getattr(args, "stream", False)) or bool(
+        user_config.get("llm_stream", False)
+    )
 
     llm_defaults = LLMConfig()
     llm_config = LLMConfig(
         api_key=user_config.get("openai_api_key", llm_defaults.api_key),
         llm_provider=user_config.get("llm_provider", llm_defaults.llm_provider),
         openai_model=user_config.get("openai_model", llm_defaults.openai_model),
+        openai_base_url=user_config.get("openai_base_url"),
         ollama_model=user_config.get("ollama_model", llm_defaults.ollama_model),
         ollama_host=user_config.get("ollama_host", llm_defaults.ollama_host),
         temperature=float(user_config.get("llm_temperature", llm_defaults.temperature)),
         max_tokens=int(user_config.get("max_tokens", llm_defaults.max_tokens)),
         timeout=int(user_config.get("llm_timeout", llm_defaults.timeout)),
+        openai_max_concurrency=int(
+            user_config.get(
+                "openai_max_concurrency", llm_defaults.openai_max_concurrency
+            )
+        ),
+        ollama_max_concurrency=int(
+            user_config.get(
+                "ollama_max_concurrency", llm_defaults.ollama_max_concurrency
+            )
+        ),
+        cache_path=(
+            None
+            if getattr(args, "no_llm_cache", False)
+            else user_config.get("llm_cache_path", DEFAULT_LLM_CACHE_PATH)
+        ),
+        cache_ttl_hours=float(
+            user_config.get("llm_cache_ttl_hours", llm_defaults.cache_ttl_hours)
+        ),
+        cache_max_entries=int(
+            user_config.get("llm_cache_max_entries", llm_defaults.cache_max_entries)
+        ),
+        similarity_threshold=_optional_number(
+            user_config.get("llm_similarity_threshold"), float
+        ),
+        pack_queries=bool(
+            user_config.get("llm_pack_queries", llm_defaults.pack_queries)
+        ),
+        pack_token_budget=int(
+            user_config.get("llm_pack_token_budget", llm_defaults.pack_token_budget)
+        ),
+        max_prompt_tokens=int(
+            user_config.get("llm_max_prompt_tokens", llm_defaults.max_prompt_tokens)
+        ),
+        fallback_providers=list(user_config.get("llm_fallback_providers") or []),
+        max_retries=int(user_config.get("llm_max_retries", DEFAULT_LLM_MAX_RETRIES)),
+        retry_backoff_seconds=float(
+            user_config.get(
+                "llm_retry_backoff_seconds", llm_defaults.retry_backoff_seconds
+            )
+        ),
+        hedge_percentile=(
+            float(user_config["llm_hedge_percentile"])
+            if user_config.get("llm_hedge_percentile") is not None
+            else None
+        ),
+        circuit_failure_threshold=int(
+            user_config.get(
+                "llm_circuit_failure_threshold",
+                llm_defaults.circuit_failure_threshold,
+            )
+        ),
+        ollama_keep_alive=user_config.get("ollama_keep_alive"),
+        circuit_reset_seconds=float(
+            user_config.get(
+                "llm_circuit_reset_seconds", llm_defaults.circuit_reset_seconds
+            )
+        ),
     )
 
     try:
+        # Compile (and validate) anti-pattern rules before any parsing work
+        detector = AntiPatternDetector(
+            rule_packs=configured_rule_packs, disabled_rules=disabled_rules
+        )
+        schema = load_schema(str(configured_schema)) if configured_schema else None
+
+        # Load the Ollama model while the log is parsed
+        llm_client = None
+        if user_config.get("llm_prewarm", False):
+            llm_client = LLMClient(llm_config)
+            llm_client.prewarm()
+
         logger.info(f"Analyzing {args.log_file}")
 
         # Parse logs
@@ -64,14 +262,19 @@ def postgresql_command(args: argparse.Namespace) -> int:
 
         # Analyze queries
         try:
-            result = run_slow_query_analysis(df, top_n=configured_top_n)
+            result = run_slow_query_analysis(df, top_n=0, detector=detector)
         except ValueError as analysis_error:
             logger.warning(str(analysis_error))
             return 0
 
         # Type narrowing for DataFrame path
         if isinstance(result, tuple):
-            top_queries, summary = result
+            all_queries, summary = result
+            top_queries = (
+                all_queries.head(configured_top_n)
+                if configured_top_n > 0
+                else all_queries
+            )
             if len(top_queries) == 0:
                 logger.warning("No slow queries met the analysis criteria")
                 return 0
@@ -79,9 +282,67 @@ def postgresql_command(args: argparse.Namespace) -> int:
             logger.error("Unexpected return type from analysis")
             return 1
 
+        # Reconstruct concurrent slow query activity
+        concurrency = analyze_concurrency(df)
+
+        # Break time down by session dimensions if requested
+        breakdown = None
+        if configured_group_by:
+            breakdown = build_dimension_breakdown(
+                df, parse_group_by(str(configured_group_by)), top_n=configured_top_n
+            )
+
+        # Correlate temp file, lock, checkpoint and autovacuum events
+        events = None
+        event_correlation = None
+        plan_metrics = None
+        plan_flips = None
+        # Skip the event and plan passes over the log when nothing they look
+        # for is in it
+        markers: Set[str] = set()
+        if log_format == "plain":
+            markers = find_log_markers(args.log_file, EVENT_MARKERS + (PLAN_MARKER,))
+        if markers.intersection(EVENT_MARKERS):
+            events = extract_log_events(args.log_file)
+            if not events.empty:
+                event_correlation = correlate_events(df, events)
+        if PLAN_MARKER in markers:
+            # Find the dominant node and plan changes of auto_explain plans
+            plan_history = PlanHistory()
+            plan_metrics = analyze_plans(
+                iter_log_plans(args.log_file), history=plan_history
+            )
+            if configured_history:
+                with HistoryStore(str(configured_history)) as store:
+                    store.save_plan_history(plan_history)
+                    plan_history = store.load_plan_history(plan_history.fingerprints)
+            plan_flips = plan_history.flips()
+
+        # Add the statements below the logging threshold from pg_stat_statements
+        workload = None
+        if configured_snapshots or configured_dsn:
+            snapshots = [
+                load_statements_snapshot(path) for path in configured_snapshots
+            ]
+            if configured_dsn:
+                snapshots.append(fetch_statements_snapshot(str(configured_dsn)))
+            workload = merge_with_log(snapshot_workload(snapshots), df, snapshots)
+
+        # Look for literal / bind-parameter values that skew latency
+        parameter_report = analyze_parameter_values(df)
+
+        # Roll time up to the tables each pattern touches
+        hot_tables = aggregate_by_relation(all_queries)
+
+        # Propose missing indexes when the schema DDL is available
+        index_advice = None
+        if schema is not None:
+            index_advice = advise_indexes(all_queries, schema)
+
         # Generate AI recommendations
         logger.info("Generating recommendations...")
-        llm_client = LLMClient(llm_config)
+        if llm_client is None:
+            llm_client = LLMClient(llm_config)
 
         queries_to_analyze: List[Dict[str, Any]] = []
         for row in top_queries.itertuples(index=False):
@@ -90,20 +351,102 @@ def postgresql_command(args: argparse.Namespace) -> int:
                     "query_text": str(row.example_query),
                     "avg_duration": float(row.avg_duration),
                     "frequency": int(row.frequency),
+                    "findings": list(row.antipatterns),
+                    "impact_score": float(row.impact_score),
+                    "matches": list(row.antipattern_matches),
                 }
             )
 
-        recommendations = llm_client.batch_generate_recommendations(queries_to_analyze)
+        # Spend LLM calls only where static analysis doesn't already explain
+        # the query
+        if tiering_policy is not None:
+            tiers = plan_recommendations(
+                queries_to_analyze,
+                tiering_policy,
+                llm_client.is_cached,
+                llm_client.estimate_tokens,
+            )
+        else:
+            tiers = [TierDecision(TIER_LLM, "tiering disabled")] * len(
+                queries_to_analyze
+            )
+        llm_indexes = [i for i, tier in enumerate(tiers) if tier.tier == TIER_LLM]
+        recommendations: List[Optional[str]] = [
+            tier.rule_recommendation if tier.tier == TIER_RULE else None
+            for tier in tiers
+        ]
+
+        # Write each query's section as soon as its recommendation is ready;
+        # the complete report replaces the partial one below
+        output_path = Path(configured_output)
+        report_gen = ReportGenerator(llm_client)
+        echo = _StreamEcho(len(queries_to_analyze)) if stream_output else None
+
+        with report_gen.start_markdown_report(
+            output_path, top_queries, plan_metrics=plan_metrics
+        ) as partial_report:
+
+            def on_result(index: int, recommendation: Optional[str]) -> None:
+                tier = tiers[index]
+                if recommendation == BUDGET_EXHAUSTED:
+                    # Out of time: fall back to the static diagnosis, if any
+                    tier = TierDecision(
+                        TIER_RULE if tier.rule_recommendation else TIER_SKIPPED,
+                        "LLM time budget spent",
+                        tier.rule_recommendation,
+                    )
+                    tiers[index] = tier
+                    recommendation = tier.rule_recommendation
+                recommendations[index] = recommendation
+                partial_report.add(index, recommendation, tier)
+                if echo is not None:
+                    echo.finished(index, recommendation or "")
+
+            for index, tier in enumerate(tiers):
+                if tier.tier != TIER_LLM:
+                    on_result(index, recommendations[index])
+
+            llm_client.batch_generate_recommendations(
+                [queries_to_analyze[index] for index in llm_indexes],
+                on_result=lambda position, text: on_result(llm_indexes[position], text),
+                on_token=(
+                    (lambda position, text: echo.token(llm_indexes[position], text))
+                    if echo is not None
+                    else None
+                ),
+                time_budget=(
+                    tiering_policy.max_seconds if tiering_policy is not None else None
+                ),
+            )
+        cache_stats = llm_client.cache.stats if llm_client.cache is not None else None
+        if cache_stats is not None:
+            logger.info(
+                f"LLM cache hit rate {cache_stats.hit_rate:.0%}, "
+                f"~{cache_stats.saved_ms / 1000:.1f} s saved"
+            )
 
         # Generate report
-        report_gen = ReportGenerator(llm_client)
         report = report_gen.generate_markdown_report(
-            top_queries, summary, recommendations
+            top_queries,
+            summary,
+            recommendations,
+            concurrency=concurrency,
+            breakdown=breakdown,
+            events=events,
+            event_correlation=event_correlation,
+            parameters=parameter_report,
+            hot_tables=hot_tables,
+            rule_stats=detector.get_rule_stats(),
+            index_advice=index_advice,
+            plan_metrics=plan_metrics,
+            plan_flips=plan_flips,
+            workload=workload,
+            llm_cache=cache_stats,
+            llm_latency=llm_client.latency_histograms,
+            tiers=tiers,
         )
 
         # Write output
-        output_path = Path(configured_output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(report)
 
         print(f"✅ Report saved to: {output_path}")
@@ -118,6 +461,40 @@ def postgresql_command(args: argparse.Namespace) -> int:
         return 1
 
 
+def explain_command(args: argparse.Namespace) -> int:
+    """Execute EXPLAIN file analysis."""
+    setup_logging("DEBUG" if args.verbose else "INFO")
+    logger = logging.getLogger(__name__)
+
+    try:
+        files = collect_explain_files(args.paths, pattern=args.glob)
+        if not files:
+            logger.warning("No EXPLAIN files found")
+            return 0
+
+        results = analyze_explain_files(files, workers=args.workers)
+        plan_metrics = analyze_plans(
+            result.plan for result in results if result.plan is not None
+        )
+
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        report = ReportGenerator(
+            None, output_dir=str(output_path.parent)
+        ).generate_explain_report(results, plan_metrics, top_n=args.top_n)
+        output_path.write_text(report)
+
+        print(f"✅ Report saved to: {output_path}")
+        return 0
+
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+        return 1
+    except Exception as e:
+        logger.error(f"Error: {e}")
+        return 1
+
+
 def mongodb_command(args: argparse.Namespace) -> int:
     """Execute MongoDB slow query analysis."""
     try:
@@ -277,6 +654,9 @@ Examples:
   # Analyze PostgreSQL log file
   %(prog)s postgresql /path/to/slow.log
 
+  # Analyze a directory of EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) files
+  %(prog)s explain ./plans --workers 8
+
   # Analyze MongoDB database with connection string
   %(prog)s mongodb --connection-string "mongodb://localhost:27017" --database myapp
 
@@ -323,6 +703,108 @@ Examples:
         default=5,
         help="Number of top slow queries to analyze (default: 5)",
     )
+    pg_parser.add_argument(
+        "--group-by",
+        type=str,
+        default=None,
+        help="Break down time by dimensions, e.g. fingerprint,db,user,app "
+        "(dimensions come from log_line_prefix)",
+    )
+
+    pg_parser.add_argument(
+        "--rule-pack",
+        action="append",
+        default=None,
+        metavar="PATH",
+        help="YAML anti-pattern rule pack to load (repeatable)",
+    )
+
+    pg_parser.add_argument(
+        "--schema",
+        type=str,
+        default=None,
+        metavar="DDL_FILE",
+        help="Schema DDL (e.g. pg_dump --schema-only) used to recommend indexes",
+    )
+
+    pg_parser.add_argument(
+        "--history-db",
+        type=str,
+        default=None,
+        metavar="SQLITE_FILE",
+        help="SQLite file keeping plan history across runs (plan-flip detection)",
+    )
+
+    pg_parser.add_argument(
+        "--pgss-snapshot",
+        action="append",
+        default=None,
+        metavar="PATH",
+        help="pg_stat_statements export (CSV/JSON); with two or more, the "
+        "delta between the first and last is used (repeatable)",
+    )
+
+    pg_parser.add_argument(
+        "--pgss-dsn",
+        type=str,
+        default=None,
+        metavar="CONNINFO",
+        help="Take a live pg_stat_statements snapshot (added as the latest)",
+    )
+
+    pg_parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Request fresh LLM recommendations instead of reusing cached ones",
+    )
+
+    pg_parser.add_argument(
+        "--no-llm-tiering",
+        action="store_true",
+        help="Request an LLM recommendation for every top query, even when "
+        "static analysis already explains it",
+    )
+
+    pg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print LLM recommendations to the terminal as they are generated",
+    )
+
+    # EXPLAIN file subcommand
+    explain_parser = subparsers.add_parser(
+        "explain",
+        help="Analyze EXPLAIN (ANALYZE, BUFFERS) output files or directories",
+    )
+    explain_parser.add_argument(
+        "paths",
+        nargs="+",
+        help="EXPLAIN output files (JSON or text) or directories of them",
+    )
+    explain_parser.add_argument(
+        "--output",
+        type=str,
+        default="reports/explain_report.md",
+        help="Output report path (default: reports/explain_report.md)",
+    )
+    explain_parser.add_argument(
+        "--top-n",
+        type=int,
+        default=20,
+        help="Number of ranked plans shown in detail (default: 20)",
+    )
+    explain_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count; 1 disables the pool)",
+    )
+    explain_parser.add_argument(
+        "--glob",
+        type=str,
+        default="*",
+        help="File name pattern used inside directories (default: *)",
+    )
 
     # MongoDB subcommand
     mongo_parser = subparsers.add_parser(
@@ -367,6 +849,8 @@ Examples:
     # Dispatch to appropriate handler
     if args.database_type in ["postgresql", "pg", "postgres"]:
         return postgresql_command(args)
+    elif args.database_type == "explain":
+        return explain_command(args)
     elif args.database_type in ["mongodb", "mongo"]:
         return mongodb_command(args)
     else:
@@ -0,0 +1,258 @@
+"""
+Bind-parameter and literal value analysis per query fingerprint.
+
+Normalization throws literal values away and extended-protocol statements
+only log ``$n`` placeholders, so parameter skew ("one tenant id is 100x
+slower than the rest") is invisible in the per-pattern statistics. This
+module recovers the values per fingerprint and tracks the heaviest ones
+with a bounded Space-Saving summary, so memory stays constant no matter how
+many distinct values appear in the log.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+
+from .analyzer import normalize_query, query_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Mirrors normalize_query: quoted strings and bare integers are literals,
+# and a parenthesised IN list collapses into one slot.
+_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'|\b(\d+(?:\.\d+)?)\b")
+_IN_LIST_RE = re.compile(r"IN\s*\(([^)]+)\)", re.IGNORECASE)
+
+MAX_SLOTS_PER_FINGERPRINT = 16
+MAX_VALUE_LENGTH = 200
+
+
+@dataclass
+class HeavyHitter:
+    """A value tracked by the Space-Saving summary."""
+
+    value: str
+    count: int
+    error: int = 0
+    total_duration: float = 0.0
+
+    @property
+    def guaranteed(self) -> int:
+        """Executions observed since the value entered the summary."""
+        return self.count - self.error
+
+    @property
+    def avg_duration(self) -> float:
+        # total_duration only covers the guaranteed executions
+        return self.total_duration / self.guaranteed if self.guaranteed else 0.0
+
+
+class SpaceSaving:
+    """
+    Bounded heavy-hitter summary (Metwally et al. Space-Saving).
+
+    Keeps at most ``capacity`` counters. When a new value arrives and the
+    summary is full, the smallest counter is evicted and its count inherited
+    as the newcomer's error bound, so every value with true frequency above
+    N / capacity is guaranteed to be present.
+    """
+
+    def __init__(self, capacity: int = 32) -> None:
+        if capacity < 1:
+            raise ValueError("Space-Saving capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self._counters: Dict[str, HeavyHitter] = {}
+
+    def add(self, value: str, duration: float = 0.0) -> None:
+        self.total += 1
+        counter = self._counters.get(value)
+        if counter is not None:
+            counter.count += 1
+            counter.total_duration += duration
+            return
+        if len(self._counters) < self.capacity:
+            self._counters[value] = HeavyHitter(value, 1, 0, duration)
+            return
+        victim = min(self._counters.values(), key=lambda c: c.count)
+        del self._counters[victim.value]
+        # The evicted value's duration sum cannot be attributed to the
+        # newcomer, so only the count is inherited (as error)
+        self._counters[value] = HeavyHitter(
+            value, victim.count + 1, victim.count, duration
+        )
+
+    def top(self, k: Optional[int] = None) -> List[HeavyHitter]:
+        ranked = sorted(self._counters.values(), key=lambda c: c.count, reverse=True)
+        return ranked if k is None else ranked[:k]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+@dataclass
+class ParameterSkew:
+    """A value whose executions are much slower than its pattern's average."""
+
+    fingerprint: str
+    query: str
+    slot: str
+    value: str
+    count: int
+    share: float
+    avg_duration: float
+    baseline_avg_duration: float
+
+    @property
+    def slowdown(self) -> float:
+        if self.baseline_avg_duration <= 0:
+            return 0.0
+        return self.avg_duration / self.baseline_avg_duration
+
+
+@dataclass
+class ParameterReport:
+    """Heavy hitters and skew findings across fingerprints."""
+
+    heavy_hitters: Dict[str, Dict[str, List[HeavyHitter]]] = field(default_factory=dict)
+    skews: List[ParameterSkew] = field(default_factory=list)
+    query_texts: Dict[str, str] = field(default_factory=dict)
+
+
+def extract_query_values(
+    query: str, parameters: Optional[Mapping[str, Optional[str]]] = None
+) -> List[Tuple[str, str]]:
+    """
+    Recover the values a query ran with, as (slot, value) pairs
+
+    Bind parameters are reported under their placeholder (``$1``); inline
+    literals under their ordinal position (``#1``, ``#2``...), which is
+    stable across executions of the same fingerprint.
+
+    Args:
+        query: Raw SQL statement
+        parameters: Bind values from a ``DETAIL: parameters`` line
+
+    Returns:
+        List of (slot, value) tuples
+    """
+    values: List[Tuple[str, str]] = []
+    if parameters:
+        for placeholder, value in parameters.items():
+            values.append((placeholder, "NULL" if value is None else value))
+
+    in_lists = [(m.start(), m.end(), m.group(1)) for m in _IN_LIST_RE.finditer(query)]
+    emitted_lists: Set[int] = set()
+    list_index = 0
+    position = 0
+    for match in _LITERAL_RE.finditer(query):
+        start = match.start()
+        if start > 0 and query[start - 1] == "$":
+            continue
+        while list_index < len(in_lists) and in_lists[list_index][1] <= start:
+            list_index += 1
+        if list_index < len(in_lists) and in_lists[list_index][0] <= start:
+            # The whole IN list is one slot, as in the normalized query
+            if list_index in emitted_lists:
+                continue
+            emitted_lists.add(list_index)
+            value = f"<{in_lists[list_index][2].count(',') + 1} values>"
+        elif match.group(1) is not None:
+            value = match.group(1).replace("''", "'")
+        else:
+            value = match.group(2)
+        position += 1
+        values.append((f"#{position}", value))
+    return values
+
+
+def analyze_parameter_values(
+    log_df: pd.DataFrame,
+    capacity: int = 32,
+    min_count: int = 2,
+    min_slowdown: float = 2.0,
+    top_n: int = 10,
+) -> ParameterReport:
+    """
+    Track heavy-hitter values per fingerprint and flag parameter skew
+
+    Args:
+        log_df: Parsed log DataFrame; an optional ``parameters`` column holds
+            bind values for extended-protocol statements
+        capacity: Space-Saving counters kept per fingerprint slot
+        min_count: Minimum executions for a value to be reported as skewed
+        min_slowdown: Minimum ratio of the value's avg duration to the avg
+            duration of the pattern's other executions
+        top_n: Maximum number of skew findings to keep
+
+    Returns:
+        ParameterReport with heavy hitters and ranked skew findings
+    """
+    report = ParameterReport()
+    summaries: Dict[str, Dict[str, SpaceSaving]] = {}
+    pattern_totals: Dict[str, List[float]] = {}
+    fingerprint_cache: Dict[str, str] = {}
+
+    has_parameters = "parameters" in log_df.columns
+    columns = ["query", "duration_ms"] + (["parameters"] if has_parameters else [])
+    for row in log_df[columns].itertuples(index=False):
+        query = str(row.query)
+        duration = float(row.duration_ms)
+        fp = fingerprint_cache.get(query)
+        if fp is None:
+            fp = query_fingerprint(query)
+            fingerprint_cache[query] = fp
+            report.query_texts.setdefault(fp, normalize_query(query))
+
+        totals = pattern_totals.setdefault(fp, [0.0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+
+        parameters: Any = row.parameters if has_parameters else None
+        slots = summaries.setdefault(fp, {})
+        for slot, value in extract_query_values(
+            query, parameters if isinstance(parameters, Mapping) else None
+        ):
+            summary = slots.get(slot)
+            if summary is None:
+                if len(slots) >= MAX_SLOTS_PER_FINGERPRINT:
+                    continue
+                summary = slots[slot] = SpaceSaving(capacity)
+            summary.add(value[:MAX_VALUE_LENGTH], duration)
+
+    for fp, slots in summaries.items():
+        executions, total_duration = pattern_totals[fp]
+        report.heavy_hitters[fp] = {slot: s.top(5) for slot, s in slots.items()}
+        for slot, summary in slots.items():
+            for hitter in summary.top():
+                # Guaranteed count excludes the inherited error bound, and is
+                # the only count the tracked duration sum is known for
+                count = hitter.guaranteed
+                others = executions - count
+                if count < min_count or others <= 0:
+                    continue
+                skew = ParameterSkew(
+                    fingerprint=fp,
+                    query=report.query_texts.get(fp, ""),
+                    slot=slot,
+                    value=hitter.value,
+                    count=count,
+                    share=count / executions if executions else 0.0,
+                    avg_duration=hitter.avg_duration,
+                    baseline_avg_duration=max(
+                        0.0, total_duration - hitter.total_duration
+                    )
+                    / others,
+                )
+                if skew.slowdown >= min_slowdown:
+                    report.skews.append(skew)
+
+    report.skews.sort(key=lambda s: s.slowdown * s.count, reverse=True)
+    report.skews = report.skews[:top_n]
+    logger.info(
+        f"Tracked parameter values for {len(summaries)} fingerprints "
+        f"({len(report.skews)} skew findings)"
+    )
+    return report
@@ -6,10 +6,36 @@ from pathlib import Path
 import yaml
 import json
 import csv
-from typing import Any
+from typing import Any, Iterable, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+# Dimension columns extracted from log_line_prefix (or passed through from
+# structured logs) so analysis can break time down by who ran the query.
+DIMENSION_COLUMNS = ["pid", "user", "database", "application", "client"]
+
+_PREFIX_KEY_ALIASES = {
+    "user": "user",
+    "usr": "user",
+    "user_name": "user",
+    "db": "database",
+    "database": "database",
+    "database_name": "database",
+    "app": "application",
+    "application": "application",
+    "application_name": "application",
+    "client": "client",
+    "host": "client",
+    "remote": "client",
+    "client_addr": "client",
+    "remote_host": "client",
+    "pid": "pid",
+    "process_id": "pid",
+}
+_BIND_PARAMETER_RE = re.compile(r"\$(\d+) = (NULL|'((?:[^']|'')*)')")
+_PREFIX_PID_RE = re.compile(r"\[(\d+)\]")
+_PREFIX_PAIR_RE = re.compile(r"(\w+)=([^,\s]*)")
+
 
 def load_config(config_path: str = ".iqtoolkit-analyzer.yml") -> dict[str, Any]:
     """Load YAML config file if present."""
@@ -20,6 +46,104 @@ def load_config(config_path: str = ".iqtoolkit-analyzer.yml") -> dict[str, Any]:
     return {}
 
 
+def parse_log_line_prefix(prefix: str) -> dict[str, Any]:
+    """
+    Extract session dimensions from a log_line_prefix fragment.
+
+    Understands the conventional ``[%p]`` process id and ``key=value`` pairs
+    such as ``user=%u,db=%d,app=%a,client=%h``.
+
+    Args:
+        prefix: Text between the log timestamp and the message severity
+
+    Returns:
+        Dict with one entry per column in DIMENSION_COLUMNS (None if absent)
+    """
+    fields: dict[str, Any] = dict.fromkeys(DIMENSION_COLUMNS)
+    pid_match = _PREFIX_PID_RE.search(prefix)
+    if pid_match:
+        fields["pid"] = int(pid_match.group(1))
+    for key, value in _PREFIX_PAIR_RE.findall(prefix):
+        column = _PREFIX_KEY_ALIASES.get(key.lower())
+        if column is None or not value or value in ("[unknown]", "?"):
+            continue
+        if column == "pid":
+            if value.isdigit():
+                fields["pid"] = int(value)
+        else:
+            fields[column] = value
+    return fields
+
+
+def find_log_markers(
+    log_file_path: str, markers: Iterable[str], chunk_size: int = 1 << 20
+) -> Set[str]:
+    """
+    Find which of the given substrings occur in a log file.
+
+    Reads raw bytes in large chunks and stops as soon as every marker has
+    been seen, so it is far cheaper than a parsing pass; use it to skip
+    passes whose message types the log does not contain.
+
+    Args:
+        log_file_path: Path to the log file
+        markers: Substrings to look for
+        chunk_size: Bytes read at a time
+
+    Returns:
+        The markers found in the file
+    """
+    wanted = {marker: marker.encode("utf-8") for marker in markers}
+    if not wanted:
+        return set()
+    overlap = max(len(encoded) for encoded in wanted.values()) - 1
+    found: Set[str] = set()
+    tail = b""
+    with open(log_file_path, "rb") as f:
+        while len(found) < len(wanted):
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            window = tail + chunk
+            for marker, encoded in wanted.items():
+                if marker not in found and encoded in window:
+                    found.add(marker)
+            tail = window[-overlap:] if overlap else b""
+    return found
+
+
+def parse_bind_parameters(detail: str) -> dict[str, Optional[str]]:
+    """
+    Parse a ``DETAIL:  parameters: $1 = '42', $2 = NULL`` payload.
+
+    Args:
+        detail: Text following ``parameters:``
+
+    Returns:
+        Dict mapping placeholder (``$1``) to its value (None for NULL)
+    """
+    parameters: dict[str, Optional[str]] = {}
+    for number, raw, quoted in _BIND_PARAMETER_RE.findall(detail):
+        parameters[f"${number}"] = None if raw == "NULL" else quoted.replace("''", "'")
+    return parameters
+
+
+def _normalize_dimension_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename known dimension aliases in structured logs and fill gaps."""
+    renames = {
+        column: _PREFIX_KEY_ALIASES[column.lower()]
+        for column in df.columns
+        if column.lower() in _PREFIX_KEY_ALIASES
+        and _PREFIX_KEY_ALIASES[column.lower()] not in df.columns
+    }
+    df = df.rename(columns=renames)
+    for column in DIMENSION_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df["pid"] = pd.to_numeric(df["pid"], errors="coerce").astype("Int64")
+    return df
+
+
 def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.DataFrame:
     """
     Parses database log file and extracts slow queries (currently PostgreSQL format)
@@ -29,7 +153,8 @@ def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.Data
         log_format: 'plain', 'csv', or 'json'
 
     Returns:
-        DataFrame with columns [timestamp, duration_ms, query]
+        DataFrame with columns [timestamp, duration_ms, query] plus the
+        session dimensions [pid, user, database, application, client]
 
     Raises:
         FileNotFoundError: If log file doesn't exist
@@ -46,8 +171,12 @@ def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.Data
             log_text = f.read()
         # Improved regex for multi-line queries and edge cases
         pattern = (
-            r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}).*?duration: "
-            r"([\d.]+) ms.*?statement: ([\s\S]+?)(?=\n\d{4}-\d{2}-\d{2} |\Z)"
+            r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})([^\n]*?)duration: "
+            # auto_explain entries ("ms  plan:") are read by explain_parser
+            r"([\d.]+) ms(?!\s+plan:).*?(?:statement|execute [^:\n]*): ([\s\S]+?)"
+            # Extended protocol: bind values follow on a DETAIL line
+            r"(?:\n\d{4}-\d{2}-\d{2} [^\n]*?DETAIL:\s+parameters: ([\s\S]+?))?"
+            r"(?=\n\d{4}-\d{2}-\d{2} |\Z)"
         )
         matches = re.findall(pattern, log_text, re.DOTALL)
         if not matches:
@@ -76,17 +205,20 @@ def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.Data
                 print(f"Examined {idx} log entries...")
                 logger.info(f"Examined {idx} log entries...")
             try:
-                log_entries.append(
-                    {
-                        "timestamp": pd.to_datetime(match[0]),
-                        "duration_ms": float(match[1]),
-                        "query": match[2].strip(),
-                    }
-                )
+                entry = {
+                    "timestamp": pd.to_datetime(match[0]),
+                    "duration_ms": float(match[2]),
+                    "query": match[3].strip(),
+                    "parameters": (
+                        parse_bind_parameters(match[4]) if match[4] else None
+                    ),
+                }
+                entry.update(parse_log_line_prefix(match[1]))
+                log_entries.append(entry)
             except Exception as e:
                 logger.warning(f"Skipping malformed entry: {e}")
                 continue
-        df = pd.DataFrame(log_entries)
+        df = _normalize_dimension_columns(pd.DataFrame(log_entries))
         logger.info(f"Parsed {len(df)} slow query entries (plain)")
         return df
 
@@ -120,7 +252,7 @@ def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.Data
             logger.warning("No valid slow query entries found in CSV log.")
             print("No valid slow query entries found in CSV log.")
             raise ValueError("No slow query entries found in CSV log.")
-        df = pd.DataFrame(rows)
+        df = _normalize_dimension_columns(pd.DataFrame(rows))
         df["timestamp"] = pd.to_datetime(df["timestamp"])
         df["duration_ms"] = df["duration_ms"].astype(float)
         logger.info(f"Parsed {len(df)} slow query entries (csv)")
@@ -162,7 +294,7 @@ def parse_postgres_log(log_file_path: str, log_format: str = "plain") -> pd.Data
             logger.warning("No valid slow query entries found in JSON log.")
             print("No valid slow query entries found in JSON log.")
             raise ValueError("No slow query entries found in JSON log.")
-        df = pd.DataFrame(log_entries)
+        df = _normalize_dimension_columns(pd.DataFrame(log_entries))
         df["timestamp"] = pd.to_datetime(df["timestamp"])
         df["duration_ms"] = df["duration_ms"].astype(float)
         logger.info(f"Parsed {len(df)} slow query entries (json)")
@@ -0,0 +1,393 @@
+"""
+pg_stat_statements snapshots, deltas and the merge with log fingerprints.
+
+The slow query log only shows statements over ``log_min_duration_statement``,
+while most load often comes from many fast statements. pg_stat_statements
+counts every execution, so the difference between two snapshots gives the
+complete workload of the time between them. Snapshots are read from CSV or
+JSON exports, or taken from a live server with psycopg.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+
+from .analyzer import normalize_query, query_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Identify a statement across snapshots; toplevel exists from PostgreSQL 14
+KEY_COLUMNS = ["userid", "dbid", "queryid", "toplevel"]
+COUNTER_COLUMNS = [
+    "calls",
+    "total_ms",
+    "rows",
+    "shared_blks_hit",
+    "shared_blks_read",
+    "temp_blks_written",
+]
+WORKLOAD_COLUMNS = [
+    "query",
+    "query_hash",
+    "calls",
+    "total_ms",
+    "mean_ms",
+    "rows",
+    "shared_blks_hit",
+    "shared_blks_read",
+    "logged_calls",
+    "logged_ms",
+    "hidden_ms",
+    "source",
+]
+
+_PARAMETER_RE = re.compile(r"\$\d+")
+
+# Spellings of toplevel: psql CSV exports write t/f, JSON and psycopg booleans
+_TRUE_VALUES = {"t", "true", "1"}
+_FALSE_VALUES = {"f", "false", "0"}
+
+
+@dataclass
+class StatementSnapshot:
+    """pg_stat_statements counters at one point in time."""
+
+    statements: pd.DataFrame
+    captured_at: Optional[datetime] = None
+    source: str = ""
+
+
+@dataclass
+class StatementWorkload:
+    """Statement totals from pg_stat_statements joined with the slow log."""
+
+    statements: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=WORKLOAD_COLUMNS)
+    )
+    snapshots: int = 0
+    # Capture times of the first and last snapshot, when known
+    window: Optional[Tuple[datetime, datetime]] = None
+
+    @property
+    def empty(self) -> bool:
+        return len(self.statements) == 0
+
+    @property
+    def total_ms(self) -> float:
+        return float(self.statements["total_ms"].sum())
+
+    @property
+    def logged_ms(self) -> float:
+        return float(self.statements["logged_ms"].sum())
+
+    @property
+    def logged_share(self) -> float:
+        """Share of the total time visible in the slow query log."""
+        total = self.total_ms
+        return min(self.logged_ms / total, 1.0) if total else 0.0
+
+
+def statement_key(query: str) -> str:
+    """
+    Grouping key shared by pg_stat_statements text and logged statements
+
+    pg_stat_statements replaces constants with ``$n`` placeholders while
+    normalize_query turns string literals into ``'?'`` and numbers into
+    ``?``; both are mapped to ``?`` before hashing.
+
+    Args:
+        query: Statement text from either source
+
+    Returns:
+        MD5 hex digest
+    """
+    text = normalize_query(_PARAMETER_RE.sub("?", query)).replace("'?'", "?")
+    return hashlib.md5(text.rstrip("; ").encode()).hexdigest()
+
+
+def _key_int(value: Any) -> Any:
+    """Read an id (userid, dbid, queryid) exactly, whatever its source type."""
+    if pd.isna(value):
+        return pd.NA
+    text = str(value).strip()
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return int(float(text))
+        except ValueError:
+            return pd.NA
+
+
+def _key_bool(value: Any) -> Any:
+    """Read toplevel from a bool or its t/f, true/false or 1/0 spelling."""
+    if isinstance(value, bool):
+        return value
+    if pd.isna(value):
+        return pd.NA
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    return pd.NA
+
+
+def _normalize_snapshot(raw: pd.DataFrame, source: str) -> StatementSnapshot:
+    if "queryid" not in raw.columns or "query" not in raw.columns:
+        raise ValueError(f"{source}: not a pg_stat_statements export (no queryid)")
+    df = raw.copy()
+
+    captured_at = None
+    if "captured_at" in df.columns and df["captured_at"].notna().any():
+        stamp = pd.to_datetime(df["captured_at"].dropna().iloc[0], utc=True)
+        captured_at = stamp.tz_convert(None).to_pydatetime()
+
+    # PostgreSQL 12 and older report total_time; 13+ split exec and plan time
+    exec_ms = df["total_exec_time"] if "total_exec_time" in df else df.get("total_time")
+    if exec_ms is None:
+        raise ValueError(f"{source}: missing total_exec_time/total_time column")
+    df["total_ms"] = pd.to_numeric(exec_ms, errors="coerce").fillna(0.0)
+    if "total_plan_time" in df:
+        df["total_ms"] += pd.to_numeric(df["total_plan_time"], errors="coerce").fillna(
+            0.0
+        )
+    for column in COUNTER_COLUMNS:
+        if column not in df:
+            df[column] = 0
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0)
+
+    keys = [column for column in KEY_COLUMNS if column in df]
+    # Key dtypes differ between CSV, JSON and psycopg (toplevel is t/f in a
+    # psql CSV and a bool elsewhere), so normalize them before any join
+    for column in keys:
+        if column == "toplevel":
+            df[column] = df[column].map(_key_bool).astype("boolean")
+        else:
+            df[column] = df[column].map(_key_int).astype("Int64")
+    df["query"] = df["query"].fillna("").astype(str)
+    return StatementSnapshot(
+        statements=df[keys + ["query"] + COUNTER_COLUMNS].reset_index(drop=True),
+        captured_at=captured_at,
+        source=source,
+    )
+
+
+def load_statements_snapshot(path: str) -> StatementSnapshot:
+    """
+    Read a pg_stat_statements export
+
+    CSV files need a header row (e.g. ``\\copy (SELECT now() AS captured_at,
+    * FROM pg_stat_statements) TO 'snap.csv' CSV HEADER``). JSON files hold
+    a list of rows, or an object with ``captured_at`` and ``statements``.
+
+    Args:
+        path: CSV or JSON file
+
+    Returns:
+        StatementSnapshot; ``captured_at`` comes from a ``captured_at``
+        column or key when present
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If the file is not a pg_stat_statements export
+    """
+    file_path = Path(path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Snapshot file not found: {path}")
+
+    if file_path.suffix.lower() == ".json":
+        data = json.loads(file_path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            rows = pd.DataFrame(data.get("statements", []))
+            if data.get("captured_at") is not None:
+                rows["captured_at"] = data["captured_at"]
+        else:
+            rows = pd.DataFrame(data)
+    else:
+        # Ids as text, so 64-bit queryids survive missing values exactly
+        rows = pd.read_csv(file_path, dtype={column: str for column in KEY_COLUMNS})
+
+    snapshot = _normalize_snapshot(rows, str(path))
+    logger.info(f"Loaded {len(snapshot.statements)} statements from {path}")
+    return snapshot
+
+
+def fetch_statements_snapshot(conninfo: str) -> StatementSnapshot:
+    """
+    Take a snapshot from a live server
+
+    Args:
+        conninfo: libpq connection string or URI
+
+    Returns:
+        StatementSnapshot captured now
+
+    Raises:
+        ValueError: If the pg_stat_statements extension is not installed
+    """
+    # Imported here so libpq is only needed when a server is queried
+    import psycopg
+
+    with psycopg.connect(conninfo) as conn:
+        with conn.cursor() as cursor:
+            try:
+                cursor.execute("SELECT now() AS captured_at, * FROM pg_stat_statements")
+            except psycopg.errors.UndefinedTable as e:
+                raise ValueError(
+                    "pg_stat_statements is not installed "
+                    "(CREATE EXTENSION pg_stat_statements)"
+                ) from e
+            columns = [column.name for column in cursor.description or []]
+            rows = pd.DataFrame(cursor.fetchall(), columns=columns)
+    return _normalize_snapshot(rows, "pg_stat_statements")
+
+
+def statement_deltas(
+    before: StatementSnapshot, after: StatementSnapshot
+) -> pd.DataFrame:
+    """
+    Compute what ran between two snapshots
+
+    Statements missing from ``before`` count from zero. When a statement's
+    calls went down, its counters were reset in between and the ``after``
+    values are used as they stand.
+
+    Args:
+        before: Earlier snapshot
+        after: Later snapshot
+
+    Returns:
+        One row per statement that ran in between, by total time
+    """
+    keys = [
+        column
+        for column in KEY_COLUMNS
+        if column in before.statements and column in after.statements
+    ]
+    merged = after.statements.merge(
+        before.statements[keys + COUNTER_COLUMNS],
+        on=keys,
+        how="left",
+        suffixes=("", "_before"),
+    )
+    reset = merged["calls"] < merged["calls_before"]
+    for column in COUNTER_COLUMNS:
+        prior = merged[f"{column}_before"].fillna(0).where(~reset, 0)
+        merged[column] = merged[column] - prior
+    deltas = merged.loc[merged["calls"] > 0, keys + ["query"] + COUNTER_COLUMNS]
+    logger.info(
+        f"{len(deltas)} statements ran between snapshots "
+        f"({int(reset.sum())} reset in between)"
+    )
+    return deltas.sort_values("total_ms", ascending=False).reset_index(drop=True)
+
+
+def snapshot_workload(snapshots: List[StatementSnapshot]) -> pd.DataFrame:
+    """
+    Reduce snapshots to the statements that ran in the covered window
+
+    Args:
+        snapshots: One or more snapshots; ordered by ``captured_at`` when
+            every snapshot has one
+
+    Returns:
+        Deltas between the first and last snapshot, or the cumulative
+        counters (since the last reset) of a single snapshot
+
+    Raises:
+        ValueError: If no snapshot is given
+    """
+    if not snapshots:
+        raise ValueError("No pg_stat_statements snapshots given")
+    if all(snapshot.captured_at is not None for snapshot in snapshots):
+        snapshots = sorted(snapshots, key=lambda s: s.captured_at or datetime.min)
+    if len(snapshots) == 1:
+        return snapshots[0].statements
+    return statement_deltas(snapshots[0], snapshots[-1])
+
+
+def merge_with_log(
+    statements: pd.DataFrame,
+    log_df: pd.DataFrame,
+    snapshots: Optional[List[StatementSnapshot]] = None,
+) -> StatementWorkload:
+    """
+    Join pg_stat_statements totals with the statements of the slow log
+
+    Args:
+        statements: Output of snapshot_workload/statement_deltas
+        log_df: Parsed log (``query`` and ``duration_ms`` columns)
+        snapshots: Snapshots the statements came from, for the time window
+
+    Returns:
+        StatementWorkload by total time; ``query_hash`` matches the
+        fingerprints of the slow query analysis for logged statements and
+        ``hidden_ms`` is the time spent below the logging threshold
+    """
+    per_key = (
+        statements.assign(key=statements["query"].map(statement_key))
+        .groupby("key")
+        .agg(
+            query=("query", "first"),
+            calls=("calls", "sum"),
+            total_ms=("total_ms", "sum"),
+            rows=("rows", "sum"),
+            shared_blks_hit=("shared_blks_hit", "sum"),
+            shared_blks_read=("shared_blks_read", "sum"),
+        )
+    )
+    logged = (
+        log_df.assign(key=log_df["query"].astype(str).map(statement_key))
+        .groupby("key")
+        .agg(
+            example_query=("query", "first"),
+            logged_calls=("duration_ms", "size"),
+            logged_ms=("duration_ms", "sum"),
+        )
+    )
+    merged = per_key.join(logged, how="outer")
+
+    in_stats = merged["calls"].notna()
+    in_log = merged["logged_calls"].notna()
+    merged["source"] = "both"
+    merged.loc[~in_log, "source"] = "pg_stat_statements"
+    merged.loc[~in_stats, "source"] = "log"
+    merged["query"] = merged["query"].fillna(merged["example_query"])
+    for column in ["logged_calls", "logged_ms", "rows"]:
+        merged[column] = merged[column].fillna(0)
+    merged["shared_blks_hit"] = merged["shared_blks_hit"].fillna(0)
+    merged["shared_blks_read"] = merged["shared_blks_read"].fillna(0)
+    # The statistics may miss logged executions (evicted entries, a window
+    # not covering the whole log); never report less than the log shows
+    merged["calls"] = merged["calls"].fillna(0).clip(lower=merged["logged_calls"])
+    merged["total_ms"] = merged["total_ms"].fillna(0).clip(lower=merged["logged_ms"])
+    merged["mean_ms"] = merged["total_ms"] / merged["calls"].where(merged["calls"] > 0)
+    merged["hidden_ms"] = merged["total_ms"] - merged["logged_ms"]
+    merged["query_hash"] = merged["example_query"].map(
+        lambda query: query_fingerprint(query) if isinstance(query, str) else None
+    )
+
+    window = None
+    stamps = [s.captured_at for s in snapshots or [] if s.captured_at is not None]
+    if len(stamps) >= 2:
+        window = (min(stamps), max(stamps))
+    workload = StatementWorkload(
+        statements=merged.sort_values("total_ms", ascending=False)[
+            WORKLOAD_COLUMNS
+        ].reset_index(drop=True),
+        snapshots=len(snapshots or []),
+        window=window,
+    )
+    logger.info(
+        f"Merged {len(workload.statements)} statements; the slow log covers "
+        f"{workload.logged_share:.1%} of {workload.total_ms / 1000:.1f} s"
+    )
+    return workload
@@ -0,0 +1,246 @@
+"""
+Plan fingerprinting and plan-flip detection.
+
+A structural plan hash covers node types, relations and index names (not
+costs or row counts), so two executions share a hash exactly when the
+planner chose the same plan shape. Executions are aggregated per query
+fingerprint, plan hash and time bucket in a single pass, with latencies kept
+in a mergeable log-scale histogram so buckets from earlier runs (see
+history_store) can be combined with the current one.
+"""
+
+import hashlib
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .explain_parser import ExplainPlan, PlanNode
+
+logger = logging.getLogger(__name__)
+
+# Histogram bins per decade of milliseconds; bins are ~26% wide, so a
+# percentile read back from the histogram is within ~12% of the true value
+HISTOGRAM_BINS_PER_DECADE = 10
+
+BucketKey = Tuple[str, str, datetime]
+
+
+def plan_shape(node: PlanNode) -> str:
+    """
+    Describe the structure of a plan, ignoring costs, rows and timing
+
+    Args:
+        node: Root of the (sub)plan
+
+    Returns:
+        Text such as ``Hash Join(Seq Scan on t, Hash(Index Scan on c using i))``
+    """
+    text = node.node_type
+    if node.relation_name:
+        text += f" on {node.relation_name}"
+    if node.index_name:
+        text += f" using {node.index_name}"
+    if node.children:
+        text += "(" + ", ".join(plan_shape(child) for child in node.children) + ")"
+    return text
+
+
+def _shape_digest(shape: str) -> str:
+    return hashlib.md5(shape.encode()).hexdigest()[:16]
+
+
+def plan_hash(node: PlanNode) -> str:
+    """Short structural hash of a plan (see plan_shape)."""
+    return _shape_digest(plan_shape(node))
+
+
+def _histogram_bin(duration_ms: float) -> int:
+    return math.floor(HISTOGRAM_BINS_PER_DECADE * math.log10(max(duration_ms, 1e-3)))
+
+
+@dataclass
+class PlanStats:
+    """Latency of the executions of one plan shape of one query fingerprint."""
+
+    fingerprint: str
+    plan_hash: str
+    shape: str
+    executions: int = 0
+    total_ms: float = 0.0
+    min_ms: float = math.inf
+    max_ms: float = 0.0
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    histogram: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.executions if self.executions else 0.0
+
+    def add(self, duration_ms: float, seen: datetime) -> None:
+        """Record one execution."""
+        self.executions += 1
+        self.total_ms += duration_ms
+        self.min_ms = min(self.min_ms, duration_ms)
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.first_seen = min(self.first_seen or seen, seen)
+        self.last_seen = max(self.last_seen or seen, seen)
+        bin_index = _histogram_bin(duration_ms)
+        self.histogram[bin_index] = self.histogram.get(bin_index, 0) + 1
+
+    def merge(self, other: "PlanStats") -> None:
+        """Fold another bucket of the same fingerprint and plan into this one."""
+        self.executions += other.executions
+        self.total_ms += other.total_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        for seen in (other.first_seen, other.last_seen):
+            if seen is not None:
+                self.first_seen = min(self.first_seen or seen, seen)
+                self.last_seen = max(self.last_seen or seen, seen)
+        for bin_index, count in other.histogram.items():
+            self.histogram[bin_index] = self.histogram.get(bin_index, 0) + count
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Approximate a latency percentile from the histogram
+
+        Args:
+            percentile: Percentile in [0, 100]
+
+        Returns:
+            Geometric midpoint of the bin holding the percentile, clamped to
+            the observed min/max, which are returned exactly for 0 and 100
+            (0.0 without executions)
+        """
+        if not self.executions:
+            return 0.0
+        # The extremes are tracked exactly
+        if percentile <= 0:
+            return self.min_ms
+        if percentile >= 100:
+            return self.max_ms
+        rank = percentile / 100 * self.executions
+        seen = 0
+        for bin_index in sorted(self.histogram):
+            seen += self.histogram[bin_index]
+            if seen >= rank:
+                value = 10 ** ((bin_index + 0.5) / HISTOGRAM_BINS_PER_DECADE)
+                return min(max(value, self.min_ms), self.max_ms)
+        return self.max_ms
+
+
+@dataclass
+class PlanFlip:
+    """A query fingerprint observed with more than one plan shape."""
+
+    fingerprint: str
+    query: str
+    # Ordered by first appearance
+    plans: List[PlanStats]
+
+    @property
+    def slowdown(self) -> float:
+        """Average latency of the slowest plan over that of the fastest."""
+        averages = [plan.avg_ms for plan in self.plans if plan.executions]
+        if not averages or min(averages) <= 0:
+            return 1.0
+        return max(averages) / min(averages)
+
+
+@dataclass
+class PlanHistory:
+    """Per fingerprint, plan hash and time bucket execution statistics."""
+
+    bucket_minutes: int = 60
+    buckets: Dict[BucketKey, PlanStats] = field(default_factory=dict)
+    queries: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.bucket_minutes <= 0 or (24 * 60) % self.bucket_minutes:
+            raise ValueError(
+                f"bucket_minutes must divide a day, got {self.bucket_minutes}"
+            )
+
+    def bucket_start(self, timestamp: datetime) -> datetime:
+        minutes = timestamp.hour * 60 + timestamp.minute
+        start = minutes - minutes % self.bucket_minutes
+        return timestamp.replace(
+            hour=start // 60, minute=start % 60, second=0, microsecond=0
+        )
+
+    def record(self, plan: ExplainPlan) -> None:
+        """
+        Add one logged plan
+
+        Plans without a fingerprint, log timestamp or latency are ignored.
+        The latency is the logged duration, falling back to the EXPLAIN
+        execution time.
+        """
+        duration = plan.duration_ms
+        if duration is None:
+            duration = plan.execution_time_ms
+        if plan.fingerprint is None or plan.timestamp is None or duration is None:
+            return
+        shape = plan_shape(plan.root)
+        digest = _shape_digest(shape)
+        key = (plan.fingerprint, digest, self.bucket_start(plan.timestamp))
+        stats = self.buckets.get(key)
+        if stats is None:
+            stats = self.buckets[key] = PlanStats(plan.fingerprint, digest, shape)
+        stats.add(duration, plan.timestamp)
+        if plan.query_text and plan.fingerprint not in self.queries:
+            self.queries[plan.fingerprint] = " ".join(plan.query_text.split())
+
+    @property
+    def fingerprints(self) -> List[str]:
+        return sorted({key[0] for key in self.buckets})
+
+    def flips(self) -> List[PlanFlip]:
+        """
+        Find fingerprints that ran with more than one plan shape
+
+        Returns:
+            PlanFlip per such fingerprint, largest slowdown first
+        """
+        per_plan: Dict[str, Dict[str, PlanStats]] = defaultdict(dict)
+        for (fingerprint, digest, _), stats in self.buckets.items():
+            merged = per_plan[fingerprint].get(digest)
+            if merged is None:
+                merged = per_plan[fingerprint][digest] = PlanStats(
+                    fingerprint, digest, stats.shape
+                )
+            merged.merge(stats)
+
+        flips = [
+            PlanFlip(
+                fingerprint=fingerprint,
+                query=self.queries.get(fingerprint, ""),
+                plans=sorted(
+                    plans.values(), key=lambda p: p.first_seen or datetime.min
+                ),
+            )
+            for fingerprint, plans in per_plan.items()
+            if len(plans) > 1
+        ]
+        return sorted(flips, key=lambda flip: flip.slowdown, reverse=True)
+
+
+def track_plans(plans: Iterable[ExplainPlan], bucket_minutes: int = 60) -> PlanHistory:
+    """
+    Aggregate plans per fingerprint, plan hash and time bucket
+
+    Args:
+        plans: Parsed plans, e.g. from iter_log_plans
+        bucket_minutes: Width of the time buckets (must divide a day)
+
+    Returns:
+        PlanHistory built in one pass over the plans
+    """
+    history = PlanHistory(bucket_minutes=bucket_minutes)
+    for plan in plans:
+        history.record(plan)
+    return history
@@ -0,0 +1,221 @@
+"""
+Token-budgeted compaction of SQL text for LLM prompts.
+
+Generated SQL can be tens of kilobytes (long IN lists, multi-row VALUES,
+wide projections, CTE chains), which overflows small context windows and
+slows local models down. Queries over the budget are shortened step by
+step, least lossy first, until they fit: literal lists are collapsed, the
+query is reduced to its normalized form, projection columns not used
+elsewhere are dropped and, as a last resort, the text is truncated.
+Token counts are offline approximations; no tokenizer is downloaded.
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+
+from .analyzer import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Items of a literal list kept when it is collapsed
+KEEP_LIST_ITEMS = 3
+# Projection columns always kept when the projection is trimmed
+KEEP_COLUMNS = 5
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(([^()]*)\)", re.IGNORECASE)
+_ARRAY_RE = re.compile(r"\bARRAY\s*\[([^\[\]]*)\]", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES\s*(\([^()]*\)(?:\s*,\s*\([^()]*\))+)", re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r"'(?:[^']|'')*'|[^,]+")
+_SELECT_RE = re.compile(
+    r"\bSELECT\s+(?:DISTINCT\s+)?(.*?)\s+FROM\b", re.IGNORECASE | re.DOTALL
+)
+_COLUMN_NAME_RE = re.compile(r"(\w+)\s*$")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the number of LLM tokens in a text
+
+    Words count one token per four characters (at least one) and every
+    punctuation character counts one, which tracks BPE tokenizers closely
+    enough for SQL to size prompts.
+
+    Args:
+        text: Prompt or query text
+
+    Returns:
+        Estimated token count
+    """
+    return sum(
+        math.ceil(len(token) / 4) if token[0].isalnum() or token[0] == "_" else 1
+        for token in _TOKEN_RE.findall(text)
+    )
+
+
+@dataclass
+class CompactedQuery:
+    """A query shortened to fit a token budget."""
+
+    text: str
+    original_tokens: int
+    tokens: int
+    # Compaction steps applied, in order
+    steps: List[str] = field(default_factory=list)
+
+    @property
+    def compacted(self) -> bool:
+        return bool(self.steps)
+
+
+def _collapse_items(items: List[str], keep: int) -> str:
+    kept = ", ".join(item.strip() for item in items[:keep])
+    return f"{kept} /* +{len(items) - keep} more */"
+
+
+def collapse_literal_lists(query: str, keep: int = KEEP_LIST_ITEMS) -> str:
+    """
+    Shorten long ``IN (...)``, ``ARRAY[...]`` and multi-row ``VALUES`` lists
+
+    Args:
+        query: SQL text
+        keep: Items (or rows) kept from each list
+
+    Returns:
+        SQL with each long list cut to ``keep`` items and a count comment
+    """
+
+    def collapse(match: "re.Match[str]", closing: str) -> str:
+        items = _LIST_ITEM_RE.findall(match.group(1))
+        if len(items) <= keep:
+            return match.group(0)
+        prefix = match.group(0)[: match.start(1) - match.start(0)]
+        return f"{prefix}{_collapse_items(items, keep)}{closing}"
+
+    query = _IN_LIST_RE.sub(lambda m: collapse(m, ")"), query)
+    query = _ARRAY_RE.sub(lambda m: collapse(m, "]"), query)
+
+    def collapse_rows(match: "re.Match[str]") -> str:
+        rows = re.findall(r"\([^()]*\)", match.group(1))
+        if len(rows) <= keep:
+            return match.group(0)
+        return f"VALUES {_collapse_items(rows, keep)}"
+
+    return _VALUES_RE.sub(collapse_rows, query)
+
+
+def _split_columns(projection: str) -> List[str]:
+    columns: List[str] = []
+    current: List[str] = []
+    depth = 0
+    for char in projection:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            columns.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    columns.append("".join(current).strip())
+    return [column for column in columns if column]
+
+
+def trim_projection(query: str, keep: int = KEEP_COLUMNS) -> str:
+    """
+    Drop projection columns that play no part in the rest of the query
+
+    A column is kept when it is among the first ``keep`` columns or when
+    its name or alias appears elsewhere in the query (joins, filters,
+    grouping, ordering); those are what matter for performance.
+
+    Args:
+        query: SQL text
+        keep: Leading columns always kept
+
+    Returns:
+        SQL with each wide SELECT list trimmed and a count comment
+    """
+
+    def trim(match: "re.Match[str]") -> str:
+        columns = _split_columns(match.group(1))
+        if len(columns) <= keep:
+            return match.group(0)
+        rest = query[: match.start(1)] + query[match.end(1) :]
+        used = {word.lower() for word in re.findall(r"\w+", rest)}
+        kept = [
+            column
+            for position, column in enumerate(columns)
+            if position < keep
+            or (
+                (name := _COLUMN_NAME_RE.search(column)) is not None
+                and name.group(1).lower() in used
+            )
+        ]
+        if len(kept) == len(columns):
+            return match.group(0)
+        projection = ", ".join(kept) + f" /* {len(columns) - len(kept)} columns */"
+        return (
+            match.group(0)[: match.start(1) - match.start(0)]
+            + projection
+            + match.group(0)[match.end(1) - match.start(0) :]
+        )
+
+    return _SELECT_RE.sub(trim, query)
+
+
+def _truncate(query: str, max_tokens: int) -> str:
+    marker = " /* truncated */"
+    budget = max(max_tokens - count_tokens(marker), 1)
+    # Cut by characters and shrink until the count fits
+    text = query[: budget * 4]
+    while count_tokens(text) > budget and len(text) > 16:
+        text = text[: int(len(text) * 0.9)]
+    return text.rstrip() + marker
+
+
+def compact_query(query: str, max_tokens: int) -> CompactedQuery:
+    """
+    Shorten a query until it fits a token budget
+
+    Args:
+        query: SQL text
+        max_tokens: Budget for the query text
+
+    Returns:
+        CompactedQuery; the text is only whitespace-normalized when the
+        query already fits
+    """
+    text = " ".join(query.split())
+    original_tokens = count_tokens(text)
+    result = CompactedQuery(text, original_tokens, original_tokens)
+    if original_tokens <= max_tokens:
+        return result
+
+    steps: List[Tuple[str, Callable[[str], str]]] = [
+        ("collapsed literal lists", collapse_literal_lists),
+        ("normalized literals", normalize_query),
+        ("trimmed projection", trim_projection),
+    ]
+    for name, step in steps:
+        shorter = step(result.text)
+        if shorter != result.text:
+            result.text = shorter
+            result.steps.append(name)
+            result.tokens = count_tokens(shorter)
+            if result.tokens <= max_tokens:
+                break
+    if result.tokens > max_tokens:
+        result.text = _truncate(result.text, max_tokens)
+        result.tokens = count_tokens(result.text)
+        result.steps.append("truncated")
+
+    logger.debug(
+        f"Compacted query from {original_tokens} to {result.tokens} tokens "
+        f"({', '.join(result.steps)})"
+    )
+    return result
@@ -1,9 +1,25 @@
 import pandas as pd
 import logging
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional, List
+from functools import partial
+from typing import Callable, Dict, Optional, List, Sequence
 from .analyzer import SlowQuery
+from .antipatterns import RuleStats
+from .concurrency import ConcurrencyReport
+from .dimensions import DimensionBreakdown
+from .explain_batch import ExplainFileResult
+from .explain_metrics import PlanMetricsReport
+from .index_advisor import IndexAdvice
+from .llm_cache import CacheStats
+from .llm_policy import TIER_LLM, TIER_RULE, TIER_SKIPPED, TierDecision
+from .llm_resilience import LatencyHistogram
+from .log_events import LogEvents
+from .plan_history import PlanFlip
+from .parameters import ParameterReport
+from .pg_stat_statements import StatementWorkload
+from .table_workload import aggregate_by_relation
 from .llm_client import LLMClient
 
 logger = logging.getLogger(__name__)
@@ -13,7 +29,13 @@ class ReportGenerator:
     """Generates comprehensive analysis reports with AI recommendations
     and anti-pattern detection."""
 
-    def __init__(self, llm_client: LLMClient, output_dir: str = "reports"):
+    def __init__(self, llm_client: Optional[LLMClient], output_dir: str = "reports"):
+        """
+        Args:
+            llm_client: Client for per-query AI recommendations, or None for
+                reports that need none (e.g. EXPLAIN batches)
+            output_dir: Directory for generated reports
+        """
         self.llm_client = llm_client
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
@@ -24,6 +46,20 @@ class ReportGenerator:
         top_queries: pd.DataFrame,
         summary: Dict,
         recommendations: Optional[list] = None,
+        concurrency: Optional[ConcurrencyReport] = None,
+        breakdown: Optional[DimensionBreakdown] = None,
+        events: Optional[LogEvents] = None,
+        event_correlation: Optional[pd.DataFrame] = None,
+        parameters: Optional[ParameterReport] = None,
+        hot_tables: Optional[pd.DataFrame] = None,
+        rule_stats: Optional[List[RuleStats]] = None,
+        index_advice: Optional[IndexAdvice] = None,
+        plan_metrics: Optional[PlanMetricsReport] = None,
+        plan_flips: Optional[List[PlanFlip]] = None,
+        workload: Optional[StatementWorkload] = None,
+        llm_cache: Optional[CacheStats] = None,
+        llm_latency: Optional[Dict[str, LatencyHistogram]] = None,
+        tiers: Optional[List[TierDecision]] = None,
     ) -> str:
         """
         Generate a Markdown report
@@ -32,6 +68,21 @@ class ReportGenerator:
             top_queries: DataFrame with top slow queries
             summary: Dictionary with summary statistics
             recommendations: Optional list of LLM recommendations
+            concurrency: Optional concurrency reconstruction results
+            breakdown: Optional dimensional breakdown (``--group-by``)
+            events: Optional non-statement events extracted from the log
+            event_correlation: Optional per-fingerprint event rollup
+            parameters: Optional parameter heavy-hitter/skew analysis
+            hot_tables: Optional per-relation rollup (see aggregate_by_relation)
+            rule_stats: Optional per-rule anti-pattern evaluation counters
+            index_advice: Optional index recommendations (``--schema``)
+            plan_metrics: Optional per-node rollup of auto_explain plans
+            plan_flips: Optional fingerprints seen with several plan shapes
+            workload: Optional pg_stat_statements totals merged with the log
+            llm_cache: Optional recommendation cache counters of this run
+            llm_latency: Optional LLM latency histograms, by provider
+            tiers: Optional source of each recommendation (rule-based or
+                LLM), in the order of ``top_queries``
 
         Returns:
             Report text as string
@@ -56,27 +107,246 @@ class ReportGenerator:
         lines.append(f"- **P99 Duration:** {summary['p99_duration']:.2f} ms")
         lines.append(
             f"- **Total Time Spent:** "
-            f"{summary['total_time_spent'] / 1000:.2f} seconds\n"
+            f"{summary['total_time_spent'] / 1000:.2f} seconds"
         )
+        if llm_cache is not None and llm_cache.lookups:
+            similar = (
+                f", {llm_cache.similar_hits} reused from similar queries"
+                if llm_cache.similar_hits
+                else ""
+            )
+            lines.append(
+                f"- **LLM Cache:** {llm_cache.hits}/{llm_cache.lookups} hits "
+                f"({llm_cache.hit_rate:.0%}){similar}, "
+                f"~{llm_cache.saved_ms / 1000:.1f} s of LLM time saved"
+            )
+        if tiers:
+            counts = {
+                tier: sum(1 for d in tiers if d.tier == tier)
+                for tier in (TIER_LLM, TIER_RULE, TIER_SKIPPED)
+            }
+            lines.append(
+                f"- **Recommendations:** {counts[TIER_LLM]} AI, "
+                f"{counts[TIER_RULE]} rule-based, {counts[TIER_SKIPPED]} skipped"
+            )
+        lines.append("")
+
+        if llm_latency and any(h.count or h.errors for h in llm_latency.values()):
+            lines.append(self._generate_llm_latency_section(llm_latency))
+
+        if workload is not None and not workload.empty:
+            lines.append(self._generate_workload_section(workload))
+
+        if hot_tables is not None and not hot_tables.empty:
+            lines.append(self._generate_hot_tables(hot_tables))
+
+        if concurrency is not None and concurrency.total_executions:
+            lines.append(self._generate_concurrency_section(concurrency))
+
+        if breakdown is not None:
+            lines.append(self._generate_breakdown_section(breakdown))
+
+        if events is not None and not events.empty:
+            lines.append(self._generate_events_section(events, event_correlation))
+
+        if parameters is not None and parameters.skews:
+            lines.append(self._generate_parameter_skew_section(parameters))
+
+        dominant_nodes: Dict[str, str] = {}
+        if plan_metrics is not None and not plan_metrics.empty:
+            lines.append(self._generate_plan_hotspots_section(plan_metrics))
+            dominant_nodes = plan_metrics.dominant["summary"].to_dict()
+
+        if plan_flips:
+            lines.append(self._generate_plan_flips_section(plan_flips))
 
         # Top queries
         lines.append("## Top Slow Queries (by Impact)\n")
 
         for rank, (idx, row) in enumerate(top_queries.iterrows(), start=1):
-            lines.append(f"### Query #{rank}\n")
-            lines.append("```sql")
-            lines.append(row["example_query"][:500])
-            lines.append("```\n")
-            lines.append(f"- **Average Duration:** {row['avg_duration']:.2f} ms")
-            lines.append(f"- **Max Duration:** {row['max_duration']:.2f} ms")
-            lines.append(f"- **Frequency:** {row['frequency']} executions")
-            lines.append(f"- **Impact Score:** {row['impact_score']:.2f}\n")
-
+            recommendation = None
             if recommendations and rank - 1 < len(recommendations):
-                lines.append("**AI Recommendation:**\n")
-                lines.append(f"{recommendations[rank - 1]}\n")
+                recommendation = recommendations[rank - 1]
+            tier = tiers[rank - 1] if tiers and rank - 1 < len(tiers) else None
+            lines.append(
+                self._generate_query_section(
+                    rank,
+                    row,
+                    recommendation,
+                    tier,
+                    dominant_nodes.get(row.get("query_hash")),
+                )
+            )
+
+        if index_advice is not None:
+            lines.append(self._generate_index_advice_section(index_advice))
+
+        if rule_stats:
+            lines.append(self._generate_rule_stats_section(rule_stats))
+
+        return "\n".join(lines)
+
+    def start_markdown_report(
+        self,
+        path: Path,
+        top_queries: pd.DataFrame,
+        plan_metrics: Optional[PlanMetricsReport] = None,
+    ) -> "IncrementalReport":
+        """
+        Start writing the top-query sections of a report as their
+        recommendations arrive
+
+        The file holds a partial report while recommendations are
+        generated, so the first results can be read right away and an
+        interrupted run still leaves them on disk. Overwrite it with
+        generate_markdown_report once all recommendations are in.
+
+        Args:
+            path: Report file to write
+            top_queries: DataFrame with top slow queries
+            plan_metrics: Optional per-node rollup of auto_explain plans
+
+        Returns:
+            IncrementalReport to pass recommendations to; close it when done
+        """
+        dominant_nodes: Dict[str, str] = {}
+        if plan_metrics is not None and not plan_metrics.empty:
+            dominant_nodes = plan_metrics.dominant["summary"].to_dict()
+        sections = [
+            partial(
+                self._generate_query_section,
+                rank,
+                row,
+                dominant_node=dominant_nodes.get(row.get("query_hash")),
+            )
+            for rank, (idx, row) in enumerate(top_queries.iterrows(), start=1)
+        ]
+        header = "\n".join(
+            [
+                "# PostgreSQL Performance Analysis Report",
+                f"\n**Generated:** {self._get_current_timestamp()}\n",
+                "> Partial report: recommendations are still being generated. "
+                "The full report replaces this file when the run completes.\n",
+                "## Top Slow Queries (by Impact)\n",
+            ]
+        )
+        placeholders = [
+            f"### Query #{rank}\n\n*Recommendation pending.*\n\n---\n"
+            for rank in range(1, len(sections) + 1)
+        ]
+        return IncrementalReport(path, header, sections, placeholders)
+
+    def _generate_query_section(
+        self,
+        rank: int,
+        row: pd.Series,
+        recommendation: Optional[str] = None,
+        tier: Optional[TierDecision] = None,
+        dominant_node: Optional[str] = None,
+    ) -> str:
+        section = [f"### Query #{rank}\n"]
+        section.append("```sql")
+        section.append(row["example_query"][:500])
+        section.append("```\n")
+        section.append(f"- **Average Duration:** {row['avg_duration']:.2f} ms")
+        section.append(f"- **Max Duration:** {row['max_duration']:.2f} ms")
+        section.append(f"- **Frequency:** {row['frequency']} executions")
+        section.append(f"- **Impact Score:** {row['impact_score']:.2f}")
+        if dominant_node:
+            section.append(f"- **Dominant Plan Node:** {dominant_node}")
+        section.append("")
+
+        if tier is not None and tier.tier == TIER_SKIPPED:
+            section.append(f"*No recommendation: {tier.reason}.*\n")
+        elif recommendation is not None:
+            if tier is not None and tier.tier == TIER_RULE:
+                section.append(f"**Rule-based Recommendation** ({tier.reason}):\n")
+            else:
+                section.append("**AI Recommendation:**\n")
+            section.append(f"{recommendation}\n")
+
+        section.append("---\n")
+        return "\n".join(section)
+
+    def generate_explain_report(
+        self,
+        results: List[ExplainFileResult],
+        plan_metrics: Optional[PlanMetricsReport] = None,
+        top_n: int = 20,
+    ) -> str:
+        """
+        Generate a Markdown report for a batch of EXPLAIN files
+
+        Args:
+            results: Ranked results from analyze_explain_files
+            plan_metrics: Optional node rollup across the batch
+            top_n: Number of plans listed in the ranking and in detail
+
+        Returns:
+            Report text as string
+        """
+        analyzed = [result for result in results if result.error is None]
+        failed = [result for result in results if result.error is not None]
+        rule_counts: Dict[str, int] = {}
+        for result in analyzed:
+            for finding in result.findings:
+                rule_counts[finding.rule_id] = rule_counts.get(finding.rule_id, 0) + 1
+
+        lines = []
+        lines.append("# PostgreSQL EXPLAIN Analysis Report")
+        lines.append(
+            f"\n**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        )
+        lines.append("## Summary Statistics\n")
+        lines.append(f"- **Plans Analyzed:** {len(analyzed)}")
+        if failed:
+            lines.append(f"- **Files Not Parsed:** {len(failed)}")
+        lines.append(
+            f"- **Total Execution Time:** "
+            f"{sum(r.execution_ms for r in analyzed) / 1000:.2f} seconds"
+        )
+        lines.append(
+            f"- **Plans With Findings:** {sum(1 for r in analyzed if r.findings)}"
+        )
+        for rule_id, count in sorted(rule_counts.items(), key=lambda x: -x[1]):
+            lines.append(f"  - `{rule_id}`: {count}")
+        lines.append("")
+
+        if analyzed:
+            lines.append("## Ranked Plans\n")
+            lines.append("| Rank | File | Execution (ms) | Dominant Node | Findings |")
+            lines.append("|---|---|---|---|---|")
+            for rank, result in enumerate(analyzed[:top_n], start=1):
+                findings = ", ".join(
+                    sorted({finding.rule_id for finding in result.findings})
+                )
+                lines.append(
+                    f"| {rank} | `{result.path}` | {result.execution_ms:.1f} "
+                    f"| {result.dominant or '-'} | {findings or '-'} |"
+                )
+            lines.append("")
 
-            lines.append("---\n")
+            lines.append("## Plan Findings\n")
+            for rank, result in enumerate(analyzed[:top_n], start=1):
+                if not result.findings:
+                    continue
+                lines.append(f"### #{rank} `{result.path}`\n")
+                for finding in result.findings:
+                    lines.append(
+                        f"- **{finding.title}** ({finding.severity}, "
+                        f"{finding.exclusive_ms:.1f} ms): {finding.problem}. "
+                        f"*{finding.suggestion}.*"
+                    )
+                lines.append("")
+
+        if plan_metrics is not None and not plan_metrics.empty:
+            lines.append(self._generate_plan_hotspots_section(plan_metrics))
+
+        if failed:
+            lines.append("## Files Not Parsed\n")
+            for result in failed[:top_n]:
+                lines.append(f"- `{result.path}`: {result.error}")
+            lines.append("")
 
         return "\n".join(lines)
 
@@ -162,8 +432,123 @@ class ReportGenerator:
             )
 
         summary.append("")
+
+        hot_tables = aggregate_by_relation(
+            pd.DataFrame(
+                {
+                    "normalized_query": [q.normalized_query for q in queries],
+                    "total_duration": [q.duration * q.frequency for q in queries],
+                    "frequency": [q.frequency for q in queries],
+                }
+            ),
+            top_n=5,
+        )
+        if not hot_tables.empty:
+            summary.append(self._generate_hot_tables(hot_tables))
         return "\n".join(summary)
 
+    def _generate_rule_stats_section(self, rule_stats: List[RuleStats]) -> str:
+        """Generate the anti-pattern rule cost table."""
+        section = []
+        section.append("## Anti-Pattern Rule Performance\n")
+        section.append(
+            "Rules that are expensive and rarely match can be disabled with "
+            "`disabled_antipattern_rules`.\n"
+        )
+        section.append(
+            "| Rule | Severity | Evaluations | Matches | Total Time (ms) "
+            "| Avg Time (µs) |"
+        )
+        section.append("|---|---|---|---|---|---|")
+        for stats in rule_stats:
+            section.append(
+                f"| `{stats.rule_id}` | {stats.severity:.2f} | {stats.evaluations} "
+                f"| {stats.matches} | {stats.total_time_ms:.2f} "
+                f"| {stats.avg_time_ms * 1000:.1f} |"
+            )
+        section.append("")
+        return "\n".join(section)
+
+    def _generate_llm_latency_section(
+        self, histograms: Dict[str, LatencyHistogram]
+    ) -> str:
+        """Generate the per-provider LLM latency section."""
+        section = []
+        section.append("### LLM Latency\n")
+        section.append(
+            "| Provider | Requests | Errors | P50 (ms) | P95 (ms) | Distribution |"
+        )
+        section.append("|---|---|---|---|---|---|")
+        for name, histogram in histograms.items():
+            p50 = histogram.percentile(50)
+            p95 = histogram.percentile(95)
+            distribution = ", ".join(
+                f"{label}: {count}" for label, count in histogram.buckets() if count
+            )
+            section.append(
+                f"| {name} | {histogram.count} | {histogram.errors} "
+                f"| {f'{p50:.0f}' if p50 is not None else '-'} "
+                f"| {f'{p95:.0f}' if p95 is not None else '-'} "
+                f"| {distribution or '-'} |"
+            )
+        section.append("")
+        return "\n".join(section)
+
+    def _generate_workload_section(self, workload: StatementWorkload) -> str:
+        """Generate the full workload view from pg_stat_statements."""
+        section = []
+        section.append("### Workload Including Fast Queries\n")
+        if workload.window is not None:
+            start, end = workload.window
+            period = (
+                f"between {start.strftime('%Y-%m-%d %H:%M')} and "
+                f"{end.strftime('%Y-%m-%d %H:%M')}"
+            )
+        elif workload.snapshots > 1:
+            period = f"across {workload.snapshots} snapshots"
+        else:
+            period = "since the statistics were last reset"
+        section.append(
+            f"pg_stat_statements recorded **{workload.total_ms / 1000:.2f} s** "
+            f"over {len(workload.statements)} statements {period}; the slow "
+            f"query log shows {workload.logged_share:.1%} of it. The rest was "
+            "spent in executions below `log_min_duration_statement`.\n"
+        )
+        section.append(
+            "| Query | Calls | Total (s) | Mean (ms) | Logged Calls "
+            "| Hidden (s) | Source |"
+        )
+        section.append("|---|---|---|---|---|---|---|")
+        for row in workload.statements.head(10).itertuples(index=False):
+            mean = f"{row.mean_ms:.2f}" if pd.notna(row.mean_ms) else "n/a"
+            section.append(
+                f"| `{self._shorten(row.query, 60)}` | {int(row.calls):,} "
+                f"| {row.total_ms / 1000:.2f} | {mean} | {int(row.logged_calls):,} "
+                f"| {row.hidden_ms / 1000:.2f} | {row.source} |"
+            )
+        section.append("")
+        return "\n".join(section)
+
+    def _generate_hot_tables(self, hot_tables: pd.DataFrame) -> str:
+        """Generate the hot tables view of the summary section."""
+        section = []
+        section.append("### Hot Tables\n")
+        section.append(
+            "| Table | Time (s) | Share | Executions "
+            "| SELECT | INSERT | UPDATE | DELETE | Top Statement |"
+        )
+        section.append("|---|---|---|---|---|---|---|---|---|")
+        for row in hot_tables.itertuples(index=False):
+            top = row.top_statements[0][0] if row.top_statements else ""
+            section.append(
+                f"| {row.relation} | {row.total_duration / 1000:.2f} "
+                f"| {row.share:.1%} | {row.executions} | {row.select} "
+                f"| {row.insert} | {row.update} | {row.delete} "
+                f"| `{self._shorten(top, 50)}` |"
+            )
+        section.append("")
+        return "\n".join(section)
+
     def _generate_query_analysis(self, query: SlowQuery, rank: int) -> str:
         """Generate detailed analysis for a single query."""
         analysis = []
@@ -189,16 +574,17 @@ class ReportGenerator:
             analysis.append(query.static_analysis_report)
 
         # AI-powered recommendations
-        try:
-            ai_recommendation = self.llm_client.generate_recommendations(
-                query.normalized_query, query.duration, query.frequency
-            )
-            analysis.append("#### 🤖 AI-Powered Optimization Recommendations")
-            analysis.append(ai_recommendation)
-        except Exception as e:
-            logger.warning(f"Failed to get AI recommendation for query {rank}: {e}")
-            analysis.append("#### 🤖 AI Analysis")
-            analysis.append("*AI analysis temporarily unavailable*")
+        if self.llm_client is not None:
+            try:
+                ai_recommendation = self.llm_client.generate_recommendations(
+                    query.normalized_query, query.duration, query.frequency
+                )
+                analysis.append("#### 🤖 AI-Powered Optimization Recommendations")
+                analysis.append(ai_recommendation)
+            except Exception as e:
+                logger.warning(f"Failed to get AI recommendation for query {rank}: {e}")
+                analysis.append("#### 🤖 AI Analysis")
+                analysis.append("*AI analysis temporarily unavailable*")
 
         analysis.append("\n---\n")
         return "\n".join(analysis)
@@ -217,7 +603,7 @@ class ReportGenerator:
             if query.antipattern_matches:
                 queries_with_issues += 1
                 for match in query.antipattern_matches:
-                    pattern_type = match.pattern_type.value.replace("_", " ").title()
+                    pattern_type = match.title
                     pattern_counts[pattern_type] = (
                         pattern_counts.get(pattern_type, 0) + 1
                     )
@@ -297,6 +683,320 @@ class ReportGenerator:
 
         return "\n".join(summary)
 
+    def _generate_concurrency_section(self, report: ConcurrencyReport) -> str:
+        """Generate the concurrency reconstruction section."""
+        section = []
+        section.append("## Concurrency Analysis\n")
+        section.append(f"- **Peak Concurrent Slow Queries:** {report.peak_concurrency}")
+        section.append(
+            f"- **Average Concurrency (time-weighted):** "
+            f"{report.avg_concurrency:.2f}\n"
+        )
+
+        if report.peak_windows:
+            section.append("### Worst Overlap Windows\n")
+            section.append("| Window | Active | Patterns Active Together |")
+            section.append("|--------|--------|--------------------------|")
+            for window in report.peak_windows:
+                patterns = ", ".join(
+                    f"`{fp[:8]}` ×{n}" for fp, n in window.fingerprints.items()
+                )
+                section.append(
+                    f"| {window.start} → {window.end} "
+                    f"({window.duration_ms:.0f} ms) "
+                    f"| {window.active_count} | {patterns} |"
+                )
+            section.append("")
+
+        repeated = {fp: n for fp, n in report.fingerprint_peaks.items() if n > 1}
+        if repeated:
+            section.append("### Self-Concurrency (copies of the same pattern)\n")
+            for fp, peak in list(repeated.items())[:5]:
+                section.append(
+                    f"- `{fp[:8]}` peaked at **{peak}** concurrent executions: "
+                    f"`{self._shorten(report.query_texts.get(fp, ''))}`"
+                )
+            section.append("")
+
+        if report.co_active_pairs:
+            section.append("### Frequently Co-Active Patterns\n")
+            for first, second, overlaps in report.co_active_pairs[:5]:
+                section.append(
+                    f"- `{first[:8]}` + `{second[:8]}`: overlapped {overlaps} "
+                    f"time{'s' if overlaps > 1 else ''}"
+                )
+            section.append("")
+
+        return "\n".join(section)
+
+    def _generate_breakdown_section(self, breakdown: DimensionBreakdown) -> str:
+        """Generate per-dimension totals and per-pattern contributors."""
+        section = []
+        titles = [d.title() for d in breakdown.group_by]
+        section.append(f"## Time Breakdown by {', '.join(titles)}\n")
+
+        for dimension, totals in breakdown.totals.items():
+            section.append(f"### By {dimension.title()}\n")
+            section.append(
+                f"| {dimension.title()} | Executions | Total Time (s) | Share |"
+            )
+            section.append("|---|---|---|---|")
+            for row in totals.itertuples(index=False):
+                row_dict = row._asdict()
+                section.append(
+                    f"| {row_dict[dimension]} | {row_dict['executions']} "
+                    f"| {row_dict['total_duration'] / 1000:.2f} "
+                    f"| {row_dict['share']:.1%} |"
+                )
+            section.append("")
+
+        if len(breakdown.group_by) > 1:
+            section.append("### Top Groups\n")
+            header = " | ".join(titles)
+            section.append(f"| {header} | Executions | Total Time (s) | Share |")
+            section.append("|" + "---|" * (len(titles) + 3))
+            for row in breakdown.groups.itertuples(index=False):
+                row_dict = row._asdict()
+                keys = " | ".join(
+                    (
+                        f"`{str(row_dict[d])[:8]}`"
+                        if d == "fingerprint"
+                        else str(row_dict[d])
+                    )
+                    for d in breakdown.group_by
+                )
+                section.append(
+                    f"| {keys} | {row_dict['executions']} "
+                    f"| {row_dict['total_duration'] / 1000:.2f} "
+                    f"| {row_dict['share']:.1%} |"
+                )
+            section.append("")
+
+        if breakdown.top_contributors:
+            section.append("### Top Contributors per Pattern\n")
+            for fp, contributors in breakdown.top_contributors.items():
+                section.append(
+                    f"- `{fp[:8]}` "
+                    f"`{self._shorten(breakdown.query_texts.get(fp, ''))}`"
+                )
+                for row in contributors.itertuples(index=False):
+                    row_dict = row._asdict()
+                    who = ", ".join(
+                        f"{d}={row_dict[d]}"
+                        for d in breakdown.group_by
+                        if d != "fingerprint"
+                    )
+                    section.append(
+                        f"  - {who}: {row_dict['pattern_share']:.1%} "
+                        f"({row_dict['executions']} executions)"
+                    )
+            section.append("")
+
+        return "\n".join(section)
+
+    def _generate_events_section(
+        self, events: LogEvents, correlation: Optional[pd.DataFrame]
+    ) -> str:
+        """Generate the temp file / lock / checkpoint / autovacuum section."""
+        section = []
+        section.append("## Performance Events\n")
+        if not events.temp_files.empty:
+            section.append(
+                f"- **Temporary Files:** {len(events.temp_files)} "
+                f"({self._format_bytes(events.temp_files['size_bytes'].sum())})"
+            )
+        if not events.lock_waits.empty:
+            section.append(
+                f"- **Lock Wait Reports:** {len(events.lock_waits)} "
+                f"(longest {events.lock_waits['wait_ms'].max():.0f} ms)"
+            )
+        if not events.checkpoints.empty:
+            section.append(
+                f"- **Checkpoints:** {len(events.checkpoints)} "
+                f"(longest {events.checkpoints['total_s'].max():.1f} s)"
+            )
+        if not events.autovacuum.empty:
+            section.append(
+                f"- **Autovacuum/Autoanalyze Runs:** {len(events.autovacuum)} "
+                f"(longest {events.autovacuum['elapsed_s'].max():.1f} s)"
+            )
+        section.append("")
+
+        if correlation is None or correlation.empty:
+            return "\n".join(section)
+
+        findings = []
+        for fp, row in correlation.iterrows():
+            label = f"`{str(fp)[:8]}` `{self._shorten(str(row['query']), 60)}`"
+            if row["temp_bytes"] > 0:
+                findings.append(
+                    f"- {label} spills {self._format_bytes(row['temp_bytes'])} "
+                    f"to temp files ({int(row['temp_files'])} files over "
+                    f"{int(row['executions'])} executions)"
+                )
+            if row["lock_wait_ms"] > 0:
+                findings.append(
+                    f"- {label} waits on locks {row['lock_wait_share']:.0%} "
+                    f"of its runtime ({row['lock_wait_ms']:.0f} ms)"
+                )
+            if row["checkpoint_overlaps"] > 0:
+                findings.append(
+                    f"- {label}: {int(row['checkpoint_overlaps'])} of "
+                    f"{int(row['executions'])} executions overlapped a checkpoint"
+                )
+            if row["autovacuum_overlaps"] > 0:
+                findings.append(
+                    f"- {label}: {int(row['autovacuum_overlaps'])} of "
+                    f"{int(row['executions'])} executions overlapped autovacuum"
+                )
+        if findings:
+            section.append("### Query Correlations\n")
+            section.extend(findings)
+            section.append("")
+
+        return "\n".join(section)
+
+    def _generate_parameter_skew_section(self, report: ParameterReport) -> str:
+        """Generate the parameter skew section."""
+        section = []
+        section.append("## Parameter Skew\n")
+        section.append(
+            "Values that make a query pattern much slower than its other "
+            "executions:\n"
+        )
+        for skew in report.skews:
+            section.append(
+                f"- `{skew.fingerprint[:8]}` `{self._shorten(skew.query, 60)}`: "
+                f"`{skew.slot} = {self._shorten(skew.value, 40)}` seen "
+                f"{skew.count}× ({skew.share:.0%} of executions), avg "
+                f"{skew.avg_duration:.0f} ms vs {skew.baseline_avg_duration:.0f} ms "
+                f"for other values (**{skew.slowdown:.0f}× slower**)"
+            )
+        section.append("")
+        return "\n".join(section)
+
+    def _generate_plan_hotspots_section(self, report: PlanMetricsReport) -> str:
+        """Generate the plan hotspots section from auto_explain plans."""
+        section = []
+        section.append("## Plan Hotspots\n")
+        section.append(
+            f"Where time goes inside the {report.plans_analyzed} analyzed plans, "
+            "by the node with the most exclusive time (its own time across all "
+            "loops, excluding child nodes):\n"
+        )
+        section.append(
+            "| Query | Plans | Plan Time (s) | Dominant Node | Buffer Hits |"
+        )
+        section.append("|---|---|---|---|---|")
+        for fingerprint, row in report.dominant.head(10).iterrows():
+            hit_ratio = (
+                f"{row['hit_ratio']:.1%}" if pd.notna(row["hit_ratio"]) else "n/a"
+            )
+            section.append(
+                f"| `{fingerprint[:8]}` `{self._shorten(row['query'], 60)}` "
+                f"| {int(row['executions'])} | {row['total_ms'] / 1000:.2f} "
+                f"| {row['summary']} | {hit_ratio} |"
+            )
+        section.append("")
+        if report.plans_skipped:
+            section.append(
+                f"{report.plans_skipped} plans without ANALYZE timing or query "
+                "text were skipped.\n"
+            )
+        return "\n".join(section)
+
+    def _generate_plan_flips_section(self, flips: List[PlanFlip]) -> str:
+        """Generate the plan changes section."""
+        section = []
+        section.append("## Plan Changes\n")
+        section.append(
+            "Query patterns that ran with more than one plan shape (node types, "
+            "relations and indexes). Percentiles are approximate (±12%).\n"
+        )
+        for flip in flips[:10]:
+            section.append(
+                f"### `{flip.fingerprint[:8]}` `{self._shorten(flip.query, 60)}`\n"
+            )
+            section.append(
+                f"{len(flip.plans)} plans; the slowest averages "
+                f"**{flip.slowdown:.1f}×** the fastest.\n"
+            )
+            section.append(
+                "| Plan | First Seen | Last Seen | Executions | Avg (ms) "
+                "| p50 (ms) | p95 (ms) | Max (ms) | Shape |"
+            )
+            section.append("|---|---|---|---|---|---|---|---|---|")
+            for plan in flip.plans:
+                first = (
+                    plan.first_seen.strftime("%Y-%m-%d %H:%M")
+                    if plan.first_seen
+                    else "-"
+                )
+                last = (
+                    plan.last_seen.strftime("%Y-%m-%d %H:%M") if plan.last_seen else "-"
+                )
+                section.append(
+                    f"| `{plan.plan_hash[:8]}` | {first} | {last} "
+                    f"| {plan.executions} | {plan.avg_ms:.1f} "
+                    f"| {plan.percentile(50):.1f} | {plan.percentile(95):.1f} "
+                    f"| {plan.max_ms:.1f} | {self._shorten(plan.shape, 100)} |"
+                )
+            section.append("")
+        return "\n".join(section)
+
+    def _generate_index_advice_section(self, advice: IndexAdvice) -> str:
+        """Generate the index recommendations section."""
+        section = []
+        section.append("## Index Recommendations\n")
+        if not advice.recommendations:
+            section.append(
+                "No missing indexes found for the tables in the schema file.\n"
+            )
+        else:
+            section.append(
+                f"{len(advice.recommendations)} indexes serve an estimated "
+                f"{advice.covered_share:.1%} of slow query time. Estimates assume "
+                "each pattern's time is spread evenly over the tables and join "
+                "keys it uses.\n"
+            )
+            section.append(
+                "| Table | Columns | Est. Time Served (s) | Share | Patterns |"
+            )
+            section.append("|---|---|---|---|---|")
+            for rec in advice.recommendations:
+                patterns = ", ".join(f"`{fp[:8]}`" for fp in rec.fingerprints[:5])
+                section.append(
+                    f"| {rec.table} | {', '.join(rec.columns)} "
+                    f"| {rec.benefit_ms / 1000:.2f} | {rec.share:.1%} | {patterns} |"
+                )
+            section.append("")
+            section.append(
+                "`CREATE INDEX CONCURRENTLY` cannot run inside a transaction block:\n"
+            )
+            section.append("```sql")
+            section.extend(rec.statement for rec in advice.recommendations)
+            section.append("```\n")
+        if advice.unknown_relations:
+            section.append(
+                "Relations not found in the schema file: "
+                + ", ".join(f"`{name}`" for name in advice.unknown_relations)
+                + "\n"
+            )
+        return "\n".join(section)
+
+    def _format_bytes(self, size: float) -> str:
+        """Format a byte count with a binary unit."""
+        for unit in ("B", "KB", "MB", "GB"):
+            if abs(size) < 1024:
+                return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+            size /= 1024
+        return f"{size:.1f} TB"
+
+    def _shorten(self, text: str, limit: int = 80) -> str:
+        """Collapse whitespace and truncate text for inline display."""
+        text = " ".join(text.split())
+        return text if len(text) <= limit else text[: limit - 3] + "..."
+
     def _get_current_timestamp(self) -> str:
         """Get the current timestamp as a formatted string."""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -308,3 +1008,80 @@ class ReportGenerator:
             f"Duration: {query.duration:.2f} ms | "
             f"Frequency: {query.frequency}"
         )
+
+
+class IncrementalReport:
+    """A report file that is rewritten as each top-query section completes.
+
+    Every completed section is written as soon as its recommendation
+    arrives, whatever its rank; sections still waiting are shown with
+    their placeholder, so the file always lists the queries in rank order.
+    Each rewrite replaces the file atomically.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        header: str,
+        sections: Sequence[Callable[[Optional[str], Optional[TierDecision]], str]],
+        placeholders: Optional[Sequence[str]] = None,
+    ):
+        """
+        Args:
+            path: Report file; parent directories are created
+            header: Text written right away
+            sections: Per-query section builders taking the recommendation
+                and its tier
+            placeholders: Text shown for each section until it completes
+                (default: nothing)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._header = header
+        self._sections = sections
+        self._texts: List[Optional[str]] = [None] * len(sections)
+        self._placeholders = (
+            list(placeholders) if placeholders is not None else [""] * len(sections)
+        )
+        self.written = 0
+        self._rewrite()
+
+    def add(
+        self,
+        index: int,
+        recommendation: Optional[str],
+        tier: Optional[TierDecision] = None,
+    ) -> None:
+        """
+        Record the recommendation of one query and rewrite the file with
+        its section filled in
+
+        Args:
+            index: Position of the query in the report (0-based)
+            recommendation: Recommendation text (None if there is none)
+            tier: How the recommendation was produced (default: LLM)
+        """
+        if self._texts[index] is None:
+            self.written += 1
+        self._texts[index] = self._sections[index](recommendation, tier)
+        self._rewrite()
+        logger.debug(f"{self.written}/{len(self._sections)} report sections written")
+
+    def _rewrite(self) -> None:
+        parts = [self._header]
+        for text, placeholder in zip(self._texts, self._placeholders):
+            part = placeholder if text is None else text
+            if part:
+                parts.append(part)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        temp.write_text("\n".join(parts) + "\n", encoding="utf-8")
+        os.replace(temp, self.path)
+
+    def close(self) -> None:
+        """Nothing is held open; kept so the report works as a context manager."""
+
+    def __enter__(self) -> "IncrementalReport":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
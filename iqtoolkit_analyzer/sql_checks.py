@@ -0,0 +1,669 @@
+"""
+Token-level checks behind the built-in anti-pattern rules.
+
+A statement is tokenized once into a TokenIndex: matching parentheses, the
+enclosing parenthesis of every token, SELECT blocks with the positions of
+their clauses, and the few candidate positions the checks look at (calls,
+LIKE, OR, OFFSET, casts). Building the index is linear in the statement
+length and every check only visits its own candidates, so a new rule does
+not add another pass over the query text.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple
+
+from .sql_lexer import (
+    CLAUSE_KEYWORDS,
+    STATEMENT_TYPES,
+    Token,
+    TokenType,
+    identifier_name,
+    tokenize,
+)
+
+logger = logging.getLogger(__name__)
+
+# (matched text, confidence) pairs returned by every check
+Finding = Tuple[str, float]
+
+LARGE_IN_MIN_VALUES = 5
+DEEP_OFFSET_MIN_ROWS = 1_000
+LARGE_LIMIT_MIN_ROWS = 10_000
+OR_CHAIN_MIN_TERMS = 3
+MAX_MATCHED_TEXT = 120
+_TIME_CHECK_INTERVAL = 256
+
+_COMPARISON_OPERATORS = {"=", "<", ">", "<=", ">=", "<>", "!="}
+_COMPARISON_WORDS = {"LIKE", "ILIKE", "BETWEEN", "IN"}
+_PREDICATE_STARTS = {"WHERE", "AND", "OR", "ON", "HAVING", "NOT", "("}
+_AGGREGATES = {
+    "COUNT",
+    "SUM",
+    "AVG",
+    "MIN",
+    "MAX",
+    "ARRAY_AGG",
+    "STRING_AGG",
+    "JSON_AGG",
+    "JSONB_AGG",
+    "BOOL_AND",
+    "BOOL_OR",
+    "EVERY",
+}
+# CAST has its own rule (implicit_cast); aggregates are evaluated after the
+# scan, so wrapping their argument does not hide an index
+_NON_FUNCTION_WORDS = (
+    CLAUSE_KEYWORDS
+    | _AGGREGATES
+    | {"IN", "EXISTS", "NOT", "ANY", "ALL", "SOME", "CASE", "ROW", "IS", "CAST"}
+)
+_NON_COLUMN_WORDS = CLAUSE_KEYWORDS | {
+    "NULL",
+    "TRUE",
+    "FALSE",
+    "NOT",
+    "IS",
+    "IN",
+    "CASE",
+    "DISTINCT",
+    "INTERVAL",
+    "CURRENT_DATE",
+    "CURRENT_TIMESTAMP",
+    "LOCALTIMESTAMP",
+}
+_RANDOM_FUNCTIONS = {"RANDOM", "RAND", "NEWID"}
+_BLOCK_CLAUSES = {
+    "FROM",
+    "WHERE",
+    "GROUP",
+    "HAVING",
+    "ORDER",
+    "LIMIT",
+    "OFFSET",
+    "FETCH",
+}
+_SET_OPERATIONS = {"UNION", "INTERSECT", "EXCEPT"}
+# AND binds tighter than OR, so it is part of an OR term rather than its end
+_OR_CHAIN_BOUNDARIES = (CLAUSE_KEYWORDS - {"AND", "OR", "AS"}) | {"CASE", "END"}
+_INDEXED_WORDS = {"LIKE", "ILIKE", "OR", "OFFSET", "LIMIT", "ORDER", "::"}
+
+
+@dataclass
+class SelectBlock:
+    """One SELECT at one parenthesis level and where its clauses start."""
+
+    select: int
+    parent: int  # index of the enclosing "(", -1 at top level
+    end: int
+    clauses: Dict[str, int] = field(default_factory=dict)
+    joins: int = 0
+
+    @property
+    def select_list_end(self) -> int:
+        return self.clauses.get("FROM", self.end)
+
+
+@dataclass
+class TokenIndex:
+    """Structural facts about a tokenized statement, shared by all checks."""
+
+    query: str
+    tokens: List[Token]
+    closes: Dict[int, int] = field(default_factory=dict)
+    opens: Dict[int, int] = field(default_factory=dict)
+    parents: List[int] = field(default_factory=list)
+    commas: DefaultDict[int, int] = field(default_factory=lambda: defaultdict(int))
+    has_column: Set[int] = field(default_factory=set)
+    calls: List[int] = field(default_factory=list)
+    words: DefaultDict[str, List[int]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    blocks: List[SelectBlock] = field(default_factory=list)
+    select_list_parens: Set[int] = field(default_factory=set)
+    statement_type: str = "OTHER"
+
+    def excerpt(self, first: int, last: int) -> str:
+        """Source text from token first to token last, shortened if long."""
+        last = min(last, len(self.tokens) - 1)
+        text = self.query[self.tokens[first].position : _token_end(self.tokens[last])]
+        if len(text) > MAX_MATCHED_TEXT:
+            return text[: MAX_MATCHED_TEXT - 3] + "..."
+        return text
+
+
+def _token_end(token: Token) -> int:
+    return token.position + len(token.text)
+
+
+def _is_column_like(token: Token) -> bool:
+    return token.type is TokenType.QUOTED_IDENT or (
+        token.type is TokenType.WORD and token.upper not in _NON_COLUMN_WORDS
+    )
+
+
+def _is_comparison(token: Token) -> bool:
+    return token.text in _COMPARISON_OPERATORS or token.upper in _COMPARISON_WORDS
+
+
+def _number(token: Token) -> Optional[float]:
+    if token.type is not TokenType.NUMBER:
+        return None
+    try:
+        return float(token.text)
+    except ValueError:
+        return None
+
+
+def index_tokens(query: str, deadline: Optional[float] = None) -> Optional[TokenIndex]:
+    """
+    Tokenize a statement and index the structure the checks need
+
+    One pass pairs parentheses with a stack, counts commas and notes whether
+    each pair contains a column reference, tracks the SELECT block active at
+    every parenthesis level with the first position of each of its clauses,
+    and collects the candidate positions of calls and indexed keywords.
+
+    Args:
+        query: SQL text
+        deadline: ``time.perf_counter()`` value after which indexing stops
+
+    Returns:
+        TokenIndex, or None if the deadline passed
+    """
+    tokens = tokenize(query)
+    index = TokenIndex(query=query, tokens=tokens)
+    closes, parents, commas = index.closes, index.parents, index.commas
+    has_column, calls, words = index.has_column, index.calls, index.words
+    stack: List[int] = []
+    active: Dict[int, SelectBlock] = {}  # current SELECT block per paren level
+    statement_type: Optional[str] = None
+    previous: Optional[Token] = None
+    count = len(tokens)
+    for position, token in enumerate(tokens):
+        if (
+            deadline is not None
+            and position % _TIME_CHECK_INTERVAL == 0
+            and time.perf_counter() > deadline
+        ):
+            logger.warning(
+                f"Anti-pattern token scan stopped after {position} tokens "
+                f"(time budget exceeded)"
+            )
+            return None
+        text = token.text
+        parent = stack[-1] if stack else -1
+        parents.append(parent)
+        # A name is a column reference unless it turns out to be a call
+        if previous is not None and stack and text != "(":
+            if _is_column_like(previous):
+                has_column.add(stack[-1])
+        if text == "(":
+            if previous is not None and previous.type is TokenType.WORD:
+                calls.append(position - 1)
+            block = active.get(parent)
+            if block is not None and "FROM" not in block.clauses:
+                index.select_list_parens.add(position)
+            stack.append(position)
+        elif text == ")":
+            if stack:
+                opened = stack.pop()
+                closes[opened] = position
+                index.opens[position] = opened
+                if opened in has_column and stack:
+                    has_column.add(stack[-1])
+                block = active.pop(opened, None)
+                if block is not None:
+                    block.end = position
+        elif text == ",":
+            if stack:
+                commas[stack[-1]] += 1
+        else:
+            upper = token.upper
+            if upper in _INDEXED_WORDS:
+                words[upper].append(position)
+            if token.type is TokenType.WORD:
+                block = active.get(parent)
+                if upper == "SELECT":
+                    if block is not None:
+                        block.end = position
+                    block = SelectBlock(select=position, parent=parent, end=count)
+                    index.blocks.append(block)
+                    active[parent] = block
+                elif block is not None and upper in _BLOCK_CLAUSES:
+                    block.clauses.setdefault(upper, position)
+                elif block is not None and upper == "JOIN":
+                    block.joins += 1
+                elif block is not None and upper in _SET_OPERATIONS:
+                    block.end = position
+                    del active[parent]
+                if statement_type is None and parent == -1:
+                    if upper in STATEMENT_TYPES:
+                        statement_type = upper
+        previous = token
+    index.statement_type = statement_type or "OTHER"
+    return index
+
+
+def check_large_in_clause(index: TokenIndex) -> List[Finding]:
+    """IN lists with at least LARGE_IN_MIN_VALUES literal values."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for call in index.calls:
+        if tokens[call].upper != "IN" or call + 2 >= count:
+            continue
+        if tokens[call + 2].upper in ("SELECT", "WITH", "VALUES"):
+            continue
+        values = index.commas[call + 1] + 1
+        if values < LARGE_IN_MIN_VALUES:
+            continue
+        if values > 11:
+            confidence = min(1.0, 0.8 + (values - 1) / 100)
+        elif values < 6:
+            confidence = 0.6
+        else:
+            confidence = 0.8
+        findings.append(
+            (index.excerpt(call, index.closes.get(call + 1, count - 1)), confidence)
+        )
+    return findings
+
+
+def check_leading_wildcard_like(index: TokenIndex) -> List[Finding]:
+    """LIKE/ILIKE with a pattern that starts with a wildcard."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for position in sorted(index.words["LIKE"] + index.words["ILIKE"]):
+        if position + 1 >= count:
+            continue
+        operand = tokens[position + 1]
+        if operand.type is not TokenType.STRING:
+            continue
+        body = operand.text[operand.text.find("'") + 1 :]
+        if body.startswith("%"):
+            # LIKE '%' || ? builds a leading wildcard pattern at runtime too
+            confidence = 0.9
+        elif body.startswith("_"):
+            confidence = 0.8
+        else:
+            continue
+        # Include the whole (qualified) column name on the left
+        left = max(position - 1, 0)
+        while left >= 2 and tokens[left - 1].text == ".":
+            left -= 2
+        findings.append((index.excerpt(left, position + 1), confidence))
+    return findings
+
+
+def check_function_on_column(index: TokenIndex) -> List[Finding]:
+    """Comparisons whose left side is a function of a column."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for call in index.calls:
+        if (
+            call == 0
+            or tokens[call - 1].upper not in _PREDICATE_STARTS
+            or tokens[call].upper in _NON_FUNCTION_WORDS
+            or call + 1 not in index.has_column
+        ):
+            continue
+        close = index.closes.get(call + 1)
+        if close is None or close + 1 >= count:
+            continue
+        if _is_comparison(tokens[close + 1]):
+            findings.append((index.excerpt(call, close + 1), 0.8))
+    return findings
+
+
+def _name_start(tokens: List[Token], last: int) -> int:
+    """First token of the (qualified) name ending at last."""
+    while (
+        last >= 2 and tokens[last - 1].text == "." and _is_column_like(tokens[last - 2])
+    ):
+        last -= 2
+    return last
+
+
+def _name_end(tokens: List[Token], first: int) -> int:
+    """Last token of the (qualified) name starting at first."""
+    while (
+        first + 2 < len(tokens)
+        and tokens[first + 1].text == "."
+        and _is_column_like(tokens[first + 2])
+    ):
+        first += 2
+    return first
+
+
+def _cast_finding(index: TokenIndex, first: int, last: int) -> Optional[Finding]:
+    """A finding if the cast spanning tokens first..last is compared."""
+    tokens = index.tokens
+    before = tokens[first - 1] if first > 0 else None
+    after = tokens[last + 1] if last + 1 < len(tokens) else None
+    if (
+        after is not None
+        and _is_comparison(after)
+        and (before is None or before.upper in _PREDICATE_STARTS)
+    ):
+        return index.excerpt(first, last + 1), 0.8
+    if before is not None and _is_comparison(before):
+        # Casting the other side of a comparison (often a join key) is less
+        # certain to matter: the index may be on the uncast column
+        return index.excerpt(first - 1, last), 0.6
+    return None
+
+
+def check_implicit_cast(index: TokenIndex) -> List[Finding]:
+    """Compared columns wrapped in ``::type`` or ``CAST(... AS type)``."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for operator in index.words["::"]:
+        if operator == 0 or operator + 1 >= count:
+            continue
+        if not _is_column_like(tokens[operator - 1]):
+            continue
+        last = operator + 1
+        if last + 1 < count and tokens[last + 1].text == "(":
+            # varchar(20), numeric(10, 2)
+            last = index.closes.get(last + 1, last)
+        finding = _cast_finding(index, _name_start(tokens, operator - 1), last)
+        if finding is not None:
+            findings.append(finding)
+    for call in index.calls:
+        if tokens[call].upper != "CAST" or call + 3 >= count:
+            continue
+        if not _is_column_like(tokens[call + 2]):
+            continue
+        name_end = _name_end(tokens, call + 2)
+        close = index.closes.get(call + 1)
+        if close is None or tokens[name_end + 1].upper != "AS":
+            continue
+        finding = _cast_finding(index, call, close)
+        if finding is not None:
+            findings.append(finding)
+    return findings
+
+
+def _declared_names(index: TokenIndex, first: int, last: int) -> Set[str]:
+    """Relation names and aliases introduced by FROM/JOIN between two tokens."""
+    tokens = index.tokens
+    names: Set[str] = set()
+    for position in range(first, last):
+        keyword = tokens[position].upper
+        if keyword not in ("FROM", "JOIN"):
+            continue
+        item = position + 1
+        while item < last:
+            if tokens[item].upper in ("ONLY", "LATERAL"):
+                item += 1
+                continue
+            if tokens[item].text == "(":
+                # Derived table or table function: only its alias is a name
+                item = index.closes.get(item, last) + 1
+            elif _is_column_like(tokens[item]):
+                end = _name_end(tokens, item)
+                names.update(identifier_name(t) for t in tokens[item : end + 1 : 2])
+                item = end + 1
+                if item < last and tokens[item].text == "(":
+                    item = index.closes.get(item, last) + 1
+            else:
+                break
+            if item < last and tokens[item].upper == "AS":
+                item += 1
+            if item < last and _is_column_like(tokens[item]):
+                names.add(identifier_name(tokens[item]))
+                item += 1
+            if keyword == "FROM" and item < last and tokens[item].text == ",":
+                item += 1
+                continue
+            break
+    return names
+
+
+def check_correlated_subquery(index: TokenIndex) -> List[Finding]:
+    """Scalar subqueries in a SELECT list that reference the outer query."""
+    tokens = index.tokens
+    findings: List[Finding] = []
+    for block in index.blocks:
+        paren = block.parent
+        if paren < 0 or block.select != paren + 1:
+            continue
+        if paren not in index.select_list_parens:
+            continue
+        close = index.closes.get(paren, len(tokens))
+        declared = _declared_names(index, paren + 1, close)
+        for position in range(paren + 1, close - 2):
+            token = tokens[position]
+            if (
+                tokens[position + 1].text == "."
+                and _is_column_like(token)
+                and tokens[position - 1].text != "."
+                and not (  # schema.function()
+                    position + 3 < len(tokens) and tokens[position + 3].text == "("
+                )
+                and identifier_name(token) not in declared
+            ):
+                findings.append((index.excerpt(paren, close), 0.85))
+                break
+    return findings
+
+
+def check_deep_offset(index: TokenIndex) -> List[Finding]:
+    """OFFSET pagination that reads and discards many rows."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for position in index.words["OFFSET"]:
+        if position + 1 >= count:
+            continue
+        operand = tokens[position + 1]
+        rows = _number(operand)
+        if rows is not None and rows >= DEEP_OFFSET_MIN_ROWS:
+            findings.append((index.excerpt(position, position + 1), 0.9))
+        elif operand.type is TokenType.PARAM:
+            # Client-supplied page offsets grow without bound
+            findings.append((index.excerpt(position, position + 1), 0.5))
+    for position in index.words["LIMIT"]:
+        # MySQL style LIMIT offset, count
+        if position + 3 < count and tokens[position + 2].text == ",":
+            rows = _number(tokens[position + 1])
+            if rows is not None and rows >= DEEP_OFFSET_MIN_ROWS:
+                findings.append((index.excerpt(position, position + 3), 0.9))
+    return findings
+
+
+def check_order_by_random(index: TokenIndex) -> List[Finding]:
+    """ORDER BY random() sorts the whole input to pick a few rows."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for position in index.words["ORDER"]:
+        if (
+            position + 3 < count
+            and tokens[position + 1].upper == "BY"
+            and tokens[position + 2].upper in _RANDOM_FUNCTIONS
+            and tokens[position + 3].text == "("
+        ):
+            close = index.closes.get(position + 3, position + 3)
+            findings.append((index.excerpt(position, close), 0.95))
+    return findings
+
+
+def check_select_star_on_join(index: TokenIndex) -> List[Finding]:
+    """SELECT * over joined relations returns every column of every table."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for block in index.blocks:
+        if not block.joins:
+            continue
+        star = block.select + 1
+        if star < count and tokens[star].upper in ("DISTINCT", "ALL"):
+            star += 1
+        if star < count and tokens[star].text == "*":
+            confidence = min(0.95, 0.6 + 0.1 * block.joins)
+            findings.append((index.excerpt(block.select, block.end - 1), confidence))
+    return findings
+
+
+def _or_chain_bounds(index: TokenIndex, position: int) -> Tuple[int, int]:
+    """Boundary tokens (exclusive) of the predicate an OR belongs to."""
+    tokens, count = index.tokens, len(index.tokens)
+    left = position - 1
+    while left >= 0:
+        token = tokens[left]
+        if token.text == ")" and left in index.opens:
+            left = index.opens[left] - 1
+            continue
+        if token.text in ("(", ";") or token.upper in _OR_CHAIN_BOUNDARIES:
+            break
+        left -= 1
+    right = position + 1
+    while right < count:
+        token = tokens[right]
+        if token.text == "(":
+            right = index.closes.get(right, count - 1) + 1
+            continue
+        if token.text in (")", ";") or token.upper in _OR_CHAIN_BOUNDARIES:
+            break
+        right += 1
+    return left, right
+
+
+def _lead_column(tokens: List[Token], first: int, last: int) -> str:
+    """First column referenced by the tokens first..last ('' if none)."""
+    for position in range(first, last + 1):
+        token = tokens[position]
+        if not _is_column_like(token):
+            continue
+        if position + 1 <= last and tokens[position + 1].text == "(":
+            continue
+        end = _name_end(tokens, position)
+        return ".".join(identifier_name(t) for t in tokens[position : end + 1 : 2])
+    return ""
+
+
+def check_or_chain(index: TokenIndex) -> List[Finding]:
+    """OR-connected filter terms that one index scan cannot serve."""
+    tokens = index.tokens
+    findings: List[Finding] = []
+    covered = -1
+    for position in index.words["OR"]:
+        if position <= covered:
+            continue
+        left, right = _or_chain_bounds(index, position)
+        covered = right
+        if left < 0:
+            continue
+        opener = tokens[left]
+        if opener.text == "(":
+            before = tokens[left - 1] if left > 0 else None
+            if before is not None and before.type is TokenType.WORD:
+                if before.upper not in _PREDICATE_STARTS:
+                    continue  # a call or SELECT list expression
+        elif opener.upper not in ("WHERE", "ON", "HAVING"):
+            continue
+
+        parent = index.parents[position]
+        leads: List[str] = []
+        start = left + 1
+        for split in range(left + 1, right + 1):
+            if split == right or (
+                tokens[split].upper == "OR" and index.parents[split] == parent
+            ):
+                leads.append(_lead_column(tokens, start, split - 1))
+                start = split + 1
+        if len(set(leads)) > 1:
+            findings.append((index.excerpt(left + 1, right - 1), 0.7))
+        elif len(leads) >= OR_CHAIN_MIN_TERMS and leads[0]:
+            # Same column each time: an IN list is the index-friendly form
+            findings.append((index.excerpt(left + 1, right - 1), 0.6))
+    return findings
+
+
+def check_count_star_full_table(index: TokenIndex) -> List[Finding]:
+    """COUNT(*) over a whole table, which must visit every row."""
+    tokens, count = index.tokens, len(index.tokens)
+    findings: List[Finding] = []
+    for block in index.blocks:
+        select = block.select
+        if select + 5 >= count or tokens[select + 1].upper != "COUNT":
+            continue
+        if tokens[select + 2].text != "(" or tokens[select + 4].text != ")":
+            continue
+        if tokens[select + 3].text not in ("*", "1"):
+            continue
+        from_ = block.clauses.get("FROM")
+        # Only an optional alias may sit between COUNT(*) and FROM
+        if from_ is None or from_ > select + 7 or block.joins:
+            continue
+        if any(c in block.clauses for c in ("WHERE", "GROUP", "HAVING")):
+            continue
+        if from_ + 1 >= count or not _is_column_like(tokens[from_ + 1]):
+            continue
+        table_end = _name_end(tokens, from_ + 1)
+        if table_end + 1 < count and tokens[table_end + 1].text in ("(", ","):
+            continue  # table function or comma join
+        findings.append((index.excerpt(select, table_end), 0.8))
+    return findings
+
+
+def _cte_names(index: TokenIndex) -> Set[str]:
+    """Names declared by the statement's leading WITH clause, upper-cased."""
+    tokens, count = index.tokens, len(index.tokens)
+    names: Set[str] = set()
+    if not tokens or tokens[0].upper != "WITH":
+        return names
+    position = 2 if count > 1 and tokens[1].upper == "RECURSIVE" else 1
+    while position < count and _is_column_like(tokens[position]):
+        names.add(tokens[position].upper)
+        position += 1
+        if position < count and tokens[position].text == "(":
+            position = index.closes.get(position, count) + 1  # column list
+        # AS [NOT] MATERIALIZED, then the body
+        while position < count and tokens[position].text != "(":
+            position += 1
+        position = index.closes.get(position, count) + 1
+        if position >= count or tokens[position].text != ",":
+            break
+        position += 1
+    return names
+
+
+def check_unbounded_result_set(index: TokenIndex) -> List[Finding]:
+    """Top-level SELECTs that return every row, or a very large LIMIT."""
+    if index.statement_type != "SELECT":
+        return []
+    tokens, count = index.tokens, len(index.tokens)
+    top = [b for b in index.blocks if b.parent == -1 and "FROM" in b.clauses]
+    ctes = _cte_names(index)
+    findings: List[Finding] = []
+    # LIMIT/FETCH after a set operation bounds every branch
+    bounded = any("LIMIT" in b.clauses or "FETCH" in b.clauses for b in top)
+    for block in top:
+        clauses = block.clauses
+        limit = clauses.get("LIMIT")
+        if limit is not None and limit + 1 < count:
+            rows = _number(tokens[limit + 1])
+            if rows is not None and rows >= LARGE_LIMIT_MIN_ROWS:
+                confidence = 0.6 if "WHERE" in clauses else 0.8
+                findings.append((index.excerpt(block.select, limit + 1), confidence))
+            continue
+        if bounded or any(c in clauses for c in ("WHERE", "GROUP", "HAVING")):
+            continue
+        source = clauses["FROM"] + 1
+        if source >= count or tokens[source].text == "(":
+            continue  # a derived table is filtered (or not) on its own
+        if tokens[source].upper in ctes:
+            continue  # so is a CTE
+        source_end = _name_end(tokens, source)
+        if source_end + 1 < count and tokens[source_end + 1].text == "(":
+            continue  # set-returning functions such as generate_series()
+        if any(
+            block.select < call < block.select_list_end
+            and index.parents[call] == block.parent
+            and tokens[call].upper in _AGGREGATES
+            for call in index.calls
+        ):
+            continue  # aggregates over the whole input return one row
+        findings.append((index.excerpt(block.select, block.end - 1), 0.7))
+    return findings
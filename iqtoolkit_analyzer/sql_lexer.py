@@ -0,0 +1,358 @@
+"""
+Lightweight SQL lexer.
+
+Splits SQL text into tokens with one linear pass of a single compiled regex
+(no nested quantifiers, so pathological input cannot trigger catastrophic
+backtracking) and derives cheap structural facts from the token stream:
+statement type and the relations a statement reads or writes. It is not a
+parser; it only needs to be right for the shapes slow query logs contain.
+"""
+
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+class TokenType(Enum):
+    """Types of lexical tokens."""
+
+    WORD = "word"
+    QUOTED_IDENT = "quoted_ident"
+    STRING = "string"
+    NUMBER = "number"
+    PARAM = "param"
+    OPERATOR = "operator"
+    PUNCT = "punct"
+
+
+class Token(NamedTuple):
+    """A lexical token; ``upper`` is the upper-cased text of words."""
+
+    type: TokenType
+    text: str
+    upper: str
+    position: int
+
+
+# Leading whitespace is consumed with each token rather than matched on its
+# own, which halves the number of matches on typical SQL. Words and
+# punctuation are tried first as they make up most tokens; a word may not
+# be the one-letter prefix of a string constant (E'...', B'...').
+_TOKEN_RE = re.compile(
+    r"""
+    \s*
+    (?:
+      (?P<word>(?![EeBbXxNn]')[A-Za-z_][\w$]*)
+    | (?P<punct>[(),;.\[\]])
+    | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<string>[EeBbXxNn]?'(?:[^']|'')*(?:'|\Z))
+    | (?P<param>\$\d+|\?|:[A-Za-z_]\w*)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*[\s\S]*?(?:\*/|\Z))
+    | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$[\s\S]*?(?:\$(?P=tag)?\$|\Z))
+    | (?P<quoted_ident>"(?:[^"]|"")*(?:"|\Z))
+    | (?P<operator>::|<>|!=|<=|>=|\|\||->>|->|[-+*/%<>=~!@#^&|])
+    | (?P<other>.)
+    | (?P<end>\Z)
+    )
+    """,
+    re.VERBOSE,
+)
+
+_SKIPPED_GROUPS = {"line_comment", "block_comment", "end"}
+
+_GROUP_TYPES = {
+    "string": TokenType.STRING,
+    "dollar": TokenType.STRING,
+    "quoted_ident": TokenType.QUOTED_IDENT,
+    "param": TokenType.PARAM,
+    "number": TokenType.NUMBER,
+    "word": TokenType.WORD,
+    "operator": TokenType.OPERATOR,
+    "punct": TokenType.PUNCT,
+    "other": TokenType.OPERATOR,
+}
+
+STATEMENT_TYPES = {
+    "SELECT",
+    "INSERT",
+    "UPDATE",
+    "DELETE",
+    "MERGE",
+    "COPY",
+    "CREATE",
+    "ALTER",
+    "DROP",
+    "TRUNCATE",
+    "VACUUM",
+    "ANALYZE",
+}
+
+_INTO_VERBS = {"INSERT", "MERGE"}
+
+# Tokens that open a subquery rather than a function's argument list
+_SUBQUERY = {"SELECT", "WITH", "VALUES"}
+
+# Words that end a FROM-list item, so they are never taken as an alias
+CLAUSE_KEYWORDS = {
+    "WHERE",
+    "JOIN",
+    "INNER",
+    "LEFT",
+    "RIGHT",
+    "FULL",
+    "OUTER",
+    "CROSS",
+    "NATURAL",
+    "LATERAL",
+    "ON",
+    "USING",
+    "GROUP",
+    "ORDER",
+    "HAVING",
+    "LIMIT",
+    "OFFSET",
+    "FETCH",
+    "UNION",
+    "INTERSECT",
+    "EXCEPT",
+    "WINDOW",
+    "FOR",
+    "SET",
+    "VALUES",
+    "RETURNING",
+    "SELECT",
+    "FROM",
+    "WHEN",
+    "THEN",
+    "AND",
+    "OR",
+    "AS",
+    "DEFAULT",
+    "DO",
+    "TABLESAMPLE",
+    "ONLY",
+}
+
+
+def tokenize(sql: str) -> List[Token]:
+    """
+    Split SQL into tokens, dropping whitespace and comments
+
+    Args:
+        sql: SQL text
+
+    Returns:
+        List of tokens in source order
+    """
+    # Same loop as iter_tokens without the generator overhead; this is on
+    # the per-query hot path of anti-pattern detection
+    tokens: List[Token] = []
+    append = tokens.append
+    new = tuple.__new__  # skips the Python-level NamedTuple constructor
+    word = TokenType.WORD
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind is None or kind in _SKIPPED_GROUPS:
+            continue
+        start, end = match.span(kind)
+        text = sql[start:end]
+        token_type = _GROUP_TYPES[kind]
+        upper = text.upper() if token_type is word else text
+        append(new(Token, (token_type, text, upper, start)))
+    return tokens
+
+
+def iter_tokens(sql: str) -> Iterator[Token]:
+    """Lazily yield tokens from SQL text (see tokenize)."""
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind is None or kind in _SKIPPED_GROUPS:
+            continue
+        text = match.group(kind)
+        token_type = _GROUP_TYPES[kind]
+        upper = text.upper() if token_type is TokenType.WORD else text
+        yield Token(token_type, text, upper, match.start(kind))
+
+
+def identifier_name(token: Token) -> str:
+    """Return the catalog spelling of an identifier token."""
+    if token.type is TokenType.QUOTED_IDENT:
+        return token.text[1:-1].replace('""', '"')
+    return token.text.lower()
+
+
+@dataclass
+class StatementInfo:
+    """Structural facts about one SQL statement."""
+
+    statement_type: str
+    relations: Dict[str, str] = field(default_factory=dict)  # name -> read/write
+
+    @property
+    def read_relations(self) -> List[str]:
+        return [name for name, access in self.relations.items() if access == "read"]
+
+    @property
+    def written_relations(self) -> List[str]:
+        return [name for name, access in self.relations.items() if access == "write"]
+
+
+def _is_name(token: Token) -> bool:
+    return token.type is TokenType.QUOTED_IDENT or (
+        token.type is TokenType.WORD and token.upper not in CLAUSE_KEYWORDS
+    )
+
+
+def _read_qualified_name(tokens: List[Token], index: int) -> Tuple[str, int]:
+    """Read ``name(.name)*`` starting at index; returns (name, next index)."""
+    parts = [identifier_name(tokens[index])]
+    index += 1
+    while (
+        index + 1 < len(tokens)
+        and tokens[index].text == "."
+        and tokens[index + 1].type in (TokenType.WORD, TokenType.QUOTED_IDENT)
+    ):
+        parts.append(identifier_name(tokens[index + 1]))
+        index += 2
+    return ".".join(parts), index
+
+
+def _cte_names(tokens: List[Token]) -> Set[str]:
+    """Names defined by WITH clauses (they are not relations)."""
+    names: Set[str] = set()
+    for index, token in enumerate(tokens):
+        if token.upper != "AS" or index == 0:
+            continue
+        nxt = tokens[index + 1] if index + 1 < len(tokens) else None
+        if nxt is None or nxt.text != "(":
+            if not (nxt is not None and nxt.upper in ("MATERIALIZED", "NOT")):
+                continue
+        # Walk back over an optional column list: name (a, b) AS (
+        back = index - 1
+        if tokens[back].text == ")":
+            depth = 0
+            while back >= 0:
+                if tokens[back].text == ")":
+                    depth += 1
+                elif tokens[back].text == "(":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                back -= 1
+            back -= 1
+        if back >= 0 and _is_name(tokens[back]):
+            previous = tokens[back - 1] if back > 0 else None
+            if previous is not None and (
+                previous.upper in ("WITH", "RECURSIVE") or previous.text == ","
+            ):
+                names.add(identifier_name(tokens[back]))
+    return names
+
+
+def analyze_statement(sql: str) -> StatementInfo:
+    """
+    Classify a statement and extract the relations it reads and writes
+
+    Args:
+        sql: SQL text (raw or normalized)
+
+    Returns:
+        StatementInfo with statement type and relation access map
+    """
+    return analyze_tokens(tokenize(sql))
+
+
+def analyze_tokens(tokens: List[Token]) -> StatementInfo:
+    """Same as analyze_statement for an already tokenized statement."""
+    statement_type = "OTHER"
+    depth = 0
+    for token in tokens:
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth -= 1
+        elif depth == 0 and token.upper in STATEMENT_TYPES:
+            statement_type = token.upper
+            break
+
+    info = StatementInfo(statement_type=statement_type)
+    ctes = _cte_names(tokens)
+
+    def _record(name: str, access: str) -> None:
+        if name in ctes:
+            return
+        if info.relations.get(name) != "write":
+            info.relations[name] = access
+
+    # One entry per open paren: True when it is a function call's argument
+    # list, where FROM is syntax (EXTRACT, TRIM, SUBSTRING) not a relation
+    calls: List[bool] = []
+    index = 0
+    count = len(tokens)
+    while index < count:
+        token = tokens[index]
+        upper = token.upper
+        access: Optional[str] = None
+        if token.text == "(":
+            calls.append(
+                index > 0
+                and _is_name(tokens[index - 1])
+                and not (index + 1 < count and tokens[index + 1].upper in _SUBQUERY)
+            )
+        elif token.text == ")":
+            if calls:
+                calls.pop()
+        elif upper == "FROM" and calls and calls[-1]:
+            pass
+        elif upper in ("FROM", "JOIN"):
+            previous = tokens[index - 1].upper if index else ""
+            access = "write" if previous == "DELETE" else "read"
+        elif upper == "INTO" and index and tokens[index - 1].upper in _INTO_VERBS:
+            access = "write"
+        elif upper == "UPDATE" and not (index and tokens[index - 1].upper == "FOR"):
+            # Skip ON CONFLICT ... DO UPDATE and FOR UPDATE locking clauses
+            if index and tokens[index - 1].upper == "DO":
+                index += 1
+                continue
+            access = "write"
+        elif upper == "USING" and index and statement_type in ("DELETE", "MERGE"):
+            if index + 1 < count and tokens[index + 1].text != "(":
+                access = "read"
+        elif upper in ("TRUNCATE", "LOCK"):
+            access = "write"
+
+        if access is None:
+            index += 1
+            continue
+
+        index += 1
+        # FROM a, b, c: keep reading comma separated items at this level
+        while index < count:
+            if tokens[index].upper in ("ONLY", "TABLE"):
+                index += 1
+                continue
+            if not _is_name(tokens[index]):
+                break
+            if access == "read" and index + 1 < count and tokens[index + 1].text == "(":
+                # Function call in FROM (e.g. generate_series)
+                break
+            name, index = _read_qualified_name(tokens, index)
+            _record(name, access)
+            # Optional alias
+            if index < count and tokens[index].upper == "AS":
+                index += 1
+            if index < count and _is_name(tokens[index]):
+                index += 1
+            if (
+                index < count
+                and tokens[index].text == ","
+                and upper in ("FROM", "TRUNCATE", "LOCK")
+                and access == ("read" if upper == "FROM" else "write")
+            ):
+                index += 1
+                continue
+            break
+
+    return info
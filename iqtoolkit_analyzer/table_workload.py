@@ -0,0 +1,125 @@
+"""
+Table- and relation-level workload aggregation.
+
+Rolls per-fingerprint slow query time up to the relations each statement
+touches, so the report can show which tables account for most of the time
+and which statements drive it. Relations are extracted with the SQL lexer
+once per fingerprint, never per execution.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from .sql_lexer import analyze_statement
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_COLUMNS = ["select", "insert", "update", "delete", "other"]
+
+HOT_TABLE_COLUMNS = [
+    "relation",
+    "total_duration",
+    "executions",
+    "share",
+    "reads",
+    "writes",
+    *STATEMENT_COLUMNS,
+    "top_statements",
+]
+
+
+def aggregate_by_relation(
+    queries: pd.DataFrame, top_n: int = 10, top_statements: int = 3
+) -> pd.DataFrame:
+    """
+    Roll slow query time up per referenced relation
+
+    A statement touching several relations counts fully towards each of them,
+    so shares across relations can add up to more than 100%.
+
+    Args:
+        queries: Per-fingerprint DataFrame from run_slow_query_analysis with
+            columns [normalized_query, total_duration, frequency]
+        top_n: Number of relations to keep (0 keeps all)
+        top_statements: Number of statements listed per relation
+
+    Returns:
+        DataFrame with one row per relation, sorted by total time
+    """
+    rows: List[Dict[str, Any]] = []
+    total_time = float(queries["total_duration"].sum()) if len(queries) else 0.0
+
+    for query in queries.itertuples(index=False):
+        info = analyze_statement(str(query.normalized_query))
+        statement = info.statement_type.lower()
+        if statement not in STATEMENT_COLUMNS:
+            statement = "other"
+        for relation, access in info.relations.items():
+            rows.append(
+                {
+                    "relation": relation,
+                    "access": access,
+                    "statement": statement,
+                    "query": str(query.normalized_query),
+                    "total_duration": float(query.total_duration),
+                    "executions": int(query.frequency),
+                }
+            )
+
+    if not rows:
+        return pd.DataFrame(columns=HOT_TABLE_COLUMNS)
+
+    touches = pd.DataFrame(rows)
+    by_relation = touches.groupby("relation").agg(
+        total_duration=("total_duration", "sum"),
+        executions=("executions", "sum"),
+    )
+    by_relation["share"] = (
+        by_relation["total_duration"] / total_time if total_time > 0 else 0.0
+    )
+
+    access = touches.pivot_table(
+        index="relation",
+        columns="access",
+        values="executions",
+        aggfunc="sum",
+        fill_value=0,
+    )
+    by_relation["reads"] = access.get("read", 0)
+    by_relation["writes"] = access.get("write", 0)
+
+    statements = touches.pivot_table(
+        index="relation",
+        columns="statement",
+        values="executions",
+        aggfunc="sum",
+        fill_value=0,
+    )
+    for column in STATEMENT_COLUMNS:
+        by_relation[column] = statements.get(column, 0)
+
+    ranked = touches.sort_values("total_duration", ascending=False)
+    by_relation["top_statements"] = pd.Series(
+        {
+            relation: list(
+                zip(
+                    group["query"].head(top_statements),
+                    group["total_duration"].head(top_statements),
+                )
+            )
+            for relation, group in ranked.groupby("relation", sort=False)
+        }
+    )
+
+    result = (
+        by_relation.fillna(0)
+        .sort_values("total_duration", ascending=False)
+        .reset_index()[HOT_TABLE_COLUMNS]
+    )
+    for column in ["executions", "reads", "writes", *STATEMENT_COLUMNS]:
+        result[column] = result[column].astype(int)
+
+    logger.info(f"Aggregated slow query time over {len(result)} relations")
+    return result.head(top_n) if top_n > 0 else result
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the anti-pattern scanner.
+
+Compares the precompiled, keyword-prefiltered AntiPatternDetector with the
+scan it replaced (one ``re.finditer`` per rule per query, with the rule
+text looked up in the re module cache) on the same five rules, over a
+synthetic corpus of query fingerprints. The corpus is split by whether
+the detector has to tokenize the statement: queries no token rule trigger
+fires on only cost the prefilter and trigger regexes, and the script exits
+with status 1 unless they are cheaper than the old scan. The queries that
+are tokenized cost more than the old regexes did, and the totals are
+printed as they are; in exchange the token checks are linear, which the
+pathological case at the end demonstrates.
+
+The full catalog is also run against a plain scan of every rule on every
+query, and must flag the same rules, which shows the keyword and trigger
+tests never skip a rule that would fire.
+
+Usage:
+    poetry run python scripts/benchmark_antipatterns.py
+    python scripts/benchmark_antipatterns.py --count 100000 --seed 7
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+from unittest.mock import patch
+
+# Add the project root to sys.path before importing iqtoolkit_analyzer
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iqtoolkit_analyzer import antipatterns  # noqa: E402
+from iqtoolkit_analyzer.antipatterns import (  # noqa: E402
+    AntiPatternDetector,
+    AntiPatternMatch,
+    AntiPatternType,
+)
+from iqtoolkit_analyzer.sql_checks import TokenIndex, index_tokens  # noqa: E402
+
+TEMPLATES = [
+    "select * from {t} where id = ?",
+    "select {c}, {c2} from {t} where {c} = ? and {c2} > ? order by {c} limit ?",
+    "insert into {t} ({c}, {c2}) values (?, ?)",
+    "update {t} set {c} = ? where id = ?",
+    "delete from {t} where {c} < ?",
+    "select count(*) from {t} where {c} like '%?'",
+    "select * from {t} where lower({c}) = ?",
+    "select * from {t} where {c} not in (select {c} from {t2})",
+    "select * from {t} where {c} in (?, ?, ?, ?, ?, ?, ?)",
+    "select * from {t}, {t2} where {t}.id = {t2}.{c}",
+    "begin",
+    "commit",
+    "set application_name = ?",
+    "show search_path",
+    "vacuum analyze {t}",
+]
+WORDS = ["orders", "users", "events", "items", "accounts", "sessions", "audit"]
+COLUMNS = ["id", "status", "email", "created_at", "owner_id", "amount", "name"]
+
+
+def build_corpus(count: int, seed: int) -> List[str]:
+    """Generate ``count`` distinct-looking query fingerprints."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        template = rng.choice(TEMPLATES)
+        corpus.append(
+            template.format(
+                t=f"{rng.choice(WORDS)}_{i % 997}",
+                t2=f"{rng.choice(WORDS)}_{i % 389}",
+                c=rng.choice(COLUMNS),
+                c2=rng.choice(COLUMNS),
+            )
+        )
+    return corpus
+
+
+# The rule regexes as they were before the token scanner replaced three of
+# them (the IN-list one backtracks exponentially on unclosed lists)
+LEGACY_RULES = [
+    (
+        AntiPatternType.LEADING_WILDCARD_LIKE,
+        r'\bWHERE\s+\w+\s+LIKE\s+[\'"]%[^%\'"]',
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    (
+        AntiPatternType.FUNCTION_ON_COLUMN,
+        r"\bWHERE\s+\w+\s*\(\s*\w+\s*\)\s*[=<>!]",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    (
+        AntiPatternType.LARGE_IN_CLAUSE,
+        r"\bIN\s*\(\s*[^)]*,.*?,.*?,.*?,.*?[^)]*\)",
+        re.IGNORECASE | re.DOTALL,
+    ),
+    (
+        AntiPatternType.NOT_IN_WITH_SUBQUERY,
+        r"\bNOT\s+IN\s*\(\s*SELECT\b",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+    (
+        AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN,
+        r"\bFROM\s+\w+\s*,\s*\w+(?!\s+WHERE)",
+        re.IGNORECASE | re.DOTALL,
+    ),
+]
+
+
+def legacy_scan(detector: AntiPatternDetector, query: str) -> List[str]:
+    """The per-rule re.finditer scan used before the rules were precompiled."""
+    found = []
+    for pattern_type, regex, flags in LEGACY_RULES:
+        config = detector.patterns[pattern_type.value]
+        for match in re.finditer(regex, query, flags):
+            found.append(
+                AntiPatternMatch(
+                    pattern_type=pattern_type,
+                    problem_description=config["problem"],
+                    rewrite_suggestion=config["solution"],
+                    example_rewrite=config.get("example"),
+                    matched_text=match.group(),
+                )
+            )
+    return sorted(m.pattern_type.value for m in found)
+
+
+LEGACY_TYPES = {pattern_type.value for pattern_type, _, _ in LEGACY_RULES}
+
+
+def unfiltered_scan(detector: AntiPatternDetector, query: str) -> List[str]:
+    """Every rule of the catalog on every query, without prefilter or triggers."""
+    found: List[str] = []
+    index = index_tokens(query)
+    for rule_id, config in detector.patterns.items():
+        check = config.get("check")
+        if check is not None:
+            found.extend(rule_id for _ in check(index))
+        else:
+            for match in re.finditer(config["regex"], query, config["flags"]):
+                found.append(rule_id)
+    return sorted(found)
+
+
+def compiled_scan(detector: AntiPatternDetector, query: str) -> List[str]:
+    return sorted(m.rule_id for m in detector.detect_antipatterns(query))
+
+
+def split_by_tokenizing(
+    detector: AntiPatternDetector, corpus: List[str]
+) -> Tuple[List[str], List[str]]:
+    """Split the corpus into queries the detector does and does not tokenize."""
+    tokenized: List[str] = []
+    plain: List[str] = []
+    calls: List[int] = []
+
+    def counting_index_tokens(*args: Any, **kwargs: Any) -> Optional[TokenIndex]:
+        calls.append(1)
+        return index_tokens(*args, **kwargs)
+
+    with patch.object(antipatterns, "index_tokens", counting_index_tokens):
+        for query in corpus:
+            before = len(calls)
+            detector.detect_antipatterns(query)
+            (tokenized if len(calls) > before else plain).append(query)
+    return plain, tokenized
+
+
+def time_scan(
+    scan: Callable[[AntiPatternDetector, str], List[str]],
+    detector: AntiPatternDetector,
+    corpus: List[str],
+) -> Tuple[float, List[List[str]]]:
+    start = time.perf_counter()
+    results = [scan(detector, query) for query in corpus]
+    return time.perf_counter() - start, results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, args.seed)
+    catalog = AntiPatternDetector()
+    _, unfiltered_results = time_scan(unfiltered_scan, catalog, corpus)
+    catalog_time, catalog_results = time_scan(compiled_scan, catalog, corpus)
+    if unfiltered_results != catalog_results:
+        print("❌ Prefiltered and plain scans disagree on at least one query")
+        return 1
+
+    # Like for like: the detector limited to the rules the old scan had
+    detector = AntiPatternDetector(
+        disabled_rules=[rule for rule in catalog.patterns if rule not in LEGACY_TYPES]
+    )
+    plain, tokenized = split_by_tokenizing(detector, corpus)
+    print(f"Corpus: {len(corpus):,} fingerprints, {len(LEGACY_RULES)} rules")
+    print(f"{'':22} {'old scan':>9} {'detector':>9}")
+    totals = [0.0, 0.0]
+    plain_ratio = 0.0
+    for name, part in (("Not tokenized", plain), ("Tokenized", tokenized)):
+        legacy_time, legacy_results = time_scan(legacy_scan, detector, part)
+        detector_time, detector_results = time_scan(compiled_scan, detector, part)
+        if legacy_results != detector_results:
+            print("❌ Old and new rules disagree on at least one query")
+            return 1
+        totals[0] += legacy_time
+        totals[1] += detector_time
+        if part is plain:
+            plain_ratio = legacy_time / detector_time if detector_time else 0.0
+        label = f"{name} ({len(part):,})"
+        print(f"{label:22} {legacy_time:8.3f}s {detector_time:8.3f}s")
+    print(f"{'Total':22} {totals[0]:8.3f}s {totals[1]:8.3f}s")
+    print(f"Untokenized queries are {plain_ratio:.2f}x as fast as with the old scan")
+    print(f"Full catalog ({len(catalog.patterns)} rules): {catalog_time:.3f}s")
+
+    # A 10k-value IN list left unclosed (e.g. truncated by the log) made the
+    # old IN-list regex backtrack exponentially; it is not run here
+    pathological = (
+        "select * from t where id in (" + ", ".join(["?"] * 10_000) + " and x = ?"
+    )
+    start = time.perf_counter()
+    findings = compiled_scan(catalog, pathological)
+    print(
+        f"Unclosed 10k-value IN list: {time.perf_counter() - start:.3f}s "
+        f"({', '.join(findings) or 'no findings'})"
+    )
+    if plain_ratio < 1:
+        print("❌ The prefilter does not make untokenized queries cheaper")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the PostgreSQL pipeline against a fake LLM.
+
+Writes a synthetic slow query log, starts the bundled fake Ollama server
+(iqtoolkit_analyzer.fake_llm_server) with a seeded latency distribution and
+runs ``postgresql`` on it once per scenario: sequential and concurrent
+requests, packed requests, a cold and a warm recommendation cache and a
+flaky server with retries. Each scenario gets a fresh server and config,
+so wall times and request counts are reproducible on one machine and
+don't depend on a GPU or network.
+
+Usage:
+    poetry run python scripts/benchmark_llm_pipeline.py
+    python scripts/benchmark_llm_pipeline.py --queries 40 \\
+        --latency lognormal:800,0.5 --seed 7
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+# Add the project root to sys.path before importing iqtoolkit_analyzer
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from iqtoolkit_analyzer import main as cli  # noqa: E402
+from iqtoolkit_analyzer.fake_llm_server import (  # noqa: E402
+    FakeLLMConfig,
+    FakeLLMServer,
+    parse_latency,
+)
+
+COLUMNS = ["customer_id", "status", "created_at", "region", "sku"]
+
+# (name, config overrides, extra CLI arguments, error rate)
+SCENARIOS: List[Tuple[str, Dict[str, Any], List[str], float]] = [
+    ("sequential", {"ollama_max_concurrency": 1}, ["--no-llm-cache"], 0.0),
+    ("concurrent", {"ollama_max_concurrency": 8}, ["--no-llm-cache"], 0.0),
+    (
+        "packed",
+        {"ollama_max_concurrency": 8, "llm_pack_queries": True},
+        ["--no-llm-cache"],
+        0.0,
+    ),
+    ("cold cache", {"ollama_max_concurrency": 8}, [], 0.0),
+    ("warm cache", {"ollama_max_concurrency": 8}, [], 0.0),
+    (
+        "flaky + retries",
+        {"ollama_max_concurrency": 8, "llm_max_retries": 3},
+        ["--no-llm-cache"],
+        0.2,
+    ),
+]
+
+
+def write_log(path: Path, queries: int, seed: int) -> None:
+    """Write a slow query log with ``queries`` distinct fingerprints."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(queries):
+        column = COLUMNS[i % len(COLUMNS)]
+        for second in range(rng.randint(1, 5)):
+            duration = rng.uniform(200, 5000)
+            lines.append(
+                f"2025-10-28 10:{i % 60:02d}:{second:02d}.000 UTC [{1000 + i}] "
+                f"LOG:  duration: {duration:.1f} ms  statement: SELECT id, total "
+                f"FROM orders_{i} WHERE {column} = {rng.randint(1, 9999)};"
+            )
+    path.write_text("\n".join(lines) + "\n")
+
+
+def run_scenario(
+    workdir: Path,
+    log_path: Path,
+    server: FakeLLMServer,
+    overrides: Dict[str, Any],
+    extra_args: List[str],
+    top_n: int,
+) -> Tuple[float, int]:
+    """Run the CLI once; returns its wall time and exit code."""
+    config = {
+        "llm_provider": "ollama",
+        "ollama_model": "fake",
+        "ollama_host": server.url,
+        "llm_cache_path": str(workdir / "llm_cache.json"),
+        **overrides,
+    }
+    (workdir / ".iqtoolkit-analyzer.yml").write_text(yaml.safe_dump(config))
+    argv = [
+        "iqtoolkit-analyzer",
+        "postgresql",
+        str(log_path),
+        "--output",
+        str(workdir / "report.md"),
+        "--top-n",
+        str(top_n),
+        "--no-llm-tiering",
+        *extra_args,
+    ]
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    original_argv = sys.argv
+    sys.argv = argv
+    start = time.perf_counter()
+    try:
+        with (
+            contextlib.redirect_stdout(io.StringIO()),
+            contextlib.redirect_stderr(io.StringIO()),
+        ):
+            code = cli.main()
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.argv = original_argv
+        os.chdir(cwd)
+    return elapsed, code
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        default=parse_latency("lognormal:300,0.3"),
+        help="Fake LLM latency (see fake_llm_server; default lognormal:300,0.3)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Before the CLI configures logging: keep its output (and the retry
+    # warnings of the flaky scenario) off the terminal and stop it from
+    # adding a file handler for the log being analyzed
+    logging.basicConfig(level=logging.ERROR)
+
+    print(
+        f"{args.queries} query fingerprints, latency {args.latency.kind}"
+        f"{list(args.latency.params)}, seed {args.seed}\n"
+    )
+    print(f"{'Scenario':<18} {'Wall (s)':>9} {'Requests':>9} {'Errors':>7}  Exit")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        log_path = workdir / "slow.log"
+        write_log(log_path, args.queries, args.seed)
+        for name, overrides, extra_args, error_rate in SCENARIOS:
+            fake = FakeLLMConfig(
+                latency=args.latency, error_rate=error_rate, seed=args.seed
+            )
+            with FakeLLMServer(fake) as server:
+                elapsed, code = run_scenario(
+                    workdir, log_path, server, overrides, extra_args, args.queries
+                )
+                requests = server.stats["ollama_chat"]
+                errors = server.stats["errors"]
+            print(f"{name:<18} {elapsed:>9.2f} {requests:>9} {errors:>7}  {code}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
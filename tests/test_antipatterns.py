@@ -0,0 +1,267 @@
+"""Tests for anti-pattern detection."""
+
+import logging
+import re
+import sys
+from pathlib import Path
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from iqtoolkit_analyzer.antipatterns import (
+    AntiPatternDetector,
+    AntiPatternType,
+    StaticQueryRewriter,
+    load_rule_pack,
+)
+from iqtoolkit_analyzer.sql_checks import index_tokens
+
+
+def test_detects_rules_in_single_pass():
+    detector = AntiPatternDetector()
+    matches = detector.detect_antipatterns(
+        "SELECT * FROM t WHERE email LIKE '%x' "
+        "AND id NOT IN (SELECT id FROM d) AND k IN (1, 2, 3, 4, 5, 6)"
+    )
+    types = {m.pattern_type for m in matches}
+    assert types == {
+        AntiPatternType.LEADING_WILDCARD_LIKE,
+        AntiPatternType.NOT_IN_WITH_SUBQUERY,
+        AntiPatternType.LARGE_IN_CLAUSE,
+    }
+
+
+def test_prefilter_skips_rules_without_trigger_keywords():
+    detector = AntiPatternDetector()
+    # Replace every confirming regex with one that would match anything, so a
+    # match can only come from a rule the keyword prefilter let through
+    detector._rules = [
+        replace(rule, regex=re.compile(r"^"), contains=None, trigger=None)
+        for rule in detector._rules
+    ]
+
+    assert detector.detect_antipatterns("BEGIN") == []
+    matches = detector.detect_antipatterns("select 1 from t")
+    assert {m.pattern_type for m in matches} == {
+        AntiPatternType.NO_WHERE_CLAUSE_ON_JOIN,
+        AntiPatternType.CORRELATED_SUBQUERY_IN_SELECT,
+        AntiPatternType.UNBOUNDED_RESULT_SET,
+    }
+
+
+def test_token_index_is_built_only_when_a_trigger_passes():
+    detector = AntiPatternDetector()
+    with patch(
+        "iqtoolkit_analyzer.antipatterns.index_tokens", wraps=index_tokens
+    ) as indexer:
+        assert detector.detect_antipatterns("select id from t where id = $1") == []
+        assert detector.detect_antipatterns("UPDATE t SET a = 1 WHERE id = 2") == []
+        indexer.assert_not_called()
+
+        matches = detector.detect_antipatterns(
+            "select id from t where lower(email) = $1 or phone = $2"
+        )
+        assert indexer.call_count == 1
+    assert {m.rule_id for m in matches} == {"function_on_column", "or_chain"}
+
+
+def test_token_scan_shapes():
+    detector = AntiPatternDetector()
+    matches = detector.detect_antipatterns(
+        "SELECT t.id FROM t JOIN u ON lower(t.email) = u.email "
+        "WHERE t.name ILIKE '_bob' AND date_trunc('day', t.created_at) >= ? "
+        "AND t.id IN (SELECT id FROM v) AND now() > t.expires_at"
+    )
+    found = [(m.pattern_type, m.matched_text) for m in matches]
+    assert found == [
+        (AntiPatternType.LEADING_WILDCARD_LIKE, "t.name ILIKE '_bob'"),
+        (AntiPatternType.FUNCTION_ON_COLUMN, "lower(t.email) ="),
+        (AntiPatternType.FUNCTION_ON_COLUMN, "date_trunc('day', t.created_at) >="),
+    ]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        (
+            "SELECT c.name, (SELECT COUNT(*) FROM support_tickets t "
+            "WHERE t.customer_id = c.id) AS tickets FROM customers c WHERE c.vip",
+            [("correlated_subquery_in_select", 0.85)],
+        ),
+        (
+            "SELECT s.id, p.name FROM sales s JOIN products p ON p.id = s.product_id "
+            "ORDER BY s.sale_date DESC LIMIT 10000",
+            [("unbounded_result_set", 0.8)],
+        ),
+        (
+            "SELECT d.name, (SELECT COUNT(*) FROM employees) FROM departments d "
+            "WHERE d.id = 1",
+            [("count_star_full_table", 0.8)],
+        ),
+        (
+            "SELECT id FROM items WHERE a = 1 ORDER BY id LIMIT 20 OFFSET 50000",
+            [("deep_offset_pagination", 0.9)],
+        ),
+        (
+            "SELECT id FROM items WHERE a = $1 ORDER BY random() LIMIT 5",
+            [("order_by_random", 0.95)],
+        ),
+        (
+            "SELECT * FROM a JOIN b ON a.id = b.a_id JOIN c ON c.id = b.c_id "
+            "WHERE a.x = 1",
+            [("select_star_on_join", 0.8)],
+        ),
+        (
+            "SELECT id FROM t WHERE status = 'a' OR status = 'b' OR status = 'c'",
+            [("or_chain", 0.6)],
+        ),
+        (
+            "SELECT id FROM t WHERE (email = $1 OR phone = $2) AND active",
+            [("or_chain", 0.7)],
+        ),
+        (
+            "SELECT id FROM t WHERE created_at::date = '2025-01-01' "
+            "AND CAST(t.code AS int) = 5",
+            [("implicit_cast", 0.8), ("implicit_cast", 0.8)],
+        ),
+        ("Select * From pg_stat_activity", [("unbounded_result_set", 0.7)]),
+        # Bounded, aggregated or filtered statements stay clean
+        ("SELECT a FROM x UNION ALL SELECT b FROM y LIMIT 10", []),
+        ("SELECT status, COUNT(*) FROM t GROUP BY status", []),
+        ("SELECT id FROM t WHERE email = $1 HAVING count(x) > 2", []),
+        ("SELECT CASE WHEN a = 1 OR b = 2 THEN 1 END FROM t WHERE id = 1", []),
+        (
+            "SELECT u.id, (SELECT max(x.ts) FROM (SELECT ts FROM logins l "
+            "WHERE l.uid = 3) x) FROM users u WHERE u.id = 1",
+            [],
+        ),
+        # Table functions, CTEs and scalar subqueries bound their own rows
+        ("SELECT * FROM generate_series(1, 100) g", []),
+        (
+            "WITH recent AS (SELECT * FROM orders WHERE created_at > $1) "
+            "SELECT * FROM recent",
+            [],
+        ),
+        (
+            "SELECT (SELECT max(total) FROM orders WHERE status = 'paid') AS top, "
+            "(SELECT count(*) FROM users WHERE active) AS users",
+            [],
+        ),
+        ("CREATE OR REPLACE VIEW v AS SELECT id FROM t WHERE a = 1", []),
+    ],
+)
+def test_expanded_catalog(query, expected):
+    detector = AntiPatternDetector()
+    matches = detector.detect_antipatterns(query)
+
+    assert [(m.rule_id, m.confidence_score) for m in matches] == expected
+
+
+def test_new_rules_lower_optimization_score():
+    rewriter = StaticQueryRewriter()
+    matches, _ = rewriter.analyze_query(
+        "SELECT * FROM orders o JOIN customers c ON c.id = o.customer_id "
+        "ORDER BY random() OFFSET 100000"
+    )
+    assert {m.rule_id for m in matches} == {
+        "select_star_on_join",
+        "order_by_random",
+        "deep_offset_pagination",
+        "unbounded_result_set",
+    }
+    score = rewriter.get_optimization_score(matches)
+    assert score == pytest.approx(
+        1 - sum(m.severity * m.confidence_score for m in matches)
+    )
+
+
+def test_unclosed_large_in_list_is_linear():
+    values = ", ".join(["1"] * 10_000)
+    detector = AntiPatternDetector()
+    matches = detector.detect_antipatterns(f"SELECT * FROM t WHERE id IN ({values}")
+
+    assert [m.pattern_type for m in matches] == [AntiPatternType.LARGE_IN_CLAUSE]
+    assert matches[0].confidence_score == 1.0
+    assert len(matches[0].matched_text) <= 120
+
+
+def test_size_and_time_guards():
+    query = "SELECT * FROM t WHERE a LIKE '%x' AND " + "b = 1 AND " * 1000
+    truncated = AntiPatternDetector(max_query_length=23)
+    assert truncated.detect_antipatterns(query) == []
+
+    no_budget = AntiPatternDetector(time_budget_ms=-1)
+    assert no_budget.detect_antipatterns(query) == []
+
+
+def test_rule_pack_loading_stats_and_disabling(tmp_path):
+    pack = tmp_path / "rules.yml"
+    pack.write_text(
+        "rules:\n"
+        "  - id: pg_sleep_call\n"
+        "    regex: '\\bpg_sleep\\s*\\('\n"
+        "    keywords: [PG_SLEEP]\n"
+        "    severity: critical\n"
+        "    confidence: 1.0\n"
+        "    problem: sleeping\n"
+        "    solution: do not sleep\n"
+    )
+    detector = AntiPatternDetector(
+        rule_packs=[str(pack)],
+        disabled_rules=["no_where_clause_on_join", "unbounded_result_set"],
+    )
+    matches = detector.detect_antipatterns("select pg_sleep(?) from a, b")
+    assert [(m.rule_id, m.pattern_type) for m in matches] == [
+        ("pg_sleep_call", AntiPatternType.CUSTOM)
+    ]
+    assert matches[0].severity == 0.4
+    assert StaticQueryRewriter(detector).get_optimization_score(matches) == 0.6
+
+    detector.detect_antipatterns("select 1")
+    stats = {s.rule_id: s for s in detector.get_rule_stats()}
+    assert "no_where_clause_on_join" not in stats
+    assert stats["pg_sleep_call"].evaluations == 1
+    assert stats["pg_sleep_call"].matches == 1
+    assert stats["pg_sleep_call"].total_time_ms > 0
+
+
+def test_example_rule_pack_is_valid():
+    pack = Path(__file__).parent.parent / "docs/examples/antipattern_rules.yml"
+    rules = load_rule_pack(str(pack))
+    assert rules["select_for_update_nowait"]["enabled"] is False
+
+
+@pytest.mark.parametrize(
+    "rule, error",
+    [
+        ("{id: r, regex: '(', problem: p, solution: s}", "invalid regex"),
+        ("{id: r, regex: x, problem: p}", "'solution' is required"),
+        ("{id: r, regex: x, problem: p, solution: s, severity: huge}", "severity"),
+        ("{id: r, regex: x, problem: p, solution: s, colour: red}", "unknown keys"),
+        ("{id: leading_wildcard_like, regex: x, problem: p, solution: s}", "already"),
+        ("{id: r, regex: '(\\w+\\s?)+$', problem: p, solution: s}", "backtrack"),
+        ("{id: r, regex: '(?:a|b*)*c', problem: p, solution: s}", "backtrack"),
+        ("{id: r, regex: x, problem: p, solution: s, flags: DOTALL}", "list"),
+    ],
+)
+def test_invalid_rule_packs_are_rejected(tmp_path, rule, error):
+    pack = tmp_path / "bad.yml"
+    pack.write_text(f"rules:\n  - {rule}\n")
+    with pytest.raises(ValueError, match=error):
+        AntiPatternDetector(rule_packs=[str(pack)])
+
+
+def test_rule_packs_load_without_the_private_regex_parser(
+    tmp_path, monkeypatch, caplog
+):
+    monkeypatch.delattr(re, "_parser")
+    monkeypatch.setitem(sys.modules, "re._parser", None)
+    pack = tmp_path / "rules.yml"
+    pack.write_text("rules:\n  - {id: r, regex: '(a+)+', problem: p, solution: s}\n")
+
+    with caplog.at_level(logging.WARNING):
+        detector = AntiPatternDetector(rule_packs=[str(pack)])
+
+    assert "r" in detector.patterns
+    assert "skipped the backtracking check" in caplog.text
@@ -0,0 +1,84 @@
+"""Tests for sweep-line concurrency reconstruction."""
+
+from unittest.mock import Mock
+
+import pandas as pd
+
+from iqtoolkit_analyzer.analyzer import query_fingerprint
+from iqtoolkit_analyzer.concurrency import analyze_concurrency
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+
+def _log_df(rows):
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime([r[0] for r in rows]),
+            "duration_ms": [r[1] for r in rows],
+            "query": [r[2] for r in rows],
+        }
+    )
+
+
+def test_peak_concurrency_and_windows():
+    df = _log_df(
+        [
+            ("2025-01-01 00:00:10", 5000, "SELECT * FROM a WHERE id = 1"),
+            ("2025-01-01 00:00:11", 5000, "SELECT * FROM a WHERE id = 2"),
+            ("2025-01-01 00:00:12", 5000, "SELECT * FROM b"),
+            ("2025-01-01 00:00:30", 1000, "SELECT 1"),
+        ]
+    )
+    report = analyze_concurrency(df)
+
+    assert report.total_executions == 4
+    assert report.peak_concurrency == 3
+    worst = report.peak_windows[0]
+    assert worst.active_count == 3
+    assert worst.start == pd.Timestamp("2025-01-01 00:00:07")
+    assert worst.end == pd.Timestamp("2025-01-01 00:00:10")
+
+    fp_a = query_fingerprint("SELECT * FROM a WHERE id = 1")
+    assert report.fingerprint_peaks[fp_a] == 2
+    assert worst.fingerprints[fp_a] == 2
+    # The two copies of a overlap each other, which is not a pair
+    assert [(a, b) for a, b, _ in report.co_active_pairs if a == b] == []
+    assert len(report.co_active_pairs) == 1
+
+    assert analyze_concurrency(df, top_windows=0).peak_concurrency == 3
+
+
+def test_back_to_back_queries_do_not_overlap():
+    df = _log_df(
+        [
+            ("2025-01-01 00:00:01", 1000, "SELECT 1"),
+            ("2025-01-01 00:00:02", 1000, "SELECT 2"),
+        ]
+    )
+    report = analyze_concurrency(df)
+
+    assert report.peak_concurrency == 1
+    assert report.co_active_pairs == []
+
+
+def test_co_active_pairs_and_report_section(tmp_path):
+    df = _log_df(
+        [
+            ("2025-01-01 00:00:05", 4000, "SELECT * FROM orders"),
+            ("2025-01-01 00:00:06", 4000, "SELECT * FROM customers"),
+        ]
+    )
+    report = analyze_concurrency(df)
+
+    assert len(report.co_active_pairs) == 1
+    assert report.co_active_pairs[0][2] == 1
+
+    generator = ReportGenerator(Mock(), output_dir=str(tmp_path))
+    section = generator._generate_concurrency_section(report)
+    assert "Peak Concurrent Slow Queries:** 2" in section
+    assert "Worst Overlap Windows" in section
+
+
+def test_empty_dataframe():
+    report = analyze_concurrency(pd.DataFrame(columns=["timestamp", "duration_ms"]))
+    assert report.total_executions == 0
+    assert report.peak_concurrency == 0
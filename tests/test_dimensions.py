@@ -0,0 +1,64 @@
+"""Tests for dimensional breakdowns of slow query time."""
+
+import pandas as pd
+import pytest
+
+from iqtoolkit_analyzer.analyzer import query_fingerprint
+from iqtoolkit_analyzer.dimensions import (
+    UNKNOWN_DIMENSION,
+    build_dimension_breakdown,
+    parse_group_by,
+)
+
+
+@pytest.fixture
+def log_df():
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2025-01-01"] * 4),
+            "duration_ms": [100.0, 200.0, 300.0, 50.0],
+            "query": [
+                "SELECT * FROM t WHERE id = 1",
+                "SELECT * FROM t WHERE id = 2",
+                "SELECT * FROM orders",
+                "SELECT * FROM orders",
+            ],
+            "user": ["api", "batch", None, "api"],
+            "database": ["shop", "shop", "crm", "crm"],
+        }
+    )
+
+
+def test_parse_group_by_aliases():
+    assert parse_group_by("fingerprint, db,user,app,db") == [
+        "fingerprint",
+        "database",
+        "user",
+        "application",
+    ]
+    with pytest.raises(ValueError, match="Unknown group-by dimension"):
+        parse_group_by("fingerprint,tenant")
+
+
+def test_breakdown_totals_and_contributors(log_df):
+    breakdown = build_dimension_breakdown(log_df, parse_group_by("fingerprint,db,user"))
+
+    assert breakdown.total_time == 650.0
+    by_db = breakdown.totals["database"].set_index("database")
+    assert by_db.loc["crm", "total_duration"] == 350.0
+    assert by_db.loc["shop", "executions"] == 2
+    by_user = breakdown.totals["user"].set_index("user")
+    assert by_user.loc[UNKNOWN_DIMENSION, "total_duration"] == 300.0
+
+    fp = query_fingerprint("SELECT * FROM t WHERE id = 1")
+    contributors = breakdown.top_contributors[fp]
+    assert list(contributors["user"]) == ["batch", "api"]
+    assert contributors["pattern_share"].iloc[0] == pytest.approx(2 / 3)
+    assert isinstance(breakdown.groups["fingerprint"].dtype, pd.CategoricalDtype)
+
+
+def test_breakdown_missing_dimension_column(log_df):
+    breakdown = build_dimension_breakdown(log_df, ["application"])
+    totals = breakdown.totals["application"]
+    assert list(totals["application"]) == [UNKNOWN_DIMENSION]
+    assert totals["executions"].iloc[0] == 4
@@ -0,0 +1,129 @@
+"""Tests for plan anti-pattern rules and batch EXPLAIN file analysis."""
+
+import pytest
+
+from iqtoolkit_analyzer.explain_antipatterns import detect_plan_antipatterns
+from iqtoolkit_analyzer.explain_batch import (
+    analyze_explain_files,
+    collect_explain_files,
+)
+from iqtoolkit_analyzer.explain_parser import parse_explain
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+SLOW_PLAN = """\
+Sort  (cost=9000.00..9100.00 rows=40 width=8) \
+(actual time=900.000..1000.000 rows=5000 loops=1)
+  Sort Key: created_at
+  Sort Method: external merge  Disk: 20480kB
+  ->  Nested Loop  (cost=0.00..8000.00 rows=40 width=8) \
+(actual time=0.100..800.000 rows=5000 loops=1)
+        ->  Seq Scan on orders  (cost=0.00..5000.00 rows=10 width=4) \
+(actual time=0.010..300.000 rows=5000 loops=1)
+              Filter: (status = 'open'::text)
+              Rows Removed by Filter: 195000
+        ->  Index Scan using items_pkey on items  (cost=0.29..0.40 rows=1 width=4) \
+(actual time=0.010..0.050 rows=1 loops=5000)
+"""
+HASH_PLAN = """\
+Hash Join  (cost=10.00..200.00 rows=100 width=8) \
+(actual time=1.000..50.000 rows=100 loops=1)
+  ->  Seq Scan on events  (cost=0.00..100.00 rows=100 width=4) \
+(actual time=0.010..10.000 rows=100 loops=1)
+  ->  Hash  (cost=5.00..5.00 rows=10 width=4) \
+(actual time=20.000..20.000 rows=9000 loops=1)
+        Buckets: 1024 (originally 1024)  Batches: 8 (originally 1)  Memory Usage: 4096kB
+        ->  Seq Scan on users  (cost=0.00..5.00 rows=10 width=4) \
+(actual time=0.010..15.000 rows=9000 loops=1)
+"""
+FAST_PLAN = """\
+Index Scan using users_pkey on users  (cost=0.29..8.30 rows=1 width=4) \
+(actual time=0.010..0.020 rows=1 loops=1)
+Execution Time: 0.050 ms
+"""
+
+
+def test_plan_rules_fire_on_the_expensive_nodes():
+    findings = detect_plan_antipatterns(parse_explain(SLOW_PLAN))
+    by_rule = {finding.rule_id: finding for finding in findings}
+
+    assert set(by_rule) == {
+        "seq_scan_on_large_relation",
+        "nested_loop_high_loops",
+        "sort_spill_to_disk",
+    }
+    seq = by_rule["seq_scan_on_large_relation"]
+    assert seq.severity == "high"
+    assert "200,000 rows" in seq.problem and "98%" in seq.problem
+    assert "status = 'open'" in seq.suggestion
+    assert "expected 10 outer rows and got 5,000" in (
+        by_rule["nested_loop_high_loops"].problem
+    )
+    assert "20,480 kB" in by_rule["sort_spill_to_disk"].problem
+    # High severity first
+    assert findings[0] is seq
+
+    (hashed,) = detect_plan_antipatterns(parse_explain(HASH_PLAN))
+    assert hashed.rule_id == "hash_batches"
+    assert "8 batches (planned 1" in hashed.problem
+
+    disabled = detect_plan_antipatterns(
+        parse_explain(SLOW_PLAN), disabled_rules=["sort_spill_to_disk"]
+    )
+    assert "sort_spill_to_disk" not in {finding.rule_id for finding in disabled}
+
+
+def test_collect_explain_files_skips_hidden(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_text(FAST_PLAN)
+    (tmp_path / "nested" / "b.json").write_text("{}")
+    (tmp_path / ".draft.txt").write_text(FAST_PLAN)
+
+    files = collect_explain_files([str(tmp_path)])
+    assert [path.split("/")[-1] for path in files] == ["a.txt", "b.json"]
+    assert len(collect_explain_files([str(tmp_path)], pattern="*.json")) == 1
+
+    with pytest.raises(FileNotFoundError):
+        collect_explain_files([str(tmp_path / "missing")])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_analyze_explain_files_ranks_results(tmp_path, workers):
+    for name, text in [
+        ("fast.txt", FAST_PLAN),
+        ("slow.txt", SLOW_PLAN),
+        ("hash.txt", HASH_PLAN),
+        ("notes.txt", "remember to vacuum"),
+    ]:
+        (tmp_path / name).write_text(text)
+
+    results = analyze_explain_files(
+        collect_explain_files([str(tmp_path)]), workers=workers
+    )
+
+    assert [result.path.split("/")[-1] for result in results] == [
+        "slow.txt",
+        "hash.txt",
+        "fast.txt",
+        "notes.txt",
+    ]
+    slow = results[0]
+    assert slow.execution_ms == pytest.approx(1000.0)
+    assert slow.dominant.startswith("Seq Scan on orders")
+    # Plain EXPLAIN output is grouped by plan shape
+    assert slow.plan.fingerprint is not None
+    assert results[2].execution_ms == 0.05
+    assert results[-1].plan is None and results[-1].error
+
+
+def test_generate_explain_report(tmp_path):
+    (tmp_path / "slow.txt").write_text(SLOW_PLAN)
+    (tmp_path / "bad.txt").write_text("not a plan")
+    results = analyze_explain_files(collect_explain_files([str(tmp_path)]), workers=1)
+
+    report = ReportGenerator(None).generate_explain_report(results)
+
+    assert "# PostgreSQL EXPLAIN Analysis Report" in report
+    assert "**Plans Analyzed:** 1" in report
+    assert "## Ranked Plans" in report
+    assert "Seq Scan On Large Relation" in report
+    assert "## Files Not Parsed" in report and "bad.txt" in report
@@ -0,0 +1,93 @@
+"""Tests for per-node plan metrics and rollups."""
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from iqtoolkit_analyzer.explain_metrics import (
+    analyze_plans,
+    estimate_error,
+    node_metrics,
+)
+from iqtoolkit_analyzer.explain_parser import iter_log_plans, parse_explain
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+SAMPLE_LOG = str(
+    Path(__file__).parent.parent
+    / "docs/sample_logs/postgresql/postgresql-2025-11-02_101500.log.txt"
+)
+
+PLAN = """\
+Query Text: SELECT * FROM orders o JOIN items i ON i.order_id = o.id
+Nested Loop  (cost=0.29..50.00 rows=10 width=8) \
+(actual time=0.100..100.000 rows=1000 loops=1)
+  Buffers: shared hit=400 read=100
+  ->  Seq Scan on orders o  (cost=0.00..10.00 rows=100 width=4) \
+(actual time=0.010..20.000 rows=100 loops=1)
+        Buffers: shared hit=50 read=100
+  ->  Index Scan using items_order_id on items i  \
+(cost=0.29..0.40 rows=1 width=4) (actual time=0.005..0.700 rows=10 loops=100)
+        Buffers: shared hit=350
+"""
+
+
+def test_exclusive_time_counts_loops():
+    metrics = {m.node.label: m for m in node_metrics(parse_explain(PLAN))}
+
+    # 100 ms inclusive - (20 ms + 0.7 ms x 100 loops)
+    assert metrics["Nested Loop"].exclusive_ms == pytest.approx(10.0)
+    assert metrics["Index Scan on items"].exclusive_ms == pytest.approx(70.0)
+    assert metrics["Index Scan on items"].loops == 100
+    # Buffers are inclusive of children too
+    assert metrics["Nested Loop"].buffers["shared_hit_blocks"] == 0
+    assert metrics["Seq Scan on orders"].buffers["shared_read_blocks"] == 100
+
+
+def test_estimate_error_ratio_and_direction():
+    root = parse_explain(PLAN).root
+    assert estimate_error(root) == (100.0, "under")
+    assert estimate_error(root.children[0]) == (1.0, "under")
+    root.actual_rows = 0.0
+    assert estimate_error(root) == (10.0, "over")
+    root.actual_loops = 0
+    assert estimate_error(root) == (None, None)
+
+
+def test_analyze_plans_rolls_up_executions():
+    plans = [parse_explain(PLAN), parse_explain(PLAN), parse_explain(PLAN)]
+    plans[2].root.children[1].actual_total_time = 0.4
+    plans[1].query_text = None
+    plans[1].fingerprint = None
+
+    report = analyze_plans(plans)
+
+    assert (report.plans_analyzed, report.plans_skipped) == (2, 1)
+    fingerprint = plans[0].fingerprint
+    nodes = report.nodes.set_index("node")
+    assert nodes.loc["Index Scan on items", "exclusive_ms"] == pytest.approx(110.0)
+    assert nodes.loc["Index Scan on items", "loops"] == 200
+    assert nodes.loc["Seq Scan on orders", "hit_ratio"] == pytest.approx(1 / 3)
+
+    dominant = report.dominant.loc[fingerprint]
+    assert dominant["executions"] == 2
+    assert dominant["total_ms"] == pytest.approx(200.0)
+    assert dominant["summary"] == (
+        "Index Scan on items: 55% of time, estimate off by 10x (under)"
+    )
+
+
+def test_sample_log_dominant_nodes_and_report(tmp_path):
+    report = analyze_plans(iter_log_plans(SAMPLE_LOG))
+
+    summaries = report.dominant["summary"].tolist()
+    assert summaries[1] == (
+        "Seq Scan on sales: 78% of time, estimate off by 400x (under)"
+    )
+    assert summaries[0].startswith("Seq Scan on support_tickets: 91% of time")
+
+    section = ReportGenerator(
+        Mock(), output_dir=str(tmp_path)
+    )._generate_plan_hotspots_section(report)
+    assert "## Plan Hotspots" in section
+    assert "Seq Scan on sales: 78% of time" in section
@@ -0,0 +1,201 @@
+"""Tests for EXPLAIN / auto_explain plan parsing."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from iqtoolkit_analyzer.analyzer import query_fingerprint
+from iqtoolkit_analyzer.explain_parser import iter_log_plans, parse_explain
+from iqtoolkit_analyzer.parser import parse_postgres_log
+
+TEXT_PLAN = """\
+Hash Left Join  (cost=10.00..200.00 rows=50 width=8) \
+(actual time=1.000..90.500 rows=4000 loops=1)
+  Hash Cond: (o.customer_id = c.id)
+  Buffers: shared hit=10 read=90 dirtied=1, temp read=3 written=4
+  ->  Parallel Seq Scan on orders o  (cost=0.00..150.00 rows=50 width=8) \
+(actual time=0.010..60.000 rows=4000 loops=1)
+        Filter: (status = 'open'::text)
+        Rows Removed by Filter: 96000
+        Buffers: shared hit=5 read=90
+        SubPlan 1
+          ->  Index Only Scan Backward using idx_x on items  \
+(cost=0.29..8.30 rows=1 width=4) (never executed)
+  ->  Hash  (cost=5.00..5.00 rows=100 width=8) \
+(actual time=0.900..0.900 rows=100 loops=1)
+        Buckets: 1024 (originally 512)  Batches: 2 (originally 1)  Memory Usage: 9kB
+        ->  Sort  (cost=4.00..4.25 rows=100 width=8) \
+(actual time=0.500..0.600 rows=100 loops=1)
+              Sort Method: external merge  Disk: 4312kB
+              ->  HashAggregate  (cost=1.00..2.00 rows=100 width=8) \
+(actual time=0.100..0.200 rows=100 loops=1)
+                    ->  Bitmap Index Scan on idx_customers_region  \
+(cost=0.00..1.00 rows=100 width=0) (actual time=0.050..0.050 rows=100 loops=1)
+Planning:
+  Buffers: shared hit=99
+Planning Time: 0.250 ms
+Execution Time: 91.000 ms
+"""
+
+JSON_PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Nested Loop",
+            "Parallel Aware": False,
+            "Join Type": "Inner",
+            "Startup Cost": 0.29,
+            "Total Cost": 16.6,
+            "Plan Rows": 1,
+            "Plan Width": 8,
+            "Actual Startup Time": 0.02,
+            "Actual Total Time": 5.5,
+            "Actual Rows": 10,
+            "Actual Loops": 1,
+            "Plans": [
+                {
+                    "Node Type": "Index Scan",
+                    "Scan Direction": "Forward",
+                    "Index Name": "orders_pkey",
+                    "Relation Name": "orders",
+                    "Alias": "o",
+                    "Actual Total Time": 0.05,
+                    "Actual Rows": 1,
+                    "Actual Loops": 100,
+                    "Index Cond": "(id = 1)",
+                    "Shared Hit Blocks": 300,
+                    "Shared Read Blocks": 2,
+                }
+            ],
+        },
+        "Planning Time": 0.1,
+        "Execution Time": 5.6,
+    }
+]
+
+LOG = """\
+2025-11-02 10:00:00.000 EDT [41] LOG:  duration: 120.500 ms  plan:
+\tQuery Text: SELECT * FROM orders
+\t  WHERE status = 'open'
+\tSeq Scan on orders  (cost=0.00..1.00 rows=1 width=8) \
+(actual time=0.010..119.000 rows=10 loops=1)
+\t  Filter: (status = 'open'::text)
+2025-11-02 10:00:01.000 EDT [42] LOG:  duration: 80.000 ms  plan:
+\t{
+\t  "Query Text": "SELECT * FROM orders WHERE status = 'closed'",
+\t  "Plan": {"Node Type": "Seq Scan", "Relation Name": "orders"}
+\t}
+2025-11-02 10:00:02.000 EDT [43] LOG:  duration: 70.000 ms  plan:
+\tnot a plan
+2025-11-02 10:00:03.000 EDT [44] LOG:  duration: 60.000 ms  statement: SELECT 1
+"""
+
+
+def test_parse_text_plan_tree():
+    plan = parse_explain(TEXT_PLAN)
+
+    assert (plan.format, plan.planning_time_ms, plan.execution_time_ms) == (
+        "text",
+        0.25,
+        91.0,
+    )
+    root = plan.root
+    assert (root.node_type, root.join_type, root.plan_rows, root.actual_rows) == (
+        "Hash Join",
+        "Left",
+        50.0,
+        4000.0,
+    )
+    # Planning buffers belong to the statement, not to the root node
+    assert (root.shared_hit_blocks, root.shared_read_blocks) == (10, 90)
+    assert (root.temp_read_blocks, root.temp_written_blocks) == (3, 4)
+
+    scan, hash_node = root.children
+    assert scan.label == "Seq Scan on orders"
+    assert (scan.alias, scan.rows_removed_by_filter) == ("o", 96000)
+    assert scan.metadata["parallel_aware"] is True
+    (subplan,) = scan.children
+    assert (subplan.node_type, subplan.index_name, subplan.actual_loops) == (
+        "Index Only Scan",
+        "idx_x",
+        0,
+    )
+    assert subplan.metadata["scan_direction"] == "Backward"
+    assert subplan.metadata["subplan_name"] == "SubPlan 1"
+
+    assert hash_node.node_type == "Hash"
+    assert hash_node.metadata["hash_batches"] == 2
+    sort = hash_node.children[0]
+    assert sort.metadata["sort_space_type"] == "Disk"
+    assert sort.metadata["sort_space_used_kb"] == 4312
+    aggregate = sort.children[0]
+    assert (aggregate.node_type, aggregate.metadata["strategy"]) == (
+        "Aggregate",
+        "Hashed",
+    )
+    bitmap = aggregate.children[0]
+    assert (bitmap.relation_name, bitmap.index_name) == (None, "idx_customers_region")
+    assert [node.node_type for node in root.walk()][-1] == "Bitmap Index Scan"
+
+
+def test_parse_json_plan():
+    plan = parse_explain(json.dumps(JSON_PLAN))
+
+    assert (plan.format, plan.has_analyze, plan.execution_time_ms) == (
+        "json",
+        True,
+        5.6,
+    )
+    assert (plan.root.node_type, plan.root.join_type) == ("Nested Loop", "Inner")
+    # Default-valued JSON keys are not kept as metadata
+    assert plan.root.metadata == {}
+    (scan,) = plan.root.children
+    assert scan.label == "Index Scan on orders"
+    assert (scan.actual_loops, scan.shared_hit_blocks, scan.shared_read_blocks) == (
+        100,
+        300,
+        2,
+    )
+    assert scan.metadata == {"index_cond": "(id = 1)"}
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[]", "{not json", "Seq Scan on t"])
+def test_parse_explain_rejects_non_plans(text):
+    with pytest.raises(ValueError):
+        parse_explain(text)
+
+
+def test_iter_log_plans_streams_entries(tmp_path):
+    path = tmp_path / "postgresql.log"
+    path.write_text(LOG)
+
+    plans = list(iter_log_plans(str(path)))
+
+    # The unparseable entry is skipped
+    assert [(p.pid, p.duration_ms, p.format) for p in plans] == [
+        (41, 120.5, "text"),
+        (42, 80.0, "json"),
+    ]
+    text_plan = plans[0]
+    assert text_plan.query_text == "SELECT * FROM orders\n  WHERE status = 'open'"
+    assert text_plan.fingerprint == query_fingerprint(
+        "SELECT * FROM orders WHERE status = 'x'"
+    )
+    assert text_plan.fingerprint == plans[1].fingerprint
+    assert text_plan.root.metadata["filter"] == "(status = 'open'::text)"
+
+    # Plan entries are not paired with the next statement by the log parser
+    df = parse_postgres_log(str(path))
+    assert df["duration_ms"].tolist() == [60.0]
+
+
+def test_sample_auto_explain_log():
+    sample = (
+        Path(__file__).parent.parent
+        / "docs/sample_logs/postgresql/postgresql-2025-11-02_101500.log.txt"
+    )
+    plans = list(iter_log_plans(str(sample)))
+
+    assert [p.format for p in plans] == ["text", "json", "text", "text"]
+    assert all(p.has_analyze and p.fingerprint for p in plans)
+    assert plans[0].fingerprint == plans[2].fingerprint
@@ -0,0 +1,109 @@
+"""Tests for the fake Ollama/OpenAI server used in benchmarks."""
+
+import json
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+
+from iqtoolkit_analyzer.fake_llm_server import (
+    FakeLLMConfig,
+    FakeLLMServer,
+    fake_answer,
+    parse_latency,
+)
+from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.read().decode()
+
+
+def test_parse_latency():
+    assert parse_latency("250").sample(random.Random(0)) == 250
+    uniform = parse_latency("uniform:100,200")
+    rng = random.Random(1)
+    assert all(100 <= uniform.sample(rng) <= 200 for _ in range(50))
+    assert parse_latency("lognormal:800,0.5").params == (800.0, 0.5)
+
+    for spec in ["gamma:1,2", "uniform:100", "normal:a,b", "fixed:-5"]:
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+def test_ollama_client_streams_and_packs():
+    with FakeLLMServer() as server:
+        client = LLMClient(
+            LLMConfig(
+                llm_provider="ollama", ollama_model="fake", ollama_host=server.url
+            )
+        )
+        tokens = []
+        recommendation = client.generate_recommendations(
+            "SELECT * FROM orders WHERE id = 1", 10.0, 2, on_token=tokens.append
+        )
+        assert recommendation == fake_answer("FROM orders")
+        assert "".join(tokens) == recommendation and len(tokens) > 1
+
+        client.config.pack_queries = True
+        queries = [
+            {"query_text": f"SELECT * FROM t{i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(4)
+        ]
+        results = client.batch_generate_recommendations(queries)
+        assert all("Add an index" in result for result in results)
+        # One packed request for the batch
+        assert server.stats["ollama_chat"] == 2
+
+
+def test_openai_client_with_base_url():
+    with FakeLLMServer() as server:
+        client = LLMClient(
+            LLMConfig(api_key="test", openai_base_url=f"{server.url}/v1")
+        )
+        assert client.latency_histograms.keys() == {
+            f"openai:gpt-4o-mini@{server.url}/v1"
+        }
+        plain = client.generate_recommendations("SELECT * FROM users", 5.0, 1)
+        tokens = []
+        streamed = client.generate_recommendations(
+            "SELECT * FROM users", 5.0, 1, on_token=tokens.append
+        )
+        assert plain == streamed == fake_answer("FROM users")
+        assert len(tokens) > 1
+        assert server.stats["openai_chat"] == 2
+
+
+def test_injected_errors_and_prewarm():
+    config = FakeLLMConfig(error_rate=1.0, error_status=429, seed=3)
+    with FakeLLMServer(config) as server:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _post(f"{server.url}/api/chat", {"model": "m", "messages": []})
+        assert error.value.code == 429
+        assert server.stats["errors"] == 1
+
+        client = LLMClient(
+            LLMConfig(
+                llm_provider="ollama",
+                ollama_host=server.url,
+                max_retries=1,
+                retry_backoff_seconds=0,
+            )
+        )
+        result = client.generate_recommendations("SELECT 1", 1.0, 1)
+        assert result.startswith("Error generating recommendations")
+        assert server.stats["errors"] == 3
+
+        # Pre-warm requests with an empty prompt only load the model
+        config.error_rate = 0
+        body = json.loads(
+            _post(f"{server.url}/api/generate", {"model": "m", "prompt": ""})
+        )
+        assert body["done"] and body["response"] == ""
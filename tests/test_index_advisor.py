@@ -0,0 +1,154 @@
+"""Tests for the offline index advisor."""
+
+from pathlib import Path
+
+import pandas as pd
+
+from iqtoolkit_analyzer.index_advisor import (
+    IndexRecommendation,
+    TableAccess,
+    advise_indexes,
+    extract_table_access,
+    load_schema,
+    parse_schema,
+)
+
+DDL = """
+-- orders and their lines
+CREATE TABLE public.orders (
+    id BIGINT PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    status TEXT,
+    created_at TIMESTAMP NOT NULL,
+    total NUMERIC(12, 2),
+    CONSTRAINT orders_ref UNIQUE (customer_id, created_at)
+);
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_id BIGINT REFERENCES orders(id),
+    sku TEXT NOT NULL,
+    qty INTEGER
+);
+CREATE INDEX CONCURRENTLY idx_lines_lower_sku ON order_lines (lower(sku));
+CREATE INDEX idx_orders_open ON orders (status) WHERE status = 'open';
+CREATE INDEX idx_lines_gin ON order_lines USING gin (sku gin_trgm_ops);
+ALTER TABLE ONLY order_lines ADD CONSTRAINT lines_pk PRIMARY KEY (order_id, sku);
+"""
+
+
+def _queries(rows):
+    return pd.DataFrame(rows, columns=["query_hash", "example_query", "total_duration"])
+
+
+def test_parse_schema_tables_and_btree_prefixes():
+    schema = parse_schema(DDL)
+
+    orders = schema.table("public.orders")
+    assert orders is not None
+    assert orders.columns == ["id", "customer_id", "status", "created_at", "total"]
+    assert orders.indexes == [("id",), ("customer_id", "created_at")]
+    # Expression, partial and GIN indexes do not serve plain column lookups
+    assert schema.tables["order_lines"].indexes == [("order_id", "sku")]
+
+
+def test_extract_filter_join_and_sort_columns():
+    schema = parse_schema(DDL)
+    accesses = extract_table_access(
+        "SELECT o.id, l.sku FROM orders o JOIN order_lines l ON l.order_id = o.id "
+        "WHERE o.status = 'open' AND o.created_at >= $1 AND lower(l.sku) = 'x' "
+        "AND o.total::int > 5 ORDER BY o.created_at DESC LIMIT 20",
+        schema,
+    )
+
+    assert accesses == [
+        TableAccess(
+            "public.orders",
+            equality=["status"],
+            range=["created_at"],
+            sort=["created_at"],
+        ),
+        TableAccess("order_lines", equality=["order_id"]),
+        TableAccess("public.orders", equality=["id"]),
+    ]
+
+
+def test_advise_indexes_greedy_cover_with_existing_prefixes():
+    schema = parse_schema(DDL)
+    advice = advise_indexes(
+        _queries(
+            [
+                # Served by the existing (customer_id, created_at) key
+                ("a", "SELECT * FROM orders WHERE customer_id = 7", 500.0),
+                ("b", "SELECT * FROM orders WHERE status = 'x' AND total > 9", 300.0),
+                ("c", "SELECT * FROM orders WHERE status = ? ORDER BY id", 150.0),
+                ("d", "SELECT * FROM order_lines WHERE sku = 'k'", 40.0),
+                ("e", "SELECT * FROM audit WHERE id = 1", 10.0),
+            ]
+        ),
+        schema,
+        max_indexes=2,
+    )
+
+    assert [(r.table, r.columns) for r in advice.recommendations] == [
+        ("public.orders", ("status", "total")),
+        ("public.orders", ("status", "id")),
+    ]
+    first, second = advice.recommendations
+    assert (first.benefit_ms, first.fingerprints) == (300.0, ["b"])
+    # The primary key already serves ORDER BY id, so only status is missing
+    assert (second.benefit_ms, second.fingerprints) == (75.0, ["c"])
+    assert advice.unknown_relations == ["audit"]
+    assert first.statement == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_status_total "
+        "ON public.orders (status, total);"
+    )
+
+
+def test_same_table_name_in_two_schemas():
+    schema = parse_schema(
+        "CREATE TABLE public.orders (id INT PRIMARY KEY, customer_id INT);\n"
+        "CREATE TABLE sales.orders (id INT PRIMARY KEY, customer_id INT);\n"
+        "CREATE INDEX ON public.orders (customer_id);"
+    )
+    assert schema.table("orders") is schema.tables["public.orders"]
+    assert schema.tables["sales.orders"].indexes == [("id",)]
+
+    advice = advise_indexes(
+        _queries(
+            [
+                ("a", "SELECT * FROM orders WHERE customer_id = 1", 100.0),
+                ("b", "SELECT * FROM sales.orders o WHERE o.customer_id = 1", 50.0),
+            ]
+        ),
+        schema,
+    )
+    # Only sales.orders lacks the index; public.orders already has it
+    assert [r.statement for r in advice.recommendations] == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_customer_id "
+        "ON sales.orders (customer_id);"
+    ]
+
+
+def test_truncated_index_names_stay_distinct():
+    columns = ("a_rather_long_column_name", "another_long_column_name")
+    first = IndexRecommendation("events", columns + ("created_at",), 1.0, 0.1)
+    second = IndexRecommendation("events", columns + ("created_by",), 1.0, 0.1)
+
+    assert len(first.name) == len(second.name) == 63
+    assert first.name != second.name
+    assert first.name.startswith("idx_events_a_rather_long_column_name_another")
+
+
+def test_recommendation_quotes_identifiers():
+    rec = IndexRecommendation("Order", ("select", "sku"), 1.0, 0.1)
+    assert rec.statement == (
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_Order_select_sku" '
+        'ON "Order" ("select", sku);'
+    )
+
+
+def test_example_schema_loads():
+    schema = load_schema(
+        str(Path(__file__).parent.parent / "docs/examples/companydb_schema.sql")
+    )
+    assert schema.tables["customers"].indexes == [("id",), ("email",)]
+    assert "customer_id" in schema.tables["support_tickets"].columns
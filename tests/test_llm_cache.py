@@ -0,0 +1,89 @@
+"""Tests for the on-disk LLM recommendation cache."""
+
+from unittest.mock import patch
+
+import pandas as pd
+
+from iqtoolkit_analyzer.llm_cache import RecommendationCache, cache_key
+from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+QUERIES = [
+    {"query_text": "SELECT * FROM users WHERE id = 1", "avg_duration": 1.0},
+    {"query_text": "SELECT * FROM orders WHERE id = 7", "avg_duration": 2.0},
+]
+
+
+def test_cache_key_covers_model_temperature_and_prompt():
+    base = cache_key("abc", "ollama", "llama3", 0.3, "prompt v1")
+    assert base == cache_key("abc", "ollama", "llama3", 0.3, "prompt v1")
+    assert base != cache_key("abc", "ollama", "llama3", 0.7, "prompt v1")
+    assert base != cache_key("abc", "ollama", "mistral", 0.3, "prompt v1")
+    assert base != cache_key("abc", "ollama", "llama3", 0.3, "prompt v2")
+
+
+def test_cache_expires_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache" / "llm.db")
+    with RecommendationCache(path, max_entries=2) as cache:
+        cache.put("a", "rec a", 100.0)
+        cache.put("b", "rec b", 200.0)
+        assert cache.get("a") == "rec a"
+        cache.put("c", "rec c", 300.0)
+        # "b" was used least recently
+        assert cache.get("b") is None
+        assert cache.get("c") == "rec c"
+        assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+        assert cache.stats.saved_ms == 400.0
+
+    with RecommendationCache(path, ttl_hours=0) as cache:
+        assert cache.get("a") is None
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_warm_run_makes_no_llm_calls(mock_ollama, tmp_path):
+    mock_ollama.Client.return_value.chat.return_value = {
+        "message": {"content": "Add an index"}
+    }
+    config = LLMConfig(llm_provider="ollama", cache_path=str(tmp_path / "llm.db"))
+
+    assert (
+        LLMClient(config).batch_generate_recommendations(QUERIES)
+        == ["Add an index"] * 2
+    )
+    assert mock_ollama.Client.return_value.chat.call_count == 2
+
+    # Same fingerprints with other literals hit the cache
+    warm = LLMClient(config)
+    queries = [dict(q, query_text=q["query_text"][:-1] + "9") for q in QUERIES]
+    assert warm.batch_generate_recommendations(queries) == ["Add an index"] * 2
+    assert mock_ollama.Client.return_value.chat.call_count == 2
+    assert warm.cache.stats.hit_rate == 1.0
+
+    summary = {
+        "total_queries": 2,
+        "unique_queries": 2,
+        "avg_duration_overall": 1.5,
+        "max_duration_overall": 2.0,
+        "p95_duration": 2.0,
+        "p99_duration": 2.0,
+        "total_time_spent": 3.0,
+    }
+    report = ReportGenerator(warm, output_dir=str(tmp_path)).generate_markdown_report(
+        pd.DataFrame(), summary, llm_cache=warm.cache.stats
+    )
+    assert "- **LLM Cache:** 2/2 hits (100%)" in report
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_failed_requests_are_not_cached(mock_ollama, tmp_path):
+    mock_ollama.Client.return_value.chat.side_effect = [
+        RuntimeError("down"),
+        {"message": {"content": "ok"}},
+    ]
+    config = LLMConfig(llm_provider="ollama", cache_path=str(tmp_path / "llm.db"))
+
+    first = LLMClient(config).batch_generate_recommendations(QUERIES[:1])
+    second = LLMClient(config).batch_generate_recommendations(QUERIES[:1])
+
+    assert first[0].startswith("Error generating recommendations")
+    assert second == ["ok"]
@@ -1,8 +1,19 @@
 """Tests for LLM client functionality."""
 
+import json
+import threading
+import time
+
+import pandas as pd
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+from iqtoolkit_analyzer.llm_client import (
+    LLMClient,
+    LLMConfig,
+    pack_queries,
+    parse_packed_response,
+)
+from iqtoolkit_analyzer.report_generator import ReportGenerator
 
 
 class TestLLMClientOpenAI:
@@ -106,7 +117,7 @@ class TestLLMClientOllama:
     @patch("iqtoolkit_analyzer.llm_client.ollama")
     def test_ollama_generate_recommendations(self, mock_ollama):
         """Test Ollama recommendation generation."""
-        mock_ollama.chat.return_value = {
+        mock_ollama.Client.return_value.chat.return_value = {
             "message": {"content": "Create index on email column"}
         }
 
@@ -120,7 +131,7 @@ class TestLLMClientOllama:
         )
 
         assert result == "Create index on email column"
-        mock_ollama.chat.assert_called_once()
+        mock_ollama.Client.return_value.chat.assert_called_once()
 
     @patch("iqtoolkit_analyzer.llm_client.ollama")
     def test_ollama_custom_host(self, mock_ollama):
@@ -143,12 +154,14 @@ class TestLLMClientOllama:
         )
 
         assert result == "Use prepared statements"
-        mock_ollama.Client.assert_called_once_with(host="http://custom-host:11434")
+        mock_ollama.Client.assert_called_once_with(
+            host="http://custom-host:11434", timeout=30
+        )
 
     @patch("iqtoolkit_analyzer.llm_client.ollama")
     def test_ollama_malformed_response(self, mock_ollama):
         """Test Ollama handles malformed response gracefully."""
-        mock_ollama.chat.return_value = {"no_message": "here"}
+        mock_ollama.Client.return_value.chat.return_value = {"no_message": "here"}
 
         config = LLMConfig(llm_provider="ollama")
         client = LLMClient(config)
@@ -162,7 +175,7 @@ class TestLLMClientOllama:
     @patch("iqtoolkit_analyzer.llm_client.ollama")
     def test_ollama_empty_content(self, mock_ollama):
         """Test Ollama handles empty content."""
-        mock_ollama.chat.return_value = {"message": {"content": ""}}
+        mock_ollama.Client.return_value.chat.return_value = {"message": {"content": ""}}
 
         config = LLMConfig(llm_provider="ollama")
         client = LLMClient(config)
@@ -231,3 +244,319 @@ class TestLLMClientCommon:
 
         assert "Error generating recommendations" in result
         assert "API Error" in result
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_batch_runs_concurrently_in_input_order(self, mock_ollama):
+        """Test concurrent batches keep input order and bound in-flight calls."""
+        lock = threading.Lock()
+        in_flight = {"now": 0, "max": 0}
+
+        def chat(model, messages):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            query = messages[0]["content"].split("Query: ")[1].split("\n")[0]
+            # Earlier queries finish last
+            time.sleep(0.2 if query.endswith("0") else 0.05)
+            with lock:
+                in_flight["now"] -= 1
+            return {"message": {"content": f"rec for {query}"}}
+
+        mock_ollama.Client.return_value.chat.side_effect = chat
+        client = LLMClient(LLMConfig(llm_provider="ollama", ollama_max_concurrency=3))
+        queries = [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(6)
+        ]
+
+        start = time.monotonic()
+        results = client.batch_generate_recommendations(queries)
+
+        assert results == [f"rec for SELECT {i}" for i in range(6)]
+        assert in_flight["max"] == 3
+        assert time.monotonic() - start < 0.2 * 6
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_batch_timeout_only_affects_its_slot(self, mock_ollama):
+        """Test a request over the timeout doesn't fail the rest of the batch."""
+        release = threading.Event()
+
+        def chat(model, messages):
+            if "SELECT 1" in messages[0]["content"]:
+                release.wait(5)
+            return {"message": {"content": "ok"}}
+
+        mock_ollama.Client.return_value.chat.side_effect = chat
+        client = LLMClient(LLMConfig(llm_provider="ollama", timeout=1))
+        queries = [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(3)
+        ]
+
+        results = client.batch_generate_recommendations(queries, max_concurrency=3)
+        release.set()
+
+        assert results[0] == results[2] == "ok"
+        assert "timed out after 1s" in results[1]
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_sequential_batch_times_out_hung_request(self, mock_ollama):
+        """Test one request at a time still gives up on a hung request."""
+        release = threading.Event()
+
+        def chat(model, messages):
+            if "SELECT 0" in messages[0]["content"]:
+                release.wait(5)
+            return {"message": {"content": "ok"}}
+
+        mock_ollama.Client.return_value.chat.side_effect = chat
+        client = LLMClient(LLMConfig(llm_provider="ollama", timeout=1))
+        queries = [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(3)
+        ]
+
+        start = time.monotonic()
+        results = client.batch_generate_recommendations(queries, max_concurrency=1)
+        elapsed = time.monotonic() - start
+        release.set()
+
+        assert "timed out after 1s" in results[0]
+        assert results[1] == results[2] == "ok"
+        assert elapsed < 3
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_concurrent_batch_times_out_more_hung_requests_than_workers(
+        self, mock_ollama
+    ):
+        """Test requests queued behind hung ones still start and time out."""
+        release = threading.Event()
+
+        def chat(model, messages):
+            if "hung" in messages[0]["content"]:
+                release.wait(10)
+            return {"message": {"content": "ok"}}
+
+        mock_ollama.Client.return_value.chat.side_effect = chat
+        client = LLMClient(LLMConfig(llm_provider="ollama", timeout=1))
+        queries = [
+            {"query_text": f"SELECT {i} AS hung", "avg_duration": 1.0, "frequency": 1}
+            for i in range(4)
+        ] + [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(2)
+        ]
+
+        start = time.monotonic()
+        results = client.batch_generate_recommendations(queries, max_concurrency=2)
+        elapsed = time.monotonic() - start
+        release.set()
+
+        assert all("timed out after 1s" in r for r in results[:4])
+        assert results[4:] == ["ok", "ok"]
+        assert elapsed < 4
+
+
+class TestPackedPrompts:
+    """Test multi-query packed prompts."""
+
+    def test_parse_packed_response_variants(self):
+        """Test JSON arrays, wrapped objects, fences and malformed entries."""
+        item = {"root_cause": "seq scan", "recommendation": "add index"}
+        fenced = (
+            "Here you go:\n```json\n"
+            + json.dumps({"results": [dict(item, id=2), {"id": 1}]})
+            + "\n```"
+        )
+
+        assert parse_packed_response(json.dumps([item, item]), 2)[1] == (
+            "**Root Cause:** seq scan\n\n**Recommendation:** add index"
+        )
+        # Entry 1 has no recommendation, entry 2 is matched by id
+        parsed = parse_packed_response(fenced, 2)
+        assert parsed[0] is None and "add index" in parsed[1]
+        assert parse_packed_response("not json {", 2) == [None, None]
+        assert parse_packed_response("", 1) == [None]
+
+    def test_pack_queries_respects_budget(self):
+        """Test greedy packing within the token budget."""
+        prompts = ["x" * 400, "x" * 400, "x" * 400, "x" * 4000]
+
+        assert pack_queries(prompts, token_budget=250) == [[0, 1], [2], [3]]
+        assert pack_queries(prompts, token_budget=10) == [[0], [1], [2], [3]]
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_packed_batch_falls_back_per_item(self, mock_ollama):
+        """Test one packed request, with a single retry for a missing entry."""
+        packed = {
+            "results": [
+                {"id": 1, "recommendation": "index users.email"},
+                {"id": 3, "recommendation": "batch the inserts"},
+            ]
+        }
+        mock_ollama.Client.return_value.chat.side_effect = [
+            {"message": {"content": json.dumps(packed)}},
+            {"message": {"content": "rewrite the join"}},
+        ]
+        client = LLMClient(
+            LLMConfig(llm_provider="ollama", pack_queries=True, pack_token_budget=4000)
+        )
+        queries = [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(3)
+        ]
+
+        results = client.batch_generate_recommendations(queries)
+
+        assert results == [
+            "**Recommendation:** index users.email",
+            "rewrite the join",
+            "**Recommendation:** batch the inserts",
+        ]
+        assert mock_ollama.Client.return_value.chat.call_count == 2
+        first_call = mock_ollama.Client.return_value.chat.call_args_list[0].kwargs
+        assert first_call["format"] == "json"
+        assert "Query 3:\nSELECT 2" in first_call["messages"][0]["content"]
+
+
+class TestStreaming:
+    """Test streamed responses and incremental report writing."""
+
+    @patch("iqtoolkit_analyzer.llm_client.OpenAI")
+    def test_openai_streams_tokens(self, mock_openai_class):
+        """Test OpenAI chunks are passed on as they arrive and joined."""
+        chunks = []
+        for text in ["Add ", None, "an index"]:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        usage_only = Mock()
+        usage_only.choices = []
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = iter(chunks + [usage_only])
+        mock_openai_class.return_value = mock_client
+        client = LLMClient(LLMConfig(api_key="test-key", llm_provider="openai"))
+        received = []
+
+        result = client.generate_recommendations(
+            "SELECT 1", 1.0, 1, on_token=received.append
+        )
+
+        assert result == "Add an index"
+        assert received == ["Add ", "an index"]
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_batch_reports_results_as_they_finish(self, mock_ollama):
+        """Test streamed Ollama batches call back per token and per query."""
+
+        def chat(model, messages, stream=False):
+            query = messages[0]["content"].split("Query: ")[1].split("\n")[0]
+            # The first query finishes last
+            time.sleep(0.2 if query == "SELECT 0" else 0.0)
+            return iter(
+                [{"message": {"content": "rec "}}, {"message": {"content": query}}]
+            )
+
+        mock_ollama.Client.return_value.chat.side_effect = chat
+        client = LLMClient(LLMConfig(llm_provider="ollama", ollama_max_concurrency=2))
+        queries = [
+            {"query_text": f"SELECT {i}", "avg_duration": 1.0, "frequency": 1}
+            for i in range(2)
+        ]
+        finished = []
+        tokens = []
+
+        results = client.batch_generate_recommendations(
+            queries,
+            on_result=lambda index, rec: finished.append((index, rec)),
+            on_token=lambda index, text: tokens.append((index, text)),
+        )
+
+        assert results == ["rec SELECT 0", "rec SELECT 1"]
+        assert finished == [(1, "rec SELECT 1"), (0, "rec SELECT 0")]
+        assert (0, "SELECT 0") in tokens and (1, "rec ") in tokens
+
+    def test_incremental_report_writes_sections_as_they_finish(self, tmp_path):
+        """Test a section lands on disk at once, even if rank 1 finishes last."""
+        top_queries = pd.DataFrame(
+            {
+                "example_query": ["SELECT 1", "SELECT 2", "SELECT 3"],
+                "avg_duration": [10.0, 5.0, 1.0],
+                "max_duration": [20.0, 6.0, 2.0],
+                "frequency": [3, 4, 5],
+                "impact_score": [30.0, 20.0, 5.0],
+            }
+        )
+        path = tmp_path / "out" / "report.md"
+        generator = ReportGenerator(None, output_dir=str(tmp_path))
+
+        report = generator.start_markdown_report(path, top_queries)
+        assert "Partial report" in path.read_text()
+        assert path.read_text().count("Recommendation pending") == 3
+
+        report.add(2, "third rec")
+        report.add(1, "second rec")
+        # Written without closing, as after a crash
+        text = path.read_text()
+        assert "second rec" in text and "third rec" in text
+        assert text.count("Recommendation pending") == 1
+        assert text.index("### Query #1") < text.index("### Query #2")
+        assert text.index("second rec") < text.index("third rec")
+        assert report.written == 2
+
+        report.add(0, "first rec")
+        text = path.read_text()
+        assert "Recommendation pending" not in text
+        assert text.index("first rec") < text.index("second rec")
+        assert text.rstrip().endswith("---")
+        assert report.written == 3
+        assert list(path.parent.iterdir()) == [path]
+        report.close()
+
+
+class TestSharedClients:
+    """Test pooled provider clients and Ollama warm-up."""
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_clients_are_shared_per_host(self, mock_ollama):
+        """Test every LLMClient for the same host reuses one Ollama client."""
+        first = LLMClient(LLMConfig(llm_provider="ollama", ollama_host="http://a"))
+        second = LLMClient(LLMConfig(llm_provider="ollama", ollama_host="http://a"))
+        other = LLMClient(LLMConfig(llm_provider="ollama", ollama_host="http://b"))
+
+        assert first._ollama_client is second._ollama_client
+        assert mock_ollama.Client.call_count == 2
+        assert other._ollama_client is mock_ollama.Client.return_value
+
+    @patch("iqtoolkit_analyzer.llm_client.OpenAI")
+    def test_openai_client_is_shared(self, mock_openai_class):
+        """Test the OpenAI client (and its connection pool) is built once."""
+        config = LLMConfig(api_key="test-key", llm_provider="openai")
+
+        assert LLMClient(config).client is LLMClient(config).client
+        mock_openai_class.assert_called_once_with(api_key="test-key", timeout=30)
+
+    @patch("iqtoolkit_analyzer.llm_client.ollama")
+    def test_prewarm_loads_the_model_with_keep_alive(self, mock_ollama):
+        """Test warm-up sends an empty prompt and requests keep the model."""
+        mock_ollama.Client.return_value.chat.return_value = {
+            "message": {"content": "ok"}
+        }
+        client = LLMClient(
+            LLMConfig(
+                llm_provider="ollama", ollama_model="llama3", ollama_keep_alive="30m"
+            )
+        )
+
+        thread = client.prewarm()
+        thread.join(5)
+        client.generate_recommendations("SELECT 1", 1.0, 1)
+
+        mock_ollama.Client.return_value.generate.assert_called_once_with(
+            model="llama3", prompt="", keep_alive="30m"
+        )
+        assert (
+            mock_ollama.Client.return_value.chat.call_args.kwargs["keep_alive"] == "30m"
+        )
@@ -0,0 +1,141 @@
+"""Tests for deterministic-first tiering of LLM recommendations."""
+
+from unittest.mock import patch
+
+import pandas as pd
+
+from iqtoolkit_analyzer.antipatterns import (
+    SEVERITY_LEVELS,
+    AntiPatternMatch,
+    AntiPatternType,
+)
+from iqtoolkit_analyzer.llm_client import BUDGET_EXHAUSTED, LLMClient, LLMConfig
+from iqtoolkit_analyzer.llm_policy import (
+    TIER_LLM,
+    TIER_RULE,
+    TIER_SKIPPED,
+    TieringPolicy,
+    plan_recommendations,
+    rule_based_recommendation,
+)
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+LEADING_WILDCARD = AntiPatternMatch(
+    pattern_type=AntiPatternType.LEADING_WILDCARD_LIKE,
+    problem_description="Full table scan; cannot use B-tree index",
+    rewrite_suggestion="Use full-text search (tsvector)",
+    example_rewrite="-- Use: WHERE email @@ to_tsquery('example.com')",
+    confidence_score=0.9,
+    severity=SEVERITY_LEVELS["high"],
+)
+LARGE_IN = AntiPatternMatch(
+    pattern_type=AntiPatternType.LARGE_IN_CLAUSE,
+    problem_description="Can be slow with many values",
+    rewrite_suggestion="Use JOIN to temporary table",
+    confidence_score=0.9,
+    severity=SEVERITY_LEVELS["low"],
+)
+
+
+def _query(impact, matches=(), text="SELECT 1"):
+    return {"query_text": text, "impact_score": impact, "matches": list(matches)}
+
+
+def _plan(queries, policy=None, cached=()):
+    return plan_recommendations(
+        queries,
+        policy or TieringPolicy(),
+        lambda q: q["query_text"] in cached,
+        lambda q: 500,
+    )
+
+
+def test_confident_findings_replace_llm_calls_unless_dominant():
+    tiers = _plan(
+        [
+            _query(60, [LEADING_WILDCARD]),
+            _query(20, [LEADING_WILDCARD, LEADING_WILDCARD]),
+            _query(15, [LARGE_IN]),
+            _query(5),
+        ]
+    )
+
+    # Most of the impact: worth an LLM call despite the diagnosis
+    assert tiers[0].tier == TIER_LLM and tiers[0].reason == "60% of impact"
+    assert tiers[1].tier == TIER_RULE
+    assert tiers[1].reason == "Leading Wildcard Like, 90% confidence"
+    assert tiers[1].rule_recommendation.count("**Leading Wildcard Like:**") == 1
+    # Low-severity findings don't count as a diagnosis
+    assert [t.tier for t in tiers[2:]] == [TIER_LLM, TIER_LLM]
+
+
+def test_budget_goes_to_highest_impact_and_cache_is_free():
+    queries = [
+        _query(50, text="SELECT a"),
+        _query(30, text="SELECT b"),
+        _query(15, [LEADING_WILDCARD], text="SELECT c"),
+        _query(5, text="SELECT d"),
+    ]
+    policy = TieringPolicy(max_calls=1, llm_impact_share=0.1)
+
+    tiers = _plan(queries, policy, cached={"SELECT b"})
+
+    assert [(t.tier, t.reason) for t in tiers] == [
+        (TIER_LLM, "no confident finding"),
+        (TIER_LLM, "cached"),
+        (TIER_RULE, "LLM budget spent"),
+        (TIER_SKIPPED, "LLM budget spent"),
+    ]
+    assert _plan(queries, TieringPolicy(max_tokens=1000))[1].tier == TIER_LLM
+    assert _plan(queries, TieringPolicy(max_tokens=999))[1].tier == TIER_SKIPPED
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_time_budget_stops_starting_requests(mock_ollama):
+    mock_ollama.Client.return_value.chat.return_value = {"message": {"content": "ok"}}
+    client = LLMClient(LLMConfig(llm_provider="ollama"))
+    queries = [{"query_text": "SELECT 1", "avg_duration": 1.0, "frequency": 1}]
+
+    assert client.batch_generate_recommendations(queries, time_budget=-1) == [
+        BUDGET_EXHAUSTED
+    ]
+    mock_ollama.Client.return_value.chat.assert_not_called()
+    assert client.estimate_tokens(queries[0]) > client.config.max_tokens
+    assert not client.is_cached(queries[0])
+
+
+def test_report_marks_rule_based_recommendations(tmp_path):
+    tiers = _plan([_query(50), _query(10, [LEADING_WILDCARD])])
+    top_queries = pd.DataFrame(
+        {
+            "example_query": ["SELECT 1", "SELECT * FROM t WHERE email LIKE '%x'"],
+            "avg_duration": [10.0, 5.0],
+            "max_duration": [20.0, 6.0],
+            "frequency": [5, 2],
+            "impact_score": [50.0, 10.0],
+        }
+    )
+    summary = {
+        "total_queries": 7,
+        "unique_queries": 2,
+        "avg_duration_overall": 8.6,
+        "max_duration_overall": 20.0,
+        "p95_duration": 20.0,
+        "p99_duration": 20.0,
+        "total_time_spent": 60.0,
+    }
+
+    report = ReportGenerator(None, output_dir=str(tmp_path)).generate_markdown_report(
+        top_queries,
+        summary,
+        ["Add an index", tiers[1].rule_recommendation],
+        tiers=tiers,
+    )
+
+    assert "- **Recommendations:** 1 AI, 1 rule-based, 0 skipped" in report
+    assert "**AI Recommendation:**\n\nAdd an index" in report
+    assert (
+        "**Rule-based Recommendation** (Leading Wildcard Like, 90% confidence):"
+        in report
+    )
+    assert rule_based_recommendation([]) == ""
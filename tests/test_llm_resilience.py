@@ -0,0 +1,164 @@
+"""Tests for LLM retries, fallback, hedging and circuit breaking."""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+
+from iqtoolkit_analyzer.fake_llm_server import (
+    FakeLLMConfig,
+    FakeLLMServer,
+    parse_latency,
+)
+from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+from iqtoolkit_analyzer.llm_resilience import (
+    CircuitBreaker,
+    LatencyHistogram,
+    Provider,
+    ProviderChain,
+    ProviderChainError,
+    RetryPolicy,
+)
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+
+def test_retries_with_backoff_then_falls_back():
+    flaky = Mock(side_effect=[RuntimeError("reset"), RuntimeError("reset")])
+    backup = Mock(return_value="from backup")
+    sleeps = []
+    chain = ProviderChain(
+        [Provider("local", flaky), Provider("remote", backup)],
+        RetryPolicy(max_retries=1, backoff_seconds=0.5),
+        sleep=sleeps.append,
+    )
+
+    assert chain.call("prompt", json_output=False) == "from backup"
+    assert flaky.call_count == 2
+    backup.assert_called_once_with("prompt", json_output=False)
+    # Full jitter: anywhere between 0 and the first backoff step
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= 0.5
+    assert chain.latency["local"].errors == 2
+    assert chain.latency["remote"].count == 1
+
+    chain = ProviderChain([Provider("down", Mock(side_effect=OSError("refused")))])
+    with pytest.raises(ProviderChainError, match="down: refused"):
+        chain.call("prompt")
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(
+        failure_threshold=2, reset_seconds=30, clock=lambda: now[0]
+    )
+    failing = Mock(side_effect=RuntimeError("timeout"))
+    chain = ProviderChain([Provider("flaky", failing, breaker)])
+
+    for _ in range(2):
+        with pytest.raises(ProviderChainError):
+            chain.call("prompt")
+    assert breaker.state == "open"
+    # Refused without calling the provider
+    with pytest.raises(ProviderChainError, match="circuit open"):
+        chain.call("prompt")
+    assert failing.call_count == 2
+
+    now[0] = 31.0
+    assert breaker.state == "half-open"
+    failing.side_effect = None
+    failing.return_value = "back"
+    assert chain.call("prompt") == "back"
+    assert breaker.state == "closed"
+
+
+def test_slow_request_is_hedged():
+    release = threading.Event()
+
+    def slow(prompt):
+        release.wait(5)
+        return "slow answer"
+
+    primary = Provider("primary", slow)
+    for _ in range(20):
+        primary.latency.record(10.0)
+    chain = ProviderChain(
+        [primary, Provider("backup", Mock(return_value="hedged answer"))],
+        hedge_percentile=95,
+    )
+
+    try:
+        assert chain.call("prompt") == "hedged answer"
+    finally:
+        release.set()
+
+
+def test_latency_histogram_buckets_and_percentiles():
+    histogram = LatencyHistogram()
+    for latency_ms in [100, 200, 300, 800, 70000]:
+        histogram.record(latency_ms)
+
+    assert histogram.count == 5
+    assert histogram.percentile(50) == 300
+    buckets = dict(histogram.buckets())
+    assert buckets["<= 250 ms"] == 2
+    assert buckets["> 60000 ms"] == 1
+
+
+def test_hung_ollama_host_times_out_and_falls_back():
+    slow = FakeLLMConfig(latency=parse_latency("fixed:20000"))
+    with FakeLLMServer(slow) as primary, FakeLLMServer() as backup:
+        client = LLMClient(
+            LLMConfig(
+                llm_provider="ollama",
+                ollama_model="fake",
+                ollama_host=primary.url,
+                timeout=1,
+                fallback_providers=[{"ollama_host": backup.url}],
+            )
+        )
+        start = time.monotonic()
+        result = client.generate_recommendations("SELECT * FROM t", 1.0, 1)
+
+        assert "Sequential scan on t" in result
+        assert time.monotonic() - start < 5
+        assert primary.stats["ollama_chat"] == 1
+        assert backup.stats["ollama_chat"] == 1
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_client_falls_back_to_secondary_host(mock_ollama, tmp_path):
+    primary, secondary = Mock(), Mock()
+    primary.chat.side_effect = ConnectionError("model not loaded")
+    secondary.chat.return_value = {"message": {"content": "Add an index"}}
+    mock_ollama.Client.side_effect = lambda host, timeout: (
+        secondary if host else primary
+    )
+    client = LLMClient(
+        LLMConfig(
+            llm_provider="ollama",
+            ollama_model="llama3",
+            fallback_providers=[{"ollama_host": "http://gpu-box:11434"}],
+        )
+    )
+
+    assert client.generate_recommendations("SELECT 1", 1.0, 1) == "Add an index"
+    mock_ollama.Client.assert_any_call(host=None, timeout=30)
+    mock_ollama.Client.assert_any_call(host="http://gpu-box:11434", timeout=30)
+    histograms = client.latency_histograms
+    assert list(histograms) == ["ollama:llama3", "ollama:llama3@http://gpu-box:11434"]
+
+    summary = {
+        "total_queries": 1,
+        "unique_queries": 1,
+        "avg_duration_overall": 1.0,
+        "max_duration_overall": 1.0,
+        "p95_duration": 1.0,
+        "p99_duration": 1.0,
+        "total_time_spent": 1.0,
+    }
+    report = ReportGenerator(client, output_dir=str(tmp_path)).generate_markdown_report(
+        pd.DataFrame(), summary, llm_latency=histograms
+    )
+    assert "### LLM Latency" in report
+    assert "| ollama:llama3 | 0 | 1 | - | - | - |" in report
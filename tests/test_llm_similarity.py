@@ -0,0 +1,121 @@
+"""Tests for reusing recommendations of similar queries."""
+
+import sqlite3
+from unittest.mock import patch
+
+import pandas as pd
+
+from iqtoolkit_analyzer.analyzer import normalize_query
+from iqtoolkit_analyzer.llm_cache import CacheStats, RecommendationCache
+from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+from iqtoolkit_analyzer.llm_similarity import SimilarityIndex, sql_terms
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+ANSWERED = "SELECT id, total FROM orders WHERE customer_id = 5 AND status = 'paid'"
+# Same shape with one more column and different literals
+SIMILAR = (
+    "SELECT id, total, created_at FROM orders "
+    "WHERE customer_id = 9 AND status = 'open'"
+)
+# Same shape on another table
+OTHER_TABLE = "SELECT id, total FROM invoices WHERE customer_id = 5 AND status = 'x'"
+
+
+def _query(text):
+    return {"query_text": text, "avg_duration": 100.0, "frequency": 3}
+
+
+def test_sql_terms_fold_literals_and_keep_order():
+    terms = sql_terms("SELECT a FROM t WHERE b = 'x' AND c = 3")
+    assert terms[:4] == ["SELECT", "A", "FROM", "T"]
+    assert terms.count("?") == 2
+    assert "FROM T" in terms and "= ?" in terms
+    assert sql_terms("") == []
+
+
+def test_index_ranks_by_cosine_similarity():
+    index = SimilarityIndex()
+    index.add("orders", normalize_query(ANSWERED))
+    index.add("users", normalize_query("UPDATE users SET name = 'x' WHERE id = 1"))
+    index.add("orders", "ignored: already indexed")
+
+    assert len(index) == 2 and "orders" in index
+    key, score = index.most_similar(normalize_query(SIMILAR))[0]
+    assert key == "orders" and 0.85 < score < 1
+    assert index.most_similar(normalize_query(ANSWERED))[0][1] > 0.999
+    assert index.most_similar(normalize_query(OTHER_TABLE))[0][1] < 0.85
+    assert index.most_similar("vacuum") == []
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_similar_query_reuses_cached_recommendation(mock_ollama, tmp_path):
+    mock_ollama.Client.return_value.chat.return_value = {
+        "message": {"content": "Index (customer_id)"}
+    }
+    path = str(tmp_path / "llm.db")
+    config = LLMConfig(llm_provider="ollama", cache_path=path)
+    LLMClient(config).batch_generate_recommendations([_query(ANSWERED)])
+    assert mock_ollama.Client.return_value.chat.call_count == 1
+
+    config.similarity_threshold = 0.85
+    client = LLMClient(config)
+    assert client.is_cached(_query(SIMILAR))
+    assert not client.is_cached(_query(OTHER_TABLE))
+    results = client.batch_generate_recommendations(
+        [_query(SIMILAR), _query(OTHER_TABLE)]
+    )
+
+    assert results[0].startswith("*Reused from a similar query (")
+    assert results[0].endswith("Index (customer_id)")
+    # Only the query on another table went to the LLM
+    assert mock_ollama.Client.return_value.chat.call_count == 2
+    stats = client.cache.stats
+    assert (stats.hits, stats.misses, stats.similar_hits) == (0, 2, 1)
+
+    # Without a threshold, similar queries are not reused
+    config.similarity_threshold = None
+    assert not LLMClient(config).is_cached(_query(SIMILAR))
+
+
+def test_cache_upgrades_schema_and_reports_similar_hits(tmp_path):
+    path = tmp_path / "llm.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE recommendations (
+            cache_key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,
+            provider TEXT NOT NULL, model TEXT NOT NULL,
+            recommendation TEXT NOT NULL, latency_ms REAL NOT NULL,
+            created_at REAL NOT NULL, last_used REAL NOT NULL
+        );
+        INSERT INTO recommendations
+            VALUES ('old', 'f0', 'ollama', 'm', 'rec', 10, 1e12, 1e12);
+        PRAGMA user_version = 1;
+        """)
+    conn.close()
+
+    with RecommendationCache(str(path)) as cache:
+        assert cache.get("old") == "rec"
+        cache.put("new", "rec", 10.0, "f1", "ollama", "m", query_text="select ?")
+        # Entries from before the upgrade have no query text to compare
+        assert cache.answered("ollama", "m") == [("f1", "select ?")]
+        assert cache.get_similar("new") == "rec"
+        assert cache.get_similar("missing") is None
+
+    summary = {
+        "total_queries": 1,
+        "unique_queries": 1,
+        "avg_duration_overall": 1.0,
+        "max_duration_overall": 1.0,
+        "p95_duration": 1.0,
+        "p99_duration": 1.0,
+        "total_time_spent": 1.0,
+    }
+    report = ReportGenerator(None, output_dir=str(tmp_path)).generate_markdown_report(
+        pd.DataFrame(),
+        summary,
+        llm_cache=CacheStats(hits=1, misses=3, similar_hits=2, saved_ms=3000),
+    )
+    assert (
+        "- **LLM Cache:** 1/4 hits (25%), 2 reused from similar queries, "
+        "~3.0 s of LLM time saved" in report
+    )
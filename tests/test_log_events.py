@@ -0,0 +1,102 @@
+"""Tests for non-statement performance event extraction."""
+
+import pytest
+
+from iqtoolkit_analyzer.analyzer import query_fingerprint
+from iqtoolkit_analyzer.log_events import correlate_events, extract_log_events
+from iqtoolkit_analyzer.parser import parse_postgres_log
+
+LOG = """\
+2025-11-01 08:00:00.000 EDT [100] LOG:  checkpoint starting: time
+2025-11-01 08:00:30.000 EDT [100] LOG:  checkpoint complete: wrote 1234 buffers \
+(7.5%); 0 WAL file(s) added, 0 removed, 1 recycled; write=26.913 s, sync=0.004 s, \
+total=27.000 s; sync files=10, longest=0.002 s, average=0.001 s
+2025-11-01 08:00:09.000 EDT [200] LOG:  process 200 still waiting for ShareLock \
+on transaction 5678 after 1000.123 ms
+2025-11-01 08:00:09.000 EDT [200] DETAIL:  Process holding the lock: 300.
+2025-11-01 08:00:09.000 EDT [200] STATEMENT:  UPDATE accounts SET x = 0 WHERE id = 1
+2025-11-01 08:00:11.000 EDT [200] LOG:  process 200 acquired ShareLock on \
+transaction 5678 after 3000.5 ms
+2025-11-01 08:00:11.000 EDT [200] STATEMENT:  UPDATE accounts SET x = 0 WHERE id = 1
+2025-11-01 08:00:12.000 EDT [200] LOG:  duration: 5000.000 ms  statement: \
+UPDATE accounts SET x = 0 WHERE id = 1
+2025-11-01 08:00:14.000 EDT [201] LOG:  temporary file: path \
+"base/pgsql_tmp/pgsql_tmp201.0", size 2147483648
+2025-11-01 08:00:14.500 EDT [201] LOG:  duration: 4000.000 ms  statement: \
+SELECT * FROM sales ORDER BY amount
+2025-11-01 08:00:40.000 EDT [300] LOG:  automatic vacuum of table \
+"shop.public.sales": index scans: 1
+\ttuples: 55 removed, 1000 remain, 0 are dead but not yet removable
+\tsystem usage: CPU: user: 0.10 s, system: 0.01 s, elapsed: 0.32 s
+"""
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "events.log"
+    path.write_text(LOG)
+    return str(path)
+
+
+def test_extract_typed_events(log_file):
+    events = extract_log_events(log_file)
+
+    assert events.temp_files.iloc[0]["size_bytes"] == 2147483648
+    assert events.temp_files.iloc[0]["pid"] == 201
+
+    assert list(events.lock_waits["state"]) == ["waiting", "acquired"]
+    assert events.lock_waits.iloc[1]["wait_ms"] == 3000.5
+    assert events.lock_waits.iloc[0]["statement"].startswith("UPDATE accounts")
+
+    checkpoint = events.checkpoints.iloc[0]
+    assert checkpoint["buffers_written"] == 1234
+    assert checkpoint["total_s"] == 27.0
+
+    vacuum = events.autovacuum.iloc[0]
+    assert vacuum["table"] == "shop.public.sales"
+    assert vacuum["elapsed_s"] == 0.32
+    assert vacuum["tuples_removed"] == 55
+
+
+def test_correlate_events_by_pid_and_window(log_file):
+    df = parse_postgres_log(log_file)
+    correlation = correlate_events(df, extract_log_events(log_file))
+
+    sort_fp = query_fingerprint("SELECT * FROM sales ORDER BY amount")
+    update_fp = query_fingerprint("UPDATE accounts SET x = 0 WHERE id = 1")
+
+    assert correlation.loc[sort_fp, "temp_bytes"] == 2147483648
+    assert correlation.loc[sort_fp, "checkpoint_overlaps"] == 1
+    assert correlation.loc[update_fp, "lock_waits"] == 1
+    assert correlation.loc[update_fp, "lock_wait_ms"] == 3000.5
+    assert correlation.loc[update_fp, "lock_wait_share"] == pytest.approx(0.6001)
+
+
+def test_separate_lock_waits_of_one_backend_are_counted(tmp_path):
+    waits = []
+    for minute, wait_ms in [(1, 2000.0), (5, 4000.0)]:
+        waits.append(f"""\
+2025-11-01 08:0{minute}:01.000 EDT [200] LOG:  process 200 still waiting for \
+ShareLock on transaction 5678 after 1000.000 ms
+2025-11-01 08:0{minute}:01.000 EDT [200] STATEMENT:  UPDATE accounts SET x = 0
+2025-11-01 08:0{minute}:03.000 EDT [200] LOG:  process 200 acquired ShareLock on \
+transaction 5678 after {wait_ms} ms
+2025-11-01 08:0{minute}:03.000 EDT [200] STATEMENT:  UPDATE accounts SET x = 0
+2025-11-01 08:0{minute}:04.000 EDT [200] LOG:  duration: 5000.000 ms  statement: \
+UPDATE accounts SET x = 0
+""")
+    path = tmp_path / "locks.log"
+    path.write_text("".join(waits))
+
+    correlation = correlate_events(
+        parse_postgres_log(str(path)), extract_log_events(str(path))
+    )
+
+    update_fp = query_fingerprint("UPDATE accounts SET x = 0")
+    assert correlation.loc[update_fp, "lock_waits"] == 2
+    assert correlation.loc[update_fp, "lock_wait_ms"] == 6000.0
+
+
+def test_missing_log_file():
+    with pytest.raises(FileNotFoundError):
+        extract_log_events("/nonexistent/postgresql.log")
@@ -0,0 +1,77 @@
+"""Tests for parameter value capture and heavy-hitter analysis."""
+
+import pandas as pd
+
+from iqtoolkit_analyzer.parameters import (
+    SpaceSaving,
+    analyze_parameter_values,
+    extract_query_values,
+)
+
+
+def test_extract_query_values_literals_and_binds():
+    values = extract_query_values(
+        "SELECT * FROM t WHERE a = 'x''y' AND id IN (1, 2, 3) AND b = 5 AND c = $1",
+        {"$1": "9"},
+    )
+    assert values == [
+        ("$1", "9"),
+        ("#1", "x'y"),
+        ("#2", "<3 values>"),
+        ("#3", "5"),
+    ]
+
+
+def test_space_saving_is_bounded_and_keeps_heavy_hitters():
+    summary = SpaceSaving(capacity=3)
+    for i in range(1000):
+        summary.add("hot" if i % 2 == 0 else f"cold-{i}", duration=1.0)
+
+    assert len(summary) == 3
+    top = summary.top(1)[0]
+    assert top.value == "hot"
+    assert top.count - top.error >= 500
+
+
+def test_parameter_skew_detection():
+    rows = []
+    for i in range(60):
+        tenant = i % 10
+        duration = 4000.0 if tenant == 7 else 40.0
+        rows.append((f"SELECT * FROM orders WHERE tenant_id = {tenant}", duration))
+    df = pd.DataFrame(rows, columns=["query", "duration_ms"])
+
+    report = analyze_parameter_values(df)
+
+    assert len(report.skews) == 1
+    skew = report.skews[0]
+    assert (skew.slot, skew.value, skew.count) == ("#1", "7", 6)
+    assert skew.slowdown == 100.0
+
+
+def test_uniform_values_report_no_skew():
+    df = pd.DataFrame(
+        {
+            "query": [f"SELECT * FROM t WHERE id = {i % 4}" for i in range(40)],
+            "duration_ms": [100.0] * 40,
+            "parameters": [None] * 40,
+        }
+    )
+    assert analyze_parameter_values(df).skews == []
+
+
+def test_skew_after_eviction_uses_guaranteed_count():
+    # Fill the summary with cold values, then let a slow value evict one:
+    # its inherited error must not dilute its average
+    rows = [(f"SELECT * FROM t WHERE id = {i % 2}", 10.0) for i in range(100)]
+    rows += [("SELECT * FROM t WHERE id = 9", 1000.0)] * 10
+    df = pd.DataFrame(rows, columns=["query", "duration_ms"])
+
+    report = analyze_parameter_values(df, capacity=2)
+
+    assert len(report.skews) == 1
+    skew = report.skews[0]
+    assert (skew.value, skew.count) == ("9", 10)
+    assert skew.share == 10 / 110
+    assert skew.avg_duration == 1000.0
+    assert skew.baseline_avg_duration == 10.0
@@ -1,3 +1,5 @@
+import pandas as pd
+
 from iqtoolkit_analyzer import parser
 
 
@@ -30,3 +32,64 @@ def test_unusual_characters(tmp_path):
     df = parser.parse_postgres_log(str(log_file))
     assert len(df) == 1
     assert "测试用户" in df.iloc[0]["query"]
+
+
+def test_log_line_prefix_dimensions(tmp_path):
+    log_content = (
+        "2025-10-28 10:15:30.123 UTC [12345]: [1-1] "
+        "user=billing,db=shop,app=invoicer,client=10.0.0.7 "
+        "LOG:  duration: 156.789 ms  statement: SELECT 1;\n"
+        "2025-10-28 10:16:30.123 UTC [777]: [1-1] user=[unknown],db=shop "
+        "LOG:  duration: 200.000 ms  statement: SELECT 2;\n"
+    )
+    log_file = tmp_path / "prefix.log"
+    log_file.write_text(log_content)
+    df = parser.parse_postgres_log(str(log_file))
+    first = df.iloc[0]
+    assert first["pid"] == 12345
+    assert first["user"] == "billing"
+    assert first["database"] == "shop"
+    assert first["application"] == "invoicer"
+    assert first["client"] == "10.0.0.7"
+    assert df.iloc[1]["pid"] == 777
+    assert pd.isna(df.iloc[1]["user"])
+
+
+def test_extended_protocol_bind_parameters(tmp_path):
+    log_content = (
+        "2025-10-28 10:15:30.123 UTC [1]: [1-1] user=api,db=shop "
+        "LOG:  duration: 15.500 ms  execute <unnamed>: "
+        "SELECT * FROM orders WHERE tenant_id = $1 AND note = $2\n"
+        "2025-10-28 10:15:30.123 UTC [1]: [2-1] user=api,db=shop "
+        "DETAIL:  parameters: $1 = '42', $2 = 'it''s'\n"
+        "2025-10-28 10:15:31.123 UTC [1]: [3-1] user=api,db=shop "
+        "LOG:  duration: 11.000 ms  execute S_1: SELECT $1\n"
+        "2025-10-28 10:15:31.123 UTC [1]: [4-1] user=api,db=shop "
+        "DETAIL:  parameters: $1 = NULL\n"
+        "2025-10-28 10:15:32.123 UTC [1]: [5-1] user=api,db=shop "
+        "LOG:  duration: 10.000 ms  statement: SELECT 1\n"
+    )
+    log_file = tmp_path / "bind.log"
+    log_file.write_text(log_content)
+    df = parser.parse_postgres_log(str(log_file))
+    assert len(df) == 3
+    assert df.iloc[0]["query"].endswith("note = $2")
+    assert df.iloc[0]["parameters"] == {"$1": "42", "$2": "it's"}
+    assert df.iloc[1]["parameters"] == {"$1": None}
+    assert df.iloc[2]["parameters"] is None
+
+
+def test_find_log_markers_across_chunks(tmp_path):
+    log_file = tmp_path / "events.log"
+    log_file.write_text(
+        "2025-10-28 10:15:30.123 UTC [1]: LOG:  duration: 15.500 ms  "
+        "statement: SELECT 1\n"
+        "2025-10-28 10:15:31.123 UTC [1]: LOG:  checkpoint complete: wrote 3 "
+        "buffers\n"
+    )
+    markers = ["checkpoint complete:", "temporary file:", "plan:"]
+
+    # Small chunks split the marker across reads
+    found = parser.find_log_markers(str(log_file), markers, chunk_size=7)
+    assert found == {"checkpoint complete:"}
+    assert parser.find_log_markers(str(log_file), []) == set()
@@ -0,0 +1,149 @@
+"""Tests for pg_stat_statements snapshots, deltas and the log merge."""
+
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock, patch
+
+import pandas as pd
+import pytest
+
+from iqtoolkit_analyzer.analyzer import query_fingerprint
+from iqtoolkit_analyzer.pg_stat_statements import (
+    fetch_statements_snapshot,
+    load_statements_snapshot,
+    merge_with_log,
+    snapshot_workload,
+    statement_deltas,
+    statement_key,
+)
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+ORDERS = "SELECT * FROM orders WHERE customer_id = $1 AND status = $2"
+ITEMS = "SELECT * FROM items WHERE id = $1"
+RESET = "UPDATE stock SET qty = qty - $1 WHERE id = $2"
+
+BEFORE_CSV = f"""\
+captured_at,userid,dbid,queryid,query,calls,total_exec_time,total_plan_time,rows
+2025-11-02 10:00:00+00,10,5,101,"{ORDERS}",10,5000.0,10.0,10
+2025-11-02 10:00:00+00,10,5,102,"{ITEMS}",1000,200.0,0.0,1000
+2025-11-02 10:00:00+00,10,5,103,"{RESET}",500,100.0,0.0,500
+"""
+AFTER_COLUMNS = ["queryid", "query", "calls", "total_exec_time", "total_plan_time"]
+AFTER_ROWS = [
+    dict(zip(AFTER_COLUMNS, values), userid=10, dbid=5)
+    for values in [
+        (101, ORDERS, 13, 8000.0, 10.0),
+        (102, ITEMS, 51000, 10200.0, 0.0),
+        (103, RESET, 20, 40.0, 0.0),
+        (104, "SELECT $1", 7, 1.0, 0.0),
+    ]
+]
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    (tmp_path / "before.csv").write_text(BEFORE_CSV)
+    (tmp_path / "after.json").write_text(
+        json.dumps({"captured_at": "2025-11-02T11:00:00Z", "statements": AFTER_ROWS})
+    )
+    # Given out of order; sorted by capture time
+    return [
+        load_statements_snapshot(str(tmp_path / "after.json")),
+        load_statements_snapshot(str(tmp_path / "before.csv")),
+    ]
+
+
+def test_statement_key_matches_logged_statements():
+    logged = "SELECT * FROM orders WHERE customer_id = 42 AND status = 'open';"
+    assert statement_key(ORDERS) == statement_key(logged)
+    assert statement_key("SELECT 1 WHERE id IN ($1, $2, $3)") == statement_key(
+        "select 1 where id in (7, 8)"
+    )
+    assert statement_key(ORDERS) != statement_key(ITEMS)
+
+
+def test_statement_deltas_handle_new_and_reset_entries(snapshots):
+    after, before = snapshots
+    assert before.captured_at.hour == 10 and after.captured_at.hour == 11
+
+    deltas = statement_deltas(before, after).set_index("queryid")
+
+    assert deltas.loc[102, "calls"] == 50000
+    assert deltas.loc[102, "total_ms"] == pytest.approx(10000.0)
+    # Planning time counts toward the total
+    assert deltas.loc[101, "total_ms"] == pytest.approx(3000.0)
+    # Calls went down: reset in between, the later counters stand
+    assert deltas.loc[103, "calls"] == 20
+    assert deltas.loc[104, "calls"] == 7
+    assert list(deltas.index[:2]) == [102, 101]
+
+
+def test_merge_with_log_adds_hidden_time(snapshots):
+    logged = "SELECT * FROM orders WHERE customer_id = 42 AND status = 'open';"
+    log_df = pd.DataFrame(
+        {
+            "query": [logged, logged, "VACUUM ANALYZE orders"],
+            "duration_ms": [1200.0, 1300.0, 900.0],
+        }
+    )
+
+    workload = merge_with_log(snapshot_workload(snapshots), log_df, snapshots)
+
+    top = workload.statements.iloc[0]
+    assert top["query"] == ITEMS and top["logged_calls"] == 0
+    assert top["hidden_ms"] == pytest.approx(10000.0)
+    orders = workload.statements[workload.statements["query"] == ORDERS].iloc[0]
+    assert orders["source"] == "both"
+    assert orders["query_hash"] == query_fingerprint(logged)
+    assert orders["hidden_ms"] == pytest.approx(500.0)
+    # Statements only in the log keep their logged time
+    assert "log" in set(workload.statements["source"])
+    assert workload.total_ms == pytest.approx(10000 + 3000 + 40 + 1 + 900)
+    assert workload.logged_share == pytest.approx(3400 / 13941)
+
+    section = ReportGenerator(Mock())._generate_workload_section(workload)
+    assert "### Workload Including Fast Queries" in section
+    assert "between 2025-11-02 10:00 and 2025-11-02 11:00" in section
+
+
+def test_csv_baseline_diffs_against_live_snapshot(tmp_path):
+    queryid = -7212475394939312845
+    (tmp_path / "before.csv").write_text(
+        "userid,dbid,queryid,toplevel,query,calls,total_exec_time\n"
+        f'10,5,{queryid},t,"{ITEMS}",100,50.0\n'
+        f'10,5,{queryid},f,"{ITEMS}",40,20.0\n'
+    )
+    columns = ["captured_at", "userid", "dbid", "queryid", "toplevel"]
+    columns += ["query", "calls", "total_exec_time"]
+    now = datetime(2025, 11, 2, 11, tzinfo=timezone.utc)
+    cursor = MagicMock()
+    cursor.description = [SimpleNamespace(name=name) for name in columns]
+    cursor.fetchall.return_value = [
+        (now, 10, 5, queryid, True, ITEMS, 150, 80.0),
+        (now, 10, 5, queryid, False, ITEMS, 40, 20.0),
+    ]
+    psycopg = MagicMock()
+    connection = psycopg.connect.return_value.__enter__.return_value
+    connection.cursor.return_value.__enter__.return_value = cursor
+
+    with patch.dict("sys.modules", {"psycopg": psycopg}):
+        live = fetch_statements_snapshot("dbname=shop")
+    deltas = statement_deltas(
+        load_statements_snapshot(str(tmp_path / "before.csv")), live
+    )
+
+    # Only the top-level entry ran in between
+    assert len(deltas) == 1
+    assert deltas.loc[0, "queryid"] == queryid and deltas.loc[0, "toplevel"]
+    assert deltas.loc[0, "calls"] == 50
+    assert deltas.loc[0, "total_ms"] == pytest.approx(30.0)
+
+
+def test_load_statements_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "other.csv"
+    path.write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError, match="not a pg_stat_statements export"):
+        load_statements_snapshot(str(path))
+    with pytest.raises(FileNotFoundError):
+        load_statements_snapshot(str(tmp_path / "missing.csv"))
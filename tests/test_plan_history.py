@@ -0,0 +1,107 @@
+"""Tests for plan hashing, plan-flip detection and the history store."""
+
+import sqlite3
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from iqtoolkit_analyzer.explain_parser import parse_explain
+from iqtoolkit_analyzer.history_store import HistoryStore
+from iqtoolkit_analyzer.plan_history import PlanHistory, plan_hash, track_plans
+from iqtoolkit_analyzer.report_generator import ReportGenerator
+
+SEQ_PLAN = """\
+Query Text: SELECT * FROM sales WHERE sale_date >= '{day}'
+Sort  (cost=1.00..{cost}.00 rows={rows} width=8) \
+(actual time=0.100..10.000 rows=5 loops=1)
+  ->  Seq Scan on sales  (cost=0.00..1.00 rows={rows} width=8) \
+(actual time=0.010..9.000 rows=5 loops=1)
+"""
+INDEX_PLAN = """\
+Query Text: SELECT * FROM sales WHERE sale_date >= '2025-01-01'
+Sort  (cost=1.00..2.00 rows=5 width=8) (actual time=0.100..1.000 rows=5 loops=1)
+  ->  Index Scan using idx_sales_day on sales  (cost=0.00..1.00 rows=5 width=8) \
+(actual time=0.010..0.900 rows=5 loops=1)
+"""
+
+
+def _plan(text, timestamp, duration_ms):
+    plan = parse_explain(text)
+    plan.timestamp = datetime.fromisoformat(timestamp)
+    plan.duration_ms = duration_ms
+    return plan
+
+
+def _seq(timestamp, duration_ms, day="2025-01-01", rows=5, cost=2):
+    return _plan(SEQ_PLAN.format(day=day, rows=rows, cost=cost), timestamp, duration_ms)
+
+
+def test_plan_hash_ignores_costs_and_rows():
+    seq = parse_explain(SEQ_PLAN.format(day="2025-01-01", rows=5, cost=2)).root
+    other = parse_explain(SEQ_PLAN.format(day="2025-02-01", rows=900, cost=70)).root
+    index = parse_explain(INDEX_PLAN).root
+
+    assert plan_hash(seq) == plan_hash(other)
+    assert plan_hash(seq) != plan_hash(index)
+
+
+def test_track_plans_buckets_and_flips():
+    history = track_plans(
+        [
+            _seq("2025-11-02 10:05:00", 100.0),
+            _seq("2025-11-02 10:55:00", 120.0, day="2025-03-01", rows=40),
+            _plan(INDEX_PLAN, "2025-11-02 11:10:00", 10.0),
+            _plan(INDEX_PLAN, "2025-11-02 11:20:00", 12.0),
+            _plan(INDEX_PLAN, "2025-11-02 12:20:00", 11.0),
+        ]
+    )
+
+    assert len(history.buckets) == 3
+    (flip,) = history.flips()
+    seq, index = flip.plans
+    assert "Seq Scan on sales" in seq.shape
+    assert (seq.executions, index.executions) == (2, 3)
+    assert index.first_seen == datetime(2025, 11, 2, 11, 10)
+    assert flip.slowdown == pytest.approx(110.0 / 11.0)
+    # Histogram percentiles are clamped to the observed range
+    assert seq.percentile(50) == pytest.approx(110.0, rel=0.15)
+    assert seq.percentile(100) == 120.0
+
+    section = ReportGenerator(Mock())._generate_plan_flips_section([flip])
+    assert "## Plan Changes" in section
+    assert "**10.0×**" in section
+
+    with pytest.raises(ValueError):
+        PlanHistory(bucket_minutes=7)
+
+
+def test_history_store_round_trip_is_idempotent(tmp_path):
+    path = str(tmp_path / "history" / "iqtoolkit.db")
+    first_run = track_plans([_seq("2025-11-01 09:00:00", 100.0)])
+    second_run = track_plans([_plan(INDEX_PLAN, "2025-11-02 09:00:00", 10.0)])
+
+    with HistoryStore(path) as store:
+        store.save_plan_history(first_run)
+        store.save_plan_history(first_run)
+        store.save_plan_history(second_run)
+        loaded = store.load_plan_history(second_run.fingerprints)
+        assert store.load_plan_history([]).buckets == {}
+
+    # The flip only shows up across the two runs
+    assert second_run.flips() == []
+    (flip,) = loaded.flips()
+    assert [plan.executions for plan in flip.plans] == [1, 1]
+    assert flip.query.startswith("SELECT * FROM sales")
+    assert flip.plans[0].percentile(95) == 100.0
+    assert loaded.buckets.keys() == first_run.buckets.keys() | second_run.buckets.keys()
+
+
+def test_history_store_rejects_newer_schema(tmp_path):
+    path = tmp_path / "future.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA user_version = 99")
+    conn.close()
+
+    with pytest.raises(ValueError, match="schema version 99"):
+        HistoryStore(str(path))
@@ -0,0 +1,82 @@
+"""Tests for token-budgeted prompt compaction."""
+
+from unittest.mock import patch
+
+from iqtoolkit_analyzer.llm_client import LLMClient, LLMConfig
+from iqtoolkit_analyzer.prompt_compactor import (
+    collapse_literal_lists,
+    compact_query,
+    count_tokens,
+    trim_projection,
+)
+
+WIDE_QUERY = (
+    "SELECT o.id, o.a1, o.a2, o.a3, o.a4, o.a5, o.a6, o.note, o.status, "
+    "COALESCE(o.total, 0) AS total FROM orders o "
+    "WHERE o.status = 'open' ORDER BY total"
+)
+
+
+def test_count_tokens_approximates_words_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("SELECT id FROM t") == 5
+    # Long identifiers take several tokens, punctuation one each
+    assert count_tokens("customer_lifetime_value(x)") == 9
+
+
+def test_collapse_literal_lists():
+    ids = ", ".join(str(i) for i in range(1000))
+    rows = ", ".join(f"({i}, 'a,b')" for i in range(50))
+
+    collapsed = collapse_literal_lists(
+        f"SELECT * FROM t WHERE id IN ({ids}) AND tag = ANY(ARRAY['x', 'y'])"
+    )
+    assert "IN (0, 1, 2 /* +997 more */)" in collapsed
+    assert "ARRAY['x', 'y']" in collapsed
+    assert collapse_literal_lists(f"INSERT INTO t VALUES {rows}") == (
+        "INSERT INTO t VALUES (0, 'a,b'), (1, 'a,b'), (2, 'a,b') /* +47 more */"
+    )
+
+
+def test_trim_projection_keeps_columns_used_elsewhere():
+    trimmed = trim_projection(WIDE_QUERY)
+
+    assert trimmed.startswith("SELECT o.id, o.a1, o.a2, o.a3, o.a4, o.status, ")
+    # Aliases used in ORDER BY are kept, unused columns dropped
+    assert "COALESCE(o.total, 0) AS total /* 3 columns */ FROM orders" in trimmed
+    assert trim_projection("SELECT * FROM t") == "SELECT * FROM t"
+
+
+def test_compact_query_fits_budget_least_lossy_first():
+    ids = ", ".join(str(100000 + i) for i in range(10000))
+    query = f"SELECT * FROM events\nWHERE user_id IN ({ids}) AND kind = 'click'"
+
+    short = compact_query(query, max_tokens=200)
+    assert short.original_tokens > 10000
+    assert short.tokens <= 200
+    assert short.steps == ["collapsed literal lists"]
+    assert "kind = 'click'" in short.text
+
+    # Without a useful step the text is truncated
+    truncated = compact_query("SELECT " + "x" * 4000, max_tokens=50)
+    assert truncated.steps[-1] == "truncated" and truncated.tokens <= 50
+    assert not compact_query("SELECT 1", max_tokens=50).compacted
+
+
+@patch("iqtoolkit_analyzer.llm_client.ollama")
+def test_prompt_is_compacted_and_carries_findings(mock_ollama):
+    client = LLMClient(LLMConfig(llm_provider="ollama", max_prompt_tokens=400))
+    ids = ", ".join(str(i) for i in range(5000))
+
+    prompt = client._build_prompt(
+        f"SELECT * FROM t WHERE id IN ({ids})",
+        120.0,
+        3,
+        None,
+        None,
+        ["Large In Clause: IN list with 5000 values"],
+    )
+
+    assert count_tokens(prompt) <= 400
+    assert "(Shortened to fit this prompt: collapsed literal lists)" in prompt
+    assert "- Large In Clause: IN list with 5000 values" in prompt
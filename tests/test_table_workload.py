@@ -0,0 +1,84 @@
+"""Tests for the SQL lexer and per-relation workload aggregation."""
+
+import pandas as pd
+import pytest
+
+from iqtoolkit_analyzer.sql_lexer import TokenType, analyze_statement, tokenize
+from iqtoolkit_analyzer.table_workload import aggregate_by_relation
+
+
+def test_tokenize_handles_strings_comments_and_dollar_quotes():
+    tokens = tokenize(
+        "SELECT 'it''s -- not a comment', $$body$$ -- trailing\nFROM \"Odd\"\"Name\""
+    )
+    types = [t.type for t in tokens]
+    assert types == [
+        TokenType.WORD,
+        TokenType.STRING,
+        TokenType.PUNCT,
+        TokenType.STRING,
+        TokenType.WORD,
+        TokenType.QUOTED_IDENT,
+    ]
+
+
+def test_analyze_statement_relations_and_access():
+    info = analyze_statement(
+        "WITH recent AS (SELECT * FROM events) "
+        "INSERT INTO audit_log (id) SELECT id FROM recent JOIN events e ON true"
+    )
+    assert info.statement_type == "INSERT"
+    assert info.relations == {"audit_log": "write", "events": "read"}
+
+    info = analyze_statement("UPDATE public.orders SET status = ? FROM customers c")
+    assert info.written_relations == ["public.orders"]
+    assert info.read_relations == ["customers"]
+
+    info = analyze_statement("SELECT * FROM a, b WHERE a.id = b.id FOR UPDATE")
+    assert info.relations == {"a": "read", "b": "read"}
+
+    info = analyze_statement("TRUNCATE TABLE foo, bar")
+    assert info.relations == {"foo": "write", "bar": "write"}
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT extract(year FROM created_at) FROM orders",
+        "SELECT EXTRACT(EPOCH FROM (now() - o.created_at)) FROM orders o",
+        "SELECT trim(both ' ' FROM name) FROM orders",
+        "SELECT substring(code FROM 1 FOR 3) FROM orders WHERE id = ?",
+    ],
+)
+def test_from_inside_function_call_is_not_a_relation(sql):
+    assert analyze_statement(sql).relations == {"orders": "read"}
+
+
+def test_from_inside_subquery_parens_is_a_relation():
+    info = analyze_statement(
+        "SELECT coalesce((SELECT max(a) FROM w), 0) FROM t "
+        "WHERE id IN (SELECT id FROM u) AND exists(SELECT 1 FROM v)"
+    )
+    assert info.relations == {"w": "read", "t": "read", "u": "read", "v": "read"}
+
+
+def test_aggregate_by_relation_rolls_up_time():
+    queries = pd.DataFrame(
+        {
+            "normalized_query": [
+                "select * from orders o join customers c on o.cid = c.id",
+                "update orders set status = ?",
+                "select now()",
+            ],
+            "total_duration": [1000.0, 500.0, 10.0],
+            "frequency": [10, 5, 1],
+        }
+    )
+    hot = aggregate_by_relation(queries)
+
+    assert list(hot["relation"]) == ["orders", "customers"]
+    orders = hot.iloc[0]
+    assert orders["total_duration"] == 1500.0
+    assert orders["reads"] == 10 and orders["writes"] == 5
+    assert orders["select"] == 10 and orders["update"] == 5
+    assert orders["top_statements"][0][1] == 1000.0